@@ -0,0 +1,94 @@
+"""
+Проверяет, что время до первой отрисовки истории транзакций и объем памяти
+окна не зависят от размера истории (от 1 тыс. до 1 млн строк).
+
+Если доступен дисплей, страницы вставляются в настоящий `ttk.Treeview`,
+иначе измеряются только выборка и окно страниц.
+
+Запуск:
+    python benchmarks/bench_history.py --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pfa_categories import ensure_category  # noqa: E402
+from pfa_db import Database  # noqa: E402
+from pfa_schema import migrate  # noqa: E402
+from pfa_history import HistoryWindow, TransactionPager, VirtualTransactionsView  # noqa: E402
+
+
+def fill(db, count):
+    with db.transaction() as conn:
+        category_id = ensure_category(conn, 1, "Продукты", "Расход")
+        conn.executemany(
+            "INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (?, ?, ?, ?, ?)",
+            ((1, category_id, i % 5000, f"20{i % 20 + 5:02d}-{i % 12 + 1:02d}-{i % 28 + 1:02d} 10:00:00",
+              "Расход") for i in range(count)),
+        )
+
+
+def open_tk():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        return root
+    except Exception:
+        return None
+
+
+def measure(db, root, scrolls):
+    tracemalloc.start()
+    start = time.perf_counter()
+    if root is not None:
+        view = VirtualTransactionsView(root, db, 1)
+        view.refresh()
+        root.update_idletasks()
+        window = view.window
+    else:
+        window = HistoryWindow(TransactionPager(db, 1))
+        window.reset()
+    first_paint = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(scrolls):
+        if root is not None:
+            view._load_next()
+        else:
+            window.scroll_down()
+    scroll = (time.perf_counter() - start) / max(scrolls, 1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    materialized = len(view.tree.get_children()) if root is not None else len(window.rows)
+    return first_paint * 1000, scroll * 1000, peak / 1024, materialized
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--scrolls", type=int, default=20)
+    args = parser.parse_args()
+
+    root = open_tk()
+    print(f"Treeview: {'да' if root is not None else 'нет (нет дисплея)'}")
+    print(f"{'rows':>9} {'first paint, ms':>16} {'page load, ms':>14} {'peak, KiB':>10} {'items':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        migrate(db)
+        filled = 0
+        for size in sorted(args.sizes):
+            fill(db, size - filled)
+            filled = size
+            first_paint, scroll, peak, items = measure(db, root, args.scrolls)
+            print(f"{size:>9} {first_paint:>16.2f} {scroll:>14.2f} {peak:>10.0f} {items:>6}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Замеряет горячие пути приложения на синтетических данных разного объема
+и сохраняет результаты в JSON для сравнения версий.
+
+Для каждого масштаба создается отдельная база, заполненная `pfa_seed.seed`
+(одинаковые данные при одинаковом `--seed`). Замеряются операции, которые
+выполняют обработчики интерфейса:
+
+- update_balance: итоги пользователя (`FinanceService.balance`);
+- generate_chart: суммы по категориям без кэша (`pfa_analytics.category_totals`);
+- generate_chart_cached: те же суммы через кэш по версии данных;
+- update_transactions_list: первая страница истории (`HistoryWindow.reload`);
+- history_filter_category, history_sort_amount, history_sort_category: первая
+  страница истории с фильтром по типу и категории, с сортировкой по сумме и
+  с сортировкой по имени категории;
+- update_goals_list: цели пользователя (`FinanceService.list_goals`);
+- check_reminders: загрузка очереди напоминаний и перевод просроченных в "expired";
+- update_goal_progress: доход с распределением по целям (`FinanceService.add_transaction`);
+- trend_month, trend_week: тренд расходов за всю историю по сводкам (`pfa_rollups.trend`);
+- goal_forecast: прогноз дат достижения целей без кэша (`pfa_forecast`);
+- goal_forecast_cached: тот же прогноз через кэш по версии данных (`FinanceService.goal_forecast`).
+
+Запуск:
+    python benchmarks/bench_hot_paths.py --scales 10000 100000 1000000 --output results.json
+    python benchmarks/bench_hot_paths.py --compare results.json --output new.json
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pfa_db import Database  # noqa: E402
+from pfa_schema import migrate  # noqa: E402
+from pfa_seed import seed  # noqa: E402
+from pfa_service import FinanceService  # noqa: E402
+from pfa_analytics import category_totals  # noqa: E402
+from pfa_history import HistoryFilter, HistoryWindow, TransactionPager  # noqa: E402
+from pfa_reminders import ReminderScheduler  # noqa: E402
+from pfa_rollups import trend  # noqa: E402
+from pfa_forecast import ForecastCache  # noqa: E402
+
+# Во сколько раз медиана может вырасти относительно базового прогона.
+REGRESSION_THRESHOLD = 1.25
+
+
+def hot_paths(db, service, user_id):
+    """
+    Возвращает замеряемые операции для пользователя `user_id`.
+    """
+    def check_reminders():
+        ReminderScheduler(service, user_id, after=lambda delay, func: None, after_cancel=lambda timer: None).start()
+        service.expire_reminders(user_id)
+
+    return {
+        "update_balance": lambda: service.balance(user_id),
+        "generate_chart": lambda: category_totals(db, user_id, "Расход"),
+        "generate_chart_cached": lambda: service.category_totals(user_id, "Расход"),
+        "update_transactions_list": lambda: HistoryWindow(TransactionPager(db, user_id)).reload(),
+        "history_filter_category": lambda: TransactionPager(
+            db, user_id, filters=HistoryFilter(transaction_type="Расход", category="Такси")).first_page(),
+        "history_sort_amount": lambda: TransactionPager(db, user_id, sort="amount").first_page(),
+        "history_sort_category": lambda: TransactionPager(db, user_id, sort="category").first_page(),
+        "update_goals_list": lambda: service.list_goals(user_id),
+        "check_reminders": check_reminders,
+        "update_goal_progress": lambda: service.add_transaction(user_id, "Зарплата", 1000, "Доход"),
+        "trend_month": lambda: trend(db, user_id, "Расход", "month"),
+        "trend_week": lambda: trend(db, user_id, "Расход", "week"),
+        "goal_forecast": lambda: ForecastCache(db).completion_dates(
+            user_id, service.list_goals(user_id), "fill_first", service.clock().date()),
+        "goal_forecast_cached": lambda: service.goal_forecast(user_id),
+    }
+
+
+def measure(func, repeat, warmup):
+    """
+    Returns:
+        dict: Статистика времени выполнения, мс.
+    """
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "min_ms": timings[0],
+        "median_ms": timings[len(timings) // 2],
+        "p95_ms": timings[max(int(len(timings) * 0.95) - 1, 0)],
+        "mean_ms": sum(timings) / len(timings),
+    }
+
+
+def run_scale(tmp, scale, args):
+    """
+    Заполняет базу для одного масштаба и замеряет все операции.
+
+    Returns:
+        list: Записи результатов.
+    """
+    db = Database(os.path.join(tmp, f"bench-{scale}.db"))
+    try:
+        migrate(db)
+        start = time.perf_counter()
+        report = seed(db, users=args.users, transactions=scale, goals=args.goals,
+                      reminders=args.reminders, seed=args.seed, days=args.days)
+        seeded = time.perf_counter() - start
+        print(f"scale={scale}: данные созданы за {seeded:.1f} с", file=sys.stderr)
+        service = FinanceService(db)
+        user_id = report.user_ids[0]
+        user_transactions = db.fetchone("SELECT COUNT(*) FROM transactions WHERE user_id = ?", (user_id,))[0]
+        results = []
+        for name, func in hot_paths(db, service, user_id).items():
+            if args.only and name not in args.only:
+                continue
+            stats = measure(func, args.repeat, args.warmup)
+            results.append({
+                "name": name,
+                "scale": scale,
+                "users": args.users,
+                "user_transactions": user_transactions,
+                "repeat": args.repeat,
+                **stats,
+            })
+            print(f"{name:>26} {scale:>9} {stats['median_ms']:>10.3f} {stats['p95_ms']:>10.3f}")
+        return results
+    finally:
+        db.close()
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(baseline, results, threshold):
+    """
+    Сравнивает медианы с базовым прогоном.
+
+    Returns:
+        list: Ключи (операция, масштаб), медиана которых выросла больше чем в `threshold` раз.
+    """
+    previous = {(item["name"], item["scale"]): item for item in baseline["results"]}
+    regressions = []
+    print(f"\nСравнение с {baseline['meta'].get('revision') or 'базовым прогоном'}:")
+    for item in results:
+        key = (item["name"], item["scale"])
+        if key not in previous:
+            continue
+        ratio = item["median_ms"] / max(previous[key]["median_ms"], 1e-9)
+        mark = ""
+        if ratio > threshold:
+            regressions.append(key)
+            mark = "  РЕГРЕССИЯ"
+        print(f"{key[0]:>26} {key[1]:>9} {previous[key]['median_ms']:>10.3f} -> {item['median_ms']:>10.3f}"
+              f" (x{ratio:.2f}){mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10000, 100000],
+                        help="общее число транзакций в базе")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--goals", type=int, default=5, help="целей на пользователя")
+    parser.add_argument("--reminders", type=int, default=20, help="напоминаний на пользователя")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=3 * 365, help="глубина истории транзакций в днях")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="замерять только перечисленные операции")
+    parser.add_argument("--output", default="bench_hot_paths.json", help="файл результатов JSON")
+    parser.add_argument("--compare", help="результаты предыдущего прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    print(f"{'operation':>26} {'scale':>9} {'median, ms':>10} {'p95, ms':>10}")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            results.extend(run_scale(tmp, scale, args))
+
+    document = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "params": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+    print(f"Результаты сохранены в {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
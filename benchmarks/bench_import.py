@@ -0,0 +1,60 @@
+"""
+Замеряет потоковый импорт CSV-выписки: скорость вставки и пиковую память.
+
+Рост RSS ограничен кэшем страниц и mmap SQLite (см. `pfa_db.PRAGMAS`)
+и не зависит от размера файла.
+
+Запуск:
+    python benchmarks/bench_import.py --rows 1000000 --batch-size 10000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import resource
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pfa_db import Database  # noqa: E402
+from pfa_schema import migrate  # noqa: E402
+from pfa_import import import_file  # noqa: E402
+
+
+def write_statement(path, rows):
+    rnd = random.Random(42)
+    categories = ["Продукты", "Одежда", "Такси", "Зарплата", "Переводы"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("date,category,amount\n")
+        for i in range(rows):
+            amount = rnd.randint(-5000, 5000) or 1
+            f.write(f"{2015 + i % 10}-{i % 12 + 1:02d}-{i % 28 + 1:02d},{rnd.choice(categories)},{amount}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "statement.csv")
+        write_statement(path, args.rows)
+        db = Database(os.path.join(tmp, "bench.db"))
+        migrate(db)
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        report = import_file(db, 1, path, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+        rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+        db.close()
+
+    print(f"rows={args.rows} batch_size={args.batch_size}")
+    print(f"imported={report.imported} failed={report.failed}")
+    print(f"time {elapsed:.2f} s, {report.imported / elapsed:,.0f} rows/s, peak RSS growth {rss_growth / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
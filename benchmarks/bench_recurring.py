@@ -0,0 +1,76 @@
+"""
+Замеряет догоняющий запуск повторяющихся транзакций: тысячи правил за
+несколько лет создаются одной транзакцией записи, повторный запуск ничего
+не создает.
+
+Запуск:
+    python benchmarks/bench_recurring.py --users 100 --rules 5000 --years 3
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pfa_db import Database  # noqa: E402
+from pfa_schema import migrate  # noqa: E402
+from pfa_recurring import DATE_FORMAT, FREQUENCIES, generate_due  # noqa: E402
+
+
+def add_rules(db, users, rules, start):
+    rnd = random.Random(42)
+    with db.transaction() as conn:
+        conn.executemany("INSERT INTO users (login, password) VALUES (?, 'password123')",
+                         [(f"user{number}",) for number in range(users)])
+        conn.execute('''
+            INSERT INTO goals (user_id, title, target_amount, current_amount, creation_date, target_date)
+            SELECT id, 'Отпуск', 10000000, 0, '2020-01-01', '2030-12-31' FROM users
+        ''')
+        categories = conn.execute("SELECT id, user_id FROM categories").fetchall()
+        values = []
+        for _ in range(rules):
+            category_id, user_id = rnd.choice(categories)
+            moment = (start + timedelta(days=rnd.randrange(365), hours=rnd.randrange(24))).strftime(DATE_FORMAT)
+            values.append((user_id, category_id, rnd.randint(100, 500000), rnd.choice(("Доход", "Расход")),
+                           rnd.choice(FREQUENCIES), rnd.randint(1, 3), moment, moment))
+        conn.executemany('''
+            INSERT INTO recurring_rules (user_id, category_id, amount, type, frequency, interval, start_date,
+                                         next_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--years", type=int, default=3)
+    args = parser.parse_args()
+
+    now = datetime(2025, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        migrate(db)
+        add_rules(db, args.users, args.rules, now.replace(year=now.year - args.years))
+
+        start = time.perf_counter()
+        report = generate_due(db, now)
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        again = generate_due(db, now)
+        repeat = time.perf_counter() - start
+        db.close()
+
+    print(f"users={args.users} rules={args.rules} years={args.years}")
+    print(f"catch-up: created={report.created} completed_goals={len(report.completed_goals)} "
+          f"time {elapsed:.2f} s, {report.created / elapsed:,.0f} rows/s")
+    print(f"repeat: created={again.created} time {repeat * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Сравнивает задержку обновления вкладок при подключении на каждый запрос
+и при общем долгоживущем подключении `pfa_db.Database`.
+
+Запуск:
+    python benchmarks/bench_refresh.py --transactions 200000 --repeat 50
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pfa_db import Database  # noqa: E402
+
+REFRESH_QUERIES = (
+    '''SELECT SUM(CASE WHEN type = "Доход" THEN amount ELSE 0 END),
+              SUM(CASE WHEN type = "Расход" THEN amount ELSE 0 END)
+       FROM transactions WHERE user_id = ?''',
+    "SELECT category, amount, type, date FROM transactions WHERE user_id = ?",
+    "SELECT id, title, target_amount, current_amount, target_date FROM goals WHERE user_id = ?",
+    "SELECT title, date, time, description_reminder FROM reminders WHERE user_id = ?",
+)
+
+
+def fill(path, transactions, users):
+    """
+    Создает тестовую базу с заданным числом транзакций.
+    """
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE transactions (id INTEGER PRIMARY KEY, user_id INTEGER, category TEXT,
+                                   amount REAL, date TEXT, type TEXT);
+        CREATE TABLE goals (id INTEGER PRIMARY KEY, user_id INTEGER, title TEXT, target_amount REAL,
+                            current_amount REAL, target_date TEXT);
+        CREATE TABLE reminders (id INTEGER PRIMARY KEY, user_id INTEGER, title TEXT, date TEXT,
+                                time TEXT, description_reminder TEXT);
+    ''')
+    rnd = random.Random(42)
+    conn.executemany(
+        "INSERT INTO transactions (user_id, category, amount, date, type) VALUES (?, ?, ?, ?, ?)",
+        ((rnd.randint(1, users), rnd.choice(["Продукты", "Такси", "Зарплата"]), rnd.randint(1, 5000),
+          "2024-01-01 12:00:00", rnd.choice(["Доход", "Расход"])) for _ in range(transactions)),
+    )
+    conn.executemany(
+        "INSERT INTO goals (user_id, title, target_amount, current_amount, target_date) VALUES (?, ?, ?, ?, ?)",
+        ((u, "Цель", 10000, 0, "2030-01-01") for u in range(1, users + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def refresh_connect_per_call(path, user_id):
+    for sql in REFRESH_QUERIES:
+        conn = sqlite3.connect(path)
+        conn.execute(sql, (user_id,)).fetchall()
+        conn.close()
+
+
+def refresh_shared(db, user_id):
+    for sql in REFRESH_QUERIES:
+        db.fetchall(sql, (user_id,))
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.95) - 1] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        fill(path, args.transactions, args.users)
+        db = Database(path)
+
+        before = measure(lambda: refresh_connect_per_call(path, 1), args.repeat)
+        after = measure(lambda: refresh_shared(db, 1), args.repeat)
+        db.close()
+
+    print(f"transactions={args.transactions} users={args.users} repeat={args.repeat}")
+    print(f"connect-per-call: median {before[0]:.2f} ms, p95 {before[1]:.2f} ms")
+    print(f"shared Database:  median {after[0]:.2f} ms, p95 {after[1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Проверяет, что полнотекстовый поиск (`pfa_search.search`) укладывается в
+бюджет времени на большой истории транзакций.
+
+База заполняется `pfa_seed.seed` (по умолчанию один пользователь с миллионом
+транзакций — худший случай: под частый запрос попадают сотни тысяч
+транзакций). Для каждого запроса из `QUERIES` печатаются медиана, p95 и
+максимум времени по `--repeat` повторам. Код завершения 1, если p95
+какого-либо запроса превышает `--budget` мс.
+
+Запуск:
+    python benchmarks/bench_search.py --transactions 1000000
+    python benchmarks/bench_search.py --db bench.db --budget 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pfa_db import Database  # noqa: E402
+from pfa_schema import migrate  # noqa: E402
+from pfa_search import search  # noqa: E402
+from pfa_seed import seed  # noqa: E402
+
+# Частые категории, префиксы из одной-двух букв, цели и напоминания
+# (в том числе из нескольких слов) и запрос без совпадений.
+QUERIES = ("Такси", "прод", "п", "за", "Цель 3", "напоминание", "напоминание 4", "велосипед")
+
+
+def measure(db, user_id, query, repeat):
+    """
+    Returns:
+        tuple: Число результатов и времена выполнения, мс.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hits = search(db, user_id, query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return len(hits), sorted(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="готовая база (по умолчанию временная, заполненная pfa_seed)")
+    parser.add_argument("--users", type=int, default=1, help="пользователей во временной базе")
+    parser.add_argument("--transactions", type=int, default=1000000, help="транзакций во временной базе")
+    parser.add_argument("--user-id", type=int, default=1, help="пользователь, от имени которого идет поиск")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--budget", type=float, default=50, help="допустимый p95 одного запроса, мс")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(args.db or os.path.join(tmp, "bench.db"))
+        migrate(db)
+        if not args.db:
+            start = time.perf_counter()
+            seed(db, users=args.users, transactions=args.transactions, seed=args.seed)
+            print(f"Заполнение: {args.transactions} транзакций за {time.perf_counter() - start:.1f} с")
+        count = db.fetchone("SELECT COUNT(*) FROM transactions WHERE user_id = ?", (args.user_id,))[0]
+        print(f"Транзакций пользователя: {count}")
+
+        failed = []
+        print(f"{'query':>20} {'hits':>5} {'p50, ms':>9} {'p95, ms':>9} {'max, ms':>9}")
+        for query in QUERIES:
+            hits, timings = measure(db, args.user_id, query, args.repeat)
+            p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+            print(f"{query:>20} {hits:>5} {statistics.median(timings):>9.2f} {p95:>9.2f} {timings[-1]:>9.2f}")
+            if p95 > args.budget:
+                failed.append(query)
+        db.close()
+
+    if failed:
+        print(f"Превышен бюджет {args.budget} мс: {', '.join(failed)}")
+        return 1
+    print(f"Все запросы укладываются в бюджет {args.budget} мс.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Нагрузочный тест HTTP API (`pfa_server`): пропускная способность и задержки.
+
+По умолчанию запускает локальный сервер на временной базе, заполненной
+`pfa_seed.seed`, и в течение `--duration` секунд отправляет запросы из
+`--concurrency` потоков. Каждый поток входит под своим пользователем и
+выполняет смесь операций: чтение баланса, первой страницы истории и целей
+и добавление транзакций (доля `--write-ratio`). В конце печатаются число
+запросов в секунду и перцентили задержки (p50, p95, p99) по каждой операции
+и в целом.
+
+Запуск:
+    python benchmarks/load_api.py --concurrency 8 --duration 10
+    python benchmarks/load_api.py --url http://192.168.1.10:8765 --login-prefix user --duration 30
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pfa_db import Database  # noqa: E402
+from pfa_schema import migrate  # noqa: E402
+from pfa_seed import SEED_PASSWORD, seed  # noqa: E402
+from pfa_server import make_server  # noqa: E402
+
+READS = ("balance", "transactions", "goals")
+
+
+class Client:
+    """
+    Клиент API: каждый запрос идет в новом соединении (сервер отвечает по HTTP/1.0).
+    """
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.token = None
+
+    def request(self, method, path, body=None):
+        """
+        Returns:
+            tuple: HTTP-статус и разобранный ответ.
+        """
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            headers = {"Content-Type": "application/json"}
+            if self.token:
+                headers["Authorization"] = f"Bearer {self.token}"
+            conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            conn.close()
+
+    def login(self, login, password):
+        status, payload = self.request("POST", "/api/login", {"login": login, "password": password})
+        if status != 200:
+            raise RuntimeError(f"Не удалось войти как {login}: {payload.get('error')}")
+        self.token = payload["token"]
+
+
+def operations(client, rnd):
+    """
+    Возвращает операции нагрузки по имени.
+    """
+    return {
+        "balance": lambda: client.request("GET", "/api/balance"),
+        "transactions": lambda: client.request("GET", "/api/transactions?limit=50"),
+        "goals": lambda: client.request("GET", "/api/goals"),
+        "add_transaction": lambda: client.request("POST", "/api/transactions", {
+            "category": "Продукты", "amount": round(rnd.uniform(50, 5000), 2), "type": "Расход"}),
+    }
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def run_load(host, port, logins, password, concurrency, duration, write_ratio, seed_value):
+    """
+    Нагружает сервер и собирает задержки.
+
+    Returns:
+        tuple: Задержки по операциям (словарь списков, мс), число ошибок и фактическая длительность, с.
+    """
+    latencies = {name: [] for name in (*READS, "add_transaction")}
+    errors = [0]
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+    deadline = [0.0]
+
+    def worker(number):
+        rnd = random.Random(seed_value + number)
+        client = Client(host, port)
+        client.login(logins[number % len(logins)], password)
+        ops = operations(client, rnd)
+        local = {name: [] for name in latencies}
+        local_errors = 0
+        start_barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            name = "add_transaction" if rnd.random() < write_ratio else rnd.choice(READS)
+            started = time.perf_counter()
+            try:
+                status, _ = ops[name]()
+            except OSError:
+                status = None
+            local[name].append((time.perf_counter() - started) * 1000)
+            if status is None or status >= 400:
+                local_errors += 1
+        with lock:
+            for name, values in local.items():
+                latencies[name].extend(values)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    started = time.perf_counter()
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - started
+
+
+def report(latencies, errors, elapsed):
+    """
+    Печатает сводку и возвращает ее для сохранения в JSON.
+    """
+    rows = {}
+    print(f"{'operation':>16} {'requests':>9} {'rps':>9} {'p50, ms':>9} {'p95, ms':>9} {'p99, ms':>9}")
+    everything = sorted(value for values in latencies.values() for value in values)
+    for name, values in (*latencies.items(), ("total", everything)):
+        values = sorted(values)
+        rows[name] = {
+            "requests": len(values),
+            "rps": len(values) / elapsed,
+            "p50_ms": percentile(values, 0.50),
+            "p95_ms": percentile(values, 0.95),
+            "p99_ms": percentile(values, 0.99),
+        }
+        row = rows[name]
+        print(f"{name:>16} {row['requests']:>9} {row['rps']:>9.1f} {row['p50_ms']:>9.2f} "
+              f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f}")
+    print(f"Ошибок: {errors}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="адрес работающего сервера (по умолчанию — локальный на временной базе)")
+    parser.add_argument("--concurrency", type=int, default=8, help="число параллельных клиентов")
+    parser.add_argument("--duration", type=float, default=10, help="длительность нагрузки, с")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="доля запросов на запись")
+    parser.add_argument("--users", type=int, default=4, help="пользователей (для локального сервера)")
+    parser.add_argument("--transactions", type=int, default=100000, help="транзакций в локальной базе")
+    parser.add_argument("--workers", type=int, default=16, help="потоков локального сервера")
+    parser.add_argument("--login-prefix", default="user", help="префикс логинов пользователей")
+    parser.add_argument("--password", default=SEED_PASSWORD)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="файл результатов JSON")
+    args = parser.parse_args()
+
+    logins = [f"{args.login_prefix}{number}" for number in range(1, args.users + 1)]
+    with tempfile.TemporaryDirectory() as tmp:
+        server = db = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            db = Database(os.path.join(tmp, "load.db"))
+            migrate(db)
+            seed(db, users=args.users, transactions=args.transactions, seed=args.seed,
+                 login_prefix=args.login_prefix)
+            server = make_server(db, port=0, workers=args.workers)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            host, port = server.server_address[:2]
+        try:
+            latencies, errors, elapsed = run_load(host, port, logins, args.password, args.concurrency,
+                                                  args.duration, args.write_ratio, args.seed)
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+                db.close()
+
+    rows = report(latencies, errors, elapsed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"params": vars(args), "results": rows, "errors": errors}, f, ensure_ascii=False, indent=2)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
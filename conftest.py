@@ -0,0 +1,14 @@
+import pytest
+from pfa_db import Database
+from pfa_schema import migrate
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    Пустая база данных с актуальной схемой во временном каталоге.
+    """
+    database = Database(str(tmp_path / "users.db"))
+    migrate(database)
+    yield database
+    database.close()
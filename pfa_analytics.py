@@ -0,0 +1,114 @@
+"""
+Агрегаты для диаграмм.
+
+Суммы по категориям считаются в SQL (`GROUP BY category_id` с фильтром по
+типу), что база данных выполняет по покрывающему индексу
+`idx_transactions_user_type_category`; имена категорий подставляются уже к
+готовым суммам. Результаты кэшируются по ключу
+(пользователь, тип транзакций) вместе с версией данных пользователя из
+таблицы `data_versions`; версия увеличивается триггерами при каждом изменении
+транзакций, поэтому устаревшие записи кэша не используются.
+"""
+from collections import OrderedDict
+import threading
+from pfa_money import Money
+
+# Соответствие типа данных диаграммы типу транзакций.
+DATA_TYPES = {
+    "Только доходы": "Доход",
+    "Только расходы": "Расход",
+}
+
+CACHE_SIZE = 64
+
+
+def data_version(db, user_id):
+    """
+    Возвращает текущую версию данных пользователя.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        user_id (int): ID пользователя.
+
+    Returns:
+        int: Версия (0, если у пользователя еще не было транзакций).
+    """
+    row = db.fetchone("SELECT version FROM data_versions WHERE user_id = ?", (user_id,))
+    return row[0] if row else 0
+
+
+def category_totals(db, user_id, transaction_type):
+    """
+    Считает суммы транзакций пользователя по категориям.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        user_id (int): ID пользователя.
+        transaction_type (str): "Доход" или "Расход".
+
+    Returns:
+        tuple: Пары (категория, `Money`), упорядоченные по категории.
+    """
+    rows = db.fetchall('''
+        SELECT c.name, s.total
+        FROM (
+            SELECT category_id, SUM(amount) AS total
+            FROM transactions
+            WHERE user_id = ? AND type = ?
+            GROUP BY category_id
+        ) s
+        JOIN categories c ON c.id = s.category_id
+        ORDER BY c.name
+    ''', (user_id, transaction_type))
+    return tuple((category, Money(total)) for category, total in rows)
+
+
+class CategoryTotalsCache:
+    """
+    LRU-кэш сумм по категориям с проверкой версии данных пользователя.
+
+    Атрибуты:
+        hits (int): Число ответов из кэша.
+        misses (int): Число пересчетов в базе данных.
+    """
+    def __init__(self, db, max_entries=CACHE_SIZE):
+        """
+        Args:
+            db (Database): Подключение к базе данных.
+            max_entries (int): Максимальное число записей кэша.
+        """
+        self.db = db
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, transaction_type):
+        """
+        Возвращает суммы по категориям, пересчитывая их только после изменения данных.
+
+        Args:
+            user_id (int): ID пользователя.
+            transaction_type (str): "Доход" или "Расход".
+
+        Returns:
+            tuple: Пары (категория, `Money`).
+        """
+        key = (user_id, transaction_type)
+        version = data_version(self.db, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        totals = category_totals(self.db, user_id, transaction_type)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (version, totals)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return totals
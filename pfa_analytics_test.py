@@ -0,0 +1,84 @@
+from pfa_analytics import CategoryTotalsCache, category_totals, data_version
+from pfa_categories import ensure_category
+from pfa_money import Money
+
+
+def add(db, category, amount, type_="Расход", user_id=1):
+    return db.execute(
+        "INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (?, ?, ?, '2024-01-01', ?)",
+        (user_id, ensure_category(db, user_id, category), amount, type_),
+    ).lastrowid
+
+
+def test_category_totals(db):
+    add(db, "Такси", 100)
+    add(db, "Такси", 50)
+    add(db, "Продукты", 30)
+    add(db, "Зарплата", 1000, "Доход")
+    add(db, "Такси", 999, user_id=2)
+    assert category_totals(db, 1, "Расход") == (("Продукты", Money(30)), ("Такси", Money(150)))
+    assert category_totals(db, 1, "Доход") == (("Зарплата", Money(1000)),)
+
+
+def test_category_totals_uses_covering_index(db):
+    plan = " ".join(row[3] for row in db.fetchall(
+        "EXPLAIN QUERY PLAN SELECT category_id, SUM(amount) FROM transactions "
+        "WHERE user_id = ? AND type = ? GROUP BY category_id", (1, "Расход")
+    ))
+    assert "COVERING INDEX idx_transactions_user_type_category" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_data_version_bumps_on_every_write(db):
+    assert data_version(db, 1) == 0
+    row_id = add(db, "Такси", 100)
+    assert data_version(db, 1) == 1
+    db.execute("UPDATE transactions SET amount = 200 WHERE id = ?", (row_id,))
+    assert data_version(db, 1) == 3  # старая и новая строка
+    db.execute("DELETE FROM transactions WHERE id = ?", (row_id,))
+    assert data_version(db, 1) == 4
+    assert data_version(db, 2) == 0
+
+
+def test_cache_hit_runs_only_version_lookup(db):
+    add(db, "Такси", 100)
+    cache = CategoryTotalsCache(db)
+    assert cache.get(1, "Расход") == (("Такси", Money(100)),)
+
+    statements = []
+    db.connection().set_trace_callback(statements.append)
+    try:
+        assert cache.get(1, "Расход") == (("Такси", Money(100)),)
+    finally:
+        db.connection().set_trace_callback(None)
+    assert len(statements) == 1
+    assert "data_versions" in statements[0]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_invalidated_by_write(db):
+    cache = CategoryTotalsCache(db)
+    assert cache.get(1, "Расход") == ()
+    add(db, "Такси", 100)
+    assert cache.get(1, "Расход") == (("Такси", Money(100)),)
+    assert cache.misses == 2
+
+
+def test_cache_invalidated_by_category_rename(db):
+    add(db, "Такси", 100)
+    cache = CategoryTotalsCache(db)
+    assert cache.get(1, "Расход") == (("Такси", Money(100)),)
+    db.execute("UPDATE categories SET name = 'Каршеринг' WHERE user_id = 1")
+    assert cache.get(1, "Расход") == (("Каршеринг", Money(100)),)
+
+
+def test_cache_evicts_least_recently_used(db):
+    cache = CategoryTotalsCache(db, max_entries=2)
+    cache.get(1, "Расход")
+    cache.get(2, "Расход")
+    cache.get(1, "Расход")
+    cache.get(3, "Расход")
+    cache.get(1, "Расход")
+    assert cache.hits == 2
+    cache.get(2, "Расход")
+    assert cache.misses == 4
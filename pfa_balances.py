@@ -0,0 +1,83 @@
+"""
+Итоговые балансы пользователей.
+
+Таблица `balances` хранит по одной строке на пользователя (сумма доходов,
+сумма расходов, число транзакций) и поддерживается триггерами на таблице
+`transactions` (см. `pfa_schema.create_balance_triggers`). Суммы хранятся
+в копейках, поэтому итоги сравниваются с пересчетом точно. Здесь собраны
+чтение итогов, а также полный пересчет и проверка расхождений.
+"""
+
+_ACTUAL_TOTALS_SQL = '''
+    SELECT user_id,
+           SUM(CASE WHEN type = 'Доход' THEN amount ELSE 0 END),
+           SUM(CASE WHEN type = 'Расход' THEN amount ELSE 0 END),
+           COUNT(*)
+    FROM transactions
+    GROUP BY user_id
+'''
+
+
+def read_balance(db, user_id):
+    """
+    Возвращает итоги пользователя одной строкой из таблицы `balances`.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        user_id (int): ID пользователя.
+
+    Returns:
+        tuple: (доходы в копейках, расходы в копейках, число транзакций).
+    """
+    row = db.fetchone(
+        "SELECT total_income, total_expense, transaction_count FROM balances WHERE user_id = ?",
+        (user_id,),
+    )
+    if row is None:
+        return 0, 0, 0
+    return row
+
+
+def rebuild_balances(db):
+    """
+    Пересчитывает таблицу `balances` с нуля по всем транзакциям.
+
+    Args:
+        db (Database): Подключение к базе данных.
+
+    Returns:
+        int: Число пользователей с пересчитанными итогами.
+    """
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM balances")
+        cursor = conn.execute(
+            "INSERT INTO balances (user_id, total_income, total_expense, transaction_count)"
+            + _ACTUAL_TOTALS_SQL
+        )
+        return cursor.rowcount
+
+
+def verify_balances(db):
+    """
+    Сравнивает сохраненные итоги с итогами, пересчитанными по транзакциям.
+
+    Args:
+        db (Database): Подключение к базе данных.
+
+    Returns:
+        list: Расхождения в виде словарей с ключами `user_id`, `stored` и `actual`,
+        где `stored` и `actual` — кортежи (доходы, расходы, число транзакций).
+    """
+    with db.transaction() as conn:
+        stored = {row[0]: row[1:] for row in conn.execute(
+            "SELECT user_id, total_income, total_expense, transaction_count FROM balances"
+        )}
+        actual = {row[0]: row[1:] for row in conn.execute(_ACTUAL_TOTALS_SQL)}
+
+    drift = []
+    for user_id in sorted(stored.keys() | actual.keys()):
+        stored_row = stored.get(user_id, (0, 0, 0))
+        actual_row = actual.get(user_id, (0, 0, 0))
+        if tuple(stored_row) != tuple(actual_row):
+            drift.append({"user_id": user_id, "stored": tuple(stored_row), "actual": tuple(actual_row)})
+    return drift
@@ -0,0 +1,52 @@
+from pfa_balances import read_balance, rebuild_balances, verify_balances
+from pfa_categories import ensure_category
+from pfa_cli import main
+
+
+def add_transaction(db, user_id, amount, type_, category="Продукты"):
+    return db.execute(
+        "INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (?, ?, ?, ?, ?)",
+        (user_id, ensure_category(db, user_id, category), amount, "2024-12-01 10:00:00", type_),
+    ).lastrowid
+
+
+def test_read_balance_empty(db):
+    assert read_balance(db, 1) == (0.0, 0.0, 0)
+
+
+def test_triggers_track_insert_update_delete(db):
+    add_transaction(db, 1, 1000, "Доход", "Зарплата")
+    expense_id = add_transaction(db, 1, 300, "Расход")
+    add_transaction(db, 2, 50, "Расход")
+    assert read_balance(db, 1) == (1000, 300, 2)
+
+    db.execute("UPDATE transactions SET amount = 400 WHERE id = ?", (expense_id,))
+    assert read_balance(db, 1) == (1000, 400, 2)
+
+    db.execute("UPDATE transactions SET user_id = 2 WHERE id = ?", (expense_id,))
+    assert read_balance(db, 1) == (1000, 0, 1)
+    assert read_balance(db, 2) == (0, 450, 2)
+
+    db.execute("DELETE FROM transactions WHERE id = ?", (expense_id,))
+    assert read_balance(db, 2) == (0, 50, 1)
+    assert verify_balances(db) == []
+
+
+def test_verify_reports_drift_and_rebuild_fixes_it(db):
+    add_transaction(db, 1, 1000, "Доход", "Зарплата")
+    db.execute("UPDATE balances SET total_income = 1 WHERE user_id = 1")
+
+    drift = verify_balances(db)
+    assert drift == [{"user_id": 1, "stored": (1, 0, 1), "actual": (1000, 0, 1)}]
+
+    assert rebuild_balances(db) == 1
+    assert verify_balances(db) == []
+
+
+def test_cli_verify(db, capsys):
+    add_transaction(db, 1, 1000, "Доход", "Зарплата")
+    db.execute("UPDATE balances SET transaction_count = 5")
+    assert main(["--db", db.path, "balances", "verify"]) == 1
+    assert main(["--db", db.path, "balances", "rebuild"]) == 0
+    assert main(["--db", db.path, "balances", "verify"]) == 0
+    assert "Расхождений не найдено" in capsys.readouterr().out
@@ -0,0 +1,124 @@
+"""
+Категории транзакций.
+
+Категории хранятся в таблице `categories` по строке на категорию
+пользователя; транзакции ссылаются на них по `transactions.category_id`.
+Поэтому суммы группируются по целому ключу, а переименование категории
+меняет одну строку, а не всю историю. Категория может быть вложена в
+другую (`parent_id`). Имя категории уникально у пользователя, так что
+категорию из формы, API или выписки можно найти по имени.
+
+Новый пользователь получает категории `DEFAULT_CATEGORIES` (триггер схемы,
+см. `pfa_schema.create_category_triggers`).
+"""
+from collections import namedtuple
+
+# Категория пользователя: parent_id — ID родительской категории или None,
+# type — тип транзакций ("Доход" или "Расход"), для которых категория
+# предлагается, или None (для любых; вложенная категория без типа получает тип
+# родительской), depth — глубина вложенности (0 у категорий верхнего уровня).
+Category = namedtuple("Category", "id name parent_id type depth")
+
+# Разделитель имен в пути категории для сортировки дерева.
+_PATH_SEPARATOR = "\x1f"
+
+
+def list_categories(db, user_id, transaction_type=None):
+    """
+    Возвращает категории пользователя в порядке дерева: за каждой категорией
+    идут ее дочерние категории, на каждом уровне — по алфавиту.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        user_id (int): ID пользователя.
+        transaction_type (str): Оставить только категории этого типа и
+            категории без типа.
+
+    Returns:
+        list: Записи `Category`.
+    """
+    rows = db.fetchall(f'''
+        WITH RECURSIVE tree (id, name, parent_id, type, depth, path) AS (
+            SELECT id, name, parent_id, type, 0, name
+            FROM categories
+            WHERE user_id = ? AND parent_id IS NULL
+            UNION ALL
+            SELECT c.id, c.name, c.parent_id, COALESCE(c.type, tree.type), tree.depth + 1,
+                   tree.path || '{_PATH_SEPARATOR}' || c.name
+            FROM categories c JOIN tree ON c.user_id = ? AND c.parent_id = tree.id
+        )
+        SELECT id, name, parent_id, type, depth
+        FROM tree
+        WHERE ? IS NULL OR type IS NULL OR type = ?
+        ORDER BY path
+    ''', (user_id, user_id, transaction_type, transaction_type))
+    return [Category._make(row) for row in rows]
+
+
+def find_category(conn, user_id, name):
+    """
+    Returns:
+        int: ID категории пользователя с именем `name` или None.
+    """
+    row = conn.execute("SELECT id FROM categories WHERE user_id = ? AND name = ?", (user_id, name)).fetchone()
+    return row[0] if row is not None else None
+
+
+def ensure_category(conn, user_id, name, transaction_type=None):
+    """
+    Возвращает ID категории по имени, создавая категорию верхнего уровня,
+    если у пользователя ее еще нет.
+
+    Args:
+        conn (sqlite3.Connection | Database): Соединение (например, внутри
+            `Database.transaction()`).
+        user_id (int): ID пользователя.
+        name (str): Имя категории.
+        transaction_type (str): Тип новой категории.
+
+    Returns:
+        int: ID категории.
+    """
+    category_id = find_category(conn, user_id, name)
+    if category_id is None:
+        category_id = conn.execute(
+            "INSERT INTO categories (user_id, name, type) VALUES (?, ?, ?)", (user_id, name, transaction_type)
+        ).lastrowid
+    return category_id
+
+
+class CategoryResolver:
+    """
+    Кэш ID категорий по имени для пакетной вставки транзакций (импорт,
+    генератор данных): каждая категория ищется или создается один раз.
+    """
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._ids = {}
+
+    def __call__(self, conn, name, transaction_type=None):
+        """
+        Returns:
+            int: ID категории (см. `ensure_category`).
+        """
+        category_id = self._ids.get(name)
+        if category_id is None:
+            category_id = self._ids[name] = ensure_category(conn, self.user_id, name, transaction_type)
+        return category_id
+
+
+def descendants(conn, category_id):
+    """
+    Returns:
+        set: ID категории и всех вложенных в нее категорий.
+    """
+    rows = conn.execute('''
+        WITH RECURSIVE tree (id) AS (
+            SELECT ?
+            UNION
+            SELECT c.id FROM categories c JOIN tree ON c.parent_id = tree.id
+        )
+        SELECT id FROM tree
+    ''', (category_id,)).fetchall()
+    return {row[0] for row in rows}
+
@@ -0,0 +1,56 @@
+from pfa_analytics import data_version
+from pfa_categories import CategoryResolver, descendants, ensure_category, find_category, list_categories
+from pfa_schema import DEFAULT_CATEGORIES
+
+
+def add(db, name, parent_id=None, transaction_type=None, user_id=1):
+    return db.execute("INSERT INTO categories (user_id, parent_id, name, type) VALUES (?, ?, ?, ?)",
+                      (user_id, parent_id, name, transaction_type)).lastrowid
+
+
+def test_new_user_gets_default_categories(db):
+    user_id = db.execute("INSERT INTO users (login, password) VALUES ('Pavel', 'password123')").lastrowid
+    assert sorted((c.name, c.type) for c in list_categories(db, user_id)) == sorted(DEFAULT_CATEGORIES)
+
+
+def test_list_categories_in_tree_order(db):
+    food = add(db, "Еда", transaction_type="Расход")
+    cafe = add(db, "Кафе", food)
+    add(db, "Кофейни", cafe)
+    add(db, "Продукты", food)
+    add(db, "Авто", transaction_type="Расход")
+    add(db, "Зарплата", transaction_type="Доход")
+    add(db, "Еда", user_id=2)
+
+    assert [("  " * c.depth + c.name) for c in list_categories(db, 1)] == [
+        "Авто", "Еда", "  Кафе", "    Кофейни", "  Продукты", "Зарплата"]
+    assert [c.name for c in list_categories(db, 1, "Доход")] == ["Зарплата"]
+    assert descendants(db, food) == {food, cafe, cafe + 1, cafe + 2}
+    assert descendants(db, cafe + 2) == {cafe + 2}
+
+
+def test_ensure_category_creates_once(db):
+    taxi = ensure_category(db, 1, "Такси", "Расход")
+    assert ensure_category(db, 1, "Такси") == taxi
+    assert ensure_category(db, 2, "Такси") != taxi
+    assert find_category(db, 1, "Самокат") is None
+
+    resolve = CategoryResolver(1)
+    statements = []
+    db.connection().set_trace_callback(statements.append)
+    try:
+        assert resolve(db, "Такси") == taxi
+        assert resolve(db, "Такси") == taxi
+    finally:
+        db.connection().set_trace_callback(None)
+    assert len(statements) == 1
+
+
+def test_rename_updates_one_row_and_bumps_data_version(db):
+    taxi = ensure_category(db, 1, "Такси")
+    db.executemany("INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (1, ?, ?, ?, 'Расход')",
+                   [(taxi, amount, f"2025-01-{amount:02d}") for amount in range(1, 11)])
+    version = data_version(db, 1)
+    assert db.execute("UPDATE categories SET name = 'Каршеринг' WHERE id = ?", (taxi,)).rowcount == 1
+    assert data_version(db, 1) == version + 1
+    assert [c.name for c in list_categories(db, 1)] == ["Каршеринг"]
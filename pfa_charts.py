@@ -0,0 +1,294 @@
+"""
+Встроенные диаграммы вкладки "Диаграммы".
+
+Фигуры строятся без pyplot: `matplotlib.figure.Figure` с холстом Agg
+создается и отрисовывается в фоновом потоке, а затем показывается во
+встроенном `FigureCanvasTkAgg`. Готовые фигуры хранятся в LRU-кэше по ключу
+(пользователь, тип данных, версия данных, тип диаграммы), поэтому
+переключение между типами диаграмм для тех же данных не перестраивает
+фигуру. Вытесненные из кэша фигуры явно очищаются.
+
+Диаграммы трендов (`TREND_CHART_TYPES`) строятся по записи `Trend` из
+сводок `pfa_rollups`, остальные — по парам (категория, сумма).
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import tkinter as tk
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
+from pfa_rollups import TREND_CHART_TYPES
+
+CHART_TYPES = ("Круговая диаграмма", "Гистограмма", "Гистограмма(Цвета)")
+
+COLORS = ["red", "green", "blue", "purple", "orange"]
+
+# Две выборки (доходы и расходы) по три типа диаграмм.
+FIGURE_CACHE_SIZE = 6
+
+FIGURE_SIZE = (8, 6)
+
+# Интервал опроса готовности фоновой отрисовки, мс.
+POLL_INTERVAL = 30
+
+
+def _draw_pie(ax, categories, amounts):
+    ax.pie(amounts, labels=categories, autopct='%1.1f%%', startangle=90)
+    ax.set_title("Круговая диаграмма")
+    ax.axis("equal")
+
+
+def _draw_bar(ax, categories, amounts):
+    ax.bar(categories, amounts)
+    ax.set_title("Гистограмма")
+    ax.set_xlabel("Категория")
+    ax.set_ylabel("Сумма")
+    ax.tick_params(axis="x", labelrotation=90)
+    # Фиксированные поля вместо tight_layout(): подписи категорий повернуты.
+    ax.figure.subplots_adjust(bottom=0.35)
+
+
+def _draw_gisto(ax, categories, amounts):
+    ax.bar(categories, amounts, color=COLORS[:len(categories)] or None)
+    ax.set_title("Гистограмма(Цвета)")
+    ax.set_xlabel("Категория")
+    ax.set_ylabel("Сумма")
+    ax.tick_params(axis="x", labelrotation=90)
+    # Фиксированные поля вместо tight_layout(): подписи категорий повернуты.
+    ax.figure.subplots_adjust(bottom=0.35)
+
+
+_DRAWERS = {
+    "Круговая диаграмма": _draw_pie,
+    "Гистограмма": _draw_bar,
+    "Гистограмма(Цвета)": _draw_gisto,
+}
+
+# Ширина столбца тренда в днях (ось X — даты начала периодов).
+_BAR_WIDTH = {"month": 25, "week": 6}
+
+
+def _format_trend_axes(ax, title):
+    ax.set_title(title)
+    ax.set_ylabel("Сумма")
+    locator = AutoDateLocator()
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(ConciseDateFormatter(locator))
+    ax.legend(loc="upper left", fontsize="small")
+
+
+def _draw_trend_lines(ax, trend):
+    for category, values in trend.series:
+        ax.plot(trend.periods, [float(value) for value in values], label=category, linewidth=1.2)
+    _format_trend_axes(ax, "Тренд по категориям")
+
+
+def _draw_trend_stacked(ax, trend):
+    bottom = [0.0] * len(trend.periods)
+    for category, values in trend.series:
+        values = [float(value) for value in values]
+        ax.bar(trend.periods, values, width=_BAR_WIDTH[trend.granularity], bottom=bottom,
+               align="edge", label=category)
+        bottom = [base + value for base, value in zip(bottom, values)]
+    _format_trend_axes(ax, "Тренд по категориям (с накоплением)")
+
+
+_TREND_DRAWERS = dict(zip(TREND_CHART_TYPES, (_draw_trend_lines, _draw_trend_stacked)))
+
+
+def build_figure(totals, chart_type, figsize=FIGURE_SIZE, dpi=100):
+    """
+    Строит и отрисовывает фигуру на холсте Agg. Безопасно вызывать вне потока Tk.
+
+    Args:
+        totals (tuple | Trend): Пары (категория, сумма) или тренд для `TREND_CHART_TYPES`.
+        chart_type (str): Тип диаграммы из `CHART_TYPES` или `TREND_CHART_TYPES`.
+        figsize (tuple): Размер фигуры в дюймах.
+        dpi (int): Разрешение.
+
+    Returns:
+        Figure: Отрисованная фигура.
+    """
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    if chart_type in _TREND_DRAWERS:
+        has_data = bool(totals.periods)
+        if has_data:
+            _TREND_DRAWERS[chart_type](ax, totals)
+    else:
+        categories = [category for category, _ in totals]
+        amounts = [float(amount) for _, amount in totals]
+        has_data = bool(categories)
+        if has_data:
+            _DRAWERS[chart_type](ax, categories, amounts)
+    if not has_data:
+        ax.set_axis_off()
+        ax.text(0.5, 0.5, "Нет данных", ha="center", va="center", fontsize=14)
+    figure.canvas.draw()
+    return figure
+
+
+def close_figure(figure):
+    """
+    Освобождает ресурсы фигуры.
+    """
+    figure.clear()
+
+
+class ChartRenderer:
+    """
+    Фоновая отрисовка диаграмм с LRU-кэшем готовых фигур.
+
+    Атрибуты:
+        hits (int): Число фигур, взятых из кэша.
+        misses (int): Число построенных фигур.
+    """
+    def __init__(self, cache_size=FIGURE_CACHE_SIZE, figsize=FIGURE_SIZE, dpi=100):
+        """
+        Args:
+            cache_size (int): Максимальное число фигур в кэше.
+            figsize (tuple): Размер фигур в дюймах.
+            dpi (int): Разрешение фигур.
+        """
+        self.cache_size = cache_size
+        self.figsize = figsize
+        self.dpi = dpi
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-render")
+
+    def cached(self, key):
+        """
+        Возвращает готовую фигуру из кэша или None.
+
+        Args:
+            key (tuple): Ключ (пользователь, тип данных, версия, тип диаграммы).
+        """
+        with self._lock:
+            figure = self._figures.get(key)
+            if figure is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+            return figure
+
+    def render(self, key, totals, chart_type):
+        """
+        Возвращает фигуру из кэша или строит ее в текущем потоке.
+
+        Args:
+            key (tuple): Ключ кэша.
+            totals (tuple): Пары (категория, сумма).
+            chart_type (str): Тип диаграммы.
+
+        Returns:
+            Figure: Отрисованная фигура.
+        """
+        figure = self.cached(key)
+        if figure is not None:
+            return figure
+        figure = build_figure(totals, chart_type, self.figsize, self.dpi)
+        evicted = []
+        with self._lock:
+            self.misses += 1
+            self._figures[key] = figure
+            while len(self._figures) > self.cache_size:
+                evicted.append(self._figures.popitem(last=False)[1])
+        for old in evicted:
+            close_figure(old)
+        return figure
+
+    def submit(self, key, load_totals, chart_type):
+        """
+        Отрисовывает фигуру в фоновом потоке.
+
+        Args:
+            key (tuple): Ключ кэша.
+            load_totals (callable): Возвращает пары (категория, сумма); вызывается в фоне.
+            chart_type (str): Тип диаграммы.
+
+        Returns:
+            concurrent.futures.Future: Результат — отрисованная фигура.
+        """
+        return self._executor.submit(lambda: self.render(key, load_totals(), chart_type))
+
+    def __len__(self):
+        return len(self._figures)
+
+    def close(self):
+        """
+        Останавливает фоновый поток и очищает кэш.
+        """
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            figures, self._figures = list(self._figures.values()), OrderedDict()
+        for figure in figures:
+            close_figure(figure)
+
+
+class ChartPanel:
+    """
+    Область вкладки, в которой показывается текущая диаграмма.
+
+    Использует один `FigureCanvasTkAgg`; при показе новой диаграммы
+    в него подставляется готовая фигура из `ChartRenderer`.
+    """
+    def __init__(self, master, renderer):
+        """
+        Args:
+            master (tk.Widget): Родительский виджет.
+            renderer (ChartRenderer): Источник фигур.
+        """
+        self.renderer = renderer
+        self.status = tk.Label(master, text="")
+        self.status.pack()
+        self.canvas = FigureCanvasTkAgg(Figure(figsize=renderer.figsize, dpi=renderer.dpi), master=master)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self._pending = None
+
+    def show(self, figure):
+        """
+        Показывает отрисованную фигуру во встроенном холсте.
+        """
+        widget = self.canvas.get_tk_widget()
+        width, height = widget.winfo_width(), widget.winfo_height()
+        if width > 1 and height > 1:
+            figure.set_size_inches(width / figure.dpi, height / figure.dpi, forward=False)
+        figure.set_canvas(self.canvas)
+        self.canvas.figure = figure
+        self.status.config(text="")
+        self.canvas.draw_idle()
+
+    def request(self, key, load_totals, chart_type):
+        """
+        Показывает диаграмму: сразу из кэша или после фоновой отрисовки.
+
+        Args:
+            key (tuple): Ключ кэша.
+            load_totals (callable): Загружает данные диаграммы (вызывается в фоне).
+            chart_type (str): Тип диаграммы.
+        """
+        figure = self.renderer.cached(key)
+        if figure is not None:
+            self._pending = None
+            self.show(figure)
+            return
+        self.status.config(text="Построение диаграммы...")
+        self._pending = self.renderer.submit(key, load_totals, chart_type)
+        self._poll(self._pending)
+
+    def _poll(self, future):
+        if future is not self._pending:
+            return
+        if not future.done():
+            self.canvas.get_tk_widget().after(POLL_INTERVAL, self._poll, future)
+            return
+        self._pending = None
+        try:
+            self.show(future.result())
+        except Exception as e:
+            self.status.config(text=f"Не удалось построить диаграмму: {e}")
@@ -0,0 +1,67 @@
+import gc
+import os
+import pytest
+from datetime import date
+from pfa_charts import CHART_TYPES, ChartRenderer, build_figure
+from pfa_rollups import TREND_CHART_TYPES, Trend
+
+TOTALS = (("Продукты", 300.0), ("Такси", 150.0), ("Одежда", 75.0))
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+@pytest.mark.parametrize("chart_type", CHART_TYPES)
+def test_build_figure(chart_type):
+    figure = build_figure(TOTALS, chart_type, figsize=(3, 2), dpi=50)
+    assert len(figure.axes) == 1
+    assert figure.canvas.get_renderer() is not None
+
+
+@pytest.mark.parametrize("chart_type", TREND_CHART_TYPES)
+@pytest.mark.parametrize("granularity", ["month", "week"])
+def test_build_trend_figure(chart_type, granularity):
+    periods = tuple(date(2015 + i // 12, i % 12 + 1, 1) for i in range(120))
+    trend = Trend(granularity, periods, (("Продукты", tuple(range(120))), ("Такси", (5.0,) * 120)))
+    figure = build_figure(trend, chart_type, figsize=(3, 2), dpi=50)
+    assert [text.get_text() for text in figure.axes[0].get_legend().get_texts()] == ["Продукты", "Такси"]
+    empty = build_figure(Trend(granularity, (), ()), chart_type, figsize=(3, 2), dpi=50)
+    assert empty.axes[0].texts[0].get_text() == "Нет данных"
+
+
+def test_build_figure_without_data():
+    figure = build_figure((), CHART_TYPES[0], figsize=(3, 2), dpi=50)
+    assert figure.axes[0].texts[0].get_text() == "Нет данных"
+
+
+def test_renderer_caches_by_key():
+    renderer = ChartRenderer(figsize=(3, 2), dpi=50)
+    first = renderer.submit((1, "Расход", 1, CHART_TYPES[0]), lambda: TOTALS, CHART_TYPES[0]).result()
+    again = renderer.submit((1, "Расход", 1, CHART_TYPES[0]), lambda: TOTALS, CHART_TYPES[0]).result()
+    assert first is again
+    assert renderer.cached((1, "Расход", 1, CHART_TYPES[0])) is first
+    assert renderer.cached((1, "Расход", 2, CHART_TYPES[0])) is None
+    assert (renderer.hits, renderer.misses) == (2, 1)
+    renderer.close()
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="нужен /proc")
+def test_opening_500_charts_keeps_rss_flat():
+    renderer = ChartRenderer(figsize=(3, 2), dpi=50)
+
+    def open_charts(start, count):
+        for version in range(start, start + count):
+            chart_type = CHART_TYPES[version % len(CHART_TYPES)]
+            totals = tuple((f"Категория {i}", float(version + i)) for i in range(5))
+            renderer.render((1, "Расход", version, chart_type), totals, chart_type)
+
+    open_charts(0, 100)
+    gc.collect()
+    baseline = rss_bytes()
+    open_charts(100, 400)
+    gc.collect()
+    assert len(renderer) == renderer.cache_size
+    assert rss_bytes() - baseline < 20 * 1024 * 1024
+    renderer.close()
@@ -0,0 +1,317 @@
+"""
+Командная строка для обслуживания базы данных "Финансового помощника".
+
+Примеры:
+    python pfa_cli.py balances verify
+    python pfa_cli.py balances rebuild
+    python pfa_cli.py rollups verify
+    python pfa_cli.py search rebuild
+    python pfa_cli.py recurring --user Pavel
+    python pfa_cli.py rates import rates.csv
+    python pfa_cli.py import --user Pavel statement.csv --column amount=Сумма --delimiter ";"
+    python pfa_cli.py export --user Pavel backup/ --format parquet --from 2024-01-01
+    python pfa_cli.py --db bench.db seed --users 100 --transactions 1000000 --seed 42
+    python pfa_cli.py serve --host 0.0.0.0 --port 8765
+"""
+import argparse
+import sqlite3
+import sys
+from datetime import datetime
+from pfa_db import DB_PATH, Database
+from pfa_schema import migrate
+from pfa_balances import rebuild_balances, verify_balances
+from pfa_rollups import rebuild_rollups, verify_rollups
+from pfa_search import rebuild_search_index, verify_search_index
+from pfa_recurring import generate_due
+from pfa_rates import RateFileError, import_rates
+from pfa_import import import_file
+from pfa_export import EXPORT_TABLES, ExportError, export_user
+from pfa_seed import seed
+from pfa_server import DEFAULT_HOST, DEFAULT_PORT, WORKERS, make_server
+
+
+class CommandError(Exception):
+    """
+    Ошибка в аргументах команды.
+    """
+
+
+def find_user_id(db, login):
+    """
+    Возвращает ID пользователя по логину.
+
+    Raises:
+        CommandError: Если пользователь не найден.
+    """
+    row = db.fetchone("SELECT id FROM users WHERE login = ?", (login,))
+    if row is None:
+        raise CommandError(f"Пользователь {login!r} не найден")
+    return row[0]
+
+
+def cmd_balances(db, args):
+    """
+    Проверяет или пересчитывает итоговые балансы пользователей.
+    """
+    if args.action == "rebuild":
+        count = rebuild_balances(db)
+        print(f"Балансы пересчитаны для пользователей: {count}")
+        return 0
+
+    drift = verify_balances(db)
+    if not drift:
+        print("Расхождений не найдено.")
+        return 0
+    for item in drift:
+        print(f"user_id={item['user_id']}: сохранено {item['stored']}, фактически {item['actual']}")
+    print(f"Найдено расхождений: {len(drift)}")
+    return 1
+
+
+def cmd_rollups(db, args):
+    """
+    Проверяет или пересчитывает сводки транзакций по периодам.
+    """
+    if args.action == "rebuild":
+        count = rebuild_rollups(db)
+        print(f"Сводки пересчитаны, строк: {count}")
+        return 0
+
+    drift = verify_rollups(db)
+    if not drift:
+        print("Расхождений не найдено.")
+        return 0
+    for item in drift:
+        print(f"{item['key']}: сохранено {item['stored']}, фактически {item['actual']}")
+    print(f"Найдено расхождений: {len(drift)}")
+    return 1
+
+
+def cmd_search(db, args):
+    """
+    Проверяет или перестраивает индексы полнотекстового поиска.
+    """
+    if args.action == "rebuild":
+        counts = rebuild_search_index(db)
+        print("Индексы поиска перестроены: " + ", ".join(f"{index} — {count}" for index, count in counts.items()))
+        return 0
+
+    problems = verify_search_index(db)
+    if not problems:
+        print("Расхождений не найдено.")
+        return 0
+    for problem in problems:
+        print(problem)
+    print(f"Найдено расхождений: {len(problems)}")
+    return 1
+
+
+def cmd_recurring(db, args):
+    """
+    Создает транзакции по наступившим срабатываниям повторяющихся правил.
+    """
+    user_id = find_user_id(db, args.user) if args.user else None
+    report = generate_due(db, datetime.now(), user_id)
+    for goal in report.completed_goals:
+        print(f"Цель достигнута: {goal.title}")
+    print(f"Создано транзакций: {report.created}")
+    return 0
+
+
+def cmd_rates(db, args):
+    """
+    Загружает курсы валют из CSV-файла и пересчитывает суммы транзакций в этих валютах.
+    """
+    try:
+        report = import_rates(db, args.path, delimiter=args.delimiter, encoding=args.encoding)
+    except RateFileError as e:
+        raise CommandError(f"{args.path}: {e}") from None
+    print(f"Загружено курсов: {report.rates} ({', '.join(report.currencies) or 'нет валют'}), "
+          f"пересчитано транзакций: {report.converted}")
+    return 0
+
+
+def cmd_import(db, args):
+    """
+    Импортирует банковскую выписку в транзакции пользователя.
+    """
+    columns = {}
+    for item in args.column:
+        field, sep, column = item.partition("=")
+        if not sep:
+            raise CommandError(f"Ожидается ПОЛЕ=КОЛОНКА, получено {item!r}")
+        columns[field] = column
+
+    def progress(report):
+        print(f"Импортировано: {report.imported}, ошибок: {report.failed}", file=sys.stderr)
+
+    report = import_file(
+        db, find_user_id(db, args.user), args.path,
+        file_format=args.format, columns=columns, delimiter=args.delimiter,
+        encoding=args.encoding, batch_size=args.batch_size, progress=progress,
+        allocate_goals=not args.no_goals,
+    )
+    for line, message in report.errors:
+        print(f"строка {line}: {message}")
+    for goal in report.completed_goals:
+        print(f"Цель достигнута: {goal.title}")
+    print(f"Импортировано транзакций: {report.imported}, отклонено строк: {report.failed}")
+    return 0 if report.failed == 0 else 1
+
+
+def cmd_export(db, args):
+    """
+    Экспортирует транзакции, цели и напоминания пользователя в файлы.
+    """
+    try:
+        result = export_user(
+            db, find_user_id(db, args.user), args.directory,
+            file_format=args.format, tables=args.table or tuple(EXPORT_TABLES),
+            date_from=args.date_from, date_to=args.date_to,
+        )
+    except (ExportError, ValueError) as e:
+        raise CommandError(str(e)) from None
+    for table, info in result.items():
+        print(f"{table}: {info['rows']} строк -> {info['path']}")
+    return 0
+
+
+def cmd_seed(db, args):
+    """
+    Заполняет базу данных синтетическими данными для замеров производительности.
+    """
+    try:
+        report = seed(
+            db, users=args.users, transactions=args.transactions, goals=args.goals,
+            reminders=args.reminders, seed=args.seed, days=args.days,
+            login_prefix=args.login_prefix, batch_size=args.batch_size,
+        )
+    except sqlite3.IntegrityError:
+        raise CommandError(f"Логины с префиксом {args.login_prefix!r} уже заняты") from None
+    except ValueError as e:
+        raise CommandError(str(e)) from None
+    print(f"Пользователей: {len(report.user_ids)}, транзакций: {report.transactions}, "
+          f"целей: {report.goals}, напоминаний: {report.reminders}")
+    return 0
+
+
+def cmd_serve(db, args):
+    """
+    Запускает HTTP API до прерывания (Ctrl+C).
+    """
+    try:
+        server = make_server(db, args.host, args.port, args.workers, verbose=not args.quiet)
+    except OSError as e:
+        raise CommandError(f"Не удалось открыть {args.host}:{args.port}: {e}") from None
+    host, port = server.server_address[:2]
+    print(f"API доступно по адресу http://{host}:{port}/api/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def build_parser():
+    """
+    Создает парсер аргументов командной строки.
+
+    Returns:
+        argparse.ArgumentParser: Парсер с подкомандами.
+    """
+    parser = argparse.ArgumentParser(description="Обслуживание базы данных финансового помощника")
+    parser.add_argument("--db", default=DB_PATH, help="путь к файлу базы данных")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    balances = commands.add_parser("balances", help="итоговые балансы пользователей")
+    balances.add_argument("action", choices=["verify", "rebuild"])
+    balances.set_defaults(handler=cmd_balances)
+
+    rollups = commands.add_parser("rollups", help="сводки транзакций по месяцам и неделям")
+    rollups.add_argument("action", choices=["verify", "rebuild"])
+    rollups.set_defaults(handler=cmd_rollups)
+
+    searcher = commands.add_parser("search", help="индексы полнотекстового поиска")
+    searcher.add_argument("action", choices=["verify", "rebuild"])
+    searcher.set_defaults(handler=cmd_search)
+
+    recurring = commands.add_parser("recurring", help="транзакции по повторяющимся правилам")
+    recurring.add_argument("--user", help="логин пользователя (по умолчанию все пользователи)")
+    recurring.set_defaults(handler=cmd_recurring)
+
+    rates = commands.add_parser("rates", help="курсы валют")
+    rates.add_argument("action", choices=["import"])
+    rates.add_argument("path", help="CSV-файл с колонками date, currency, rate")
+    rates.add_argument("--delimiter", default=",", help="разделитель колонок CSV")
+    rates.add_argument("--encoding", default="utf-8-sig", help="кодировка файла")
+    rates.set_defaults(handler=cmd_rates)
+
+    importer = commands.add_parser("import", help="импорт банковской выписки (CSV или OFX)")
+    importer.add_argument("path", help="файл выписки")
+    importer.add_argument("--user", required=True, help="логин пользователя")
+    importer.add_argument("--format", choices=["csv", "ofx"], help="формат (по умолчанию по расширению)")
+    importer.add_argument("--column", action="append", default=[],
+                          help="соответствие колонки CSV полю: category|amount|date|type=КОЛОНКА")
+    importer.add_argument("--delimiter", default=",", help="разделитель колонок CSV")
+    importer.add_argument("--encoding", default="utf-8-sig", help="кодировка файла")
+    importer.add_argument("--batch-size", type=int, default=10000, help="строк в одном пакете")
+    importer.add_argument("--no-goals", action="store_true", help="не распределять доходы по целям")
+    importer.set_defaults(handler=cmd_import)
+
+    exporter = commands.add_parser("export", help="экспорт данных пользователя в CSV или Parquet")
+    exporter.add_argument("directory", help="каталог для файлов")
+    exporter.add_argument("--user", required=True, help="логин пользователя")
+    exporter.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    exporter.add_argument("--table", action="append", choices=list(EXPORT_TABLES),
+                          help="экспортируемая таблица (по умолчанию все)")
+    exporter.add_argument("--from", dest="date_from", help="начало периода ГГГГ-ММ-ДД")
+    exporter.add_argument("--to", dest="date_to", help="конец периода ГГГГ-ММ-ДД")
+    exporter.set_defaults(handler=cmd_export)
+
+    seeder = commands.add_parser("seed", help="синтетические данные для замеров производительности")
+    seeder.add_argument("--users", type=int, default=10, help="число пользователей")
+    seeder.add_argument("--transactions", type=int, default=10000, help="общее число транзакций")
+    seeder.add_argument("--goals", type=int, default=5, help="целей на пользователя")
+    seeder.add_argument("--reminders", type=int, default=5, help="напоминаний на пользователя")
+    seeder.add_argument("--seed", type=int, default=42, help="начальное значение генератора")
+    seeder.add_argument("--days", type=int, default=3 * 365, help="глубина истории транзакций в днях")
+    seeder.add_argument("--login-prefix", default="user", help="префикс логинов пользователей")
+    seeder.add_argument("--batch-size", type=int, default=10000, help="строк в одном пакете")
+    seeder.set_defaults(handler=cmd_seed)
+
+    server = commands.add_parser("serve", help="HTTP API для устройств в локальной сети")
+    server.add_argument("--host", default=DEFAULT_HOST, help="адрес для прослушивания")
+    server.add_argument("--port", type=int, default=DEFAULT_PORT, help="порт (0 — любой свободный)")
+    server.add_argument("--workers", type=int, default=WORKERS, help="потоков обработки запросов")
+    server.add_argument("--quiet", action="store_true", help="не писать журнал запросов")
+    server.set_defaults(handler=cmd_serve)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Точка входа командной строки.
+
+    Args:
+        argv (list): Аргументы командной строки (по умолчанию `sys.argv`).
+
+    Returns:
+        int: Код завершения.
+    """
+    args = build_parser().parse_args(argv)
+    db = Database(args.db)
+    try:
+        migrate(db)
+        return args.handler(db, args)
+    except CommandError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 2
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
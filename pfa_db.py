@@ -0,0 +1,205 @@
+"""
+Слой доступа к базе данных приложения "Финансовый помощник".
+
+Все обращения к SQLite проходят через объект `Database`, который держит
+долгоживущие настроенные соединения (по одному на поток) вместо
+`sqlite3.connect()` на каждый запрос. Соединения открываются в режиме WAL,
+с увеличенным кэшем страниц и memory-mapped I/O, а подготовленные
+выражения переиспользуются встроенным кэшем модуля `sqlite3`.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "users.db")
+
+# Размер кэша подготовленных выражений на одно соединение.
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -65536),       # 64 МБ кэша страниц
+    ("mmap_size", 268435456),     # 256 МБ memory-mapped I/O
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000),
+)
+
+# Запросы, которые только читают данные и выполняются без блокировки записи.
+_READ_STATEMENTS = ("SELECT", "WITH", "EXPLAIN", "VALUES")
+
+
+class Database:
+    """
+    Долгоживущее подключение к базе данных SQLite.
+
+    Каждый поток получает собственное соединение, которое открывается один раз
+    и затем переиспользуется всеми запросами этого потока. Запись
+    сериализуется блокировкой, чтобы одновременно работал только один писатель:
+    `transaction()` держит ее до COMMIT, а одиночные изменяющие запросы
+    `execute()` и `executemany()` вне транзакции берут ее на время запроса.
+    Чтение (SELECT, WITH, EXPLAIN, VALUES) идет без блокировки; изменяющий
+    запрос, начинающийся с WITH, нужно выполнять внутри `transaction()`.
+
+    Атрибуты:
+        path (str): Путь к файлу базы данных.
+    """
+    def __init__(self, path=DB_PATH, cached_statements=STATEMENT_CACHE_SIZE):
+        """
+        Args:
+            path (str): Путь к файлу базы данных.
+            cached_statements (int): Размер кэша подготовленных выражений.
+        """
+        self.path = path
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def _connect(self):
+        """
+        Открывает и настраивает новое соединение.
+
+        Returns:
+            sqlite3.Connection: Соединение в режиме автокоммита.
+        """
+        conn = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        for name, value in PRAGMAS:
+            conn.execute(f"PRAGMA {name} = {value}")
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def connection(self):
+        """
+        Возвращает соединение текущего потока, открывая его при первом обращении.
+
+        Returns:
+            sqlite3.Connection: Настроенное соединение.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    def execute(self, sql, params=()):
+        """
+        Выполняет один SQL-запрос. Изменяющий запрос выполняется под
+        блокировкой записи.
+
+        Args:
+            sql (str): Текст запроса.
+            params (tuple): Параметры запроса.
+
+        Returns:
+            sqlite3.Cursor: Курсор с результатом.
+        """
+        conn = self.connection()
+        if sql.lstrip()[:7].upper().startswith(_READ_STATEMENTS):
+            return conn.execute(sql, params)
+        with self._write_lock:
+            return conn.execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        """
+        Выполняет один SQL-запрос для набора параметров под блокировкой записи.
+
+        Args:
+            sql (str): Текст запроса.
+            seq_of_params (iterable): Наборы параметров.
+
+        Returns:
+            sqlite3.Cursor: Курсор с результатом.
+        """
+        conn = self.connection()
+        with self._write_lock:
+            return conn.executemany(sql, seq_of_params)
+
+    def fetchone(self, sql, params=()):
+        """
+        Выполняет запрос и возвращает первую строку результата.
+        """
+        return self.execute(sql, params).fetchone()
+
+    def fetchall(self, sql, params=()):
+        """
+        Выполняет запрос и возвращает все строки результата.
+        """
+        return self.execute(sql, params).fetchall()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Открывает транзакцию на запись.
+
+        Вложенные вызовы присоединяются к внешней транзакции. При исключении
+        все изменения откатываются.
+
+        Yields:
+            sqlite3.Connection: Соединение текущего потока.
+        """
+        with self._write_lock:
+            conn = self.connection()
+            outermost = self._local.depth == 0
+            if outermost:
+                conn.execute("BEGIN IMMEDIATE")
+            self._local.depth += 1
+            try:
+                yield conn
+            except BaseException:
+                self._local.depth -= 1
+                if outermost:
+                    conn.execute("ROLLBACK")
+                raise
+            self._local.depth -= 1
+            if outermost:
+                conn.execute("COMMIT")
+
+    def close(self):
+        """
+        Закрывает все открытые соединения.
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+_default_db = None
+_default_db_lock = threading.Lock()
+
+
+def get_db():
+    """
+    Возвращает общий для приложения объект `Database`.
+
+    Returns:
+        Database: Подключение к `users.db` рядом с приложением.
+    """
+    global _default_db
+    with _default_db_lock:
+        if _default_db is None:
+            _default_db = Database()
+        return _default_db
+
+
+def set_db(db):
+    """
+    Подменяет общий объект `Database` (например, на базу во временном каталоге).
+
+    Args:
+        db (Database): Новое подключение.
+    """
+    global _default_db
+    with _default_db_lock:
+        _default_db = db
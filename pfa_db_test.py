@@ -0,0 +1,64 @@
+import threading
+import pytest
+import pfa_db
+from pfa_db import Database
+
+
+@pytest.fixture
+def raw_db(tmp_path):
+    database = Database(str(tmp_path / "test.db"))
+    database.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT)")
+    yield database
+    database.close()
+
+
+def test_pragmas_applied(raw_db):
+    assert raw_db.fetchone("PRAGMA journal_mode")[0] == "wal"
+    assert raw_db.fetchone("PRAGMA synchronous")[0] == 1  # NORMAL
+    assert raw_db.fetchone("PRAGMA cache_size")[0] == -65536
+
+
+def test_connection_reused(raw_db):
+    assert raw_db.connection() is raw_db.connection()
+
+
+def test_connection_per_thread(raw_db):
+    other = []
+    thread = threading.Thread(target=lambda: other.append(raw_db.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not raw_db.connection()
+
+
+def test_transaction_commit(raw_db):
+    with raw_db.transaction() as conn:
+        conn.execute("INSERT INTO items (value) VALUES ('a')")
+        with raw_db.transaction() as inner:
+            inner.execute("INSERT INTO items (value) VALUES ('b')")
+    assert raw_db.fetchone("SELECT COUNT(*) FROM items")[0] == 2
+
+
+def test_transaction_rollback(raw_db):
+    with pytest.raises(RuntimeError):
+        with raw_db.transaction() as conn:
+            conn.execute("INSERT INTO items (value) VALUES ('a')")
+            raise RuntimeError("boom")
+    assert raw_db.fetchone("SELECT COUNT(*) FROM items")[0] == 0
+    assert not raw_db.connection().in_transaction
+
+
+def test_execute_write_waits_for_transaction(raw_db, monkeypatch):
+    # Без ожидания занятой базы запись вне блокировки сразу упала бы с "database is locked".
+    monkeypatch.setattr(pfa_db, "PRAGMAS", pfa_db.PRAGMAS + (("busy_timeout", 0),))
+    order = []
+    writer = threading.Thread(target=lambda: (raw_db.execute("INSERT INTO items (value) VALUES ('b')"),
+                                              order.append("b")))
+    with raw_db.transaction() as conn:
+        conn.execute("INSERT INTO items (value) VALUES ('a')")
+        writer.start()
+        writer.join(0.2)
+        assert writer.is_alive()
+        assert raw_db.fetchone("SELECT COUNT(*) FROM items")[0] == 1
+        order.append("a")
+    writer.join()
+    assert order == ["a", "b"]
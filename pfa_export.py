@@ -0,0 +1,220 @@
+"""
+Потоковый экспорт данных пользователя в CSV и Parquet.
+
+Транзакции, цели и напоминания читаются из базы порциями через `fetchmany`
+и сразу записываются в файл: CSV дописывается построчно, Parquet — по одной
+группе строк (row group) на порцию. Поэтому объем памяти ограничен размером
+порции и не зависит от размера истории. Parquet доступен, если установлен
+пакет `pyarrow`.
+
+Денежные колонки (тип "money") хранятся в базе в копейках (центах) и
+выгружаются в единицах валюты: в CSV — строкой с двумя знаками после точки,
+в Parquet — точным десятичным типом decimal(18, 2). Валюта сумм выгружается
+рядом с ними: у транзакции amount — сумма в базовой валюте (RUB) по курсу на
+дату, а original_amount — сумма в валюте currency; суммы цели указаны в ее
+валюте currency.
+"""
+import csv
+import os
+from datetime import datetime, timedelta
+from pfa_money import Money
+
+CHUNK_SIZE = 10000
+
+# Колонки таблиц с типами для Parquet ("money" — копейки, выгружаемые в единицах валюты),
+# колонка для фильтра по датам и SQL-выражения колонок, которых нет в таблице.
+EXPORT_TABLES = {
+    "transactions": {
+        "columns": (("id", "int64"), ("category", "string"), ("amount", "money"),
+                    ("date", "string"), ("type", "string"), ("currency", "string"),
+                    ("original_amount", "money")),
+        "date_column": "date",
+        "expressions": {
+            "category": "(SELECT name FROM categories WHERE id = category_id)",
+            # У транзакций до появления валют сумма в валюте совпадает с amount.
+            "original_amount": "COALESCE(original_amount, amount)",
+        },
+    },
+    "goals": {
+        "columns": (("id", "int64"), ("title", "string"), ("description", "string"),
+                    ("target_amount", "money"), ("current_amount", "money"),
+                    ("creation_date", "string"), ("target_date", "string"), ("currency", "string")),
+        "date_column": "creation_date",
+    },
+    "reminders": {
+        "columns": (("id", "int64"), ("title", "string"), ("date", "string"),
+                    ("time", "string"), ("description_reminder", "string"),
+                    ("due_at", "int64"), ("status", "string")),
+        "date_column": "date",
+    },
+}
+
+FORMATS = ("csv", "parquet")
+
+
+class ExportError(RuntimeError):
+    """
+    Ошибка экспорта (например, недоступен выбранный формат).
+    """
+
+
+def parquet_available():
+    """
+    Проверяет, установлен ли `pyarrow`.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _date_bounds(date_from, date_to):
+    """
+    Переводит включительный диапазон дат "ГГГГ-ММ-ДД" в условия для текстовой колонки.
+    """
+    conditions = []
+    params = []
+    if date_from:
+        datetime.strptime(date_from, "%Y-%m-%d")
+        conditions.append(">= ?")
+        params.append(date_from)
+    if date_to:
+        next_day = datetime.strptime(date_to, "%Y-%m-%d") + timedelta(days=1)
+        conditions.append("< ?")
+        params.append(next_day.strftime("%Y-%m-%d"))
+    return conditions, params
+
+
+def iter_chunks(db, table, user_id, date_from=None, date_to=None, chunk_size=CHUNK_SIZE):
+    """
+    Читает строки таблицы пользователя порциями.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        table (str): Имя таблицы из `EXPORT_TABLES`.
+        user_id (int): ID пользователя.
+        date_from (str): Начало периода "ГГГГ-ММ-ДД" включительно.
+        date_to (str): Конец периода "ГГГГ-ММ-ДД" включительно.
+        chunk_size (int): Число строк в порции.
+
+    Yields:
+        list: Очередная порция строк.
+    """
+    spec = EXPORT_TABLES[table]
+    expressions = spec.get("expressions", {})
+    columns = ", ".join(expressions.get(name, name) for name, _ in spec["columns"])
+    conditions, params = _date_bounds(date_from, date_to)
+    where = "".join(f" AND {spec['date_column']} {condition}" for condition in conditions)
+    cursor = db.execute(
+        f"SELECT {columns} FROM {table} WHERE user_id = ?{where} ORDER BY {spec['date_column']}, id",
+        (user_id, *params),
+    )
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def _money_rows(chunks, table):
+    """
+    Переводит копейки денежных колонок порций в рубли (`Decimal`).
+    """
+    positions = [index for index, (_, type_name) in enumerate(EXPORT_TABLES[table]["columns"])
+                 if type_name == "money"]
+    for rows in chunks:
+        if positions:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for index in positions:
+                    row[index] = Money(row[index]).rubles
+        yield rows
+
+
+def write_csv(chunks, path, table):
+    """
+    Записывает порции строк в CSV-файл с заголовком.
+
+    Returns:
+        int: Число записанных строк.
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(name for name, _ in EXPORT_TABLES[table]["columns"])
+        for rows in _money_rows(chunks, table):
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def write_parquet(chunks, path, table):
+    """
+    Записывает порции строк в Parquet-файл, по одной группе строк на порцию.
+
+    Returns:
+        int: Число записанных строк.
+
+    Raises:
+        ExportError: Если `pyarrow` не установлен.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Для экспорта в Parquet установите пакет pyarrow") from None
+
+    columns = EXPORT_TABLES[table]["columns"]
+    schema = pa.schema([
+        (name, pa.decimal128(18, 2) if type_name == "money" else pa.type_for_alias(type_name))
+        for name, type_name in columns
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in _money_rows(chunks, table):
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(rows)
+        if count == 0:
+            writer.write_table(schema.empty_table())
+    return count
+
+
+def export_user(db, user_id, directory, file_format="csv", tables=tuple(EXPORT_TABLES),
+                date_from=None, date_to=None, chunk_size=CHUNK_SIZE):
+    """
+    Экспортирует данные пользователя в каталог, по одному файлу на таблицу.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        user_id (int): ID пользователя.
+        directory (str): Каталог для файлов (создается при необходимости).
+        file_format (str): "csv" или "parquet".
+        tables (iterable): Имена экспортируемых таблиц.
+        date_from (str): Начало периода "ГГГГ-ММ-ДД" включительно.
+        date_to (str): Конец периода "ГГГГ-ММ-ДД" включительно.
+        chunk_size (int): Число строк в порции.
+
+    Returns:
+        dict: Путь и число строк для каждой таблицы.
+
+    Raises:
+        ExportError: Если формат не поддерживается или недоступен.
+    """
+    if file_format not in FORMATS:
+        raise ExportError(f"Неизвестный формат экспорта: {file_format}")
+    if file_format == "parquet" and not parquet_available():
+        raise ExportError("Для экспорта в Parquet установите пакет pyarrow")
+    writer = write_parquet if file_format == "parquet" else write_csv
+
+    os.makedirs(directory, exist_ok=True)
+    result = {}
+    for table in tables:
+        path = os.path.join(directory, f"{table}.{file_format}")
+        chunks = iter_chunks(db, table, user_id, date_from, date_to, chunk_size)
+        result[table] = {"path": path, "rows": writer(chunks, path, table)}
+    return result
@@ -0,0 +1,99 @@
+import csv
+import tracemalloc
+import pytest
+from pfa_categories import ensure_category
+from pfa_cli import main
+from pfa_export import ExportError, export_user, iter_chunks
+
+
+def fill(db):
+    groceries, taxi = ensure_category(db, 1, "Продукты"), ensure_category(db, 2, "Такси")
+    db.executemany(
+        "INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (?, ?, ?, ?, ?)",
+        [(1, groceries, 100 + i, f"2024-01-{i + 1:02d} 10:00:00", "Расход") for i in range(20)]
+        + [(2, taxi, 50, "2024-01-05 10:00:00", "Расход")],
+    )
+    db.execute("""
+        INSERT INTO goals (user_id, title, target_amount, current_amount, creation_date, target_date)
+        VALUES (1, 'Отпуск', 1000, 0, '2024-01-03', '2025-01-01')
+    """)
+
+
+def test_iter_chunks_respects_chunk_size_and_dates(db):
+    fill(db)
+    chunks = list(iter_chunks(db, "transactions", 1, "2024-01-05", "2024-01-14", chunk_size=4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    dates = [row[3] for chunk in chunks for row in chunk]
+    assert dates[0] == "2024-01-05 10:00:00"
+    assert dates[-1] == "2024-01-14 10:00:00"
+
+
+def test_export_csv(db, tmp_path):
+    fill(db)
+    result = export_user(db, 1, str(tmp_path / "out"), chunk_size=3)
+    assert {table: info["rows"] for table, info in result.items()} == \
+        {"transactions": 20, "goals": 1, "reminders": 0}
+    with open(result["transactions"]["path"], encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["id", "category", "amount", "date", "type", "currency", "original_amount"]
+    assert rows[1][1:] == ["Продукты", "1.00", "2024-01-01 10:00:00", "Расход", "RUB", "1.00"]
+    assert len(rows) == 21
+
+
+def test_export_keeps_foreign_currency(db, tmp_path):
+    groceries = ensure_category(db, 1, "Продукты")
+    db.execute('''
+        INSERT INTO transactions (user_id, category_id, amount, original_amount, currency, date, type)
+        VALUES (1, ?, 900000, 10000, 'USD', '2024-01-01 10:00:00', 'Расход')
+    ''', (groceries,))
+    db.execute("""
+        INSERT INTO goals (user_id, title, target_amount, current_amount, creation_date, target_date, currency)
+        VALUES (1, 'Ноутбук', 100000, 2500, '2024-01-03', '2025-01-01', 'USD')
+    """)
+    result = export_user(db, 1, str(tmp_path), tables=("transactions", "goals"))
+    with open(result["transactions"]["path"], encoding="utf-8") as f:
+        transaction = next(csv.DictReader(f))
+    assert (transaction["amount"], transaction["original_amount"], transaction["currency"]) == \
+        ("9000.00", "100.00", "USD")
+    with open(result["goals"]["path"], encoding="utf-8") as f:
+        goal = next(csv.DictReader(f))
+    assert (goal["target_amount"], goal["current_amount"], goal["currency"]) == ("1000.00", "25.00", "USD")
+
+
+def test_export_parquet_row_groups(db, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    fill(db)
+    result = export_user(db, 1, str(tmp_path), file_format="parquet", chunk_size=8)
+    parquet_file = pq.ParquetFile(result["transactions"]["path"])
+    assert parquet_file.metadata.num_rows == 20
+    assert parquet_file.metadata.num_row_groups == 3
+    assert pq.read_table(result["reminders"]["path"]).num_rows == 0
+
+
+def test_export_memory_does_not_grow_with_ledger(db, tmp_path):
+    peaks = []
+    for total in (1000, 10000):
+        count = db.fetchone("SELECT COUNT(*) FROM transactions")[0]
+        db.executemany(
+            "INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (1, 1, ?, ?, 'Расход')",
+            ((i, f"2024-01-01 10:00:{i % 60:02d}") for i in range(total - count)),
+        )
+        tracemalloc.start()
+        export_user(db, 1, str(tmp_path), tables=("transactions",), chunk_size=500)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    assert peaks[1] < peaks[0] * 2
+
+
+def test_export_unknown_format(db, tmp_path):
+    with pytest.raises(ExportError):
+        export_user(db, 1, str(tmp_path), file_format="xlsx")
+
+
+def test_cli_export(db, tmp_path, capsys):
+    db.execute("INSERT INTO users (login, password) VALUES ('Pavel', 'abcdefgh')")
+    fill(db)
+    assert main(["--db", db.path, "export", "--user", "Pavel", str(tmp_path),
+                 "--table", "transactions", "--to", "2024-01-02"]) == 0
+    assert "transactions: 2 строк" in capsys.readouterr().out
+    assert main(["--db", db.path, "export", "--user", "Pavel", str(tmp_path), "--from", "01.01.2024"]) == 2
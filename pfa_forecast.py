@@ -0,0 +1,233 @@
+"""
+Прогноз дат достижения финансовых целей.
+
+По транзакциям пользователя строится ряд чистого денежного потока по дням
+(доходы минус расходы) за последние `HISTORY_DAYS` дней. Модель аддитивная:
+линейный тренд по методу наименьших квадратов, средние остатки по дню
+месяца (зарплата, аренда) и по дню недели. Прогноз на `HORIZON_DAYS` дней
+вперед накапливается в сумму, которую пользователь сможет отложить, и даты
+достижения всех целей пользователя находятся одним векторным проходом
+(`numpy.searchsorted`) с учетом стратегии распределения доходов.
+
+Накопления кэшируются по версии данных пользователя из `data_versions`,
+поэтому до новых транзакций прогноз не читает их повторно, а изменение
+целей или стратегии пересчитывается без обращения к транзакциям.
+
+Модуль загружает NumPy и pandas, поэтому импортируется лениво.
+"""
+from collections import OrderedDict
+from datetime import timedelta
+import threading
+import numpy as np
+import pandas as pd
+from pfa_analytics import CACHE_SIZE, data_version
+
+# Глубина истории, по которой строится модель, в днях.
+HISTORY_DAYS = 365
+
+# Насколько далеко вперед ищется дата достижения цели, в днях.
+HORIZON_DAYS = 10 * 365
+
+# Допустимая погрешность при сравнении прогноза (числа с плавающей точкой) с
+# целыми суммами в копейках.
+TOLERANCE = 1e-6
+
+
+def daily_cash_flow(db, user_id, today, days=HISTORY_DAYS):
+    """
+    Строит ряд чистого денежного потока пользователя по дням в копейках.
+
+    Ряд начинается с первого дня с транзакциями в окне `days` дней до
+    `today` включительно; дни без транзакций заполняются нулями.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        user_id (int): ID пользователя.
+        today (date): Последний день ряда.
+        days (int): Глубина истории в днях.
+
+    Returns:
+        pandas.Series: Доходы минус расходы по дням, int64 (пустой ряд, если транзакций нет).
+    """
+    rows = db.fetchall('''
+        SELECT date(date) AS day, SUM(CASE WHEN type = 'Доход' THEN amount ELSE -amount END)
+        FROM transactions
+        WHERE user_id = ? AND date >= ? AND date < ? AND day IS NOT NULL
+        GROUP BY day
+        ORDER BY day
+    ''', (user_id, (today - timedelta(days=days - 1)).isoformat(), (today + timedelta(days=1)).isoformat()))
+    if not rows:
+        return pd.Series(dtype="int64")
+    days_index = pd.to_datetime([row[0] for row in rows])
+    series = pd.Series([row[1] for row in rows], index=days_index, dtype="int64")
+    return series.reindex(pd.date_range(days_index[0], pd.Timestamp(today)), fill_value=0)
+
+
+def project_savings(series, today, horizon=HORIZON_DAYS):
+    """
+    Прогнозирует накопления на каждый день после `today`.
+
+    Тренд продолжается не дольше длины истории, затем остается на
+    достигнутом уровне, чтобы короткая история не давала неограниченный рост
+    или падение. Накопления не убывают: отложенная на цели сумма не
+    возвращается, даже если прогноз потока становится отрицательным.
+
+    Args:
+        series (pandas.Series): Результат `daily_cash_flow`.
+        today (date): Последний день истории.
+        horizon (int): Число дней прогноза.
+
+    Returns:
+        numpy.ndarray: Накопления в копейках на конец дней `today + 1` … `today + horizon`.
+    """
+    if series.empty:
+        return np.zeros(horizon)
+    values = series.to_numpy(dtype=float)
+    length = len(values)
+    x = np.arange(length)
+    if length > 1:
+        slope, intercept = np.polyfit(x, values, 1)
+    else:
+        slope, intercept = 0.0, values[0]
+    residual = pd.Series(values - (intercept + slope * x), index=series.index)
+    monthly = residual.groupby(series.index.day).mean().reindex(range(1, 32), fill_value=0.0)
+    residual = residual - monthly.to_numpy()[series.index.day - 1]
+    weekly = residual.groupby(series.index.dayofweek).mean().reindex(range(7), fill_value=0.0)
+
+    future = pd.date_range(pd.Timestamp(today) + pd.Timedelta(days=1), periods=horizon)
+    steps = np.minimum(np.arange(length, length + horizon), 2 * length - 1)
+    flow = (intercept + slope * steps + monthly.to_numpy()[future.day - 1]
+            + weekly.to_numpy()[future.dayofweek])
+    return np.maximum.accumulate(np.maximum(np.cumsum(flow), 0.0))
+
+
+def required_savings(goals, strategy):
+    """
+    Считает, сколько нужно накопить до достижения каждой незавершенной цели.
+
+    Повторяет стратегии `pfa_goals`: при fill_first цели заполняются по
+    очереди (приоритет, затем ближайший срок); при proportional все цели
+    достигаются одновременно; при priority доля цели пропорциональна ее
+    приоритету среди еще не достигнутых целей.
+
+    Args:
+        goals (list): Записи `Goal` пользователя.
+        strategy (str): Стратегия из `pfa_goals.STRATEGIES`.
+
+    Returns:
+        tuple: ID незавершенных целей и `numpy.ndarray` нужных накоплений в
+        копейках в том же порядке.
+    """
+    active = [goal for goal in goals if goal.current_amount < goal.target_amount]
+    if strategy == "fill_first":
+        active.sort(key=lambda goal: (-goal.priority, goal.target_date, goal.id))
+    remaining = np.array([(goal.target_amount - goal.current_amount).kopecks for goal in active],
+                         dtype=np.int64)
+    ids = [goal.id for goal in active]
+
+    if strategy == "fill_first":
+        return ids, np.cumsum(remaining)
+    if strategy == "proportional":
+        return ids, np.full(len(active), remaining.sum())
+
+    # priority: накопления на единицу приоритета растут одинаково у всех
+    # недостигнутых целей; цель k достигается, когда они доходят до
+    # remaining / priority, а до этого каждая единица дохода делится на
+    # сумму приоритетов оставшихся целей.
+    priorities = np.array([goal.priority for goal in active], dtype=float)
+    thresholds = remaining / priorities
+    order = np.argsort(thresholds, kind="stable")
+    active_priority = np.cumsum(priorities[order][::-1])[::-1]
+    needed = np.empty(len(active))
+    needed[order] = np.cumsum(np.diff(thresholds[order], prepend=0.0) * active_priority)
+    return ids, needed
+
+
+def completion_dates(savings, goals, strategy, today):
+    """
+    Находит даты достижения целей по прогнозу накоплений.
+
+    Args:
+        savings (numpy.ndarray): Результат `project_savings`.
+        goals (list): Записи `Goal` пользователя.
+        strategy (str): Стратегия из `pfa_goals.STRATEGIES`.
+        today (date): Последний день истории.
+
+    Returns:
+        dict: ID незавершенной цели -> `date` или None, если цель не
+        достигается за горизонт прогноза.
+    """
+    ids, needed = required_savings(goals, strategy)
+    positions = np.searchsorted(savings, needed - TOLERANCE)
+    return {
+        goal_id: today + timedelta(days=int(position) + 1) if position < len(savings) else None
+        for goal_id, position in zip(ids, positions)
+    }
+
+
+class ForecastCache:
+    """
+    LRU-кэш прогнозов накоплений с проверкой версии данных пользователя.
+
+    Атрибуты:
+        hits (int): Число ответов из кэша.
+        misses (int): Число пересчетов по транзакциям.
+    """
+    def __init__(self, db, max_entries=CACHE_SIZE, horizon=HORIZON_DAYS):
+        """
+        Args:
+            db (Database): Подключение к базе данных.
+            max_entries (int): Максимальное число записей кэша.
+            horizon (int): Число дней прогноза.
+        """
+        self.db = db
+        self.max_entries = max_entries
+        self.horizon = horizon
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def savings(self, user_id, today):
+        """
+        Возвращает прогноз накоплений, пересчитывая его только после новых
+        транзакций или смены дня.
+
+        Args:
+            user_id (int): ID пользователя.
+            today (date): Последний день истории.
+
+        Returns:
+            numpy.ndarray: Результат `project_savings`.
+        """
+        version = data_version(self.db, user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[:2] == (version, today):
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[2]
+
+        savings = project_savings(daily_cash_flow(self.db, user_id, today), today, self.horizon)
+        with self._lock:
+            self.misses += 1
+            self._entries[user_id] = (version, today, savings)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return savings
+
+    def completion_dates(self, user_id, goals, strategy, today):
+        """
+        Прогнозирует даты достижения целей пользователя.
+
+        Args:
+            user_id (int): ID пользователя.
+            goals (list): Записи `Goal` пользователя.
+            strategy (str): Стратегия из `pfa_goals.STRATEGIES`.
+            today (date): Текущая дата.
+
+        Returns:
+            dict: См. `completion_dates`.
+        """
+        return completion_dates(self.savings(user_id, today), goals, strategy, today)
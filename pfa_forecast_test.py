@@ -0,0 +1,108 @@
+from datetime import date, timedelta
+import pytest
+from pfa_forecast import (ForecastCache, completion_dates, daily_cash_flow, project_savings,
+                          required_savings)
+from pfa_money import Money
+from pfa_service import Goal
+
+TODAY = date(2025, 3, 31)
+
+
+def add(db, amount, day, type_="Доход", user_id=1):
+    db.execute(
+        "INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (?, 1, ?, ?, ?)",
+        (user_id, amount, f"{day.isoformat()} 12:00:00", type_),
+    )
+
+
+def goal(goal_id, target_amount, current_amount=0, priority=1, target_date="2026-01-01"):
+    return Goal(goal_id, f"Цель {goal_id}", Money(target_amount), Money(current_amount), "2025-01-01",
+                target_date, priority)
+
+
+def daily(db, amount, days):
+    for offset in range(days):
+        add(db, amount, TODAY - timedelta(days=offset))
+
+
+def test_daily_cash_flow(db):
+    add(db, 100, TODAY - timedelta(days=3))
+    add(db, 30, TODAY - timedelta(days=3), "Расход")
+    add(db, 50, TODAY)
+    add(db, 999, TODAY, user_id=2)
+    add(db, 999, TODAY + timedelta(days=1))
+    add(db, 999, TODAY - timedelta(days=400))
+    db.execute("INSERT INTO transactions (user_id, category_id, amount, date, type) "
+               "VALUES (1, 1, 5, 'вчера', 'Расход')")
+
+    series = daily_cash_flow(db, 1, TODAY)
+    assert series.tolist() == [70, 0, 0, 50]
+    assert series.index[0].date() == TODAY - timedelta(days=3)
+    assert daily_cash_flow(db, 3, TODAY).empty
+
+
+def test_constant_flow(db):
+    daily(db, 100, 60)
+    savings = project_savings(daily_cash_flow(db, 1, TODAY), TODAY, horizon=30)
+    assert savings == pytest.approx([100 * day for day in range(1, 31)])
+    dates = completion_dates(savings, [goal(1, 1000), goal(2, 500, current_amount=500)], "fill_first", TODAY)
+    assert dates == {1: TODAY + timedelta(days=10)}
+
+
+def test_monthly_seasonality(db):
+    for month in range(3, 15):
+        add(db, 3000, date(2024 + month // 12, month % 12 + 1, 5))
+    for offset in range(365):
+        add(db, 50, TODAY - timedelta(days=offset), "Расход")
+    savings = project_savings(daily_cash_flow(db, 1, TODAY), TODAY)
+    dates = completion_dates(savings, [goal(1, 100), goal(2, 5000)], "fill_first", TODAY)
+    assert dates[1] == date(2025, 4, 5)
+    assert dates[2].day == 5
+
+
+def test_negative_flow_is_never_reached(db):
+    daily(db, 10, 30)
+    add(db, 1000, TODAY, "Расход")
+    for offset in range(1, 30):
+        add(db, 100, TODAY - timedelta(days=offset), "Расход")
+    savings = project_savings(daily_cash_flow(db, 1, TODAY), TODAY, horizon=365)
+    assert savings.max() == 0
+    assert completion_dates(savings, [goal(1, 100)], "fill_first", TODAY) == {1: None}
+
+
+def test_required_savings_by_strategy():
+    goals = [goal(1, 100, priority=1), goal(2, 300, priority=3, target_date="2025-06-01"), goal(3, 50, 50)]
+    assert required_savings(goals, "fill_first")[0] == [2, 1]
+    assert required_savings(goals, "fill_first")[1].tolist() == [300, 400]
+    assert required_savings(goals, "proportional")[1].tolist() == [400, 400]
+
+    ids, needed = required_savings([goal(1, 100, priority=1), goal(2, 100, priority=3)], "priority")
+    assert ids == [1, 2]
+    # Цель 2 получает 3/4 каждого дохода и достигается на 133.33; затем весь доход идет цели 1.
+    assert needed.tolist() == pytest.approx([200, 400 / 3])
+
+
+def test_required_savings_without_goals():
+    for strategy in ("fill_first", "proportional", "priority"):
+        ids, needed = required_savings([goal(1, 10, 10)], strategy)
+        assert ids == [] and len(needed) == 0
+
+
+def test_cache_recomputes_only_after_new_transactions(db):
+    daily(db, 100, 30)
+    cache = ForecastCache(db, horizon=30)
+    assert cache.completion_dates(1, [goal(1, 1000)], "fill_first", TODAY) == {1: TODAY + timedelta(days=10)}
+
+    statements = []
+    db.connection().set_trace_callback(statements.append)
+    try:
+        assert cache.completion_dates(1, [goal(1, 2000)], "fill_first", TODAY) == {1: TODAY + timedelta(days=20)}
+    finally:
+        db.connection().set_trace_callback(None)
+    assert not [sql for sql in statements if "transactions" in sql]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    add(db, 100, TODAY)
+    cache.savings(1, TODAY)
+    cache.savings(1, TODAY + timedelta(days=1))
+    assert (cache.hits, cache.misses) == (1, 3)
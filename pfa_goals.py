@@ -0,0 +1,138 @@
+"""
+Распределение доходов по финансовым целям.
+
+Доход распределяется между незавершенными целями пользователя одним
+запросом `UPDATE ... FROM` с оконными функциями; достигнутые цели
+возвращаются через `RETURNING` и показываются пользователю уже после
+фиксации транзакции. Поддерживаются стратегии:
+
+- fill_first: цели заполняются по очереди (приоритет, затем ближайший срок),
+  следующая — только после достижения предыдущей;
+- proportional: доход делится пропорционально оставшимся суммам целей;
+- priority: доход делится пропорционально приоритетам целей, доля каждой
+  цели ограничена оставшейся суммой (излишек не переносится).
+
+Суммы целых копеек делятся целочисленно (доли proportional и priority
+округляются вниз, остаток в доли копейки цели не достается), поэтому
+прогресс целей точен и не накапливает погрешность плавающей точки.
+
+Пакетный путь (`allocate_incomes`) принимает сразу много доходов, например
+из импорта выписки, суммирует их по пользователям в том же запросе и
+распределяет за один проход. Для fill_first результат совпадает с
+последовательным распределением каждого дохода, для proportional — с
+точностью до округления долей (по копейке на доход и цель).
+
+Суммы цели хранятся в ее валюте, доходы — в базовой валюте: остаток цели
+переводится в базовую валюту по последнему курсу в том же запросе, доля
+дохода переводится обратно в валюту цели (вниз до копейки).
+"""
+import json
+from collections import namedtuple
+from pfa_rates import rate_sql
+
+STRATEGIES = ("fill_first", "proportional", "priority")
+
+STRATEGY_LABELS = {
+    "fill_first": "По очереди",
+    "proportional": "Пропорционально остатку",
+    "priority": "По приоритету",
+}
+
+DEFAULT_STRATEGY = "fill_first"
+
+GoalCompletion = namedtuple("GoalCompletion", "id user_id title")
+
+# Доля дохода, которая достается цели при каждой стратегии. Доступны:
+# g — цель (g.remaining — остаток в базовой валюте), i.amount — доход пользователя.
+_SHARES = {
+    "fill_first": '''
+        i.amount - (SUM(g.remaining) OVER (
+            PARTITION BY g.user_id ORDER BY g.priority DESC, g.target_date, g.id
+        ) - g.remaining)
+    ''',
+    "proportional": '''
+        CASE WHEN i.amount >= SUM(g.remaining) OVER (PARTITION BY g.user_id)
+             THEN g.remaining
+             ELSE i.amount * g.remaining
+                  / SUM(g.remaining) OVER (PARTITION BY g.user_id)
+        END
+    ''',
+    "priority": '''
+        i.amount * g.priority / SUM(g.priority) OVER (PARTITION BY g.user_id)
+    ''',
+}
+
+_ALLOCATE_SQL = '''
+    WITH income (user_id, amount) AS (
+        SELECT json_extract(value, '$[0]'), SUM(json_extract(value, '$[1]'))
+        FROM json_each(?)
+        GROUP BY 1
+    ),
+    goal AS (
+        SELECT id, user_id, priority, target_date, rate,
+               CAST(ROUND((target_amount - current_amount) * rate) AS INTEGER) AS remaining
+        FROM (
+            SELECT goals.*, {rate} AS rate
+            FROM goals
+            WHERE current_amount < target_amount AND user_id IN (SELECT user_id FROM income)
+        )
+    ),
+    allocation AS (
+        SELECT g.id, g.remaining, g.rate, {share} AS share
+        FROM goal AS g
+        JOIN income AS i ON i.user_id = g.user_id
+    )
+    UPDATE goals
+    SET current_amount = CASE WHEN allocation.share >= allocation.remaining THEN goals.target_amount
+                              ELSE goals.current_amount + CAST(allocation.share / allocation.rate AS INTEGER) END
+    FROM allocation
+    WHERE goals.id = allocation.id AND allocation.share > 0
+    RETURNING goals.id, goals.user_id, goals.title, goals.current_amount >= goals.target_amount
+'''
+
+
+def validate_strategy(strategy):
+    """
+    Raises:
+        ValueError: Если стратегия неизвестна.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Неизвестная стратегия распределения: {strategy!r}")
+    return strategy
+
+
+def goal_strategy(db, user_id):
+    """
+    Возвращает стратегию распределения доходов, выбранную пользователем.
+
+    Args:
+        db (Database | sqlite3.Connection): Подключение к базе данных.
+        user_id (int): ID пользователя.
+    """
+    row = db.execute("SELECT goal_strategy FROM users WHERE id = ?", (user_id,)).fetchone()
+    return row[0] if row else DEFAULT_STRATEGY
+
+
+def allocate_incomes(conn, incomes, strategy=DEFAULT_STRATEGY):
+    """
+    Распределяет доходы по незавершенным целям одним запросом.
+
+    Вызывается внутри транзакции, в которой добавлены сами доходы.
+
+    Args:
+        conn (sqlite3.Connection): Соединение с открытой транзакцией.
+        incomes (iterable): Пары (ID пользователя, сумма дохода в копейках).
+        strategy (str): Стратегия из `STRATEGIES`.
+
+    Returns:
+        list: Записи `GoalCompletion` для целей, достигнутых этими доходами.
+
+    Raises:
+        ValueError: Если стратегия неизвестна.
+    """
+    sql = _ALLOCATE_SQL.format(share=_SHARES[validate_strategy(strategy)], rate=rate_sql("goals.currency"))
+    payload = json.dumps([[user_id, amount] for user_id, amount in incomes if amount > 0])
+    if payload == "[]":
+        return []
+    rows = conn.execute(sql, (payload,)).fetchall()
+    return [GoalCompletion(goal_id, user_id, title) for goal_id, user_id, title, done in sorted(rows) if done]
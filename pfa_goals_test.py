@@ -0,0 +1,106 @@
+import pytest
+from pfa_goals import STRATEGIES, GoalCompletion, allocate_incomes, goal_strategy
+
+
+def add_user(db, login="Pavel"):
+    return db.execute("INSERT INTO users (login, password) VALUES (?, 'password123')", (login,)).lastrowid
+
+
+def add_goal(db, user_id, title, target, current=0, target_date="2025-12-31", priority=1):
+    return db.execute('''
+        INSERT INTO goals (user_id, title, target_amount, current_amount, creation_date, target_date, priority)
+        VALUES (?, ?, ?, ?, '2025-01-01', ?, ?)
+    ''', (user_id, title, target, current, target_date, priority)).lastrowid
+
+
+def amounts(db, user_id):
+    return [row[0] for row in db.fetchall("SELECT current_amount FROM goals WHERE user_id = ? ORDER BY id", (user_id,))]
+
+
+def allocate(db, incomes, strategy):
+    with db.transaction() as conn:
+        return allocate_incomes(conn, incomes, strategy)
+
+
+@pytest.fixture
+def user_id(db):
+    return add_user(db)
+
+
+def test_fill_first_fills_by_priority_then_deadline(db, user_id):
+    add_goal(db, user_id, "Поздняя", 100, target_date="2026-01-01")
+    add_goal(db, user_id, "Ранняя", 100, target_date="2025-06-01")
+    add_goal(db, user_id, "Важная", 100, target_date="2027-01-01", priority=5)
+
+    completed = allocate(db, [(user_id, 150)], "fill_first")
+
+    assert amounts(db, user_id) == [0, 50, 100]
+    assert [goal.title for goal in completed] == ["Важная"]
+
+
+def test_proportional_splits_by_remaining(db, user_id):
+    add_goal(db, user_id, "Маленькая", 100)
+    add_goal(db, user_id, "Большая", 400, current=100)
+
+    allocate(db, [(user_id, 100)], "proportional")
+    assert amounts(db, user_id) == pytest.approx([25, 175])
+
+    completed = allocate(db, [(user_id, 1000)], "proportional")
+    assert amounts(db, user_id) == [100, 400]
+    assert len(completed) == 2
+
+
+def test_priority_splits_by_weight_and_caps_at_target(db, user_id):
+    add_goal(db, user_id, "Обычная", 1000, priority=1)
+    add_goal(db, user_id, "Срочная", 100, priority=3)
+
+    completed = allocate(db, [(user_id, 200)], "priority")
+
+    assert amounts(db, user_id) == [50, 100]
+    assert completed == [GoalCompletion(2, user_id, "Срочная")]
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_completed_goals_are_not_reported_again(db, user_id, strategy):
+    add_goal(db, user_id, "Цель", 100)
+    assert len(allocate(db, [(user_id, 100)], strategy)) == 1
+    assert allocate(db, [(user_id, 100)], strategy) == []
+    assert amounts(db, user_id) == [100]
+
+
+@pytest.mark.parametrize("strategy", ["fill_first", "proportional"])
+def test_batch_matches_sequential_allocation(db, strategy):
+    sequential, batch = add_user(db, "seq"), add_user(db, "batch")
+    for user in (sequential, batch):
+        add_goal(db, user, "A", 500, target_date="2025-03-01")
+        add_goal(db, user, "B", 1500, current=200, target_date="2025-02-01")
+        add_goal(db, user, "C", 3000, target_date="2025-04-01")
+    incomes = [37.5 * (i % 7 + 1) for i in range(40)]
+
+    completed_sequential = []
+    for amount in incomes:
+        completed_sequential += allocate(db, [(sequential, amount)], strategy)
+    completed_batch = allocate(db, [(batch, amount) for amount in incomes], strategy)
+
+    assert amounts(db, batch) == pytest.approx(amounts(db, sequential))
+    assert [g.title for g in completed_batch] == sorted(g.title for g in completed_sequential)
+
+
+def test_batch_allocates_many_users_in_one_statement(db):
+    users = [add_user(db, f"user{i}") for i in range(50)]
+    for user in users:
+        add_goal(db, user, "Цель", 1000)
+    statements = []
+    db.connection().set_trace_callback(statements.append)
+
+    completed = allocate(db, [(user, 10) for user in users for _ in range(100)], "fill_first")
+
+    db.connection().set_trace_callback(None)
+    assert len([sql for sql in statements if "UPDATE goals" in sql]) == 1
+    assert len(completed) == 50
+
+
+def test_user_strategy_defaults_and_rejects_unknown(db, user_id):
+    assert goal_strategy(db, user_id) == "fill_first"
+    with pytest.raises(ValueError):
+        allocate(db, [(user_id, 10)], "random")
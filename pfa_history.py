@@ -0,0 +1,471 @@
+"""
+Виртуализированная история транзакций.
+
+Вместо загрузки всех транзакций пользователя в `ttk.Treeview` история
+подгружается страницами по мере прокрутки. Страницы выбираются keyset-пагинацией
+по ключу сортировки (например, (date, id)), поэтому стоимость запроса не зависит
+от того, насколько далеко прокручен список. Фильтры и сортировка переводятся в
+параметризованные `WHERE` и `ORDER BY`; для каждого ключа сортировки в схеме
+есть индекс (user_id, ...ключ), так что страница читается из индекса без
+сортировки в памяти. Исключение — диапазон по другой колонке (например, период
+при сортировке по сумме): тогда SQLite может выбрать индекс этого диапазона и
+отсортировать только отобранные им строки. Имя категории каждой строки
+читается из `categories` по первичному ключу. В виджете одновременно
+существует не больше `max_pages` страниц.
+
+Страницы читаются через переданную функцию запуска задач (например,
+`DatabaseWorker.submit` в фоновом потоке); в поток Tk возвращается готовый
+список строк окна.
+"""
+import tkinter as tk
+from collections import deque, namedtuple
+from datetime import timedelta
+from tkinter import ttk
+from pfa_money import Money
+from pfa_treeview import TreeviewReconciler
+from pfa_worker import run_now
+
+PAGE_SIZE = 100
+MAX_PAGES = 3
+
+# Доля прокрутки у края окна, при которой подгружается соседняя страница.
+SCROLL_THRESHOLD = 0.1
+
+# Колонки ORDER BY для каждой сортировки (после них — id транзакции).
+# Каждому ключу соответствует индекс схемы: (user_id, date), (user_id, amount),
+# (user_id, type, date); при сортировке по категории категории пользователя
+# перебираются по имени (индекс (user_id, name) таблицы `categories`), а
+# транзакции каждой категории — по индексу (user_id, category_id, date).
+SORT_KEYS = {
+    "date": ("date",),
+    "amount": ("amount",),
+    "category": ("category", "date"),
+    "type": ("type", "date"),
+}
+
+_COLUMNS = ("id", "category", "amount", "type", "date")
+_EXPRESSIONS = {"id": "t.id", "category": "c.name", "amount": "t.amount", "type": "t.type", "date": "t.date"}
+
+# Граница даты, которая больше или меньше любой даты транзакции.
+_DATE_BOUNDS = {True: "\U0010ffff", False: ""}
+
+# Фильтр истории: date_from и date_to (date) — границы включительно,
+# transaction_type и category (имя) — точное совпадение, amount_min и
+# amount_max (`Money`) — границы суммы включительно. None — без ограничения.
+HistoryFilter = namedtuple(
+    "HistoryFilter", "date_from date_to transaction_type category amount_min amount_max",
+    defaults=(None,) * 6,
+)
+
+
+def filter_clause(filters, user_id):
+    """
+    Переводит фильтр в условия `WHERE` по транзакциям `t`.
+
+    Args:
+        filters (HistoryFilter): Фильтр истории.
+        user_id (int): ID пользователя (категория ищется по имени среди его категорий).
+
+    Returns:
+        tuple: Список условий и список их параметров.
+    """
+    clauses, params = [], []
+    if filters.date_from is not None:
+        clauses.append("t.date >= ?")
+        params.append(filters.date_from.isoformat())
+    if filters.date_to is not None:
+        clauses.append("t.date < ?")
+        params.append((filters.date_to + timedelta(days=1)).isoformat())
+    if filters.transaction_type is not None:
+        clauses.append("t.type = ?")
+        params.append(filters.transaction_type)
+    if filters.category is not None:
+        # Подзапрос вычисляется один раз, поэтому category_id сравнивается
+        # с константой и транзакции читаются по индексу.
+        clauses.append("t.category_id = (SELECT id FROM categories WHERE user_id = ? AND name = ?)")
+        params.extend((user_id, filters.category))
+    if filters.amount_min is not None:
+        clauses.append("t.amount >= ?")
+        params.append(filters.amount_min.kopecks)
+    if filters.amount_max is not None:
+        clauses.append("t.amount <= ?")
+        params.append(filters.amount_max.kopecks)
+    return clauses, params
+
+
+class TransactionPager:
+    """
+    Постраничное чтение транзакций пользователя с фильтром и сортировкой.
+
+    Строки возвращаются в виде кортежей (id, category, amount, type, date),
+    где category — имя категории; ключ строки для пагинации — значения колонок
+    сортировки и id, например (date, id).
+    """
+    def __init__(self, db, user_id, page_size=PAGE_SIZE, filters=HistoryFilter(), sort="date", descending=True):
+        """
+        Args:
+            db (Database): Подключение к базе данных.
+            user_id (int): ID пользователя.
+            page_size (int): Число строк на странице.
+            filters (HistoryFilter): Фильтр истории.
+            sort (str): Колонка сортировки — ключ `SORT_KEYS`.
+            descending (bool): Сортировать по убыванию (новые, крупные первыми).
+
+        Raises:
+            ValueError: Если колонка сортировки неизвестна.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Неизвестная колонка сортировки: {sort!r}")
+        self.db = db
+        self.user_id = user_id
+        self.page_size = page_size
+        self.filters = filters
+        self.sort = sort
+        self.descending = descending
+        # Колонка, закрепленная фильтром на равенство, не меняет порядок строк;
+        # без нее ключ совпадает с хвостом индекса и сортировка не нужна.
+        pinned = {"type"} if filters.transaction_type is not None else set()
+        if filters.category is not None:
+            pinned.add("category")
+        self.key_columns = tuple(column for column in SORT_KEYS[sort] if column not in pinned) + ("id",)
+        self._key_positions = [_COLUMNS.index(column) for column in self.key_columns]
+        self._where, self._params = filter_clause(filters, user_id)
+
+    def key(self, row):
+        """
+        Возвращает ключ пагинации строки.
+        """
+        return tuple(row[position] for position in self._key_positions)
+
+    def _select(self, descending, key=None, inclusive=False):
+        """
+        Читает страницу в порядке `descending`, начиная после строки с ключом `key`.
+        """
+        operator = ("<" if descending else ">") + ("=" if inclusive else "")
+        where, params = [*self._where], [*self._params]
+        if self.key_columns[0] == "category":
+            # Внешний цикл — категории по имени, внутренний — транзакции
+            # категории по дате. Для категории из ключа граница (date, id)
+            # берется из ключа, для следующих категорий она открыта, поэтому
+            # оба цикла идут по индексам (CROSS JOIN фиксирует их порядок).
+            source = "categories c CROSS JOIN transactions t ON t.user_id = c.user_id AND t.category_id = c.id"
+            where.insert(0, "c.user_id = ?")
+            params.insert(0, self.user_id)
+            if key is not None:
+                name, date, row_id = key
+                where.append(f"c.name {operator[0]}= ?")
+                where.append(f"(t.date, t.id) {operator} (CASE WHEN c.name = ? THEN ? ELSE ? END, "
+                             "CASE WHEN c.name = ? THEN ? ELSE 0 END)")
+                params.extend((name, name, date, _DATE_BOUNDS[descending], name, row_id))
+        else:
+            source = "transactions t CROSS JOIN categories c ON c.id = t.category_id"
+            where.insert(0, "t.user_id = ?")
+            params.insert(0, self.user_id)
+            if key is not None:
+                columns = ", ".join(_EXPRESSIONS[column] for column in self.key_columns)
+                where.append(f"({columns}) {operator} ({', '.join('?' * len(key))})")
+                params.extend(key)
+        direction = "DESC" if descending else "ASC"
+        return self.db.fetchall(f'''
+            SELECT {", ".join(_EXPRESSIONS[column] for column in _COLUMNS)}
+            FROM {source}
+            WHERE {" AND ".join(where)}
+            ORDER BY {", ".join(f"{_EXPRESSIONS[column]} {direction}" for column in self.key_columns)}
+            LIMIT ?
+        ''', (*params, self.page_size))
+
+    def first_page(self):
+        """
+        Возвращает первую страницу (самые новые транзакции при сортировке по дате).
+        """
+        return self._select(self.descending)
+
+    def page_after(self, key, inclusive=False):
+        """
+        Возвращает страницу транзакций, следующих за строкой с ключом `key`.
+
+        Args:
+            key (tuple): Ключ строки.
+            inclusive (bool): Включать ли саму строку с ключом `key`.
+        """
+        return self._select(self.descending, key, inclusive)
+
+    def page_before(self, key):
+        """
+        Возвращает страницу транзакций, предшествующих строке с ключом `key`
+        (в порядке отображения).
+        """
+        rows = self._select(not self.descending, key)
+        rows.reverse()
+        return rows
+
+
+class HistoryWindow:
+    """
+    Скользящее окно из нескольких соседних страниц истории.
+
+    Окно хранит не больше `max_pages` страниц: при подгрузке страницы с одного
+    края страница с противоположного края вытесняется.
+    """
+    def __init__(self, pager, max_pages=MAX_PAGES):
+        """
+        Args:
+            pager (TransactionPager): Источник страниц.
+            max_pages (int): Максимальное число страниц в окне.
+        """
+        self.pager = pager
+        self.max_pages = max_pages
+        self.pages = deque()
+        self.at_start = True
+        self.at_end = False
+
+    @property
+    def rows(self):
+        """
+        Все строки окна в порядке отображения.
+        """
+        return [row for page in self.pages for row in page]
+
+    def reset(self):
+        """
+        Перезагружает окно с первой страницы.
+
+        Returns:
+            list: Строки окна.
+        """
+        page = self.pager.first_page()
+        self.pages = deque([page] if page else [])
+        self.at_start = True
+        self.at_end = len(page) < self.pager.page_size
+        return page
+
+    def reload(self):
+        """
+        Перечитывает страницы окна, сохраняя его положение в истории.
+
+        Если окно начинается с самых новых строк, оно перечитывается с начала
+        (чтобы показать новые транзакции), иначе — с первой строки окна.
+
+        Returns:
+            list: Строки окна.
+        """
+        count = max(len(self.pages), 1)
+        if self.at_start or not self.pages:
+            self.reset()
+        else:
+            page = self.pager.page_after(self.pager.key(self.pages[0][0]), inclusive=True)
+            self.pages = deque([page] if page else [])
+            self.at_end = len(page) < self.pager.page_size
+        while len(self.pages) < count and self.scroll_down():
+            pass
+        return self.rows
+
+    def scroll_down(self):
+        """
+        Подгружает следующую (более старую) страницу.
+
+        Returns:
+            tuple: (добавленные строки, вытесненные сверху строки) или None,
+            если дальше строк нет.
+        """
+        if self.at_end or not self.pages:
+            return None
+        page = self.pager.page_after(self.pager.key(self.pages[-1][-1]))
+        if len(page) < self.pager.page_size:
+            self.at_end = True
+        if not page:
+            return None
+        self.pages.append(page)
+        evicted = []
+        if len(self.pages) > self.max_pages:
+            evicted = self.pages.popleft()
+            self.at_start = False
+        return page, evicted
+
+    def scroll_up(self):
+        """
+        Подгружает предыдущую (более новую) страницу, если она была вытеснена.
+
+        Returns:
+            tuple: (добавленные строки, вытесненные снизу строки) или None,
+            если окно уже начинается с самых новых строк.
+        """
+        if self.at_start or not self.pages:
+            return None
+        page = self.pager.page_before(self.pager.key(self.pages[0][0]))
+        if len(page) < self.pager.page_size:
+            self.at_start = True
+        if not page:
+            return None
+        self.pages.appendleft(page)
+        evicted = []
+        if len(self.pages) > self.max_pages:
+            evicted = self.pages.pop()
+            self.at_end = False
+        return page, evicted
+
+
+class VirtualTransactionsView:
+    """
+    Таблица истории транзакций с подгрузкой страниц при прокрутке,
+    фильтром и сортировкой по щелчку на заголовке колонки.
+
+    Атрибуты:
+        tree (ttk.Treeview): Виджет таблицы; ID элемента — ID транзакции.
+        window (HistoryWindow): Окно материализованных страниц.
+        filters (HistoryFilter): Текущий фильтр.
+    """
+    HEADINGS = {"category": "Категория", "amount": "Сумма", "type": "Тип", "date": "Дата"}
+
+    def __init__(self, master, db, user_id, page_size=PAGE_SIZE, max_pages=MAX_PAGES, run=run_now):
+        """
+        Args:
+            master (tk.Widget): Родительский виджет.
+            db (Database): Подключение к базе данных.
+            user_id (int): ID пользователя.
+            page_size (int): Число строк на странице.
+            max_pages (int): Максимальное число страниц в виджете.
+            run (callable): Запускает чтение страниц: `run(задача, on_done, on_error)`.
+                По умолчанию — сразу в текущем потоке.
+        """
+        self.db = db
+        self.user_id = user_id
+        self.page_size = page_size
+        self.window = HistoryWindow(TransactionPager(db, user_id, page_size), max_pages)
+        self.run = run
+        self._loading = False
+        self.filters = HistoryFilter()
+        self._sort = ("date", True)
+
+        frame = tk.Frame(master)
+        frame.pack(fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL)
+        self.tree = ttk.Treeview(
+            frame,
+            columns=tuple(self.HEADINGS),
+            show="headings",
+            yscrollcommand=self._on_yscroll,
+        )
+        self.scrollbar.config(command=self.tree.yview)
+        for column in self.HEADINGS:
+            self.tree.heading(column, command=lambda column=column: self.sort_by(column))
+        self._update_headings()
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.reconciler = TreeviewReconciler(self.tree)
+
+    def set_filter(self, filters):
+        """
+        Применяет фильтр и показывает первую страницу (один запрос к базе).
+
+        Args:
+            filters (HistoryFilter): Фильтр истории.
+        """
+        self.filters = filters
+        self._show()
+
+    def sort_by(self, column):
+        """
+        Сортирует историю по колонке; повторный щелчок меняет направление.
+
+        Args:
+            column (str): Колонка — ключ `SORT_KEYS`.
+        """
+        sort, descending = self._sort
+        self._sort = (column, not descending if column == sort else column in ("date", "amount"))
+        self._show()
+
+    def _show(self):
+        """
+        Перечитывает историю с первой страницы с текущими фильтром и
+        сортировкой. Источник страниц окна заменяется внутри задачи `run`,
+        чтобы не менять его под уже запущенной подгрузкой.
+        """
+        pager = TransactionPager(self.db, self.user_id, self.page_size, self.filters, *self._sort)
+
+        def reset():
+            self.window.pager = pager
+            return self.window.reset()
+
+        self._update_headings()
+        self.run(reset, self._render_first)
+
+    def _render_first(self, rows):
+        self._render(rows)
+        self.tree.yview_moveto(0)
+
+    def _update_headings(self):
+        sort, descending = self._sort
+        for column, text in self.HEADINGS.items():
+            if column == sort:
+                text += " ▼" if descending else " ▲"
+            self.tree.heading(column, text=text)
+
+    def refresh(self):
+        """
+        Перечитывает видимые страницы и точечно обновляет таблицу,
+        сохраняя прокрутку и выделение.
+        """
+        self.run(self._reload, self._render)
+
+    def _reload(self):
+        self.window.reload()
+        return self.window.rows
+
+    def _render(self, rows):
+        self.reconciler.reconcile(
+            (row_id, (category, str(Money(amount)), transaction_type, date), ())
+            for row_id, category, amount, transaction_type, date in rows
+        )
+
+    def _on_yscroll(self, first, last):
+        """
+        Обновляет полосу прокрутки и подгружает страницы у краев окна.
+        """
+        self.scrollbar.set(first, last)
+        if self._loading:
+            return
+        if float(last) >= 1.0 - SCROLL_THRESHOLD and not self.window.at_end:
+            self._loading = True
+            self.tree.after_idle(self._load_next)
+        elif float(first) <= SCROLL_THRESHOLD and not self.window.at_start:
+            self._loading = True
+            self.tree.after_idle(self._load_previous)
+
+    def _load_next(self):
+        self._load(self.window.scroll_down)
+
+    def _load_previous(self):
+        self._load(self.window.scroll_up)
+
+    def _load(self, scroll):
+        """
+        Подгружает соседнюю страницу и возвращает прокрутку к прежней верхней строке.
+        """
+        anchor = self._top_item()
+        self.run(lambda: self.window.rows if scroll() else None,
+                 lambda rows: self._loaded(rows, anchor), self._load_failed)
+
+    def _loaded(self, rows, anchor):
+        self._loading = False
+        if rows is not None:
+            self._render(rows)
+            self._restore(anchor)
+
+    def _load_failed(self, error):
+        self._loading = False
+
+    def _top_item(self):
+        children = self.tree.get_children()
+        if not children:
+            return None
+        first = float(self.tree.yview()[0])
+        return children[min(int(first * len(children)), len(children) - 1)]
+
+    def _restore(self, anchor):
+        """
+        Возвращает прокрутку к строке, которая была сверху до подгрузки.
+        """
+        if anchor is None or not self.tree.exists(anchor):
+            return
+        self.tree.yview_moveto(self.tree.index(anchor) / len(self.tree.get_children()))
@@ -0,0 +1,180 @@
+from datetime import date
+import pytest
+from pfa_categories import ensure_category
+from pfa_history import SORT_KEYS, HistoryFilter, HistoryWindow, TransactionPager
+from pfa_money import Money
+
+
+def fill(db, count, user_id=1):
+    category_id = ensure_category(db, user_id, "Продукты")
+    db.executemany(
+        "INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (?, ?, ?, ?, ?)",
+        ((user_id, category_id, i, f"2024-01-{i % 28 + 1:02d} 10:00:00", "Расход") for i in range(count)),
+    )
+
+
+def expected_order(db, user_id=1):
+    return [row[0] for row in db.fetchall(
+        "SELECT id FROM transactions WHERE user_id = ? ORDER BY date DESC, id DESC", (user_id,)
+    )]
+
+
+def test_pager_walks_all_rows_in_order(db):
+    fill(db, 250)
+    fill(db, 10, user_id=2)
+    pager = TransactionPager(db, 1, page_size=40)
+    ids = []
+    page = pager.first_page()
+    while page:
+        ids.extend(row[0] for row in page)
+        page = pager.page_after(pager.key(page[-1]))
+    assert ids == expected_order(db)
+
+
+def test_page_before_returns_newer_rows(db):
+    fill(db, 100)
+    pager = TransactionPager(db, 1, page_size=10)
+    second = pager.page_after(pager.key(pager.first_page()[-1]))
+    assert pager.page_before(pager.key(second[0])) == pager.first_page()
+
+
+def test_pager_uses_keyset_index(db):
+    plan = " ".join(row[3] for row in db.fetchall(
+        "EXPLAIN QUERY PLAN SELECT id FROM transactions WHERE user_id = ? AND (date, id) < (?, ?) "
+        "ORDER BY date DESC, id DESC LIMIT 10", (1, "2024-01-01", 1)
+    ))
+    assert "idx_transactions_user_date (user_id=? AND date<?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_window_keeps_fixed_number_of_pages(db):
+    fill(db, 1000)
+    window = HistoryWindow(TransactionPager(db, 1, page_size=50), max_pages=3)
+    window.reset()
+    while window.scroll_down():
+        assert len(window.rows) <= 150
+    assert window.at_end
+    assert [row[0] for row in window.rows] == expected_order(db)[-150:]
+
+    while window.scroll_up():
+        assert len(window.rows) <= 150
+    assert window.at_start
+    assert [row[0] for row in window.rows] == expected_order(db)[:150]
+
+
+def test_window_small_history(db):
+    fill(db, 5)
+    window = HistoryWindow(TransactionPager(db, 1, page_size=50))
+    assert len(window.reset()) == 5
+    assert window.scroll_down() is None
+    assert window.scroll_up() is None
+
+
+def test_window_reload_keeps_position(db):
+    fill(db, 500)
+    window = HistoryWindow(TransactionPager(db, 1, page_size=50), max_pages=3)
+    window.reset()
+    for _ in range(5):
+        window.scroll_down()
+    before = [row[0] for row in window.rows]
+    fill(db, 1)
+    assert [row[0] for row in window.reload()] == before
+
+
+def test_window_reload_at_start_shows_new_rows(db):
+    fill(db, 120)
+    window = HistoryWindow(TransactionPager(db, 1, page_size=50), max_pages=3)
+    window.reset()
+    window.scroll_down()
+    new_id = db.execute(
+        "INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (1, 1, 1, '2099-01-01', 'Расход')"
+    ).lastrowid
+    rows = window.reload()
+    assert rows[0][0] == new_id
+    assert len(rows) == 100
+
+
+def fill_mixed(db, count, user_id=1):
+    # "Одежда" без транзакций: сортировка по категории должна ее пропустить.
+    categories = [ensure_category(db, user_id, name) for name in ("Продукты", "Такси", "Зарплата", "Одежда")]
+    db.executemany(
+        "INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (?, ?, ?, ?, ?)",
+        ((user_id, categories[i % 3], i % 17 * 100, f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 10:00:00",
+          "Доход" if i % 3 == 2 else "Расход") for i in range(count)),
+    )
+
+
+def walk(pager):
+    rows = []
+    page = pager.first_page()
+    while page:
+        rows.extend(page)
+        page = pager.page_after(pager.key(page[-1]))
+    return rows
+
+
+FILTERS = [
+    HistoryFilter(),
+    HistoryFilter(date_from=date(2024, 3, 1), date_to=date(2024, 5, 31)),
+    HistoryFilter(transaction_type="Расход"),
+    HistoryFilter(category="Такси"),
+    HistoryFilter(amount_min=Money(300), amount_max=Money(900)),
+    HistoryFilter(date(2024, 2, 1), date(2024, 11, 30), "Расход", "Такси", Money(100), Money(1500)),
+]
+
+
+@pytest.mark.parametrize("sort", list(SORT_KEYS))
+@pytest.mark.parametrize("descending", [True, False])
+@pytest.mark.parametrize("filters", FILTERS)
+def test_pager_filters_and_sorts(db, filters, sort, descending):
+    fill_mixed(db, 300)
+    fill_mixed(db, 30, user_id=2)
+    rows = db.fetchall("SELECT t.id, c.name, t.amount, t.type, t.date "
+                       "FROM transactions t JOIN categories c ON c.id = t.category_id WHERE t.user_id = 1")
+    columns = ("id", "category", "amount", "type", "date")
+    expected = sorted(
+        (row for row in rows
+         if (filters.date_from is None or row[4] >= filters.date_from.isoformat())
+         and (filters.date_to is None or row[4][:10] <= filters.date_to.isoformat())
+         and filters.transaction_type in (None, row[3]) and filters.category in (None, row[1])
+         and (filters.amount_min is None or row[2] >= filters.amount_min.kopecks)
+         and (filters.amount_max is None or row[2] <= filters.amount_max.kopecks)),
+        key=lambda row: tuple(row[columns.index(column)] for column in SORT_KEYS[sort] + ("id",)),
+        reverse=descending,
+    )
+    pager = TransactionPager(db, 1, 7, filters, sort, descending)
+    assert walk(pager) == expected
+    if len(expected) > 7:
+        second = pager.page_after(pager.key(expected[6]))
+        assert pager.page_before(pager.key(second[0])) == expected[:7]
+
+
+def test_pager_rejects_unknown_sort(db):
+    with pytest.raises(ValueError):
+        TransactionPager(db, 1, sort="id; DROP TABLE transactions")
+
+
+@pytest.mark.parametrize("sort", list(SORT_KEYS))
+@pytest.mark.parametrize("filters", FILTERS)
+def test_filtered_pages_use_index_without_sorting(db, filters, sort):
+    plans = []
+
+    class Explain:
+        def fetchall(self, sql, params):
+            plans.append(" ".join(row[3] for row in db.fetchall("EXPLAIN QUERY PLAN " + sql, params)))
+            return []
+
+    pager = TransactionPager(Explain(), 1, 10, filters, sort)
+    key = ("2024-01-01",) * (len(pager.key_columns) - 1) + (1,)
+    pager.first_page()
+    pager.page_after(key)
+    pager.page_before(key)
+    # При диапазоне по другой колонке SQLite может выбрать индекс диапазона
+    # и отсортировать отобранные строки.
+    ranges = {"date"} if filters.date_from or filters.date_to else set()
+    if filters.amount_min or filters.amount_max:
+        ranges.add("amount")
+    for plan in plans:
+        assert "USING INDEX idx_transactions_user_" in plan
+        if not ranges - {sort}:
+            assert "TEMP B-TREE" not in plan
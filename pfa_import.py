@@ -0,0 +1,288 @@
+"""
+Потоковый импорт банковских выписок (CSV и OFX).
+
+Выписка читается построчно генераторами, поэтому потребление памяти не
+зависит от размера файла. Записи приводятся к полям транзакции
+(category, amount, date, type) с суммой в копейках и вставляются пакетами через `executemany`,
+каждый пакет — в отдельной транзакции. Категории ищутся по имени, отсутствующие
+у пользователя создаются (см. `pfa_categories.CategoryResolver`). Ошибочные
+строки не прерывают импорт, а собираются в отчет вместе с номером строки. Доходы каждого пакета
+распределяются по целям пользователя одним запросом (см. `pfa_goals`) в той
+же транзакции.
+"""
+import csv
+import re
+from datetime import datetime
+from functools import lru_cache
+from pfa_categories import CategoryResolver
+from pfa_goals import allocate_incomes, goal_strategy
+from pfa_money import MAX_AMOUNT_KOPECKS, Money
+
+BATCH_SIZE = 10000
+
+# Сколько ошибок хранить в отчете; остальные только подсчитываются.
+MAX_REPORTED_ERRORS = 1000
+
+DEFAULT_CATEGORY = "Прочее"
+
+DATE_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y %H:%M",
+    "%d.%m.%Y",
+    "%Y%m%d%H%M%S",
+    "%Y%m%d",
+)
+
+TYPE_ALIASES = {
+    "доход": "Доход",
+    "income": "Доход",
+    "credit": "Доход",
+    "расход": "Расход",
+    "expense": "Расход",
+    "debit": "Расход",
+}
+
+DEFAULT_COLUMNS = {
+    "category": "category",
+    "amount": "amount",
+    "date": "date",
+    "type": "type",
+}
+
+_INSERT_SQL = "INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (?, ?, ?, ?, ?)"
+
+
+class ImportRowError(ValueError):
+    """
+    Ошибка разбора одной строки выписки.
+    """
+
+
+class ImportReport:
+    """
+    Итог импорта.
+
+    Атрибуты:
+        imported (int): Число вставленных транзакций.
+        failed (int): Число отклоненных строк.
+        errors (list): Первые `MAX_REPORTED_ERRORS` ошибок в виде (номер строки, сообщение).
+        completed_goals (list): Записи `GoalCompletion` целей, достигнутых импортированными доходами.
+    """
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.completed_goals = []
+
+    def add_error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value):
+    """
+    Приводит дату выписки к формату приложения `%Y-%m-%d %H:%M:%S`.
+
+    В выписках одна и та же дата повторяется во многих строках, поэтому
+    результаты кэшируются.
+
+    Raises:
+        ImportRowError: Если дата не распознана.
+    """
+    value = value.strip()
+    if value[4:5] == "-":
+        try:
+            return datetime.fromisoformat(value).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            pass
+    if value[:8].isdigit():
+        # Дата OFX: 20240131120000.000[+3:MSK]
+        value = value.split("[")[0].split(".")[0]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    raise ImportRowError(f"Некорректная дата: {value!r}")
+
+
+def parse_amount(value):
+    """
+    Разбирает сумму в рублях, допуская пробелы-разделители разрядов и десятичную запятую.
+
+    Returns:
+        int: Сумма в копейках (доли копейки округляются).
+
+    Raises:
+        ImportRowError: Если сумма не является числом или по модулю больше `MAX_AMOUNT_KOPECKS`.
+    """
+    try:
+        kopecks = Money.parse(value).kopecks
+    except ValueError:
+        raise ImportRowError(f"Некорректная сумма: {value!r}") from None
+    if abs(kopecks) > MAX_AMOUNT_KOPECKS:
+        raise ImportRowError(f"Слишком большая сумма: {value!r}")
+    return kopecks
+
+
+def normalize(record):
+    """
+    Приводит запись выписки к кортежу (category, amount, date, type).
+
+    Если тип не указан, он определяется по знаку суммы. Сумма в базе всегда
+    положительная и хранится в копейках.
+
+    Args:
+        record (dict): Поля `category`, `amount`, `date` и необязательный `type`.
+
+    Raises:
+        ImportRowError: Если запись некорректна.
+    """
+    amount = parse_amount(record.get("amount") or "")
+    raw_type = (record.get("type") or "").strip()
+    if raw_type:
+        transaction_type = TYPE_ALIASES.get(raw_type.lower())
+        if transaction_type is None:
+            raise ImportRowError(f"Неизвестный тип транзакции: {raw_type!r}")
+    else:
+        transaction_type = "Доход" if amount > 0 else "Расход"
+    amount = abs(amount)
+    if amount == 0:
+        raise ImportRowError("Сумма транзакции должна быть больше нуля")
+    category = (record.get("category") or "").strip() or DEFAULT_CATEGORY
+    return category, amount, parse_date(record.get("date") or ""), transaction_type
+
+
+def read_csv(stream, columns=None, delimiter=","):
+    """
+    Читает CSV-выписку построчно.
+
+    Args:
+        stream (file): Открытый текстовый файл.
+        columns (dict): Соответствие полей транзакции колонкам файла.
+        delimiter (str): Разделитель колонок.
+
+    Yields:
+        tuple: (номер строки, запись с полями `category`, `amount`, `date`, `type`).
+    """
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    reader = csv.DictReader(stream, delimiter=delimiter)
+    for row in reader:
+        yield reader.line_num, {field: row.get(column) for field, column in columns.items()}
+
+
+_OFX_TAG = re.compile(r"<(/?)([A-Z0-9.]+)>([^<\r\n]*)", re.IGNORECASE)
+
+
+def read_ofx(stream):
+    """
+    Читает OFX-выписку (SGML или XML) построчно, по одному блоку `<STMTTRN>`.
+
+    Категория берется из `NAME` (или `MEMO`), тип — по знаку `TRNAMT`.
+
+    Args:
+        stream (file): Открытый текстовый файл.
+
+    Yields:
+        tuple: (номер строки начала блока, запись транзакции).
+    """
+    fields = None
+    start = 0
+    for line_number, line in enumerate(stream, start=1):
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if not closing:
+                    fields, start = {}, line_number
+                elif fields is not None:
+                    yield start, {
+                        "category": fields.get("NAME") or fields.get("MEMO"),
+                        "amount": fields.get("TRNAMT"),
+                        "date": fields.get("DTPOSTED"),
+                        "type": None,
+                    }
+                    fields = None
+            elif fields is not None and not closing:
+                fields[tag] = value.strip()
+
+
+def import_records(db, user_id, records, batch_size=BATCH_SIZE, progress=None, allocate_goals=True):
+    """
+    Вставляет записи выписки пакетами.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        user_id (int): ID пользователя.
+        records (iterable): Пары (номер строки, запись), например из `read_csv`.
+        batch_size (int): Число строк в одном `executemany`.
+        progress (callable): Вызывается после каждого пакета с объектом `ImportReport`.
+        allocate_goals (bool): Распределять ли доходы по целям пользователя.
+
+    Returns:
+        ImportReport: Итог импорта.
+    """
+    report = ImportReport()
+    batch = []
+    strategy = goal_strategy(db, user_id) if allocate_goals else None
+    resolve = CategoryResolver(user_id)
+
+    def flush():
+        with db.transaction() as conn:
+            conn.executemany(_INSERT_SQL, [
+                (user_id, resolve(conn, category, transaction_type), amount, date, transaction_type)
+                for user_id, category, amount, date, transaction_type in batch
+            ])
+            if strategy is not None:
+                incomes = ((row[0], row[2]) for row in batch if row[4] == "Доход")
+                report.completed_goals.extend(allocate_incomes(conn, incomes, strategy))
+        report.imported += len(batch)
+        batch.clear()
+        if progress is not None:
+            progress(report)
+
+    for line, record in records:
+        try:
+            batch.append((user_id, *normalize(record)))
+        except ImportRowError as e:
+            report.add_error(line, str(e))
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return report
+
+
+def import_file(db, user_id, path, file_format=None, columns=None, delimiter=",",
+                encoding="utf-8-sig", batch_size=BATCH_SIZE, progress=None, allocate_goals=True):
+    """
+    Импортирует выписку из файла.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        user_id (int): ID пользователя.
+        path (str): Путь к файлу.
+        file_format (str): "csv" или "ofx"; по умолчанию определяется по расширению.
+        columns (dict): Соответствие колонок для CSV.
+        delimiter (str): Разделитель колонок для CSV.
+        encoding (str): Кодировка файла.
+        batch_size (int): Число строк в одном пакете.
+        progress (callable): Обработчик прогресса.
+        allocate_goals (bool): Распределять ли доходы по целям пользователя.
+
+    Returns:
+        ImportReport: Итог импорта.
+    """
+    if file_format is None:
+        file_format = "ofx" if path.lower().endswith((".ofx", ".qfx")) else "csv"
+    with open(path, encoding=encoding, newline="") as stream:
+        if file_format == "ofx":
+            records = read_ofx(stream)
+        else:
+            records = read_csv(stream, columns, delimiter)
+        return import_records(db, user_id, records, batch_size, progress, allocate_goals)
@@ -0,0 +1,99 @@
+import io
+import pytest
+from pfa_balances import read_balance
+from pfa_cli import main
+from pfa_import import ImportRowError, import_records, normalize, read_csv, read_ofx
+
+CSV_DATA = """Дата;Категория;Сумма
+31.01.2024;Зарплата;50 000,00
+01.02.2024 12:30;Продукты;-1250,50
+вчера;Такси;-300
+02.02.2024;Такси;abc
+"""
+
+OFX_DATA = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240201120000.000[+3:MSK]
+<TRNAMT>-120.50
+<NAME>Такси
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT</TRNTYPE><DTPOSTED>20240205</DTPOSTED><TRNAMT>1000</TRNAMT><MEMO>Перевод</MEMO></STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+COLUMNS = {"date": "Дата", "category": "Категория", "amount": "Сумма"}
+
+
+def test_normalize_infers_type_from_sign():
+    assert normalize({"category": "Такси", "amount": "-300", "date": "2024-02-01"}) == \
+        ("Такси", 30000, "2024-02-01 00:00:00", "Расход")
+    assert normalize({"category": "", "amount": "10", "date": "2024-02-01", "type": "income"}) == \
+        ("Прочее", 1000, "2024-02-01 00:00:00", "Доход")
+
+
+@pytest.mark.parametrize("record", [
+    {"amount": "0", "date": "2024-02-01"},
+    {"amount": "12", "date": "2024/02/01"},
+    {"amount": "12", "date": "2024-02-01", "type": "перевод"},
+    {"amount": "1e30", "date": "2024-02-01"},
+    {"amount": "-99999999999999999", "date": "2024-02-01"},
+])
+def test_normalize_rejects_bad_rows(record):
+    with pytest.raises(ImportRowError):
+        normalize(record)
+
+
+def test_read_ofx_sgml_and_xml():
+    records = [record for _, record in read_ofx(io.StringIO(OFX_DATA))]
+    assert [normalize(record) for record in records] == [
+        ("Такси", 12050, "2024-02-01 12:00:00", "Расход"),
+        ("Перевод", 100000, "2024-02-05 00:00:00", "Доход"),
+    ]
+
+
+def test_import_reports_errors_without_aborting(db):
+    progress = []
+    records = read_csv(io.StringIO(CSV_DATA), COLUMNS, delimiter=";")
+    report = import_records(db, 1, records, batch_size=1, progress=lambda r: progress.append(r.imported))
+    assert report.imported == 2
+    assert report.failed == 2
+    assert [line for line, _ in report.errors] == [4, 5]
+    assert progress == [1, 2]
+    assert read_balance(db, 1) == (5000000, 125050, 2)
+
+
+def test_import_reports_oversized_amounts(db):
+    records = read_csv(io.StringIO("date,category,amount\n2024-02-01,Такси,1e30\n"
+                                   "2024-02-01,Такси,99999999999999999\n2024-02-01,Такси,-300\n"))
+    report = import_records(db, 1, records)
+    assert (report.imported, report.failed) == (1, 2)
+    assert [line for line, _ in report.errors] == [2, 3]
+    assert read_balance(db, 1) == (0, 30000, 1)
+
+
+def test_cli_import(db, tmp_path, capsys):
+    db.execute("INSERT INTO users (login, password) VALUES ('Pavel', 'abcdefgh')")
+    path = tmp_path / "statement.ofx"
+    path.write_text(OFX_DATA, encoding="utf-8")
+    assert main(["--db", db.path, "import", "--user", "Pavel", str(path)]) == 0
+    assert "Импортировано транзакций: 2" in capsys.readouterr().out
+    assert main(["--db", db.path, "import", "--user", "Nobody", str(path)]) == 2
+
+
+def test_import_allocates_incomes_to_goals(db):
+    db.execute("INSERT INTO users (login, password) VALUES ('Pavel', 'abcdefgh')")
+    db.execute('''
+        INSERT INTO goals (user_id, title, target_amount, current_amount, creation_date, target_date)
+        VALUES (1, 'Отпуск', 4000000, 0, '2024-01-01', '2024-12-31'),
+               (1, 'Машина', 90000000, 0, '2024-01-01', '2026-12-31')
+    ''')
+    records = read_csv(io.StringIO(CSV_DATA), COLUMNS, delimiter=";")
+    report = import_records(db, 1, records)
+    assert [goal.title for goal in report.completed_goals] == ["Отпуск"]
+    assert db.fetchall("SELECT current_amount FROM goals ORDER BY id") == [(4000000,), (1000000,)]
+
+    records = read_csv(io.StringIO(CSV_DATA), COLUMNS, delimiter=";")
+    import_records(db, 1, records, allocate_goals=False)
+    assert db.fetchall("SELECT current_amount FROM goals ORDER BY id") == [(4000000,), (1000000,)]
@@ -1,76 +1,56 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, PhotoImage
-import sqlite3
-from datetime import datetime, timedelta
-import re
-import pandas as pd
-import matplotlib.pyplot as plt
+from tkinter import ttk, messagebox, filedialog, PhotoImage
+from datetime import datetime
 import os
-os.chdir(os.path.dirname(__file__))
+from pfa_db import get_db
+from pfa_schema import migrate
+from pfa_history import VirtualTransactionsView
+from pfa_treeview import TreeviewReconciler
+from pfa_analytics import DATA_TYPES
+from pfa_goals import STRATEGIES, STRATEGY_LABELS
+from pfa_money import BASE_CURRENCY, format_money
+from pfa_recurring import FREQUENCIES, FREQUENCY_LABELS
+from pfa_rollups import GRANULARITIES, GRANULARITY_LABELS, TREND_CHART_TYPES
+from pfa_search import KIND_LABELS
+import pfa_service
+from pfa_service import FinanceService, ServiceError, ValidationError
+from pfa_reminders import ReminderScheduler
+from pfa_worker import DatabaseWorker, LoadingTabs
+
+# Ресурсы приложения ищутся рядом с модулем, а не в текущем каталоге.
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGO_PATH = os.path.join(APP_DIR, "logo.png")
+
+# Подписи статусов напоминаний в таблице.
+REMINDER_STATUS_LABELS = {
+    "active": "Активно",
+    "expired": "Напоминание устарело.",
+    "invalid": "Некорректная дата",
+}
+
+# Пауза после ввода в поле поиска перед запросом, мс.
+SEARCH_DELAY = 300
+
+# Значение фильтра истории "без ограничения" для типа и категории.
+HISTORY_ALL = "Все"
+
+# Период проверки повторяющихся транзакций, мс.
+RECURRING_INTERVAL = 10 * 60 * 1000
 
 def create_db():
     """
-    Создает базу данных и таблицы, если они еще не существуют.
+    Создает базу данных и приводит ее схему к актуальной версии.
 
     Таблицы:
     - users: Хранит данные пользователей.
     - goals: Хранит финансовые цели пользователей.
     - reminders: Хранит напоминания пользователей.
     - transactions: Хранит транзакции (доходы и расходы).
-    """
-    conn = sqlite3.connect('users.db') 
-    cursor = conn.cursor() 
-
-    cursor.execute(''' 
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            login TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS goals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            description TEXT,
-            target_amount REAL NOT NULL,
-            current_amount REAL DEFAULT 0,
-            creation_date TEXT NOT NULL,
-            target_date TEXT NOT NULL,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS reminders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            date TEXT NOT NULL,
-            time TEXT NOT NULL,
-            description_reminder TEXT NOT NULL,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            category TEXT NOT NULL,
-            amount REAL NOT NULL,
-            date TEXT NOT NULL,
-            type TEXT NOT NULL,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-
-    conn.commit()
-    conn.close()
 
-create_db()
+    Миграции схемы описаны в модуле `pfa_schema`. Вызывается при запуске
+    приложения (см. `main`), а не при импорте модуля.
+    """
+    migrate(get_db())
 
 class FinanceAssistantApp(tk.Tk):
     """
@@ -78,44 +58,70 @@ class FinanceAssistantApp(tk.Tk):
 
     Атрибуты:
         user (tuple): Текущий пользователь (ID и логин).
+        db (Database): Подключение к базе данных.
+        service (FinanceService): Бизнес-логика приложения.
+        worker (DatabaseWorker): Фоновый поток, в котором выполняются все запросы к базе.
 
     Методы:
         create_main_interface(): Создает основной интерфейс приложения.
+        run_in_background(page, func, *args, on_done, on_error): Выполняет запрос в фоновом потоке.
+        report_error(error): Показывает ошибку фоновой задачи.
         update_balance(): Обновляет данные баланса, доходов и расходов.
-        generate_chart(data_type, chart_type): Генерирует диаграмму на основе данных пользователя.
+        load_currencies(): Загружает валюты с курсами и валюту отчетов пользователя.
+        change_reporting_currency(): Сохраняет валюту отчетов пользователя.
+        import_rates_file(): Загружает курсы валют из выбранного файла.
+        generate_chart(data_type, chart_type, granularity): Строит диаграмму на вкладке "Диаграммы".
         add_transaction_window(): Открывает окно для добавления транзакции.
         setup_diagrams_page(): Настраивает вкладку диаграмм.
-        plot_pie_chart(df): Строит круговую диаграмму.
-        plot_bar_chart(df): Строит гистограмму.
-        plot_gisto_chart(df): Строит гистограмму с цветами.
+        ensure_chart_panel(): Создает область диаграмм при первом построении диаграммы.
+        shutdown(): Дожидается фоновых задач и освобождает ресурсы перед выходом.
         setup_transactions_page(): Настраивает вкладку для управления транзакциями.
+        apply_history_filter(): Применяет фильтр истории транзакций.
         update_transactions_list(): Обновляет список транзакций.
         setup_goals_page(): Настраивает вкладку для управления финансовыми целями.
-        update_goals_list(): Обновляет список финансовых целей.
+        update_goals_list(): Обновляет список финансовых целей и прогноз их достижения.
         add_goal_window(): Открывает окно для добавления новой финансовой цели.
+        change_goal_strategy(): Сохраняет стратегию распределения доходов по целям.
         delete_completed_goal(): Удаляет выполненную финансовую цель.
         setup_reminders_page(): Настраивает вкладку для работы с напоминаниями.
         load_reminders(): Загружает напоминания из базы данных.
         add_reminder_window(): Открывает окно для добавления напоминания.
         delete_reminder(): Удаляет выбранное напоминание.
-        check_reminders(): Проверяет напоминания на актуальность.
-        check_reminders_loop(): Запускает цикл проверки напоминаний.
+        start_reminder_scheduler(): Запускает планировщик напоминаний.
+        run_recurring(): Создает наступившие повторяющиеся транзакции и планирует следующую проверку.
+        recurring_rules_window(): Открывает окно правил повторяющихся транзакций.
+        notify_reminders(reminders): Сообщает о напоминаниях, срок которых скоро наступит.
+        setup_search_page(): Настраивает вкладку полнотекстового поиска.
+        schedule_search(): Запускает поиск после паузы во вводе.
+        run_search(): Ищет цели, напоминания и транзакции по тексту запроса.
     """
-    def __init__(self, user):
+    def __init__(self, user, db=None, service=None):
         """
         Инициализирует главное окно приложения.
 
         Args:
             user (tuple): Кортеж (ID пользователя, логин пользователя).
+            db (Database): Подключение к базе данных. По умолчанию общее подключение приложения.
+            service (FinanceService): Сервисный слой. По умолчанию создается поверх `db`.
         """
         super().__init__()
         self.title("Финансовый помощник")
         self.geometry("800x600")
         self.user = user
-        icon = PhotoImage(file="logo.png")
+        self.db = db if db is not None else get_db()
+        self.service = service if service is not None else FinanceService(self.db)
+        self.worker = DatabaseWorker(self.after, on_error=self.report_error)
+        self.chart_renderer = None
+        self.chart_panel = None
+        icon = PhotoImage(file=LOGO_PATH)
         self.iconphoto(False, icon)
+        self.recurring_timer = None
+        # Валюты с загруженными курсами и валюта отчетов пользователя.
+        self.currencies = (BASE_CURRENCY,)
+        self.currency = tk.StringVar(value=BASE_CURRENCY)
         self.create_main_interface()
-        self.check_reminders_loop()
+        self.start_reminder_scheduler()
+        self.run_recurring()
 
 
 
@@ -136,24 +142,69 @@ class FinanceAssistantApp(tk.Tk):
 
         notebook = ttk.Notebook(self)
         notebook.pack(fill=tk.BOTH, expand=True)
+        self.loading_tabs = LoadingTabs(notebook)
 
         self.home_page = tk.Frame(notebook)
         self.diagrams_page = tk.Frame(notebook)
         self.transactions_page = tk.Frame(notebook)
         self.goals_page = tk.Frame(notebook)
         self.reminders_page = tk.Frame(notebook)
+        self.search_page = tk.Frame(notebook)
 
         notebook.add(self.home_page, text="Главная")
         notebook.add(self.diagrams_page, text="Диаграммы")
         notebook.add(self.transactions_page, text="Транзакции")
         notebook.add(self.goals_page, text="Цели")
         notebook.add(self.reminders_page, text="Напоминания")
+        notebook.add(self.search_page, text="Поиск")
 
         self.setup_home_page()
         self.setup_diagrams_page()
         self.setup_transactions_page()
         self.setup_goals_page()
         self.setup_reminders_page()
+        self.setup_search_page()
+
+    def run_in_background(self, page, func, *args, on_done=None, on_error=None):
+        """
+        Выполняет запрос к базе данных в фоновом потоке.
+
+        Пока запрос выполняется, вкладка `page` отмечена как загружающаяся.
+        Обработчики вызываются в потоке Tk.
+
+        Args:
+            page (tk.Frame): Вкладка, данные которой загружаются.
+            func (callable): Запрос; вызывается в фоновом потоке как `func(*args)`.
+            on_done (callable): Получает результат запроса.
+            on_error (callable): Получает исключение; по умолчанию `report_error`.
+
+        Returns:
+            concurrent.futures.Future: Результат запроса.
+        """
+        self.loading_tabs.begin(page)
+
+        def done(result):
+            self.loading_tabs.end(page)
+            if on_done is not None:
+                on_done(result)
+
+        def failed(error):
+            self.loading_tabs.end(page)
+            (on_error if on_error is not None else self.report_error)(error)
+
+        return self.worker.submit(func, *args, on_done=done, on_error=failed)
+
+    def report_error(self, error):
+        """
+        Показывает пользователю ошибку фоновой задачи.
+
+        Args:
+            error (Exception): Ошибка сервисного слоя или базы данных.
+        """
+        if isinstance(error, ServiceError):
+            messagebox.showerror("Ошибка", error.message)
+        else:
+            messagebox.showerror("Ошибка", f"Ошибка базы данных: {error}")
 
 
     def setup_home_page(self):
@@ -162,41 +213,94 @@ class FinanceAssistantApp(tk.Tk):
         """
         tk.Label(self.home_page, text="Общая информация", font=("Arial", 16)).pack(pady=10)
 
-        self.balance_label = tk.Label(self.home_page, text="Текущий баланс: 0.00 RUB", font=("Arial", 14))
+        zero = format_money(0)
+        self.balance_label = tk.Label(self.home_page, text=f"Текущий баланс: {zero}", font=("Arial", 14))
         self.balance_label.pack(pady=10)
 
-        self.earnings_label = tk.Label(self.home_page, text="Заработано: 0.00 RUB", font=("Arial", 12))
+        self.earnings_label = tk.Label(self.home_page, text=f"Заработано: {zero}", font=("Arial", 12))
         self.earnings_label.pack(pady=5)
 
-        self.expenses_label = tk.Label(self.home_page, text="Потрачено: 0.00 RUB", font=("Arial", 12))
+        self.expenses_label = tk.Label(self.home_page, text=f"Потрачено: {zero}", font=("Arial", 12))
         self.expenses_label.pack(pady=5)
 
+        currency_frame = tk.Frame(self.home_page)
+        currency_frame.pack(pady=5)
+        tk.Label(currency_frame, text="Валюта отчетов:").pack(side=tk.LEFT)
+        self.currency_box = ttk.Combobox(currency_frame, textvariable=self.currency, state="readonly",
+                                         values=self.currencies, width=6)
+        self.currency_box.pack(side=tk.LEFT, padx=5)
+        self.currency_box.bind("<<ComboboxSelected>>", self.change_reporting_currency)
+        tk.Button(currency_frame, text="Загрузить курсы валют", command=self.import_rates_file).pack(side=tk.LEFT)
+
         tk.Button(self.home_page, text="Добавить транзакцию", command=self.add_transaction_window).pack(pady=10)
+        tk.Button(self.home_page, text="Регулярные платежи", command=self.recurring_rules_window).pack(pady=5)
 
+        self.load_currencies()
         self.update_balance()
 
+    def load_currencies(self):
+        """
+        Загружает валюты с курсами для выпадающих списков и валюту отчетов пользователя.
+        """
+        def show(result):
+            self.currencies, currency = result
+            self.currency_box["values"] = self.currencies
+            self.currency.set(currency)
+
+        self.run_in_background(
+            self.home_page, lambda: (self.service.currencies(), self.service.reporting_currency(self.user[0])),
+            on_done=show,
+        )
+
+    def change_reporting_currency(self, event=None):
+        """
+        Сохраняет выбранную валюту отчетов и пересчитывает в ней баланс и цели.
+        """
+        def changed(result):
+            self.update_balance()
+            self.update_goals_list()
+
+        self.run_in_background(self.home_page, self.service.set_reporting_currency, self.user[0],
+                               self.currency.get(), on_done=changed)
+
+    def import_rates_file(self):
+        """
+        Загружает курсы валют из CSV-файла (колонки date, currency, rate) и
+        обновляет суммы, пересчитанные по новым курсам.
+        """
+        path = filedialog.askopenfilename(
+            parent=self, title="Файл курсов валют", filetypes=[("CSV", "*.csv"), ("Все файлы", "*.*")])
+        if not path:
+            return
+
+        def imported(report):
+            messagebox.showinfo(
+                "Курсы валют",
+                f"Загружено курсов: {report.rates}\nПересчитано транзакций: {report.converted}")
+            self.load_currencies()
+            self.update_balance()
+            self.update_transactions_list()
+            self.update_goals_list()
+
+        self.run_in_background(self.home_page, self.service.import_rates, path, on_done=imported)
+
     def update_balance(self):
         """
-        Обновляет текущий баланс пользователя, суммируя доходы и расходы из базы данных.
+        Обновляет текущий баланс пользователя по итогам из таблицы `balances`
+        в валюте отчетов.
         """
-        conn = sqlite3.connect('users.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT SUM(CASE WHEN type = "Доход" THEN amount ELSE 0 END) as total_income,
-                SUM(CASE WHEN type = "Расход" THEN amount ELSE 0 END) as total_expense
-            FROM transactions
-            WHERE user_id = ?
-        ''', (self.user[0],))
-        result = cursor.fetchone()
-        conn.close()
+        self.run_in_background(self.home_page, self.service.balance, self.user[0], on_done=self.show_balance)
 
-        total_income = result[0] if result[0] is not None else 0.0
-        total_expense = result[1] if result[1] is not None else 0.0
-        current_balance = total_income - total_expense
+    def show_balance(self, balance):
+        """
+        Показывает баланс, доходы и расходы пользователя.
 
-        self.balance_label.config(text=f"Текущий баланс: {current_balance} RUB")
-        self.earnings_label.config(text=f"Заработано: {total_income} RUB")
-        self.expenses_label.config(text=f"Потрачено: {total_expense} RUB")
+        Args:
+            balance (Balance): Итоги пользователя.
+        """
+        self.balance_label.config(text=f"Текущий баланс: {format_money(balance.current, balance.currency)}")
+        self.earnings_label.config(text=f"Заработано: {format_money(balance.income, balance.currency)}")
+        self.expenses_label.config(text=f"Потрачено: {format_money(balance.expense, balance.currency)}")
 
     def setup_diagrams_page(self):
         """
@@ -210,13 +314,41 @@ class FinanceAssistantApp(tk.Tk):
             command=self.open_diagrams_window
         ).pack(pady=10)
 
+    def ensure_chart_panel(self):
+        """
+        Создает область диаграмм при первом обращении.
+
+        Модуль `pfa_charts` (и вместе с ним matplotlib) импортируется только
+        здесь, чтобы не замедлять запуск приложения.
+
+        Returns:
+            ChartPanel: Область диаграмм вкладки "Диаграммы".
+        """
+        if self.chart_panel is None:
+            from pfa_charts import ChartPanel, ChartRenderer
+            self.chart_renderer = ChartRenderer()
+            self.chart_panel = ChartPanel(self.diagrams_page, self.chart_renderer)
+        return self.chart_panel
+
+    def shutdown(self):
+        """
+        Дожидается отправленных запросов к базе данных и останавливает фоновую
+        отрисовку диаграмм, если она запускалась.
+        """
+        if self.recurring_timer is not None:
+            self.after_cancel(self.recurring_timer)
+            self.recurring_timer = None
+        self.worker.close()
+        if self.chart_renderer is not None:
+            self.chart_renderer.close()
+
     def open_diagrams_window(self):
         """
         Открывает окно настройки и генерации диаграмм.
         """
         diagrams_window = tk.Toplevel(self)
         diagrams_window.title("Настройка диаграмм")
-        diagrams_window.geometry("400x400")
+        diagrams_window.geometry("400x460")
         diagrams_window.resizable(False, False)
 
         tk.Label(diagrams_window, text="Тип данных:").pack(pady=5)
@@ -234,7 +366,16 @@ class FinanceAssistantApp(tk.Tk):
             diagrams_window,
             textvariable=chart_type,
             state="readonly",
-            values=["Круговая диаграмма", "Гистограмма", "Гистограмма(Цвета)"]
+            values=["Круговая диаграмма", "Гистограмма", "Гистограмма(Цвета)", *TREND_CHART_TYPES]
+        ).pack(pady=5)
+
+        tk.Label(diagrams_window, text="Период тренда:").pack(pady=5)
+        granularity = tk.StringVar(value=GRANULARITY_LABELS["month"])
+        ttk.Combobox(
+            diagrams_window,
+            textvariable=granularity,
+            state="readonly",
+            values=[GRANULARITY_LABELS[key] for key in GRANULARITIES]
         ).pack(pady=5)
 
         tk.Button(
@@ -242,117 +383,127 @@ class FinanceAssistantApp(tk.Tk):
             text="Построить диаграмму",
             command=lambda: (
                 messagebox.showerror("Ошибка", "Пожалуйста, выберите тип данных!")
-                if data_type.get() == "Выберите тип транзакций" else self.generate_chart(data_type.get(),
-                                                                                         chart_type.get())
+                if data_type.get() == "Выберите тип транзакций" else self.generate_chart(
+                    data_type.get(), chart_type.get(),
+                    next(key for key, label in GRANULARITY_LABELS.items() if label == granularity.get()))
             )
         ).pack(pady=15)
 
-    def generate_chart(self, data_type, chart_type):
+    def generate_chart(self, data_type, chart_type, granularity="month"):
         """
-        Генерирует и отображает диаграмму на основе данных пользователя.
+        Строит диаграмму на основе данных пользователя и показывает ее на вкладке "Диаграммы".
+
+        Суммы по категориям считаются в базе данных, тренды читаются из сводок
+        по периодам, а фигура строится в фоновом потоке; готовые фигуры
+        кэшируются до следующего изменения транзакций или курсов. Суммы
+        показываются в валюте отчетов.
 
         Args:
             data_type (str): Тип данных ("Только доходы" или "Только расходы").
-            chart_type (str): Тип диаграммы ("Круговая диаграмма" и др.).
+            chart_type (str): Тип диаграммы ("Круговая диаграмма", "Тренд (линии)" и др.).
+            granularity (str): Детализация тренда: "month" или "week".
         """
-        conn = sqlite3.connect('users.db')
-        cursor = conn.cursor()
-        cursor.execute('''SELECT category, amount, type FROM transactions WHERE user_id = ?''', (self.user[0],))
-        data = cursor.fetchall()
-        conn.close()
+        user_id = self.user[0]
+        transaction_type = DATA_TYPES[data_type]
+        currency = self.currency.get()
+        trend = chart_type in TREND_CHART_TYPES
+        if not trend:
+            granularity = None
 
-        # Преобразование в DataFrame
-        df = pd.DataFrame(data, columns=["Category", "Amount", "Type"])
+        def load():
+            if trend:
+                return self.service.trend(user_id, transaction_type, granularity, currency=currency)
+            return self.service.category_totals(user_id, transaction_type, currency)
 
-        # Фильтрация данных
-        if data_type == "Только доходы":
-            df = df[df["Type"] == "Доход"]
-        elif data_type == "Только расходы":
-            df = df[df["Type"] == "Расход"]
+        def show(version):
+            key = (user_id, transaction_type, version, chart_type, granularity, currency)
+            self.ensure_chart_panel().request(key, load, chart_type)
 
-        if chart_type == "Круговая диаграмма":
-            self.plot_pie_chart(df)
-        elif chart_type == "Гистограмма":
-            self.plot_bar_chart(df)
-        elif chart_type == "Гистограмма(Цвета)":
-            self.plot_gisto_chart(df)
-
-    def plot_pie_chart(self, df):
-        """
-        Строит круговую диаграмму на основе данных.
+        self.run_in_background(self.diagrams_page, self.service.data_version, user_id, on_done=show)
 
-        Args:
-            df (pd.DataFrame): Данные с колонками "Category" и "Amount".
+    def setup_transactions_page(self):
         """
-        plt.figure(figsize=(8, 8))
-        df.groupby("Category")["Amount"].sum().plot.pie(autopct='%1.1f%%', startangle=90)
-        plt.title("Круговая диаграмма")
-        plt.ylabel("")
-        plt.tight_layout()
-        plt.show()
-
-    def plot_bar_chart(self, df):
+        Настраивает вкладку для отображения и управления транзакциями:
+        фильтр над таблицей и сортировку по щелчку на заголовке колонки.
         """
-        Строит гистограмму на основе данных.
+        tk.Label(self.transactions_page, text="История транзакций", font=("Arial", 16)).pack(pady=10)
 
-        Args:
-            df (pd.DataFrame): Данные с колонками "Category" и "Amount".
-        """
-        plt.figure(figsize=(10, 10))
-        df.groupby("Category")["Amount"].sum().plot(kind="bar")
-        plt.title("Гистограмма")
-        plt.xlabel("Категория")
-        plt.ylabel("Сумма")
-        plt.show()
+        filter_frame = tk.Frame(self.transactions_page)
+        filter_frame.pack(fill=tk.X, padx=10, pady=5)
+        self.history_filter = {}
+        fields = (
+            ("date_from", "С (ГГГГ-ММ-ДД):", tk.Entry, {"width": 11}),
+            ("date_to", "По:", tk.Entry, {"width": 11}),
+            ("transaction_type", "Тип:", ttk.Combobox,
+             {"width": 8, "state": "readonly", "values": [HISTORY_ALL, *pfa_service.TRANSACTION_TYPES]}),
+            ("category", "Категория:", ttk.Combobox, {"width": 14, "state": "readonly", "values": [HISTORY_ALL]}),
+            ("amount_min", "Сумма от:", tk.Entry, {"width": 9}),
+            ("amount_max", "до:", tk.Entry, {"width": 9}),
+        )
+        for name, label, widget, options in fields:
+            tk.Label(filter_frame, text=label).pack(side=tk.LEFT, padx=(6, 2))
+            variable = tk.StringVar(value=HISTORY_ALL if widget is ttk.Combobox else "")
+            field = widget(filter_frame, textvariable=variable, **options)
+            field.pack(side=tk.LEFT)
+            if widget is ttk.Combobox:
+                field.bind("<<ComboboxSelected>>", lambda event: self.apply_history_filter())
+            else:
+                field.bind("<Return>", lambda event: self.apply_history_filter())
+            self.history_filter[name] = variable
+            if name == "category":
+                self.category_filter_box = field
+        tk.Button(filter_frame, text="Применить", command=self.apply_history_filter).pack(side=tk.LEFT, padx=6)
+        tk.Button(filter_frame, text="Сбросить", command=self.reset_history_filter).pack(side=tk.LEFT)
+
+        def run(func, on_done, on_error=None):
+            def failed(error):
+                if on_error is not None:
+                    on_error(error)
+                self.report_error(error)
+            self.run_in_background(self.transactions_page, func, on_done=on_done, on_error=failed)
+
+        self.transactions_view = VirtualTransactionsView(self.transactions_page, self.db, self.user[0], run=run)
+        self.transactions_tree = self.transactions_view.tree
+        self.update_transactions_list()
 
-    def plot_gisto_chart(self, df):
+    def apply_history_filter(self):
         """
-        Строит гистограмму с использованием различных цветов для категорий.
-
-        Args:
-            df (pd.DataFrame): Данные с колонками "Category" и "Amount".
+        Проверяет поля фильтра и перечитывает историю одним запросом к базе.
         """
-        plt.figure(figsize=(10, 10))
-
-        grouped = df.groupby("Category")["Amount"].sum()
-        colors = ["red", "green", "blue", "purple", "orange"]
-        grouped.plot(kind="bar", color=colors[:len(grouped)])
-
-        plt.title("Гистограмма(Цвета)")
-        plt.xlabel("Категория")
-        plt.ylabel("Сумма")
-        plt.show()
+        values = {name: variable.get() for name, variable in self.history_filter.items()}
+        for name in ("transaction_type", "category"):
+            if values[name] == HISTORY_ALL:
+                values[name] = ""
+        try:
+            filters = pfa_service.validate_history_filter(**values)
+        except ValidationError as e:
+            messagebox.showerror("Ошибка", e.message)
+            return
+        if filters != self.transactions_view.filters:
+            self.transactions_view.set_filter(filters)
 
-    def setup_transactions_page(self):
+    def reset_history_filter(self):
         """
-        Настраивает вкладку для отображения и управления транзакциями.
+        Очищает поля фильтра и показывает всю историю.
         """
-        tk.Label(self.transactions_page, text="История транзакций", font=("Arial", 16)).pack(pady=10)
-        self.transactions_tree = ttk.Treeview(self.transactions_page, columns=("category", "amount","type", "date"), show="headings")
-        self.transactions_tree.heading("category", text="Категория")
-        self.transactions_tree.heading("amount", text="Сумма")
-        self.transactions_tree.heading("type", text="Тип")
-        self.transactions_tree.heading("date", text="Дата")
-        self.transactions_tree.pack(fill=tk.BOTH, expand=True)
-        self.update_transactions_list()
+        for variable in self.history_filter.values():
+            variable.set("")
+        self.history_filter["transaction_type"].set(HISTORY_ALL)
+        self.history_filter["category"].set(HISTORY_ALL)
+        self.apply_history_filter()
 
     def update_transactions_list(self):
         """
-        Обновляет список транзакций из базы данных.
+        Обновляет список транзакций: перечитывает видимые страницы истории
+        (остальные подгружаются при прокрутке) и список категорий фильтра.
         """
-        conn = sqlite3.connect('users.db')
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT category, amount, type, date FROM transactions WHERE user_id = ?
-        """, (self.user[0],))
-        transactions = cursor.fetchall()
-        conn.close()
+        self.transactions_view.refresh()
 
-        for row in self.transactions_tree.get_children():
-            self.transactions_tree.delete(row)
+        def show_categories(categories):
+            self.category_filter_box["values"] = [HISTORY_ALL, *(category.name for category in categories)]
 
-        for transaction in transactions:
-            self.transactions_tree.insert("", tk.END, values=transaction)
+        self.run_in_background(self.transactions_page, self.service.list_categories, self.user[0],
+                               on_done=show_categories)
 
     def add_transaction_window(self):
         """
@@ -369,17 +520,27 @@ class FinanceAssistantApp(tk.Tk):
         category_type = tk.StringVar(value="Выберите категорию")
         combobox = ttk.Combobox(add_window, textvariable=category_type, state="readonly")
         combobox.pack(padx=6, pady=6)
+        # Категории в порядке строк списка; вложенные показаны с отступом.
+        categories = []
 
-        def update_categories():
+        def update_categories(selected=None):
             """
-            Устанавливает начальные значения категорий
+            Загружает категории пользователя для выбранного типа транзакции
+            и выбирает категорию с именем `selected`, если она есть.
             """
-            if transaction_type.get() == "Доход":
-                combobox["values"] = ["Зарплата", "Переводы", "Инвестиции"]
-            else:
-                combobox["values"] = ["Продукты", "Одежда", "Такси"]
-
-            category_type.set("Выберите категорию")
+            def show(loaded):
+                if not add_window.winfo_exists():
+                    return
+                categories[:] = loaded
+                combobox["values"] = ["    " * category.depth + category.name for category in loaded]
+                names = [category.name for category in loaded]
+                if selected in names:
+                    combobox.current(names.index(selected))
+                else:
+                    category_type.set("Выберите категорию")
+
+            self.run_in_background(self.transactions_page, self.service.list_categories, self.user[0],
+                                   transaction_type.get(), on_done=show)
 
         income_radiobutton = tk.Radiobutton(add_window, text="Доход", variable=transaction_type, value="Доход",
                                             command=update_categories, pady=20)
@@ -388,53 +549,111 @@ class FinanceAssistantApp(tk.Tk):
                                             command=update_categories, pady=5)
         expense_radiobutton.pack()
 
-
-        combobox["values"] = ["Продукты", "Одежда", "Такси"]
-        category_type.set("Выберите категорию")
+        tk.Button(add_window, text="Новая категория",
+                  command=lambda: self.add_category_window(add_window, transaction_type.get(), categories,
+                                                           on_added=update_categories)).pack(pady=2)
+        update_categories()
 
         tk.Label(add_window, text="Сумма:").pack(pady=15)
-        amount_entry = tk.Entry(add_window)
-        amount_entry.pack(pady=2)
+        amount_frame = tk.Frame(add_window)
+        amount_frame.pack(pady=2)
+        amount_entry = tk.Entry(amount_frame)
+        amount_entry.pack(side=tk.LEFT)
+        currency_box = ttk.Combobox(amount_frame, state="readonly", values=self.currencies, width=5)
+        currency_box.current(0)
+        currency_box.pack(side=tk.LEFT, padx=4)
+        save_button = tk.Button(add_window, text="Сохранить")
 
         def save_transaction():
             """
             Сохраняет новую транзакцию в базу данных.
             """
-            category = category_type.get()  
             amount = amount_entry.get()
+            currency = currency_box.get()
             transaction_type_value = transaction_type.get()
 
-            if category == "Выберите категорию":
+            if combobox.current() < 0:
                 messagebox.showerror("Ошибка", "Пожалуйста, выберите категорию!")
                 return
+            category = categories[combobox.current()].name
 
-            if not amount:
-                messagebox.showerror("Ошибка", "Введите сумму!")
-                return
+            def saved(result):
+                for goal in result.completed_goals:
+                    messagebox.showinfo("Поздравляем!", f"Цель достигнута: {goal.title}!")
 
-            try:
-                amount = float(amount)
-            except ValueError:
-                messagebox.showerror("Ошибка", "Сумма должна быть числом!")
-                return
+                messagebox.showinfo("Успех", "Транзакция добавлена!")
+                add_window.destroy()
+                self.update_transactions_list()
+                self.update_balance()
+                if transaction_type_value == "Доход":
+                    self.update_goals_list()
+
+            def failed(error):
+                if add_window.winfo_exists():
+                    save_button.config(state=tk.NORMAL)
+                self.report_error(error)
+
+            # Кнопка отключена, пока транзакция сохраняется, чтобы не отправить ее дважды.
+            save_button.config(state=tk.DISABLED)
+            self.run_in_background(
+                self.transactions_page, self.service.add_transaction,
+                self.user[0], category, amount, transaction_type_value, None, currency,
+                on_done=saved, on_error=failed,
+            )
 
-            conn = sqlite3.connect('users.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO transactions (user_id, category, amount, date, type) VALUES (?, ?, ?, ?, ?)
-            """, (self.user[0], category, amount, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), transaction_type_value))
-            conn.commit()
-            conn.close()
+        save_button.config(command=save_transaction)
+        save_button.pack(pady=10)
 
-            if transaction_type_value == "Доход":
-                self.update_goal_progress(amount)
+    def add_category_window(self, parent, transaction_type, categories, on_added):
+        """
+        Открывает окно для добавления категории пользователя.
 
-            messagebox.showinfo("Успех", "Транзакция добавлена!")
-            add_window.destroy()
-            self.update_transactions_list()
-            self.update_balance()
+        Args:
+            parent (tk.Toplevel): Окно, над которым открывается диалог.
+            transaction_type (str): Тип транзакций новой категории.
+            categories (list): Записи `Category`, среди которых выбирается родительская категория.
+            on_added (callable): Вызывается с именем новой категории после сохранения.
+        """
+        category_window = tk.Toplevel(parent)
+        category_window.title("Новая категория")
+        category_window.geometry("300x220")
+
+        tk.Label(category_window, text="Название:").pack(pady=10)
+        name_entry = tk.Entry(category_window)
+        name_entry.pack(pady=2)
+
+        tk.Label(category_window, text="Родительская категория:").pack(pady=10)
+        parent_box = ttk.Combobox(category_window, state="readonly",
+                                  values=["Нет", *("    " * category.depth + category.name for category in categories)])
+        parent_box.current(0)
+        parent_box.pack(padx=6, pady=2)
+        save_button = tk.Button(category_window, text="Сохранить")
+
+        def save_category():
+            """
+            Сохраняет категорию в базу данных.
+            """
+            name = name_entry.get()
+            parent_id = categories[parent_box.current() - 1].id if parent_box.current() > 0 else None
+
+            def saved(category_id):
+                category_window.destroy()
+                on_added(name.strip())
+
+            def failed(error):
+                if category_window.winfo_exists():
+                    save_button.config(state=tk.NORMAL)
+                self.report_error(error)
+
+            save_button.config(state=tk.DISABLED)
+            self.run_in_background(
+                self.transactions_page, self.service.add_category,
+                self.user[0], name, parent_id, transaction_type,
+                on_done=saved, on_error=failed,
+            )
 
-        tk.Button(add_window, text="Сохранить", command=save_transaction).pack(pady=10)
+        save_button.config(command=save_category)
+        save_button.pack(pady=10)
 
 
     def setup_goals_page(self):
@@ -443,60 +662,136 @@ class FinanceAssistantApp(tk.Tk):
         """
         tk.Label(self.goals_page, text="Финансовые цели", font=("Arial", 16)).pack(pady=10)
 
-        self.goals_tree = ttk.Treeview(self.goals_page, columns=("title", "target_amount", "current_amount", "remaining"), show="headings")
+        self.goals_tree = ttk.Treeview(
+            self.goals_page, columns=("title", "target_amount", "current_amount", "remaining", "forecast"),
+            show="headings",
+        )
         self.goals_tree.heading("title", text="Название")
-        self.goals_tree.heading("target_amount", text="Цель (₽)")
-        self.goals_tree.heading("current_amount", text="Текущая сумма (₽)")
+        self.show_goal_headings(self.currency.get())
         self.goals_tree.heading("remaining", text="Осталось времени")
+        self.goals_tree.heading("forecast", text="Прогноз достижения")
+        self.goals = []
+        self.goal_forecasts = {}
         self.goals_tree.pack(fill=tk.BOTH, expand=True, pady=10)
+        self.goals_reconciler = TreeviewReconciler(self.goals_tree)
+
+        strategy_frame = tk.Frame(self.goals_page)
+        strategy_frame.pack(pady=5)
+        tk.Label(strategy_frame, text="Распределение доходов:").pack(side=tk.LEFT)
+        self.goal_strategy = tk.StringVar()
+        strategy_box = ttk.Combobox(
+            strategy_frame,
+            textvariable=self.goal_strategy,
+            state="readonly",
+            values=[STRATEGY_LABELS[strategy] for strategy in STRATEGIES],
+            width=25,
+        )
+        strategy_box.pack(side=tk.LEFT, padx=5)
+        strategy_box.bind("<<ComboboxSelected>>", self.change_goal_strategy)
 
         tk.Button(self.goals_page, text="Добавить цель", command=self.add_goal_window).pack(pady=10)
         tk.Button(self.goals_page, text="Удалить цель", command=self.delete_completed_goal).pack(pady=10)
 
+        self.run_in_background(
+            self.goals_page, self.service.goal_strategy, self.user[0],
+            on_done=lambda strategy: self.goal_strategy.set(STRATEGY_LABELS[strategy]),
+        )
         self.update_goals_list()
 
+    def change_goal_strategy(self, event=None):
+        """
+        Сохраняет выбранную стратегию распределения доходов по целям.
+        """
+        label = self.goal_strategy.get()
+        strategy = next(key for key, value in STRATEGY_LABELS.items() if value == label)
+        self.run_in_background(
+            self.goals_page, self.service.set_goal_strategy, self.user[0], strategy,
+            on_done=lambda result: self.update_goals_list(),
+        )
+
 
     def update_goals_list(self):
         """
         Обновляет список финансовых целей из базы данных.
         """
-        # Очищаем таблицу
-        for row in self.goals_tree.get_children():
-            self.goals_tree.delete(row)
+        def loaded(goals):
+            if goals:
+                self.show_goal_headings(goals[0].currency)
+            self.show_goals(goals)
+            self.run_in_background(
+                self.goals_page, self.service.goal_forecast, self.user[0], on_done=self.show_goal_forecasts,
+            )
+
+        self.run_in_background(self.goals_page, self.service.list_goals, self.user[0], on_done=loaded)
+
+    def show_goal_headings(self, currency):
+        """
+        Показывает валюту сумм целей в заголовках таблицы.
+        """
+        self.goals_tree.heading("target_amount", text=f"Цель ({currency})")
+        self.goals_tree.heading("current_amount", text=f"Текущая сумма ({currency})")
 
-        conn = sqlite3.connect('users.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, title, target_amount, current_amount, target_date
-            FROM goals
-            WHERE user_id = ?
-        ''', (self.user[0],))
-        goals = cursor.fetchall()
-        conn.close()
+    def show_goal_forecasts(self, forecasts):
+        """
+        Показывает прогноз дат достижения целей.
+
+        Args:
+            forecasts (dict): ID цели -> дата достижения или None.
+        """
+        self.goal_forecasts = forecasts
+        self.show_goals(self.goals)
 
+    def forecast_text(self, goal_id, target_date):
+        """
+        Returns:
+            str: Прогноз достижения цели для таблицы целей.
+        """
+        if goal_id not in self.goal_forecasts:
+            return "…"
+        completion = self.goal_forecasts[goal_id]
+        if completion is None:
+            return "Не достигается"
+        text = completion.strftime("%d.%m.%Y")
+        if completion.isoformat() > target_date:
+            text += " (позже срока)"
+        return text
+
+    def show_goals(self, goals):
+        """
+        Показывает финансовые цели в таблице.
 
-        for goal_id, title, target_amount, current_amount, target_date in goals:
+        Прогноз берется из последнего результата `show_goal_forecasts`; он
+        пересчитывается после каждой загрузки списка целей.
+
+        Args:
+            goals (list): Записи `Goal`.
+        """
+        self.goals = goals
+        rows = []
+        for goal_id, title, target_amount, current_amount, _, target_date, *_ in goals:
             remaining_days = (datetime.strptime(target_date, "%Y-%m-%d") - datetime.now()).days
             remaining_text = f"{remaining_days + 1} дн." if remaining_days >= 0 else "Срок истёк"
 
             if current_amount >= target_amount:
-                self.goals_tree.insert(
-                    "",
-                    tk.END,
-                    values=(title, f"{current_amount}/{target_amount}", "Цель достигнута!"),
-                    tags=("completed",)
-                )
+                rows.append((
+                    goal_id,
+                    (title, f"{current_amount}/{target_amount}", "Цель достигнута!"),
+                    ("completed",)
+                ))
             else:
-                self.goals_tree.insert(
-                    "",
-                    tk.END,
-                    values=(
+                rows.append((
+                    goal_id,
+                    (
                         title, 
                         f"{target_amount}",  
                         f"{current_amount}",  
-                        remaining_text  
-                    )
-                )
+                        remaining_text,
+                        self.forecast_text(goal_id, target_date),
+                    ),
+                    ()
+                ))
+
+        self.goals_reconciler.reconcile(rows)
 
     def add_goal_window(self):
         """
@@ -504,21 +799,31 @@ class FinanceAssistantApp(tk.Tk):
         """
         add_goal_window = tk.Toplevel(self)
         add_goal_window.title("Добавить цель")
-        add_goal_window.geometry("300x300")
+        add_goal_window.geometry("300x360")
         add_goal_window.resizable(False, False)
 
         tk.Label(add_goal_window, text="Название цели:").pack(pady=10)
         title_entry = tk.Entry(add_goal_window)
         title_entry.pack(pady=5)
 
-        tk.Label(add_goal_window, text="Сумма цели (₽):").pack(pady=10)
-        target_amount_entry = tk.Entry(add_goal_window)
-        target_amount_entry.pack(pady=5)
+        tk.Label(add_goal_window, text="Сумма цели:").pack(pady=10)
+        amount_frame = tk.Frame(add_goal_window)
+        amount_frame.pack(pady=5)
+        target_amount_entry = tk.Entry(amount_frame)
+        target_amount_entry.pack(side=tk.LEFT)
+        currency_box = ttk.Combobox(amount_frame, state="readonly", values=self.currencies, width=5)
+        currency_box.current(0)
+        currency_box.pack(side=tk.LEFT, padx=4)
 
         tk.Label(add_goal_window, text="Дата достижения цели (ГГГГ-ММ-ДД):").pack(pady=10)
         target_date_entry = tk.Entry(add_goal_window)
         target_date_entry.pack(pady=5)
 
+        tk.Label(add_goal_window, text="Приоритет (1 — обычный):").pack(pady=10)
+        priority_entry = tk.Entry(add_goal_window)
+        priority_entry.insert(0, "1")
+        priority_entry.pack(pady=5)
+
 
         def save_goal():
             """
@@ -527,29 +832,20 @@ class FinanceAssistantApp(tk.Tk):
             title = title_entry.get()
             target_amount = target_amount_entry.get()
             target_date = target_date_entry.get()
+            priority = priority_entry.get()
+            currency = currency_box.get()
 
-            try:
-                check_goal_title(title)
-                check_goal_amount(target_amount)
-                check_goal_date(target_date)
-            except ValueError:
-                return  
-
-            creation_date = datetime.now().strftime("%Y-%m-%d")
-
-            conn = sqlite3.connect('users.db')
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO goals (user_id, title, target_amount, current_amount, target_date, creation_date)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (self.user[0], title, target_amount, 0, target_date, creation_date))
-            conn.commit()
-            conn.close()
+            def saved(goal_id):
+                messagebox.showinfo("Успех", "Цель добавлена!")
+                add_goal_window.destroy()
 
-            messagebox.showinfo("Успех", "Цель добавлена!")
-            add_goal_window.destroy()
+                self.update_goals_list()
 
-            self.update_goals_list()  
+            self.run_in_background(
+                self.goals_page, lambda: self.service.add_goal(
+                    self.user[0], title, target_amount, target_date, priority=priority, currency=currency),
+                on_done=saved,
+            )
 
         tk.Button(add_goal_window, text="Сохранить цель", command=save_goal).pack(pady=10)
 
@@ -559,13 +855,15 @@ class FinanceAssistantApp(tk.Tk):
         """
         tk.Label(self.reminders_page, text="Напоминания", font=("Arial", 16)).pack(pady=10)
 
-        self.reminders_tree = ttk.Treeview(self.reminders_page, columns=("Title", "Date", "Time", "Description"), show="headings")
+        self.reminders_tree = ttk.Treeview(self.reminders_page, columns=("Title", "Date", "Time", "Description", "Status"), show="headings")
         self.reminders_tree.heading("Title", text="Название")
         self.reminders_tree.heading("Date", text="Дата")
         self.reminders_tree.heading("Time", text="Время")
         self.reminders_tree.heading("Description", text="Описание")
+        self.reminders_tree.heading("Status", text="Статус")
         self.reminders_tree.pack(fill=tk.BOTH, expand=True)
         self.reminders_tree.column("Time", stretch=False, width=100 )
+        self.reminders_reconciler = TreeviewReconciler(self.reminders_tree)
 
         tk.Button(self.reminders_page, text="Добавить напоминание", command=self.add_reminder_window).pack(pady=10)
 
@@ -577,16 +875,20 @@ class FinanceAssistantApp(tk.Tk):
         """
         Загружает все напоминания пользователя из базы данных и отображает их в интерфейсе.
         """
-        # Очистка текущего содержимого
-        for item in self.reminders_tree.get_children():
-            self.reminders_tree.delete(item)
+        self.run_in_background(
+            self.reminders_page, self.service.list_reminders, self.user[0], on_done=self.show_reminders)
 
-        conn = sqlite3.connect('users.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT title, date, time, description_reminder FROM reminders WHERE user_id = ?', (self.user[0],))
-        for row in cursor.fetchall():
-            self.reminders_tree.insert("", tk.END, values=row)
-        conn.close()
+    def show_reminders(self, reminders):
+        """
+        Показывает напоминания в таблице.
+
+        Args:
+            reminders (list): Записи `Reminder`.
+        """
+        self.reminders_reconciler.reconcile(
+            (r.id, (r.title, r.date, r.time, r.description, REMINDER_STATUS_LABELS[r.status]), ())
+            for r in reminders
+        )
 
     def delete_reminder(self):
         """
@@ -597,25 +899,22 @@ class FinanceAssistantApp(tk.Tk):
             messagebox.showwarning("Ошибка", "Выберите напоминание для удаления.")
             return
 
-        item_values = self.reminders_tree.item(selected_item)['values']
-        title = item_values[0]
-        date = item_values[1]
-        time = item_values[2]
+        reminder_id = selected_item[0]
+        title = self.reminders_tree.item(reminder_id)['values'][0]
 
         if messagebox.askyesno("Подтверждение", f"Вы уверены, что хотите удалить напоминание '{title}'?"):
-            try:
-                conn = sqlite3.connect('users.db')
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM reminders WHERE user_id=? AND title=? AND date=? AND time=?",
-                               (self.user[0], title, date, time))
-                conn.commit()
-                conn.close()
+            def deleted(result):
+                self.reminder_scheduler.remove(int(reminder_id))
 
-                self.reminders_tree.delete(selected_item)
+                self.load_reminders()
 
                 messagebox.showinfo("Успех", "Напоминание удалено.")
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Не удалось удалить напоминание: {e}")
+
+            self.run_in_background(
+                self.reminders_page, self.service.delete_reminder, self.user[0], int(reminder_id),
+                on_done=deleted, on_error=lambda error: messagebox.showerror(
+                    "Ошибка", f"Не удалось удалить напоминание: {getattr(error, 'message', error)}"),
+            )
 
     def add_reminder_window(self):
         """
@@ -642,23 +941,6 @@ class FinanceAssistantApp(tk.Tk):
         description_entry = tk.Entry(add_window)
         description_entry.pack(pady=5)
 
-        def validate_time(time_str):
-            """
-            Проверяет корректность формата времени.
-
-            Args:
-                time_str (str): Время в формате "ЧЧ:ММ".
-
-            Returns:
-                bool: True, если время корректно, иначе False.
-            """
-            try:
-                datetime.strptime(time_str, "%H:%M")
-                return True
-            except ValueError:
-                return False
-
-
         def save_reminder():
             """
             Сохраняет новое напоминание в базе данных.
@@ -668,123 +950,221 @@ class FinanceAssistantApp(tk.Tk):
             time = time_entry.get()
             description = description_entry.get()
 
-            if not title or not date or not time:
-                messagebox.showerror("Ошибка", "Заполните все обязательные поля!")
-                return
-
-            if not validate_date(date):
-                messagebox.showerror("Ошибка", "Некорректный формат даты! Используйте ГГГГ-ММ-ДД.")
-                return
-
-            if not validate_time(time):
-                messagebox.showerror("Ошибка", "Некорректный формат времени! Используйте ЧЧ:ММ.")
-                return
-
-            if not re.match(r"^[a-zA-Zа-яА-Я0-9\s\-.,!?]+$", title):
-                messagebox.showerror("Ошибка", "Название содержит недопустимые символы!")
-                return
-
-            if description and not re.match(r"^[a-zA-Zа-яА-Я0-9\s\-.,!?]+$", description):
-                messagebox.showerror("Ошибка", "Описание содержит недопустимые символы!")
-                return
+            def add():
+                reminder_id = self.service.add_reminder(self.user[0], title, date, time, description)
+                return self.service.get_reminder(self.user[0], reminder_id)
 
-            try:
-                conn = sqlite3.connect('users.db')
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO reminders (user_id, title, date, time, description_reminder) 
-                    VALUES (?, ?, ?, ?, ?)
-                """, (self.user[0], title, date, time, description))
-                conn.commit()
-                conn.close()
+            def saved(reminder):
+                self.reminder_scheduler.add(reminder)
 
                 messagebox.showinfo("Успех", "Напоминание добавлено!")
                 add_window.destroy()
                 self.load_reminders()
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Не удалось добавить напоминание: {e}")
+
+            self.run_in_background(self.reminders_page, add, on_done=saved)
 
         tk.Button(add_window, text="Сохранить", command=save_reminder).pack(pady=10)
 
-    def check_reminders(self):
+    def start_reminder_scheduler(self):
         """
-        Проверяет напоминания в базе данных на устаревшие или близкие к текущему времени.
+        Запускает планировщик, который срабатывает к сроку ближайшего напоминания.
         """
-        now = datetime.now()
-        conn = sqlite3.connect('users.db')
-        cursor = conn.cursor()
-
-        cursor.execute('SELECT id, title, date, time FROM reminders WHERE user_id = ?', (self.user[0],))
-        reminders = cursor.fetchall()
-
-        for reminder_id, title, date_str, time_str in reminders:
-            if not date_str.strip() or not time_str.strip():
-                continue
+        self.reminder_scheduler = ReminderScheduler(
+            self.service, self.user[0], self.after, self.after_cancel,
+            on_upcoming=self.notify_reminders,
+            on_expired=lambda reminder_ids: self.load_reminders(),
+            run=lambda func, on_done: self.run_in_background(self.reminders_page, func, on_done=on_done),
+        )
+        self.reminder_scheduler.start()
 
-            try:
-                reminder_datetime = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+    def notify_reminders(self, reminders):
+        """
+        Сообщает о напоминаниях, срок которых скоро наступит.
 
-                if reminder_datetime < now:
-                    cursor.execute('''
-                        UPDATE reminders 
-                        SET description_reminder = ?, date = '', time = '' 
-                        WHERE id = ?''',
-                                   ("Напоминание устарело.", reminder_id))
+        Args:
+            reminders (list): Записи `Reminder`.
+        """
+        for reminder in reminders:
+            messagebox.showinfo("Напоминание", f"Напоминание скоро истечет!\n\nНапоминание: {reminder.title}")
 
-                if now <= reminder_datetime <= now + timedelta(minutes=30):
-                    messagebox.showinfo("Напоминание", f"Напоминание скоро истечет!\n\nНапоминание: {title}")
+    def run_recurring(self):
+        """
+        Создает транзакции по наступившим срабатываниям правил пользователя,
+        в том числе пропущенным, пока приложение было закрыто, и планирует
+        следующую проверку через `RECURRING_INTERVAL`.
+        """
+        self.recurring_timer = self.after(RECURRING_INTERVAL, self.run_recurring)
+        self.run_in_background(self.transactions_page, self.service.generate_recurring, self.user[0],
+                               on_done=self.show_recurring_report)
 
-            except ValueError as e:
-                print(f"Ошибка обработки напоминания ID {reminder_id}: {e}")
+    def show_recurring_report(self, report):
+        """
+        Обновляет историю, баланс и цели, если появились новые транзакции.
 
-        conn.commit()
-        conn.close()
+        Args:
+            report (RecurringReport): Итог запуска `generate_recurring`.
+        """
+        if not report.created:
+            return
+        self.update_transactions_list()
+        self.update_balance()
+        self.update_goals_list()
+        for goal in report.completed_goals:
+            messagebox.showinfo("Поздравляем!", f"Цель достигнута: {goal.title}!")
 
-    def check_reminders_loop(self):
+    def recurring_rules_window(self):
         """
-        Запускает проверку напоминаний в фоне каждые 1 минут.
+        Открывает окно со списком правил повторяющихся транзакций и формой
+        добавления правила.
         """
+        rules_window = tk.Toplevel(self)
+        rules_window.title("Регулярные платежи")
+        rules_window.geometry("760x480")
+
+        columns = ("category", "amount", "type", "frequency", "start_date", "end_date", "next_date")
+        rules_tree = ttk.Treeview(rules_window, columns=columns, show="headings", height=8)
+        for column, text, width in (("category", "Категория", 120), ("amount", "Сумма", 110),
+                                    ("type", "Тип", 70), ("frequency", "Периодичность", 120),
+                                    ("start_date", "Начало", 85), ("end_date", "Окончание", 85),
+                                    ("next_date", "Следующая", 85)):
+            rules_tree.heading(column, text=text)
+            rules_tree.column(column, width=width)
+        rules_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        reconciler = TreeviewReconciler(rules_tree)
+
+        def show(rules):
+            if not rules_window.winfo_exists():
+                return
+            rows = []
+            for rule in rules:
+                frequency = FREQUENCY_LABELS[rule.frequency]
+                if rule.interval > 1:
+                    frequency += f" (шаг {rule.interval})"
+                rows.append((rule.id, (rule.category, format_money(rule.amount, rule.currency), rule.type, frequency,
+                                       rule.start_date[:10], rule.end_date or "—",
+                                       rule.next_date[:10] if rule.next_date else "Завершено"),
+                             ()))
+            reconciler.reconcile(rows)
+
+        def load():
+            self.run_in_background(self.transactions_page, self.service.list_recurring_rules, self.user[0],
+                                   on_done=show)
+
+        form = tk.Frame(rules_window)
+        form.pack(padx=10, pady=5)
+        fields = {}
+        for row, (name, label, widget, options) in enumerate((
+                ("category", "Категория:", tk.Entry, {}),
+                ("amount", "Сумма:", tk.Entry, {}),
+                ("currency", "Валюта:", ttk.Combobox, {"state": "readonly", "values": self.currencies}),
+                ("type", "Тип:", ttk.Combobox, {"state": "readonly", "values": pfa_service.TRANSACTION_TYPES}),
+                ("frequency", "Периодичность:", ttk.Combobox,
+                 {"state": "readonly", "values": [FREQUENCY_LABELS[frequency] for frequency in FREQUENCIES]}),
+                ("interval", "Шаг:", tk.Entry, {}),
+                ("start_date", "Начало (ГГГГ-ММ-ДД):", tk.Entry, {}),
+                ("end_date", "Окончание (необязательно):", tk.Entry, {}))):
+            tk.Label(form, text=label).grid(row=row // 2, column=row % 2 * 2, sticky=tk.E, padx=4, pady=2)
+            fields[name] = widget(form, width=18, **options)
+            fields[name].grid(row=row // 2, column=row % 2 * 2 + 1, sticky=tk.W, padx=4, pady=2)
+        fields["type"].current(1)
+        fields["currency"].current(0)
+        fields["frequency"].current(FREQUENCIES.index("monthly"))
+        fields["interval"].insert(0, "1")
+        fields["start_date"].insert(0, datetime.now().strftime("%Y-%m-%d"))
+
+        def save_rule():
+            """
+            Сохраняет правило и сразу создает транзакции за прошедшие даты.
+            """
+            values = {name: field.get() for name, field in fields.items()}
 
-        def delayed_check():
-            self.check_reminders()
-            self.after(600000, delayed_check)
+            def add():
+                self.service.add_recurring_rule(
+                    self.user[0], values["category"], values["amount"], values["type"],
+                    FREQUENCIES[fields["frequency"].current()], values["start_date"], values["end_date"],
+                    values["interval"], values["currency"])
+                return self.service.generate_recurring(self.user[0])
 
-        self.after(1000, delayed_check)
+            def saved(report):
+                self.show_recurring_report(report)
+                load()
 
+            self.run_in_background(self.transactions_page, add, on_done=saved)
 
+        def delete_rule():
+            """
+            Удаляет выбранное правило; созданные им транзакции остаются.
+            """
+            selected = rules_tree.selection()
+            if not selected:
+                messagebox.showwarning("Ошибка", "Выберите правило для удаления.", parent=rules_window)
+                return
+            self.run_in_background(self.transactions_page, self.service.delete_recurring_rule, self.user[0],
+                                   int(selected[0]), on_done=lambda result: load())
 
-    def update_goal_progress(self, amount):
-        """
-        Обновляет прогресс всех финансовых целей пользователя на основании внесённой суммы.
+        buttons = tk.Frame(rules_window)
+        buttons.pack(pady=10)
+        tk.Button(buttons, text="Добавить правило", command=save_rule).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Удалить правило", command=delete_rule).pack(side=tk.LEFT, padx=5)
+        load()
 
-        Args:
-            amount (float): Сумма для обновления прогресса целей.
+    def setup_search_page(self):
         """
-        conn = sqlite3.connect('users.db')
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT id, current_amount, target_amount FROM goals WHERE user_id = ?
-        ''', (self.user[0],))
-        goals = cursor.fetchall()
-
-        for goal_id, current_amount, target_amount in goals:
-            new_amount = current_amount + amount
-
-            if new_amount >= target_amount:
-                cursor.execute('''
-                    UPDATE goals SET current_amount = ?, target_amount = 0 WHERE id = ?
-                ''', (target_amount, goal_id))
-                messagebox.showinfo("Поздравляем!", f"Цель достигнута!")
-            else:
-                cursor.execute('''
-                    UPDATE goals SET current_amount = ? WHERE id = ?
-                ''', (new_amount, goal_id))
+        Настраивает вкладку поиска по транзакциям, целям и напоминаниям.
+        """
+        tk.Label(self.search_page, text="Поиск", font=("Arial", 16)).pack(pady=10)
+
+        self.search_entry = tk.Entry(self.search_page, width=50)
+        self.search_entry.pack(pady=5)
+        self.search_entry.bind("<KeyRelease>", self.schedule_search)
+        self.search_entry.bind("<Return>", lambda event: self.run_search())
+        self.search_timer = None
+
+        self.search_tree = ttk.Treeview(
+            self.search_page, columns=("kind", "title", "details", "date", "amount"), show="headings")
+        self.search_tree.heading("kind", text="Раздел")
+        self.search_tree.heading("title", text="Название / категория")
+        self.search_tree.heading("details", text="Подробности")
+        self.search_tree.heading("date", text="Дата")
+        self.search_tree.heading("amount", text="Сумма")
+        self.search_tree.column("kind", stretch=False, width=110)
+        self.search_tree.column("amount", stretch=False, width=140)
+        self.search_tree.pack(fill=tk.BOTH, expand=True)
+        self.search_reconciler = TreeviewReconciler(self.search_tree)
+
+    def schedule_search(self, event=None):
+        """
+        Откладывает поиск до паузы во вводе, чтобы не искать на каждое нажатие клавиши.
+        """
+        if self.search_timer is not None:
+            self.after_cancel(self.search_timer)
+        self.search_timer = self.after(SEARCH_DELAY, self.run_search)
 
-        conn.commit()
-        conn.close()
+    def run_search(self):
+        """
+        Ищет по тексту из поля поиска в фоновом потоке и показывает результаты.
+        """
+        if self.search_timer is not None:
+            self.after_cancel(self.search_timer)
+            self.search_timer = None
+        self.run_in_background(
+            self.search_page, self.service.search, self.user[0], self.search_entry.get(),
+            on_done=self.show_search_results)
+
+    def show_search_results(self, hits):
+        """
+        Показывает результаты поиска; совпадения отмечены квадратными скобками.
 
-        self.update_goals_list()
+        Args:
+            hits (list): Записи `pfa_search.SearchHit`.
+        """
+        self.search_reconciler.reconcile(
+            (f"{hit.kind}-{hit.id}",
+             (KIND_LABELS[hit.kind], hit.title, hit.snippet, hit.date,
+              "" if hit.amount is None else format_money(hit.amount, hit.currency)),
+             ())
+            for hit in hits
+        )
 
     def delete_completed_goal(self):
         """
@@ -797,28 +1177,21 @@ class FinanceAssistantApp(tk.Tk):
             return
 
 
-        item_values = self.goals_tree.item(selected_item)['values']
-        title = item_values[0]
+        goal_id = selected_item[0]
+        title = self.goals_tree.item(goal_id)['values'][0]
 
 
         if messagebox.askyesno("Подтверждение", f"Вы уверены, что хотите удалить цель '{title}'?"):
-            try:
-                conn = sqlite3.connect('users.db')
-                cursor = conn.cursor()
-
-                # Удаляем цель из базы данных по её названию и пользователю
-                cursor.execute("""
-                    DELETE FROM goals 
-                    WHERE user_id = ? AND title = ?
-                """, (self.user[0], title))
-                conn.commit()
-                conn.close()
-
-                self.goals_tree.delete(selected_item)
+            def deleted(result):
+                self.update_goals_list()
 
                 messagebox.showinfo("Успех", "Цель удалена.")
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Не удалось удалить цель: {e}")
+
+            self.run_in_background(
+                self.goals_page, self.service.delete_goal, self.user[0], int(goal_id),
+                on_done=deleted, on_error=lambda error: messagebox.showerror(
+                    "Ошибка", f"Не удалось удалить цель: {getattr(error, 'message', error)}"),
+            )
 
 
 def validate_date(date_str):
@@ -831,12 +1204,33 @@ def validate_date(date_str):
     :rtype: bool
     :raises ValueError: if date < datetime.now().date()
     '''
-    date = datetime.strptime(date_str, "%Y-%m-%d").date()
-    if date < datetime.now().date():
-        messagebox.showerror("Ошибка","Дата должна быть больше указанной")
-        raise ValueError("Дата должна быть больше указанной")
+    try:
+        pfa_service.validate_future_date(date_str, datetime.now().date())
+    except ValidationError as e:
+        messagebox.showerror("Ошибка", e.message)
+        raise
     return True
 
+def _check(validator, value, testing=False, title="Ошибка"):
+    """
+    Проверяет значение валидатором сервисного слоя и показывает ошибку пользователю.
+
+    Args:
+        validator (callable): Валидатор из `pfa_service`.
+        value (str): Проверяемое значение.
+        testing (bool): Если True, ошибки только через исключения (для тестов).
+        title (str): Заголовок окна с ошибкой.
+
+    Raises:
+        ValidationError: Если значение некорректно.
+    """
+    try:
+        validator(value)
+    except ValidationError as e:
+        if not testing:
+            messagebox.showerror(title, e.message)
+        raise
+
 def clear_text():
     """
     Очищает текст
@@ -853,27 +1247,17 @@ def register():
     password = password_entry.get()
     confirm_password = confirm_password_entry.get()
 
-    check_login(login)
-    check_password(password)
     if not login or not password or not confirm_password:
         messagebox.showerror("Ошибка", "Заполните все поля!")
         return
 
-    if password != confirm_password:
-        messagebox.showerror("Ошибка", "Пароли не совпадают!")
-        return
-
-    conn = sqlite3.connect('users.db')
-    cursor = conn.cursor()
     try:
-        cursor.execute("INSERT INTO users (login, password) VALUES (?, ?)", (login, password))
-        conn.commit()
-        messagebox.showinfo("Успех", "Регистрация прошла успешно!")
-        clear_text()
-    except sqlite3.IntegrityError:
-        messagebox.showerror("Ошибка", "Пользователь с таким логином уже существует!")
-    finally:
-        conn.close()
+        FinanceService().register(login, password, confirm_password)
+    except ServiceError as e:
+        messagebox.showerror("Ошибка", e.message)
+        return
+    messagebox.showinfo("Успех", "Регистрация прошла успешно!")
+    clear_text()
 
 def check_sums_transaction_valid(summ, testing=False):
     """
@@ -939,12 +1323,7 @@ def check_goal_title(title, testing=False):
     Raises:
         ValueError: Если название цели пустое.
     """
-    if not title.strip():
-        if testing:
-            raise ValueError("Название цели не может быть пустым")
-        else:
-            messagebox.showerror("Ошибка", "Название цели не может быть пустым!")
-            raise ValueError("Название цели не может быть пустым")
+    _check(pfa_service.validate_goal_title, title, testing)
     return True  
 
 
@@ -958,19 +1337,7 @@ def check_goal_amount(target_amount, testing=False):
     Raises:
         ValueError: Если сумма цели пуста, некорректна или отрицательна.
     """
-    if not target_amount.strip():
-        if testing:
-            raise ValueError("Сумма цели не может быть пустой")
-        else:
-            messagebox.showerror("Ошибка", "Сумма цели не может быть пустой!")
-            raise ValueError("Сумма цели не может быть пустой")
-
-    if not target_amount.isdigit() or int(target_amount) <= 0:
-        if testing:
-            raise ValueError("Сумма цели должна быть положительным числом")
-        else:
-            messagebox.showerror("Ошибка", "Сумма цели должна быть положительным числом!")
-            raise ValueError("Сумма цели должна быть положительным числом")
+    _check(pfa_service.validate_amount, target_amount, testing)
     return True  
 
 
@@ -984,21 +1351,7 @@ def check_goal_date(target_date, testing=False):
     Raises:
         ValueError: Если дата пуста или формат даты некорректен.
     """
-    if not target_date.strip():
-        if testing:
-            raise ValueError("Дата достижения цели не может быть пустой")
-        else:
-            messagebox.showerror("Ошибка", "Дата достижения цели не может быть пустой!")
-            raise ValueError("Дата достижения цели не может быть пустой")
-
-    try:
-        datetime.strptime(target_date, "%Y-%m-%d")
-    except ValueError:
-        if testing:
-            raise ValueError("Некорректный формат даты! Ожидается формат ГГГГ-ММ-ДД.")
-        else:
-            messagebox.showerror("Ошибка", "Некорректный формат даты! Используйте ГГГГ-ММ-ДД.")
-            raise ValueError("Некорректный формат даты! Ожидается формат ГГГГ-ММ-ДД.")
+    _check(pfa_service.validate_date, target_date, testing)
     return True  # Дата валидна
 
 
@@ -1012,9 +1365,7 @@ def check_login(entryLogin):
     :rtype: bool
     :raises ValueError: if len(entryPassword) < 8
     """
-    if len(entryLogin) < 3:
-        messagebox.showerror("Ошибка!", "Логин слишком короткий! Должен содержать минимум 3 символов.")
-        raise ValueError("Логин слишком короткий!")
+    _check(pfa_service.validate_login, entryLogin, title="Ошибка!")
     return True
 
 
@@ -1028,11 +1379,8 @@ def check_password(entryPassword):
     :rtype: bool
     :raises ValueError: if len(entryPassword) < 8
     """
-    if len(entryPassword) < 8:
-        messagebox.showerror("Ошибка!", "Пароль слишком короткий! Должен содержать минимум 8 символов.")
-        raise ValueError("Пароль слишком короткий!")
-    else:
-        return True
+    _check(pfa_service.validate_password, entryPassword, title="Ошибка!")
+    return True
 
 def login():
     """
@@ -1049,29 +1397,34 @@ def login():
         return
 
 
-    conn = sqlite3.connect('users.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE login = ? AND password = ?", (login, password))
-    user = cursor.fetchone()
-    conn.close()
+    try:
+        user = FinanceService().login(login, password)
+    except ServiceError as e:
+        messagebox.showerror("Ошибка", e.message)
+        return
 
+    messagebox.showinfo("Успех", "Вход выполнен успешно!")
+    window.destroy()
+    app = FinanceAssistantApp(user)
+    app.mainloop()
+    app.shutdown()
+    get_db().close()
 
-    if user and password == confirm_password:
-        messagebox.showinfo("Успех", "Вход выполнен успешно!")
-        window.destroy()
-        app = FinanceAssistantApp(user)
-        app.mainloop()
-    else:
-        messagebox.showerror("Ошибка", "Проверьте корректность введённых данных!")
 
+def create_login_window():
+    """
+    Создает окно входа и регистрации.
 
-if __name__ == "__main__":
+    Returns:
+        tk.Tk: Окно входа.
+    """
+    global window, login_entry, password_entry, confirm_password_entry
     window = tk.Tk()
     window.resizable(width=False, height=False)
     window.title("Вход/Регистрация")
     window.geometry("800x600")
 
-    icon = PhotoImage(file= "logo.png")
+    icon = PhotoImage(file=LOGO_PATH)
     window.iconphoto(False, icon)
 
     app_label = tk.Label(window, text = "Финансовый помощник",fg="#57a1f8", font=('Microsoft Yahei UI Light',23,'bold'), pady=40)
@@ -1097,6 +1450,16 @@ if __name__ == "__main__":
     register_button = tk.Button(window, text="Регистрация", command=register)
     register_button.place(x=375,y=320)
 
-    window.mainloop()
+    return window
+
+
+def main():
+    """
+    Точка входа приложения: подготавливает базу данных и показывает окно входа.
+    """
+    create_db()
+    create_login_window().mainloop()
 
 
+if __name__ == "__main__":
+    main()
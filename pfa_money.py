@@ -0,0 +1,147 @@
+"""
+Денежные суммы в копейках.
+
+Суммы хранятся в базе данных целыми числами копеек (колонки `amount`,
+`target_amount`, `current_amount`, итоги `balances` и сводки `rollups`),
+поэтому SUM в SQLite и агрегаты NumPy/pandas по массивам int64 точны и не
+накапливают погрешность плавающей точки. На границе сервисного слоя суммы
+представлены значением `Money`; в рубли с копейками они переводятся только
+при отображении.
+
+`Money` не хранит валюту: суммы транзакций, итоги и сводки ведутся в базовой
+валюте `BASE_CURRENCY`, а суммы в других валютах (в сотых долях единицы, как
+копейки) сопровождаются кодом валюты рядом (см. `pfa_rates`).
+"""
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+# Копеек в рубле.
+MINOR_UNITS = 100
+
+# Базовая валюта: в ней хранятся суммы транзакций, итоги и сводки.
+BASE_CURRENCY = "RUB"
+
+# Предел INTEGER в SQLite (знаковое 64-битное целое).
+MAX_KOPECKS = 2 ** 63 - 1
+
+# Наибольшая сумма одной записи (10^13 рублей): итоги и сводки складывают
+# много таких сумм и должны остаться в пределах `MAX_KOPECKS`.
+MAX_AMOUNT_KOPECKS = 10 ** 15
+
+
+class Money(namedtuple("Money", "kopecks")):
+    """
+    Неизменяемая денежная сумма в копейках.
+
+    Суммы складываются, вычитаются и сравниваются между собой без потери
+    точности; `str()` дает рубли с двумя знаками после точки ("1234.50").
+
+    Атрибуты:
+        kopecks (int): Сумма в копейках.
+    """
+    __slots__ = ()
+
+    def __new__(cls, kopecks=0):
+        if isinstance(kopecks, bool) or not isinstance(kopecks, int):
+            raise TypeError(f"Сумма в копейках должна быть целым числом, а не {type(kopecks).__name__}")
+        return super().__new__(cls, kopecks)
+
+    @classmethod
+    def parse(cls, value):
+        """
+        Переводит сумму в рублях в `Money`, округляя до копейки (половина — от нуля).
+
+        Args:
+            value (str | int | float | Decimal | Money): Сумма в рублях. Строка
+                допускает пробелы-разделители разрядов и десятичную запятую.
+
+        Returns:
+            Money: Сумма.
+
+        Raises:
+            ValueError: Если значение не является конечным числом или не
+                помещается в INTEGER SQLite (`MAX_KOPECKS`).
+        """
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, str):
+            value = value.strip().replace(" ", "").replace("\u00a0", "").replace(",", ".")
+        elif isinstance(value, float):
+            # repr дает кратчайшую запись, которая читается обратно в то же число.
+            value = repr(value)
+        try:
+            rubles = Decimal(value)
+        except (InvalidOperation, TypeError, ValueError):
+            raise ValueError(f"Некорректная сумма: {value!r}") from None
+        if not rubles.is_finite():
+            raise ValueError(f"Некорректная сумма: {value!r}")
+        try:
+            kopecks = int((rubles * MINOR_UNITS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+        except InvalidOperation:
+            # Число цифр превышает точность контекста Decimal.
+            raise ValueError(f"Слишком большая сумма: {value!r}") from None
+        if abs(kopecks) > MAX_KOPECKS:
+            raise ValueError(f"Слишком большая сумма: {value!r}")
+        return cls(kopecks)
+
+    @property
+    def rubles(self):
+        """
+        Сумма в рублях (`Decimal` с двумя знаками после точки).
+        """
+        return Decimal(self.kopecks).scaleb(-2)
+
+    def __str__(self):
+        return str(self.rubles)
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def __float__(self):
+        # Только для отображения (например, осей диаграмм).
+        return self.kopecks / MINOR_UNITS
+
+    def __bool__(self):
+        return self.kopecks != 0
+
+    def __add__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.kopecks + other.kopecks)
+
+    def __radd__(self, other):
+        # Позволяет использовать sum() с начальным значением 0.
+        if other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.kopecks - other.kopecks)
+
+    def __neg__(self):
+        return Money(-self.kopecks)
+
+    def __mul__(self, other):
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+
+ZERO = Money(0)
+
+
+def format_money(money, currency=BASE_CURRENCY):
+    """
+    Форматирует сумму для отображения: "1 234.50 RUB".
+
+    Args:
+        money (Money | int): Сумма или копейки.
+        currency (str): Код валюты суммы.
+    """
+    if not isinstance(money, Money):
+        money = Money(money)
+    sign = "-" if money.kopecks < 0 else ""
+    rubles, kopecks = divmod(abs(money.kopecks), MINOR_UNITS)
+    return f"{sign}{rubles:,}.{kopecks:02d} {currency}".replace(",", " ")
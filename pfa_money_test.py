@@ -0,0 +1,103 @@
+from decimal import Decimal
+import sqlite3
+from hypothesis import given, strategies as st
+import pytest
+from pfa_money import ZERO, Money, format_money
+from pfa_schema import KOPECKS_SQL, register_legacy_kopecks
+
+# Суммы в копейках до 10^13 рублей: с запасом больше любых реальных сумм.
+kopecks = st.integers(min_value=-10 ** 15, max_value=10 ** 15)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1234.5", 123450),
+    ("1 234,56", 123456),
+    ("1 000", 100000),
+    (" -0.01 ", -1),
+    ("0.005", 1),
+    ("-0.005", -1),
+    (0.1, 10),
+    (1234.5000000001, 123450),
+    (3, 300),
+    (Decimal("19.99"), 1999),
+])
+def test_parse(value, expected):
+    assert Money.parse(value) == Money(expected)
+
+
+@pytest.mark.parametrize("value", ["", "abc", "1.2.3", "nan", "inf", float("nan"), None,
+                                   "1e30", 1e30, "99999999999999999", "-99999999999999999"])
+def test_parse_rejects(value):
+    with pytest.raises(ValueError):
+        Money.parse(value)
+
+
+def test_only_integer_kopecks():
+    for value in (1.5, "100", True):
+        with pytest.raises(TypeError):
+            Money(value)
+
+
+def test_arithmetic_and_display():
+    total = sum([Money(10), Money(20), Money(30)])
+    assert total == Money(60)
+    assert Money(100) - Money(150) == Money(-50)
+    assert -Money(5) == Money(-5)
+    assert Money(10) < Money(20) and not ZERO
+    assert str(Money(123450)) == "1234.50"
+    assert str(Money(-7)) == "-0.07"
+    assert float(Money(1999)) == 19.99
+    assert format_money(Money(123456789)) == "1 234 567.89 RUB"
+    assert format_money(-5) == "-0.05 RUB"
+    assert format_money(Money(250), "USD") == "2.50 USD"
+    with pytest.raises(TypeError):
+        Money(10) * 2
+    with pytest.raises(TypeError):
+        Money(10) + 1
+
+
+@given(kopecks)
+def test_str_parse_round_trip(value):
+    money = Money(value)
+    assert Money.parse(str(money)) == money
+    assert Money.parse(money.rubles) == money
+    assert Money.parse(format_money(money).removesuffix(" RUB")) == money
+
+
+@given(kopecks, kopecks, kopecks)
+def test_addition_is_exact(a, b, c):
+    a, b, c = Money(a), Money(b), Money(c)
+    assert (a + b) + c == a + (b + c)
+    assert (a + b) - b == a
+    assert sum([a, b, c]).rubles == a.rubles + b.rubles + c.rubles
+
+
+def migrate_amounts(values):
+    conn = sqlite3.connect(":memory:")
+    register_legacy_kopecks(conn)
+    conn.execute("CREATE TABLE amounts (id INTEGER PRIMARY KEY, amount REAL)")
+    conn.executemany("INSERT INTO amounts (amount) VALUES (?)", [(value,) for value in values])
+    converted = [row[0] for row in conn.execute(
+        f"SELECT {KOPECKS_SQL.format(column='amount')} FROM amounts ORDER BY id")]
+    conn.close()
+    return converted
+
+
+@given(st.lists(st.integers(min_value=-10 ** 13, max_value=10 ** 13), max_size=50))
+def test_migration_is_lossless(values):
+    # Суммы с двумя знаками, как их хранила колонка REAL до перехода на копейки.
+    assert migrate_amounts([float(Decimal(value).scaleb(-2)) for value in values]) == values
+    assert [Money.parse(float(Decimal(value).scaleb(-2))).kopecks for value in values] == values
+
+
+@given(st.lists(st.one_of(
+    st.decimals(min_value=-10 ** 9, max_value=10 ** 9, places=3, allow_nan=False, allow_infinity=False),
+    st.decimals(min_value=-10 ** 6, max_value=10 ** 6, places=6, allow_nan=False, allow_infinity=False),
+).map(float) | st.floats(min_value=-10 ** 11, max_value=10 ** 11), max_size=50))
+def test_migration_rounds_like_parse(values):
+    # Суммы с долями копейки: миграция и ввод той же суммы сейчас дают одинаковые копейки.
+    assert migrate_amounts(values) == [Money.parse(value).kopecks for value in values]
+
+
+def test_migration_rounds_half_up():
+    assert migrate_amounts([1.005, 0.285, -0.285, 2.675]) == [101, 29, -29, 268]
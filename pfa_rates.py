@@ -0,0 +1,280 @@
+"""
+Валюты и курсы.
+
+Транзакция хранит сумму в своей валюте (`original_amount`, `currency`) и ту
+же сумму в копейках базовой валюты `pfa_money.BASE_CURRENCY` (`amount`) по
+курсу на дату транзакции. Поэтому итоги `balances`, сводки `rollups`, суммы
+по категориям и распределение доходов по целям по-прежнему складывают одну
+колонку `amount`: курс подставляется в SQL при вставке строки (`to_base_sql`),
+а не при каждом чтении.
+
+Курсы (`exchange_rates`) загружаются из локального CSV-файла
+(`import_rates`): сколько рублей стоит единица валюты на дату. Для даты без
+курса берется последний курс до нее, для даты раньше первого курса — первый
+курс. После загрузки суммы транзакций в затронутых валютах пересчитываются
+одним UPDATE на валюту (курс каждой строки — поиск по первичному ключу
+(currency, date)); триггеры обновляют итоги, сводки и версии данных, а версии
+данных всех пользователей дополнительно увеличиваются, поэтому кэши агрегатов
+и диаграмм сбрасываются.
+
+При отображении суммы переводятся из базовой валюты в валюту отчетов
+пользователя (`RateCache`): остатки и суммы за все время — по последнему
+курсу, тренды — по курсу на начало каждого периода. `RateCache` держит курсы
+в памяти и перечитывает их только после новой загрузки (по номеру последней
+записи журнала `rate_imports`).
+"""
+import bisect
+import csv
+import re
+import threading
+from collections import namedtuple
+from datetime import datetime
+from pfa_money import BASE_CURRENCY, Money
+
+_CURRENCY_PATTERN = re.compile(r"^[A-Z]{3}\Z")
+
+# Колонки файла курсов.
+RATE_COLUMNS = ("date", "currency", "rate")
+
+# Итог загрузки курсов: число загруженных курсов, коды валют и число
+# транзакций, сумма которых в базовой валюте изменилась.
+RateImportReport = namedtuple("RateImportReport", "rates currencies converted")
+
+
+class RateFileError(ValueError):
+    """
+    Ошибка в файле курсов.
+
+    Атрибуты:
+        line (int): Номер строки файла.
+    """
+    def __init__(self, line, message):
+        super().__init__(f"строка {line}: {message}")
+        self.line = line
+
+
+class MissingRateError(ValueError):
+    """
+    Для валюты не загружено ни одного курса.
+    """
+
+
+def validate_currency(currency):
+    """
+    Приводит код валюты к верхнему регистру и проверяет формат ISO 4217.
+
+    Raises:
+        ValueError: Если код не из трех латинских букв.
+    """
+    code = str(currency or "").strip().upper()
+    if not _CURRENCY_PATTERN.match(code):
+        raise ValueError(f"Некорректный код валюты: {currency!r}")
+    return code
+
+
+def rate_sql(currency, date="'9999-12-31'"):
+    """
+    Возвращает SQL-выражение курса валюты на дату.
+
+    Args:
+        currency (str): SQL-выражение кода валюты: параметр или колонка с
+            именем таблицы (без него колонка совпадет с exchange_rates.currency).
+        date (str): SQL-выражение даты "ГГГГ-ММ-ДД" или "ГГГГ-ММ-ДД ЧЧ:ММ:СС";
+            по умолчанию — последний курс.
+
+    Returns:
+        str: Выражение; 1.0 для базовой валюты и NULL для валюты без курсов.
+    """
+    return f'''(CASE WHEN {currency} = '{BASE_CURRENCY}' THEN 1.0 ELSE COALESCE(
+        (SELECT rate FROM exchange_rates WHERE currency = {currency} AND date <= {date} ORDER BY date DESC LIMIT 1),
+        (SELECT rate FROM exchange_rates WHERE currency = {currency} ORDER BY date LIMIT 1)) END)'''
+
+
+def to_base_sql(amount, currency, date):
+    """
+    Returns:
+        str: SQL-выражение суммы `amount` в валюте `currency`, переведенной в
+        копейки базовой валюты по курсу на дату `date` (половина — от нуля).
+    """
+    return f"CAST(ROUND({amount} * {rate_sql(currency, date)}) AS INTEGER)"
+
+
+def round_half_away(value):
+    """
+    Округляет до целого как ROUND в SQLite: половина — от нуля.
+    """
+    return int(value + 0.5) if value >= 0 else -int(-value + 0.5)
+
+
+def read_rates(stream, delimiter=","):
+    """
+    Читает курсы из CSV с колонками `RATE_COLUMNS` (порядок любой, по строке
+    заголовка). Курс — число рублей за единицу валюты; допускается
+    десятичная запятая.
+
+    Args:
+        stream (file): Открытый текстовый файл.
+        delimiter (str): Разделитель колонок.
+
+    Returns:
+        list: Кортежи (валюта, дата "ГГГГ-ММ-ДД", курс).
+
+    Raises:
+        RateFileError: Если в файле нет нужных колонок или строка некорректна.
+    """
+    reader = csv.DictReader(stream, delimiter=delimiter)
+    missing = [column for column in RATE_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise RateFileError(1, f"нет колонок: {', '.join(missing)}")
+    rates = []
+    for record in reader:
+        line = reader.line_num
+        try:
+            currency = validate_currency(record["currency"])
+            day = datetime.strptime((record["date"] or "").strip(), "%Y-%m-%d").date().isoformat()
+            rate = float((record["rate"] or "").strip().replace(",", "."))
+        except ValueError as e:
+            raise RateFileError(line, str(e)) from None
+        if currency == BASE_CURRENCY:
+            raise RateFileError(line, f"курс базовой валюты {BASE_CURRENCY} всегда равен 1")
+        if not rate > 0 or rate == float("inf"):
+            raise RateFileError(line, f"курс должен быть положительным числом: {record['rate']!r}")
+        rates.append((currency, day, rate))
+    return rates
+
+
+def import_rates(db, path, delimiter=",", encoding="utf-8-sig", clock=datetime.now):
+    """
+    Загружает курсы из файла и пересчитывает в базовую валюту суммы
+    транзакций в загруженных валютах. Все изменения — одна транзакция.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        path (str): Путь к CSV-файлу (см. `read_rates`).
+        delimiter (str): Разделитель колонок.
+        encoding (str): Кодировка файла.
+        clock (callable): Источник времени для журнала загрузок.
+
+    Returns:
+        RateImportReport: Итог загрузки.
+
+    Raises:
+        RateFileError: Если файл некорректен; курсы не меняются.
+    """
+    with open(path, encoding=encoding, newline="") as stream:
+        rates = read_rates(stream, delimiter)
+    currencies = tuple(sorted({currency for currency, _, _ in rates}))
+    converted = 0
+    with db.transaction() as conn:
+        conn.executemany('''
+            INSERT INTO exchange_rates (currency, date, rate) VALUES (?, ?, ?)
+            ON CONFLICT (currency, date) DO UPDATE SET rate = excluded.rate
+        ''', rates)
+        for currency in currencies:
+            # Код валюты проверен `validate_currency` и подставляется литералом, а условие
+            # частичного индекса idx_transactions_foreign_currency повторено: иначе SQLite его не выберет.
+            converted += conn.execute(f'''
+                UPDATE transactions SET amount = c.amount
+                FROM (
+                    SELECT t.id, {to_base_sql("t.original_amount", "t.currency", "t.date")} AS amount
+                    FROM transactions AS t
+                    WHERE t.currency = '{currency}' AND t.currency != '{BASE_CURRENCY}'
+                ) AS c
+                WHERE transactions.id = c.id AND transactions.amount != c.amount
+            ''').rowcount
+        conn.execute("INSERT INTO rate_imports (imported_at, source, rate_count) VALUES (?, ?, ?)",
+                     (clock().strftime("%Y-%m-%d %H:%M:%S"), str(path), len(rates)))
+        # Суммы в валюте отчетов зависят от курсов, даже если транзакции не изменились.
+        conn.execute('''
+            INSERT INTO data_versions (user_id, version) SELECT id, 1 FROM users WHERE true
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1
+        ''')
+    return RateImportReport(len(rates), currencies, converted)
+
+
+class RateCache:
+    """
+    Курсы валют в памяти для перевода сумм в валюту отчетов.
+
+    Курсы перечитываются из базы, только если с прошлого обращения была
+    новая загрузка (`import_rates`).
+    """
+    def __init__(self, db):
+        """
+        Args:
+            db (Database): Подключение к базе данных.
+        """
+        self.db = db
+        self._version = None
+        self._rates = {}
+        self._lock = threading.Lock()
+
+    def _table(self):
+        """
+        Returns:
+            dict: Код валюты -> (список дат по возрастанию, список курсов).
+        """
+        version = self.db.fetchone("SELECT COALESCE(MAX(id), 0) FROM rate_imports")[0]
+        with self._lock:
+            if version != self._version:
+                rates = {}
+                for currency, day, rate in self.db.fetchall(
+                        "SELECT currency, date, rate FROM exchange_rates ORDER BY currency, date"):
+                    days, values = rates.setdefault(currency, ([], []))
+                    days.append(day)
+                    values.append(rate)
+                self._rates, self._version = rates, version
+            return self._rates
+
+    def currencies(self):
+        """
+        Returns:
+            tuple: Базовая валюта и валюты с загруженными курсами (по алфавиту).
+        """
+        return (BASE_CURRENCY, *sorted(self._table()))
+
+    def rates(self, currency, days):
+        """
+        Возвращает курсы валюты сразу на несколько дат.
+
+        Args:
+            currency (str): Код валюты.
+            days (iterable): Даты "ГГГГ-ММ-ДД" (строки) или None — последний курс.
+
+        Returns:
+            list: Курсы в порядке дат.
+
+        Raises:
+            MissingRateError: Если для валюты нет курсов.
+        """
+        if currency == BASE_CURRENCY:
+            return [1.0 for _ in days]
+        table = self._table().get(currency)
+        if table is None:
+            raise MissingRateError(f"Нет курсов валюты {currency}")
+        known, values = table
+        return [values[-1] if day is None else values[max(bisect.bisect_right(known, day) - 1, 0)]
+                for day in days]
+
+    def rate(self, currency, day=None):
+        """
+        Returns:
+            float: Курс валюты на дату (по умолчанию последний).
+        """
+        return self.rates(currency, (day,))[0]
+
+    def convert(self, amounts, currency, days=None):
+        """
+        Переводит суммы из базовой валюты в `currency`.
+
+        Args:
+            amounts (list): Суммы (`Money` или копейки) в базовой валюте.
+            currency (str): Код валюты результата.
+            days (list): Дата курса для каждой суммы; по умолчанию последний курс.
+
+        Returns:
+            list: Суммы `Money` в валюте `currency`.
+        """
+        amounts = [amount.kopecks if isinstance(amount, Money) else amount for amount in amounts]
+        rates = self.rates(currency, days if days is not None else [None] * len(amounts))
+        return [Money(round_half_away(amount / rate)) for amount, rate in zip(amounts, rates)]
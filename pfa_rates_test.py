@@ -0,0 +1,95 @@
+import io
+from datetime import datetime
+import pytest
+from pfa_balances import verify_balances
+from pfa_money import Money
+from pfa_rates import RateCache, RateFileError, import_rates, read_rates, to_base_sql
+from pfa_rollups import verify_rollups
+from pfa_service import FinanceService
+
+
+def write_rates(tmp_path, text, name="rates.csv"):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def service(db):
+    return FinanceService(db, clock=lambda: datetime(2025, 3, 10, 12, 0))
+
+
+def test_read_rates():
+    stream = io.StringIO("currency;date;rate\nusd;2025-01-01;90,5\nEUR;2025-01-02;100\n")
+    assert read_rates(stream, ";") == [("USD", "2025-01-01", 90.5), ("EUR", "2025-01-02", 100.0)]
+
+
+@pytest.mark.parametrize("text, line", [
+    ("date,rate\n2025-01-01,90\n", 1),
+    ("date,currency,rate\n2025-01-01,USD,90\n01.01.2025,USD,90\n", 3),
+    ("date,currency,rate\n2025-01-01,US,90\n", 2),
+    ("date,currency,rate\n2025-01-01,USD,0\n", 2),
+    ("date,currency,rate\n2025-01-01,USD,много\n", 2),
+    ("date,currency,rate\n2025-01-01,RUB,1\n", 2),
+])
+def test_read_rates_rejects(text, line):
+    with pytest.raises(RateFileError) as error:
+        read_rates(io.StringIO(text))
+    assert error.value.line == line
+
+
+def test_import_reconverts_foreign_transactions(db, service, tmp_path):
+    user = service.register("Pavel", "password123")
+    import_rates(db, write_rates(tmp_path, "date,currency,rate\n2025-01-01,USD,90\n2025-02-01,USD,100\n"))
+    # До первого курса действует первый курс, между курсами — последний до даты.
+    for day in (datetime(2024, 12, 1), datetime(2025, 1, 15), datetime(2025, 2, 10)):
+        service.add_transaction(user.id, "Зарплата", 10, "Доход", date=day, currency="USD")
+    service.add_transaction(user.id, "Продукты", 100, "Расход", date=datetime(2025, 1, 20))
+    version = service.data_version(user.id)
+    assert service.balance(user.id, "RUB") == (Money(280000), Money(10000), 4, "RUB")
+
+    report = import_rates(db, write_rates(tmp_path, "date,currency,rate\n2025-01-01,USD,95\n"))
+
+    assert report == (1, ("USD",), 2)
+    assert service.balance(user.id, "RUB").income == Money(290000)
+    assert service.data_version(user.id) > version
+    assert verify_balances(db) == []
+    assert verify_rollups(db) == []
+    assert import_rates(db, write_rates(tmp_path, "date,currency,rate\n2025-01-01,USD,95\n")).converted == 0
+
+
+def test_invalid_file_changes_nothing(db, tmp_path):
+    import_rates(db, write_rates(tmp_path, "date,currency,rate\n2025-01-01,USD,90\n"))
+    with pytest.raises(RateFileError):
+        import_rates(db, write_rates(tmp_path, "date,currency,rate\n2025-01-01,USD,95\n2025-01-02,USD,-1\n"))
+    assert db.fetchall("SELECT currency, date, rate FROM exchange_rates") == [("USD", "2025-01-01", 90.0)]
+    assert db.fetchone("SELECT COUNT(*) FROM rate_imports")[0] == 1
+
+
+def test_rate_cache_reloads_after_import(db, tmp_path):
+    cache = RateCache(db)
+    assert cache.currencies() == ("RUB",)
+    import_rates(db, write_rates(tmp_path, "date,currency,rate\n2025-01-01,USD,90\n2025-02-01,USD,100\n"))
+    assert cache.currencies() == ("RUB", "USD")
+    assert cache.rates("USD", ["2024-12-31", "2025-01-31", "2025-02-01", None]) == [90, 90, 100, 100]
+    assert cache.convert([Money(-15000), 45], "USD", ["2025-01-01", None]) == [Money(-167), Money(0)]
+
+    # Без новой загрузки курсы не перечитываются.
+    db.execute("UPDATE exchange_rates SET rate = 50")
+    assert cache.rate("USD") == 100
+    import_rates(db, write_rates(tmp_path, "date,currency,rate\n2025-03-01,EUR,110\n"))
+    assert cache.rate("USD") == 50
+    assert cache.rate("RUB") == 1.0
+    with pytest.raises(ValueError):
+        cache.rate("GBP")
+
+
+def test_conversion_uses_primary_key(db):
+    plan = " ".join(row[3] for row in db.fetchall(f'''
+        EXPLAIN QUERY PLAN
+        SELECT t.id, {to_base_sql("t.original_amount", "t.currency", "t.date")}
+        FROM transactions AS t
+        WHERE t.currency = 'USD' AND t.currency != 'RUB'
+    '''))
+    assert "idx_transactions_foreign_currency" in plan
+    assert "SCAN exchange_rates" not in plan
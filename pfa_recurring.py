@@ -0,0 +1,136 @@
+"""
+Повторяющиеся транзакции.
+
+Правило (таблица `recurring_rules`) описывает транзакцию, которая повторяется
+каждые `interval` дней, недель, месяцев или лет начиная с `start_date` и, если
+задано, до `end_date` включительно. Срок n-го срабатывания вычисляется от даты
+начала, а не от предыдущего срабатывания, поэтому правило "31-го числа каждый
+месяц" в коротком месяце срабатывает в его последний день и затем снова 31-го.
+
+`generate_due` создает все срабатывания, срок которых наступил с прошлого
+запуска, в одной транзакции записи: строки транзакций передаются в один
+`executemany` потоком, счетчики правил сдвигаются вторым `executemany`, а
+доходы распределяются по целям пакетно (`pfa_goals.allocate_incomes`), по
+запросу на стратегию. Правило хранит число созданных транзакций (`generated`)
+и срок следующей (`next_date`), которые фиксируются вместе с транзакциями,
+поэтому повторный запуск, в том числе после сбоя, ничего не создает дважды;
+уникальный индекс (recurring_rule_id, date) дополнительно это гарантирует.
+
+Сумма правила задана в его валюте и переводится в базовую валюту по курсу
+на дату каждого срабатывания в самом INSERT (`pfa_rates.to_base_sql`);
+доходы для целей суммируются уже по созданным строкам.
+"""
+import calendar
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from pfa_goals import allocate_incomes, goal_strategy
+from pfa_rates import to_base_sql
+
+FREQUENCIES = ("daily", "weekly", "monthly", "yearly")
+
+FREQUENCY_LABELS = {
+    "daily": "Ежедневно",
+    "weekly": "Еженедельно",
+    "monthly": "Ежемесячно",
+    "yearly": "Ежегодно",
+}
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Итог запуска: число созданных транзакций и записи `GoalCompletion` целей,
+# достигнутых созданными доходами.
+RecurringReport = namedtuple("RecurringReport", "created completed_goals")
+
+_MONTHS = {"monthly": 1, "yearly": 12}
+
+_INSERT_SQL = f'''
+    INSERT INTO transactions (user_id, category_id, original_amount, currency, date, type, recurring_rule_id, amount)
+    VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, {to_base_sql("?3", "?4", "?5")})
+'''
+
+
+def occurrence_date(start, frequency, interval, number):
+    """
+    Возвращает срок срабатывания правила с номером `number` (с нуля).
+
+    Для monthly и yearly день месяца ограничивается последним днем целевого
+    месяца (31 января + 1 месяц = 28 или 29 февраля).
+
+    Args:
+        start (datetime): Первое срабатывание.
+        frequency (str): Периодичность из `FREQUENCIES`.
+        interval (int): Шаг в единицах периодичности.
+        number (int): Номер срабатывания.
+
+    Returns:
+        datetime: Срок срабатывания.
+    """
+    step = interval * number
+    if frequency == "daily":
+        return start + timedelta(days=step)
+    if frequency == "weekly":
+        return start + timedelta(weeks=step)
+    month = start.month - 1 + step * _MONTHS[frequency]
+    year, month = start.year + month // 12, month % 12 + 1
+    return start.replace(year=year, month=month, day=min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def generate_due(db, now, user_id=None):
+    """
+    Создает транзакции для всех наступивших срабатываний правил.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        now (datetime): Текущее время; создаются срабатывания со сроком не
+            позже него.
+        user_id (int): Обработать только правила этого пользователя; по
+            умолчанию правила всех пользователей.
+
+    Returns:
+        RecurringReport: Итог запуска.
+    """
+    sql = '''
+        SELECT id, user_id, category_id, amount, currency, type, frequency, interval, start_date, end_date, generated
+        FROM recurring_rules
+        WHERE next_date <= ?
+    '''
+    params = (now.strftime(DATE_FORMAT),)
+    if user_id is not None:
+        sql += " AND user_id = ?"
+        params += (user_id,)
+
+    with db.transaction() as conn:
+        rules = conn.execute(sql, params).fetchall()
+        if not rules:
+            return RecurringReport(0, [])
+        advanced = []
+
+        def occurrences():
+            for rule_id, owner_id, category_id, amount, currency, transaction_type, frequency, interval, start, end, \
+                    number in rules:
+                start = datetime.strptime(start, DATE_FORMAT)
+                end = date.fromisoformat(end) if end else date.max
+                moment = occurrence_date(start, frequency, interval, number)
+                while moment <= now and moment.date() <= end:
+                    yield owner_id, category_id, amount, currency, moment.isoformat(" "), transaction_type, rule_id
+                    number += 1
+                    moment = occurrence_date(start, frequency, interval, number)
+                next_date = moment.isoformat(" ") if moment.date() <= end else None
+                advanced.append((number, next_date, rule_id))
+
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+        conn.executemany(_INSERT_SQL, occurrences())
+        conn.executemany("UPDATE recurring_rules SET generated = ?, next_date = ? WHERE id = ?", advanced)
+        # Доходы в базовой валюте: новые строки идут после last_id (запись под BEGIN IMMEDIATE).
+        incomes = conn.execute('''
+            SELECT user_id, SUM(amount) FROM transactions WHERE id > ? AND type = 'Доход' GROUP BY user_id
+        ''', (last_id,)).fetchall()
+
+        by_strategy = {}
+        for owner_id, amount in incomes:
+            by_strategy.setdefault(goal_strategy(conn, owner_id), []).append((owner_id, amount))
+        completed = []
+        for strategy, user_incomes in by_strategy.items():
+            completed.extend(allocate_incomes(conn, user_incomes, strategy))
+    created = sum(row[0] for row in advanced) - sum(rule[10] for rule in rules)
+    return RecurringReport(created, sorted(completed))
@@ -0,0 +1,129 @@
+import sqlite3
+from datetime import datetime
+import pytest
+from pfa_balances import verify_balances
+from pfa_categories import ensure_category
+from pfa_goals import GoalCompletion
+from pfa_recurring import generate_due, occurrence_date
+from pfa_rollups import verify_rollups
+
+
+def add_user(db, login="Pavel"):
+    return db.execute("INSERT INTO users (login, password) VALUES (?, 'password123')", (login,)).lastrowid
+
+
+def add_rule(db, user_id, frequency, start, end=None, amount=100, transaction_type="Расход", interval=1,
+             category="Аренда", currency="RUB"):
+    category_id = ensure_category(db, user_id, category)
+    return db.execute('''
+        INSERT INTO recurring_rules (user_id, category_id, amount, type, frequency, interval, start_date, end_date,
+                                     next_date, currency)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (user_id, category_id, amount, transaction_type, frequency, interval, start, end, start,
+          currency)).lastrowid
+
+
+def dates(db, rule_id):
+    return [row[0][:10] for row in db.fetchall(
+        "SELECT date FROM transactions WHERE recurring_rule_id = ? ORDER BY date", (rule_id,))]
+
+
+@pytest.mark.parametrize("frequency, interval, expected", [
+    ("daily", 1, ["2024-01-31", "2024-02-01", "2024-02-02"]),
+    ("weekly", 2, ["2024-01-31", "2024-02-14", "2024-02-28"]),
+    ("monthly", 1, ["2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30", "2024-05-31"]),
+    ("yearly", 1, ["2024-01-31", "2025-01-31"]),
+])
+def test_occurrence_date(frequency, interval, expected):
+    start = datetime(2024, 1, 31, 9, 30)
+    result = [occurrence_date(start, frequency, interval, number) for number in range(len(expected))]
+    assert [moment.date().isoformat() for moment in result] == expected
+    assert all(moment.time() == start.time() for moment in result)
+
+
+def test_leap_day_yearly():
+    start = datetime(2024, 2, 29)
+    assert [occurrence_date(start, "yearly", 1, number).date().isoformat() for number in range(5)] == [
+        "2024-02-29", "2025-02-28", "2026-02-28", "2027-02-28", "2028-02-29"]
+
+
+def test_generate_catches_up_once(db):
+    user_id = add_user(db)
+    rent = add_rule(db, user_id, "monthly", "2024-01-31 00:00:00", end="2024-06-30")
+    coffee = add_rule(db, user_id, "daily", "2024-06-01 08:00:00", amount=3, category="Кофе")
+
+    report = generate_due(db, datetime(2024, 6, 10, 12, 0))
+
+    assert report.created == 5 + 10
+    assert dates(db, rent) == ["2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30", "2024-05-31"]
+    assert len(dates(db, coffee)) == 10
+    assert generate_due(db, datetime(2024, 6, 10, 12, 0)).created == 0
+
+    report = generate_due(db, datetime(2024, 7, 1))
+    assert report.created == 1 + 20
+    assert dates(db, rent)[-1] == "2024-06-30"
+    assert db.fetchall("SELECT id, generated, next_date FROM recurring_rules ORDER BY id") == [
+        (rent, 6, None), (coffee, 30, "2024-07-01 08:00:00")]
+    assert verify_balances(db) == [] and verify_rollups(db) == []
+
+
+def test_generate_for_one_user(db):
+    first, second = add_user(db, "Pavel"), add_user(db, "Maria")
+    add_rule(db, first, "daily", "2025-01-01 00:00:00")
+    add_rule(db, second, "daily", "2025-01-01 00:00:00")
+
+    assert generate_due(db, datetime(2025, 1, 3), first).created == 3
+    counts = db.fetchall("SELECT user_id, COUNT(*) FROM transactions GROUP BY user_id ORDER BY user_id")
+    assert counts == [(first, 3)]
+
+
+def test_incomes_fill_goals_in_batch(db):
+    user_id = add_user(db)
+    goal_id = db.execute('''
+        INSERT INTO goals (user_id, title, target_amount, current_amount, creation_date, target_date)
+        VALUES (?, 'Отпуск', 50000, 0, '2025-01-01', '2025-12-31')
+    ''', (user_id,)).lastrowid
+    add_rule(db, user_id, "monthly", "2025-01-05 00:00:00", amount=20000, transaction_type="Доход",
+             category="Зарплата")
+    add_rule(db, user_id, "monthly", "2025-01-05 00:00:00", amount=5000)
+
+    report = generate_due(db, datetime(2025, 3, 10))
+
+    assert report == (6, [GoalCompletion(goal_id, user_id, "Отпуск")])
+    assert db.fetchone("SELECT current_amount FROM goals")[0] == 50000
+
+
+def test_foreign_rule_converts_at_occurrence_date(db):
+    user_id = add_user(db)
+    db.executemany("INSERT INTO exchange_rates (currency, date, rate) VALUES ('USD', ?, ?)",
+                   [("2025-01-01", 90), ("2025-02-01", 100)])
+    db.execute('''
+        INSERT INTO goals (user_id, title, target_amount, current_amount, creation_date, target_date)
+        VALUES (?, 'Отпуск', 200000, 0, '2025-01-01', '2025-12-31')
+    ''', (user_id,))
+    add_rule(db, user_id, "monthly", "2025-01-05 00:00:00", amount=1000, transaction_type="Доход",
+             category="Зарплата", currency="USD")
+
+    assert len(generate_due(db, datetime(2025, 3, 10)).completed_goals) == 1
+    assert db.fetchall("SELECT original_amount, currency, amount FROM transactions ORDER BY date") == [
+        (1000, "USD", 90000), (1000, "USD", 100000), (1000, "USD", 100000)]
+    assert verify_balances(db) == []
+
+
+def test_duplicate_occurrence_is_rejected(db):
+    user_id = add_user(db)
+    rule_id = add_rule(db, user_id, "daily", "2025-01-01 00:00:00")
+    generate_due(db, datetime(2025, 1, 2))
+    # Счетчик правила потерян: повторная вставка того же срабатывания
+    # отклоняется уникальным индексом, и транзакция откатывается целиком.
+    db.execute("UPDATE recurring_rules SET generated = 0, next_date = start_date")
+    with pytest.raises(sqlite3.IntegrityError):
+        generate_due(db, datetime(2025, 1, 3))
+    assert dates(db, rule_id) == ["2025-01-01", "2025-01-02"]
+
+
+def test_due_rules_use_index(db):
+    plan = " ".join(row[3] for row in db.fetchall('''
+        EXPLAIN QUERY PLAN SELECT id FROM recurring_rules WHERE next_date <= ? AND user_id = ?
+    ''', ("2025-01-01", 1)))
+    assert "idx_recurring_rules_user_next" in plan
@@ -0,0 +1,198 @@
+"""
+Планировщик напоминаний.
+
+Напоминания пользователя загружаются из базы данных один раз и хранятся в
+куче (heapq), упорядоченной по времени ближайшего события. Для каждого
+напоминания есть два события: предупреждение за `REMINDER_WARNING` до срока
+и истечение в срок. Планировщик держит один отложенный вызов (`after`) на
+ближайшее событие, поэтому уведомления приходят вовремя, а база данных не
+опрашивается между событиями. Добавленные и удаленные напоминания
+обновляют кучу точечно; удаленные записи пропускаются при извлечении.
+Все напоминания, срок которых наступил, переводятся в статус "expired"
+одним запросом `UPDATE` по индексу (user_id, status, due_at). Запросы
+выполняются через переданную функцию запуска задач, например в фоновом
+потоке `DatabaseWorker`.
+"""
+import heapq
+import itertools
+import math
+from datetime import datetime, timedelta
+from pfa_service import REMINDER_ACTIVE
+from pfa_worker import run_now
+
+# За сколько до срока пользователь получает предупреждение.
+REMINDER_WARNING = timedelta(minutes=30)
+
+# Максимальная задержка одного вызова, мс. Планировщик просыпается не реже,
+# чтобы учесть перевод системных часов.
+MAX_DELAY = 60 * 60 * 1000
+
+_WARN = 0
+_EXPIRE = 1
+
+
+def reminder_due(reminder):
+    """
+    Возвращает срок напоминания.
+
+    Args:
+        reminder (Reminder): Напоминание.
+
+    Returns:
+        datetime: Локальное время срока или None, если напоминание не активно.
+    """
+    if reminder.status != REMINDER_ACTIVE or reminder.due_at is None:
+        return None
+    return datetime.fromtimestamp(reminder.due_at)
+
+
+class ReminderScheduler:
+    """
+    Очередь напоминаний пользователя с одним отложенным вызовом на ближайшее событие.
+
+    Атрибуты:
+        fired (int): Число срабатываний таймера, на которых были события.
+    """
+    def __init__(self, service, user_id, after, after_cancel, on_upcoming=None, on_expired=None,
+                 clock=None, warning=REMINDER_WARNING, max_delay=MAX_DELAY, run=run_now):
+        """
+        Args:
+            service (FinanceService): Сервисный слой для чтения и обновления напоминаний.
+            user_id (int): ID пользователя.
+            after (callable): Планирует вызов: `after(задержка в мс, функция)` -> идентификатор.
+            after_cancel (callable): Отменяет вызов по идентификатору.
+            on_upcoming (callable): Получает список напоминаний, срок которых скоро наступит.
+            on_expired (callable): Получает список ID напоминаний, помеченных устаревшими.
+            clock (callable): Текущее время; по умолчанию часы сервиса.
+            warning (timedelta): За сколько до срока предупреждать.
+            max_delay (int): Максимальная задержка одного вызова, мс.
+            run (callable): Запускает запросы к базе: `run(задача, on_done)`.
+                По умолчанию — сразу в текущем потоке.
+        """
+        self.service = service
+        self.user_id = user_id
+        self.after = after
+        self.after_cancel = after_cancel
+        self.on_upcoming = on_upcoming
+        self.on_expired = on_expired
+        self.clock = clock if clock is not None else service.clock
+        self.warning = warning
+        self.max_delay = max_delay
+        self.run = run
+        self.fired = 0
+        self._heap = []
+        self._tokens = {}
+        self._reminders = {}
+        self._counter = itertools.count()
+        self._timer = None
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def start(self):
+        """
+        Загружает активные напоминания пользователя одним запросом и планирует
+        ближайшее событие.
+        """
+        self._heap = []
+        self._tokens = {}
+        self._reminders = {}
+        self.run(lambda: self.service.active_reminders(self.user_id), self._load)
+
+    def _load(self, reminders):
+        for reminder in reminders:
+            self._push(reminder)
+        self._schedule()
+
+    def stop(self):
+        """
+        Отменяет запланированный вызов.
+        """
+        if self._timer is not None:
+            self.after_cancel(self._timer)
+            self._timer = None
+
+    def add(self, reminder):
+        """
+        Добавляет новое напоминание в очередь.
+
+        Args:
+            reminder (Reminder): Сохраненное напоминание.
+        """
+        self._push(reminder)
+        self._schedule()
+
+    def remove(self, reminder_id):
+        """
+        Убирает напоминание из очереди (например, после удаления).
+        """
+        if self._tokens.pop(reminder_id, None) is not None:
+            del self._reminders[reminder_id]
+            self._schedule()
+
+    def next_event(self):
+        """
+        Returns:
+            datetime: Время ближайшего события или None, если очередь пуста.
+        """
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def _push(self, reminder, stage=_WARN):
+        due = reminder_due(reminder)
+        if due is None:
+            return
+        when = due - self.warning if stage == _WARN else due
+        token = next(self._counter)
+        self._tokens[reminder.id] = token
+        self._reminders[reminder.id] = reminder
+        heapq.heappush(self._heap, (when, token, reminder.id, stage))
+
+    def _discard_stale(self):
+        while self._heap and self._tokens.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    def _schedule(self):
+        if self._timer is not None:
+            self.after_cancel(self._timer)
+            self._timer = None
+        when = self.next_event()
+        if when is None:
+            return
+        delay = math.ceil((when - self.clock()).total_seconds() * 1000)
+        self._timer = self.after(min(max(delay, 0), self.max_delay), self._fire)
+
+    def _fire(self):
+        self._timer = None
+        now = self.clock()
+        upcoming = []
+        expired = []
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, _, reminder_id, stage = heapq.heappop(self._heap)
+            reminder = self._reminders[reminder_id]
+            if stage == _WARN:
+                if reminder_due(reminder) > now:
+                    upcoming.append(reminder)
+                self._push(reminder, _EXPIRE)
+            else:
+                del self._tokens[reminder_id]
+                del self._reminders[reminder_id]
+                expired.append(reminder_id)
+
+        if upcoming or expired:
+            self.fired += 1
+        # Следующий вызов планируется до обработчиков: они могут открывать
+        # модальные окна, внутри которых продолжает работать цикл событий.
+        self._schedule()
+        if upcoming and self.on_upcoming is not None:
+            self.on_upcoming(upcoming)
+        if expired:
+            self.run(lambda: self.service.expire_reminders(self.user_id, now),
+                     lambda count: self._expired(expired))
+
+    def _expired(self, reminder_ids):
+        if self.on_expired is not None:
+            self.on_expired(reminder_ids)
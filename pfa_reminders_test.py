@@ -0,0 +1,217 @@
+from datetime import datetime, timedelta
+import pytest
+from pfa_service import REMINDER_ACTIVE, REMINDER_EXPIRED, FinanceService
+from pfa_reminders import MAX_DELAY, ReminderScheduler
+
+START = datetime(2025, 3, 10, 9, 0)
+
+
+class FakeClock:
+    """
+    Часы и таймер `after`, время в которых идет только по команде теста.
+    """
+    def __init__(self, now):
+        self.now = now
+        self.timers = {}
+        self.ids = 0
+
+    def __call__(self):
+        return self.now
+
+    def after(self, delay, callback):
+        self.ids += 1
+        self.timers[self.ids] = (self.now + timedelta(milliseconds=delay), callback)
+        return self.ids
+
+    def after_cancel(self, timer_id):
+        del self.timers[timer_id]
+
+    def advance(self, delta):
+        """
+        Переводит часы вперед, вызывая наступившие таймеры в их время.
+        """
+        end = self.now + delta
+        while self.timers:
+            timer_id = min(self.timers, key=lambda key: self.timers[key][0])
+            when, callback = self.timers[timer_id]
+            if when > end:
+                break
+            del self.timers[timer_id]
+            self.now = max(self.now, when)
+            callback()
+        self.now = end
+
+
+class QueryCounter:
+    def __init__(self, db):
+        self.statements = []
+        db.connection().set_trace_callback(self.statements.append)
+
+    def __len__(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(START)
+
+
+@pytest.fixture
+def service(db, clock):
+    return FinanceService(db, clock=clock)
+
+
+@pytest.fixture
+def user_id(service):
+    return service.register("Pavel", "password123").id
+
+
+def add_reminder(service, user_id, due, title="Оплата"):
+    return service.add_reminder(user_id, title, due.strftime("%Y-%m-%d"), due.strftime("%H:%M"))
+
+
+def make_scheduler(service, user_id, clock, events):
+    scheduler = ReminderScheduler(
+        service, user_id, clock.after, clock.after_cancel,
+        on_upcoming=lambda reminders: events.append(("upcoming", clock.now, [r.id for r in reminders])),
+        on_expired=lambda ids: events.append(("expired", clock.now, ids)),
+    )
+    scheduler.start()
+    return scheduler
+
+
+def test_fires_exactly_at_warning_and_due_time(service, user_id, clock):
+    due = START + timedelta(hours=2, minutes=15)
+    reminder_id = add_reminder(service, user_id, due)
+    events = []
+    make_scheduler(service, user_id, clock, events)
+
+    clock.advance(timedelta(hours=3))
+
+    assert events == [
+        ("upcoming", due - timedelta(minutes=30), [reminder_id]),
+        ("expired", due, [reminder_id]),
+    ]
+    reminder = service.get_reminder(user_id, reminder_id)
+    assert reminder.status == REMINDER_EXPIRED
+    assert (reminder.date, reminder.time) == (due.strftime("%Y-%m-%d"), due.strftime("%H:%M"))
+
+
+def test_keeps_a_single_timer(service, user_id, clock):
+    for minutes in (30, 90, 150):
+        add_reminder(service, user_id, START + timedelta(minutes=minutes))
+    make_scheduler(service, user_id, clock, [])
+    assert len(clock.timers) == 1
+    clock.advance(timedelta(minutes=100))
+    assert len(clock.timers) == 1
+
+
+def test_past_reminders_expire_in_one_update(service, user_id, clock, db):
+    clock.now = START - timedelta(days=1)
+    ids = [add_reminder(service, user_id, START - timedelta(hours=h)) for h in (1, 2, 3)]
+    clock.now = START
+    events = []
+    counter = QueryCounter(db)
+
+    make_scheduler(service, user_id, clock, events)
+    clock.advance(timedelta(0))
+
+    assert events == [("expired", START, sorted(ids, reverse=True))]
+    assert len([sql for sql in counter.statements if sql.lstrip().startswith("UPDATE")]) == 1
+    assert service.active_reminders(user_id) == []
+
+
+def test_queries_per_hour(service, user_id, clock, db):
+    # 60 напоминаний, по одному на каждую минуту второго часа.
+    for minute in range(60):
+        add_reminder(service, user_id, START + timedelta(hours=1, minutes=minute), f"Напоминание {minute}")
+    counter = QueryCounter(db)
+    scheduler = make_scheduler(service, user_id, clock, [])
+    assert len(counter) == 1
+
+    # Первый час: только предупреждения, без обращений к базе.
+    clock.advance(timedelta(hours=1) - timedelta(seconds=1))
+    assert len(counter) == 1
+
+    # Второй час: одно UPDATE на каждый срок.
+    clock.advance(timedelta(hours=1))
+    assert len(counter) == 1 + 60
+    assert len(scheduler) == 0
+
+    # Пустая очередь: ни таймеров, ни запросов.
+    clock.advance(timedelta(hours=5))
+    assert len(counter) == 1 + 60
+    assert clock.timers == {}
+
+
+def test_add_and_remove_update_the_queue(service, user_id, clock):
+    later = add_reminder(service, user_id, START + timedelta(hours=5))
+    events = []
+    scheduler = make_scheduler(service, user_id, clock, events)
+
+    sooner_due = START + timedelta(hours=1)
+    sooner = add_reminder(service, user_id, sooner_due, "Срочно")
+    scheduler.add(service.get_reminder(user_id, sooner))
+    assert scheduler.next_event() == sooner_due - timedelta(minutes=30)
+
+    service.delete_reminder(user_id, later)
+    scheduler.remove(later)
+    clock.advance(timedelta(hours=6))
+
+    assert [(kind, ids) for kind, _, ids in events] == [("upcoming", [sooner]), ("expired", [sooner])]
+
+
+def test_reminder_within_warning_is_announced_on_start(service, user_id, clock):
+    reminder_id = add_reminder(service, user_id, START + timedelta(minutes=10))
+    events = []
+    make_scheduler(service, user_id, clock, events)
+    clock.advance(timedelta(0))
+    assert events == [("upcoming", START, [reminder_id])]
+
+
+def test_long_delays_are_split(service, user_id, clock):
+    add_reminder(service, user_id, START + timedelta(days=3))
+    make_scheduler(service, user_id, clock, [])
+    (when, _), = clock.timers.values()
+    assert when - START == timedelta(milliseconds=MAX_DELAY)
+
+
+def test_start_skips_inactive_reminders(service, user_id, clock):
+    active = add_reminder(service, user_id, START + timedelta(hours=1))
+    expired = add_reminder(service, user_id, START + timedelta(hours=2))
+    service.db.execute("UPDATE reminders SET status = 'expired' WHERE id = ?", (expired,))
+    scheduler = make_scheduler(service, user_id, clock, [])
+    assert len(scheduler) == 1
+    assert service.get_reminder(user_id, active).status == REMINDER_ACTIVE
+
+
+def test_stop_cancels_timer(service, user_id, clock):
+    add_reminder(service, user_id, START + timedelta(hours=1))
+    scheduler = make_scheduler(service, user_id, clock, [])
+    scheduler.stop()
+    assert clock.timers == {}
+
+
+def test_queries_go_through_run(service, user_id, clock):
+    due = START + timedelta(minutes=10)
+    reminder_id = add_reminder(service, user_id, due)
+    tasks = []
+    events = []
+    scheduler = ReminderScheduler(
+        service, user_id, clock.after, clock.after_cancel,
+        on_expired=lambda ids: events.append(ids),
+        run=lambda func, on_done: tasks.append((func, on_done)),
+    )
+
+    scheduler.start()
+    assert len(scheduler) == 0 and clock.timers == {}
+    func, on_done = tasks.pop()
+    on_done(func())
+    assert len(scheduler) == 1
+
+    clock.advance(timedelta(minutes=10))
+    assert events == [] and service.get_reminder(user_id, reminder_id).status == REMINDER_ACTIVE
+    func, on_done = tasks.pop()
+    on_done(func())
+    assert events == [[reminder_id]]
+    assert service.get_reminder(user_id, reminder_id).status == REMINDER_EXPIRED
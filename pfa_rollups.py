@@ -0,0 +1,169 @@
+"""
+Сводки транзакций по периодам для графиков трендов.
+
+Таблица `rollups` хранит суммы транзакций пользователя по детализации
+(месяц или неделя), типу, началу периода и ID категории. Она поддерживается
+триггерами на таблице `transactions` (см. `pfa_schema.create_rollup_triggers`),
+поэтому тренд за любой срок читается из нескольких сотен строк сводки, а не
+из всей истории транзакций. Здесь собраны чтение тренда, а также полный
+пересчет и проверка сводок.
+"""
+from collections import namedtuple
+from datetime import date, timedelta
+from pfa_schema import ROLLUP_PERIODS, fill_rollups
+
+GRANULARITIES = tuple(ROLLUP_PERIODS)
+
+GRANULARITY_LABELS = {
+    "month": "По месяцам",
+    "week": "По неделям",
+}
+
+# Типы диаграмм вкладки "Диаграммы", которые строятся по сводкам.
+TREND_CHART_TYPES = ("Тренд (линии)", "Тренд (столбцы с накоплением)")
+
+# Суммы по категориям за последовательные периоды: periods — даты начала
+# периодов (`datetime.date`) без пропусков, series — пары (категория, кортеж
+# сумм по периодам в копейках).
+Trend = namedtuple("Trend", "granularity periods series")
+
+_ACTUAL_ROLLUPS_SQL = '''
+    SELECT user_id, '{granularity}', type, {period}, category_id, SUM(amount), COUNT(*)
+    FROM transactions
+    WHERE {period} IS NOT NULL
+    GROUP BY user_id, type, 4, category_id
+'''
+
+
+def validate_granularity(granularity):
+    """
+    Raises:
+        ValueError: Если детализация неизвестна.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Неизвестная детализация: {granularity!r}")
+    return granularity
+
+
+def period_start(day, granularity):
+    """
+    Возвращает начало периода, в который попадает дата.
+
+    Args:
+        day (date): Дата.
+        granularity (str): "month" или "week".
+    """
+    if validate_granularity(granularity) == "month":
+        return day.replace(day=1)
+    return day - timedelta(days=day.weekday())
+
+
+def next_period(start, granularity):
+    """
+    Возвращает начало периода, следующего за периодом, который начинается с `start`.
+    """
+    if granularity == "month":
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=7)
+
+
+def trend(db, user_id, transaction_type, granularity="month", date_from=None, date_to=None):
+    """
+    Читает тренд сумм по категориям из сводок.
+
+    Запрос — одно диапазонное сканирование первичного ключа `rollups`
+    (имена категорий читаются по первичному ключу `categories`); периоды без
+    транзакций (в том числе на краях заданного интервала) заполняются нулями.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        user_id (int): ID пользователя.
+        transaction_type (str): "Доход" или "Расход".
+        granularity (str): "month" или "week".
+        date_from (date): Первая дата интервала (по умолчанию — с первой транзакции).
+        date_to (date): Последняя дата интервала (по умолчанию — до последней транзакции).
+
+    Returns:
+        Trend: Периоды и суммы по категориям (категории по алфавиту).
+
+    Raises:
+        ValueError: Если детализация неизвестна.
+    """
+    validate_granularity(granularity)
+    low = period_start(date_from, granularity).isoformat() if date_from is not None else ""
+    high = date_to.isoformat() if date_to is not None else "9999-12-31"
+    rows = db.fetchall('''
+        SELECT r.period, c.name, r.total
+        FROM rollups r JOIN categories c ON c.id = r.category_id
+        WHERE r.user_id = ? AND r.granularity = ? AND r.type = ? AND r.period BETWEEN ? AND ?
+    ''', (user_id, granularity, transaction_type, low, high))
+    if not rows:
+        return Trend(granularity, (), ())
+
+    periods = []
+    start = date.fromisoformat(low or min(row[0] for row in rows))
+    if date_to is not None:
+        last = period_start(date_to, granularity)
+    else:
+        last = date.fromisoformat(max(row[0] for row in rows))
+    while start <= last:
+        periods.append(start)
+        start = next_period(start, granularity)
+    index = {period.isoformat(): position for position, period in enumerate(periods)}
+
+    values = {}
+    for period, category, total in rows:
+        values.setdefault(category, [0] * len(periods))[index[period]] += total
+    series = tuple((category, tuple(values[category])) for category in sorted(values))
+    return Trend(granularity, tuple(periods), series)
+
+
+def rebuild_rollups(db, user_id=None):
+    """
+    Пересчитывает сводки с нуля по транзакциям.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        user_id (int): Пересчитать только сводки этого пользователя.
+
+    Returns:
+        int: Число строк сводок после пересчета.
+    """
+    with db.transaction() as conn:
+        if user_id is None:
+            conn.execute("DELETE FROM rollups")
+            fill_rollups(conn)
+            return conn.execute("SELECT COUNT(*) FROM rollups").fetchone()[0]
+        conn.execute("DELETE FROM rollups WHERE user_id = ?", (user_id,))
+        fill_rollups(conn, user_id)
+        return conn.execute("SELECT COUNT(*) FROM rollups WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+
+def verify_rollups(db):
+    """
+    Сравнивает сохраненные сводки со сводками, пересчитанными по транзакциям.
+
+    Args:
+        db (Database): Подключение к базе данных.
+
+    Returns:
+        list: Расхождения в виде словарей с ключами `key`, `stored` и `actual`, где
+        `key` — (user_id, детализация, тип, период, ID категории), а `stored` и
+        `actual` — пары (сумма в копейках, число транзакций).
+    """
+    with db.transaction() as conn:
+        stored = {row[:5]: row[5:] for row in conn.execute(
+            "SELECT user_id, granularity, type, period, category_id, total, transaction_count FROM rollups"
+        )}
+        actual = {}
+        for granularity, period in ROLLUP_PERIODS.items():
+            sql = _ACTUAL_ROLLUPS_SQL.format(granularity=granularity, period=period.format(date="date"))
+            actual.update((row[:5], row[5:]) for row in conn.execute(sql))
+
+    drift = []
+    for key in sorted(stored.keys() | actual.keys()):
+        stored_row = stored.get(key, (0, 0))
+        actual_row = actual.get(key, (0, 0))
+        if tuple(stored_row) != tuple(actual_row):
+            drift.append({"key": key, "stored": tuple(stored_row), "actual": tuple(actual_row)})
+    return drift
@@ -0,0 +1,93 @@
+from datetime import date
+import time
+from pfa_categories import ensure_category
+from pfa_cli import main
+from pfa_rollups import period_start, rebuild_rollups, trend, verify_rollups
+from pfa_seed import seed
+
+# Бюджет на чтение тренда за 10 лет, секунды.
+TREND_BUDGET = 0.05
+
+
+def add_transaction(db, amount, when, category="Продукты", type_="Расход", user_id=1):
+    return db.execute(
+        "INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (?, ?, ?, ?, ?)",
+        (user_id, ensure_category(db, user_id, category), amount, f"{when} 10:00:00", type_),
+    ).lastrowid
+
+
+def test_period_start():
+    assert period_start(date(2025, 3, 16), "month") == date(2025, 3, 1)
+    assert period_start(date(2025, 3, 16), "week") == date(2025, 3, 10)
+    assert period_start(date(2025, 3, 10), "week") == date(2025, 3, 10)
+
+
+def test_triggers_track_insert_update_delete(db):
+    first = add_transaction(db, 100, "2025-01-15")
+    add_transaction(db, 50, "2025-01-20", "Такси")
+    add_transaction(db, 1000, "2025-01-05", "Зарплата", "Доход")
+    db.execute("UPDATE transactions SET date = '2025-03-01 09:00:00', amount = 70 WHERE id = ?", (first,))
+    db.execute("UPDATE transactions SET user_id = 2 WHERE category_id = ?", (ensure_category(db, 1, "Такси"),))
+    assert verify_rollups(db) == []
+
+    db.execute("DELETE FROM transactions WHERE id = ?", (first,))
+    db.execute("INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (1, 1, 5, 'вчера', 'Расход')")
+    assert verify_rollups(db) == []
+    assert db.fetchone("SELECT COUNT(*) FROM rollups WHERE user_id = 1 AND type = 'Расход'")[0] == 0
+
+
+def test_trend_fills_gaps_by_month(db):
+    add_transaction(db, 100, "2024-11-03")
+    add_transaction(db, 40, "2024-11-20", "Такси")
+    add_transaction(db, 60, "2025-02-10")
+    add_transaction(db, 500, "2025-01-10", "Зарплата", "Доход")
+
+    result = trend(db, 1, "Расход")
+
+    assert result.periods == (date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1))
+    assert result.series == (("Продукты", (100, 0, 0, 60)), ("Такси", (40, 0, 0, 0)))
+    assert trend(db, 1, "Расход", date_from=date(2025, 1, 15)).periods == (date(2025, 1, 1), date(2025, 2, 1))
+    assert trend(db, 2, "Расход").periods == ()
+
+
+def test_trend_by_week(db):
+    add_transaction(db, 10, "2025-03-09")
+    add_transaction(db, 20, "2025-03-10")
+    add_transaction(db, 30, "2025-03-24")
+    result = trend(db, 1, "Расход", "week")
+    assert result.periods == (date(2025, 3, 3), date(2025, 3, 10), date(2025, 3, 17), date(2025, 3, 24))
+    assert result.series == (("Продукты", (10, 20, 0, 30)),)
+
+
+def test_trend_reads_only_rollups(db):
+    plan = " ".join(row[3] for row in db.fetchall(
+        "EXPLAIN QUERY PLAN SELECT r.period, c.name, r.total FROM rollups r JOIN categories c ON c.id = r.category_id "
+        "WHERE r.user_id = ? AND r.granularity = ? AND r.type = ? AND r.period BETWEEN ? AND ?",
+        (1, "month", "Расход", "", "9999-12-31"),
+    ))
+    assert "PRIMARY KEY" in plan and "transactions" not in plan
+
+
+def test_ten_year_trend_is_fast(db):
+    report = seed(db, users=1, transactions=50000, goals=0, reminders=0, days=3650)
+    user_id = report.user_ids[0]
+    start = time.perf_counter()
+    result = trend(db, user_id, "Расход", "month")
+    elapsed = time.perf_counter() - start
+    assert 119 <= len(result.periods) <= 122
+    assert elapsed < TREND_BUDGET
+
+
+def test_rebuild_fixes_drift(db, capsys):
+    add_transaction(db, 100, "2025-01-15")
+    add_transaction(db, 100, "2025-01-15", user_id=2)
+    db.execute("UPDATE rollups SET total = 1")
+    db.execute("INSERT INTO rollups VALUES (3, 'month', 'Расход', '2020-01-01', 'Такси', 5, 1)")
+    assert len(verify_rollups(db)) == 5
+
+    assert rebuild_rollups(db, user_id=1) == 2
+    assert len(verify_rollups(db)) == 3
+    assert main(["--db", db.path, "rollups", "verify"]) == 1
+    assert main(["--db", db.path, "rollups", "rebuild"]) == 0
+    assert main(["--db", db.path, "rollups", "verify"]) == 0
+    assert "Расхождений не найдено" in capsys.readouterr().out
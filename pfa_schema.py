@@ -0,0 +1,985 @@
+"""
+Версионированные миграции схемы базы данных.
+
+Текущая версия схемы хранится в `PRAGMA user_version`. Каждая миграция —
+функция, принимающая соединение; миграции применяются по порядку внутри
+одной транзакции, начиная с версии, записанной в файле базы данных.
+Новые миграции добавляются только в конец списка `MIGRATIONS`.
+"""
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+# Шаблон канонической даты транзакции "ГГГГ-ММ-ДД ЧЧ:ММ:СС" для GLOB.
+CANONICAL_DATE_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]"
+
+
+def _create_base_tables(conn):
+    """
+    Создает исходные таблицы приложения.
+
+    Таблицы:
+    - users: Хранит данные пользователей.
+    - goals: Хранит финансовые цели пользователей.
+    - reminders: Хранит напоминания пользователей.
+    - transactions: Хранит транзакции (доходы и расходы).
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            login TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS goals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            target_amount REAL NOT NULL,
+            current_amount REAL DEFAULT 0,
+            creation_date TEXT NOT NULL,
+            target_date TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            description_reminder TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            amount REAL NOT NULL,
+            date TEXT NOT NULL,
+            type TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+
+def _add_user_indexes(conn):
+    """
+    Добавляет составные индексы для запросов по пользователю.
+
+    - transactions (user_id, date): история транзакций пользователя.
+    - transactions (user_id, type, category, amount): покрывающий индекс для
+      баланса и диаграмм.
+    - reminders (user_id, date, time): напоминания пользователя.
+    - goals (user_id, target_date): цели пользователя.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_user_date ON transactions (user_id, date)")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_user_type_category
+        ON transactions (user_id, type, category, amount)
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reminders_user_due ON reminders (user_id, date, time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_goals_user ON goals (user_id, target_date)")
+
+
+def create_balance_triggers(conn):
+    """
+    Создает триггеры, поддерживающие таблицу `balances` в согласованном состоянии
+    при вставке, изменении и удалении транзакций.
+    """
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_balance_insert
+        AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO balances (user_id, total_income, total_expense, transaction_count)
+            VALUES (NEW.user_id,
+                    CASE WHEN NEW.type = 'Доход' THEN NEW.amount ELSE 0 END,
+                    CASE WHEN NEW.type = 'Расход' THEN NEW.amount ELSE 0 END,
+                    1)
+            ON CONFLICT (user_id) DO UPDATE SET
+                total_income = total_income + excluded.total_income,
+                total_expense = total_expense + excluded.total_expense,
+                transaction_count = transaction_count + 1;
+        END
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_balance_delete
+        AFTER DELETE ON transactions
+        BEGIN
+            UPDATE balances SET
+                total_income = total_income - CASE WHEN OLD.type = 'Доход' THEN OLD.amount ELSE 0 END,
+                total_expense = total_expense - CASE WHEN OLD.type = 'Расход' THEN OLD.amount ELSE 0 END,
+                transaction_count = transaction_count - 1
+            WHERE user_id = OLD.user_id;
+        END
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_balance_update
+        AFTER UPDATE OF user_id, amount, type ON transactions
+        BEGIN
+            UPDATE balances SET
+                total_income = total_income - CASE WHEN OLD.type = 'Доход' THEN OLD.amount ELSE 0 END,
+                total_expense = total_expense - CASE WHEN OLD.type = 'Расход' THEN OLD.amount ELSE 0 END,
+                transaction_count = transaction_count - 1
+            WHERE user_id = OLD.user_id;
+
+            INSERT INTO balances (user_id, total_income, total_expense, transaction_count)
+            VALUES (NEW.user_id,
+                    CASE WHEN NEW.type = 'Доход' THEN NEW.amount ELSE 0 END,
+                    CASE WHEN NEW.type = 'Расход' THEN NEW.amount ELSE 0 END,
+                    1)
+            ON CONFLICT (user_id) DO UPDATE SET
+                total_income = total_income + excluded.total_income,
+                total_expense = total_expense + excluded.total_expense,
+                transaction_count = transaction_count + 1;
+        END
+    ''')
+
+
+def _add_balances(conn):
+    """
+    Добавляет таблицу `balances` с итогами доходов, расходов и числом транзакций
+    по каждому пользователю и заполняет ее по существующим транзакциям.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS balances (
+            user_id INTEGER PRIMARY KEY,
+            total_income REAL NOT NULL DEFAULT 0,
+            total_expense REAL NOT NULL DEFAULT 0,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    create_balance_triggers(conn)
+    conn.execute('''
+        INSERT OR REPLACE INTO balances (user_id, total_income, total_expense, transaction_count)
+        SELECT user_id,
+               SUM(CASE WHEN type = 'Доход' THEN amount ELSE 0 END),
+               SUM(CASE WHEN type = 'Расход' THEN amount ELSE 0 END),
+               COUNT(*)
+        FROM transactions
+        GROUP BY user_id
+    ''')
+
+
+def create_data_version_triggers(conn):
+    """
+    Создает триггеры, увеличивающие версию данных пользователя при любом
+    изменении его транзакций.
+    """
+    bump = '''
+            INSERT INTO data_versions (user_id, version) VALUES ({row}.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+    '''
+    for event, rows in (("INSERT", ("NEW",)), ("DELETE", ("OLD",)), ("UPDATE", ("OLD", "NEW"))):
+        body = "".join(bump.format(row=row) for row in rows)
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_version_{event.lower()}
+            AFTER {event} ON transactions
+            BEGIN
+                {body}
+            END
+        ''')
+
+
+def _add_data_versions(conn):
+    """
+    Добавляет таблицу `data_versions` с версией данных каждого пользователя.
+    По версии инвалидируются кэши агрегатов (например, данных диаграмм).
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    create_data_version_triggers(conn)
+
+
+def _legacy_reminder_due(date, time):
+    """
+    Проверяет дату и время напоминания старой версии и переводит их в метку
+    времени. Правило зафиксировано здесь, а не берется из кода приложения,
+    чтобы уже примененная миграция не менялась вместе с ним.
+
+    Args:
+        date (str): Дата "ГГГГ-ММ-ДД".
+        time (str): Время "ЧЧ:ММ".
+
+    Returns:
+        tuple: (дата, время, due_at, status). Для корректных значений дата и
+        время приводятся к каноническому виду, due_at — секунды Unix,
+        status — "active". Пустые значения (напоминание устарело в старой
+        версии) дают статус "expired", нераспознанные — "invalid"; в обоих
+        случаях due_at равен None, а исходные строки сохраняются.
+    """
+    if not date.strip() or not time.strip():
+        return date, time, None, "expired"
+    try:
+        due = datetime.strptime(f"{date.strip()} {time.strip()}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        return date, time, None, "invalid"
+    return due.strftime("%Y-%m-%d"), due.strftime("%H:%M"), int(due.timestamp()), "active"
+
+
+# Форматы дат транзакций, которые могли записать старые версии приложения.
+_LEGACY_DATE_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y %H:%M",
+    "%d.%m.%Y",
+    "%Y%m%d%H%M%S",
+    "%Y%m%d",
+)
+
+
+def _legacy_transaction_date(value):
+    """
+    Приводит дату транзакции старой версии к виду "ГГГГ-ММ-ДД ЧЧ:ММ:СС".
+
+    Разбор зафиксирован в миграции и не зависит от разбора дат импорта
+    (`pfa_import.parse_date`), который может меняться.
+
+    Returns:
+        str: Каноническая дата или None, если дата не распознана.
+    """
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if value[4:5] == "-":
+        try:
+            return datetime.fromisoformat(value).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            pass
+    if value[:8].isdigit():
+        # Дата OFX: 20240131120000.000[+3:MSK]
+        value = value.split("[")[0].split(".")[0]
+    for date_format in _LEGACY_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    return None
+
+
+def _add_timestamps(conn):
+    """
+    Переводит сроки напоминаний в индексируемые метки времени и приводит даты
+    транзакций к каноническому виду.
+
+    - reminders.due_at: срок в секундах Unix; reminders.status: "active",
+      "expired" или "invalid". Устаревшие напоминания получают статус вместо
+      затирания даты, времени и описания.
+    - Индекс (user_id, status, due_at) вместо (user_id, date, time): выборки
+      "скоро наступит" и "срок прошел" становятся диапазонными.
+    - transactions.date приводится к "ГГГГ-ММ-ДД ЧЧ:ММ:СС", чтобы порядок
+      строк совпадал с хронологическим и фильтры по датам шли по индексу
+      (user_id, date). Нераспознанные даты не изменяются.
+    """
+    conn.execute("ALTER TABLE reminders ADD COLUMN due_at INTEGER")
+    conn.execute('''
+        ALTER TABLE reminders ADD COLUMN status TEXT NOT NULL DEFAULT 'active'
+        CHECK (status IN ('active', 'expired', 'invalid'))
+    ''')
+    reminders = conn.execute("SELECT id, date, time FROM reminders").fetchall()
+    conn.executemany(
+        "UPDATE reminders SET date = ?, time = ?, due_at = ?, status = ? WHERE id = ?",
+        [(*_legacy_reminder_due(date, time), reminder_id) for reminder_id, date, time in reminders],
+    )
+    conn.execute("DROP INDEX IF EXISTS idx_reminders_user_due")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_reminders_user_status_due ON reminders (user_id, status, due_at)")
+
+    updates = []
+    for transaction_id, date in conn.execute(
+            "SELECT id, date FROM transactions WHERE date NOT GLOB ?", (CANONICAL_DATE_GLOB,)).fetchall():
+        canonical = _legacy_transaction_date(date)
+        if canonical is not None:
+            updates.append((canonical, transaction_id))
+    conn.executemany("UPDATE transactions SET date = ? WHERE id = ?", updates)
+
+
+def _add_goal_allocation(conn):
+    """
+    Добавляет настройки распределения доходов по целям.
+
+    - goals.priority: приоритет цели (целое больше нуля, по умолчанию 1).
+    - users.goal_strategy: стратегия распределения (см. `pfa_goals`).
+    - Цели, достигнутые в старой версии, хранились с target_amount = 0;
+      им возвращается целевая сумма, равная накопленной.
+    """
+    conn.execute('''
+        ALTER TABLE goals ADD COLUMN priority INTEGER NOT NULL DEFAULT 1 CHECK (priority > 0)
+    ''')
+    conn.execute('''
+        ALTER TABLE users ADD COLUMN goal_strategy TEXT NOT NULL DEFAULT 'fill_first'
+        CHECK (goal_strategy IN ('fill_first', 'proportional', 'priority'))
+    ''')
+    conn.execute("UPDATE goals SET target_amount = current_amount WHERE target_amount = 0 AND current_amount > 0")
+
+
+# Начало периода сводки для даты транзакции `{date}`: первое число месяца
+# или понедельник недели.
+ROLLUP_PERIODS = {
+    "month": "strftime('%Y-%m-01', {date})",
+    "week": "date({date}, '-6 days', 'weekday 1')",
+}
+
+
+def create_rollup_triggers(conn, category="category_id"):
+    """
+    Создает триггеры, поддерживающие сводки `rollups` при вставке, изменении
+    и удалении транзакций. Строки сводки без транзакций удаляются; транзакции
+    с нераспознанной датой (оставшиеся от старых версий) в сводки не попадают.
+
+    Args:
+        conn (sqlite3.Connection): Соединение с открытой транзакцией.
+        category (str): Колонка категории в `transactions` и `rollups`
+            ("category" в схемах до `_add_categories`).
+    """
+    add = '''
+            INSERT INTO rollups (user_id, granularity, type, period, {category}, total, transaction_count)
+            SELECT NEW.user_id, '{granularity}', NEW.type, {period}, NEW.{category}, NEW.amount, 1
+            WHERE {period} IS NOT NULL
+            ON CONFLICT DO UPDATE SET
+                total = total + excluded.total,
+                transaction_count = transaction_count + 1;
+    '''
+    remove = '''
+            UPDATE rollups SET
+                total = total - OLD.amount,
+                transaction_count = transaction_count - 1
+            WHERE user_id = OLD.user_id AND granularity = '{granularity}' AND type = OLD.type
+              AND period = {period} AND {category} = OLD.{category};
+            DELETE FROM rollups
+            WHERE user_id = OLD.user_id AND granularity = '{granularity}' AND type = OLD.type
+              AND period = {period} AND {category} = OLD.{category} AND transaction_count = 0;
+    '''
+    events = (
+        ("insert", "INSERT", ((add, "NEW"),)),
+        ("delete", "DELETE", ((remove, "OLD"),)),
+        ("update", f"UPDATE OF user_id, {category}, amount, date, type", ((remove, "OLD"), (add, "NEW"))),
+    )
+    for name, event, steps in events:
+        body = "".join(
+            step.format(granularity=granularity, period=period.format(date=f"{row}.date"), category=category)
+            for step, row in steps
+            for granularity, period in ROLLUP_PERIODS.items()
+        )
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_{name}
+            AFTER {event} ON transactions
+            BEGIN
+                {body}
+            END
+        ''')
+
+
+def fill_rollups(conn, user_id=None, category="category_id"):
+    """
+    Заполняет сводки по транзакциям одним запросом на каждую детализацию.
+
+    Строки сводок заполняемых пользователей должны быть удалены заранее.
+
+    Args:
+        conn (sqlite3.Connection): Соединение с открытой транзакцией.
+        user_id (int): Заполнить только сводки этого пользователя.
+        category (str): Колонка категории (см. `create_rollup_triggers`).
+    """
+    where, params = ("AND user_id = ?", (user_id,)) if user_id is not None else ("", ())
+    for granularity, period in ROLLUP_PERIODS.items():
+        period = period.format(date="date")
+        conn.execute(f'''
+            INSERT INTO rollups (user_id, granularity, type, period, {category}, total, transaction_count)
+            SELECT user_id, '{granularity}', type, {period}, {category}, SUM(amount), COUNT(*)
+            FROM transactions
+            WHERE {period} IS NOT NULL {where}
+            GROUP BY user_id, type, 4, {category}
+        ''', params)
+
+
+def _add_rollups(conn):
+    """
+    Добавляет таблицу `rollups` с суммами транзакций пользователя по периодам
+    (месяц, неделя), типу и категории и заполняет ее по существующим транзакциям.
+
+    Первичный ключ (user_id, granularity, type, period, category) позволяет
+    читать тренд за любой интервал дат одним диапазонным сканированием.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rollups (
+            user_id INTEGER NOT NULL,
+            granularity TEXT NOT NULL CHECK (granularity IN ('month', 'week')),
+            type TEXT NOT NULL,
+            period TEXT NOT NULL,
+            category TEXT NOT NULL,
+            total REAL NOT NULL DEFAULT 0,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, granularity, type, period, category)
+        ) WITHOUT ROWID
+    ''')
+    create_rollup_triggers(conn, "category")
+    fill_rollups(conn, category="category")
+
+
+def legacy_kopecks(value):
+    """
+    Переводит сумму в рублях из колонки REAL в целые копейки по тому же
+    правилу, что `Money.parse`: число с плавающей точкой берется в кратчайшей
+    десятичной записи (repr) и округляется до копейки, половина — от нуля.
+    Поэтому 1.005 дает 101 копейку, как и при вводе той же суммы сейчас, а
+    не 100, как ROUND в SQLite по двоичному значению.
+
+    Копия правила, а не вызов `pfa_money`: уже примененная миграция не должна
+    меняться вместе с кодом приложения. Значения, которые не являются
+    числом, становятся нулем (как при CAST в SQLite).
+    """
+    if isinstance(value, float):
+        value = repr(value)
+    try:
+        rubles = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return 0
+    if not rubles.is_finite():
+        return 0
+    return int((rubles * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def register_legacy_kopecks(conn):
+    """
+    Регистрирует в соединении SQL-функцию legacy_kopecks (см. `legacy_kopecks`).
+    """
+    conn.create_function("legacy_kopecks", 1, legacy_kopecks, deterministic=True)
+
+
+# Перевод суммы в рублях (REAL) в целые копейки (нужна `register_legacy_kopecks`).
+KOPECKS_SQL = "legacy_kopecks({column})"
+
+
+def _rebuild_table(conn, name, create_sql, columns, expressions):
+    """
+    Пересоздает таблицу по новому определению, копируя строки.
+
+    Старая таблица удаляется вместе с ее индексами и триггерами; их нужно
+    создать заново. Счетчик AUTOINCREMENT сохраняется, чтобы ID удаленных
+    строк не выдавались повторно.
+
+    Args:
+        conn (sqlite3.Connection): Соединение с открытой транзакцией.
+        name (str): Имя таблицы.
+        create_sql (str): CREATE TABLE с местом `{name}` для имени таблицы.
+        columns (tuple): Колонки новой таблицы.
+        expressions (dict): Выражения по старой таблице для колонок, которые
+            нужно преобразовать; остальные колонки копируются как есть.
+    """
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (name,)).fetchone()
+    conn.execute(create_sql.format(name=f"{name}_new"))
+    selected = ", ".join(expressions.get(column, column) for column in columns)
+    conn.execute(f"INSERT INTO {name}_new ({', '.join(columns)}) SELECT {selected} FROM {name}")
+    conn.execute(f"DROP TABLE {name}")
+    conn.execute(f"ALTER TABLE {name}_new RENAME TO {name}")
+    if sequence is not None:
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (name,))
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (name, sequence[0]))
+
+
+def _use_minor_units(conn):
+    """
+    Переводит все денежные суммы в целые копейки (INTEGER).
+
+    - transactions.amount, goals.target_amount и goals.current_amount:
+      таблицы пересоздаются с колонками INTEGER (в колонке REAL целые
+      значения снова хранились бы как числа с плавающей точкой), индексы и
+      триггеры балансов, версий данных и сводок создаются заново.
+    - balances и rollups пересоздаются с целыми итогами и заполняются по
+      переведенным транзакциям, поэтому итоги точно равны суммам строк.
+    """
+    register_legacy_kopecks(conn)
+    _rebuild_table(conn, "transactions", '''
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            type TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''', ("id", "user_id", "category", "amount", "date", "type"),
+        {"amount": KOPECKS_SQL.format(column="amount")})
+    _rebuild_table(conn, "goals", '''
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            target_amount INTEGER NOT NULL,
+            current_amount INTEGER NOT NULL DEFAULT 0,
+            creation_date TEXT NOT NULL,
+            target_date TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 1 CHECK (priority > 0),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''', ("id", "user_id", "title", "description", "target_amount", "current_amount", "creation_date",
+          "target_date", "priority"),
+        {"target_amount": KOPECKS_SQL.format(column="target_amount"),
+         "current_amount": KOPECKS_SQL.format(column="COALESCE(current_amount, 0)")})
+    _add_user_indexes(conn)
+    conn.execute("DROP INDEX IF EXISTS idx_reminders_user_due")
+
+    conn.execute("DROP TABLE balances")
+    conn.execute('''
+        CREATE TABLE balances (
+            user_id INTEGER PRIMARY KEY,
+            total_income INTEGER NOT NULL DEFAULT 0,
+            total_expense INTEGER NOT NULL DEFAULT 0,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO balances (user_id, total_income, total_expense, transaction_count)
+        SELECT user_id,
+               SUM(CASE WHEN type = 'Доход' THEN amount ELSE 0 END),
+               SUM(CASE WHEN type = 'Расход' THEN amount ELSE 0 END),
+               COUNT(*)
+        FROM transactions
+        GROUP BY user_id
+    ''')
+
+    conn.execute("DROP TABLE rollups")
+    conn.execute('''
+        CREATE TABLE rollups (
+            user_id INTEGER NOT NULL,
+            granularity TEXT NOT NULL CHECK (granularity IN ('month', 'week')),
+            type TEXT NOT NULL,
+            period TEXT NOT NULL,
+            category TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, granularity, type, period, category)
+        ) WITHOUT ROWID
+    ''')
+    fill_rollups(conn, category="category")
+
+    create_balance_triggers(conn)
+    create_data_version_triggers(conn)
+    create_rollup_triggers(conn, "category")
+
+
+# Полнотекстовые индексы FTS5: имя -> (таблица с содержимым, индексируемые
+# колонки). Колонка user_id индексируется последней, чтобы поиск ограничивался
+# пользователем внутри FTS5, а не фильтром по всем совпадениям.
+SEARCH_INDEXES = {
+    "fts_categories": ("categories", ("name", "user_id")),
+    "fts_goals": ("goals", ("title", "description", "user_id")),
+    "fts_reminders": ("reminders", ("title", "description_reminder", "user_id")),
+}
+
+# Индексы в схеме до `_add_categories`: категории брались из `category_usage`.
+_SEARCH_INDEXES_V9 = dict(SEARCH_INDEXES, fts_categories=("category_usage", ("category", "user_id")))
+
+
+def create_search_indexes(conn, indexes=SEARCH_INDEXES):
+    """
+    Создает индексы FTS5 с внешним содержимым (текст хранится только в
+    исходных таблицах).
+
+    Args:
+        conn (sqlite3.Connection): Соединение с открытой транзакцией.
+        indexes (dict): Описания индексов (см. `SEARCH_INDEXES`).
+    """
+    for index, (table, columns) in indexes.items():
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(
+                {", ".join(columns)},
+                content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+            )
+        ''')
+
+
+def create_search_triggers(conn, indexes=SEARCH_INDEXES):
+    """
+    Создает триггеры, поддерживающие полнотекстовый поиск (см. `pfa_search`):
+    индексы FTS5 обновляются при вставке, изменении и удалении строк своих
+    таблиц. Изменение сумм целей (распределение доходов) индексы не трогает.
+
+    Args:
+        conn (sqlite3.Connection): Соединение с открытой транзакцией.
+        indexes (dict): Описания индексов (см. `SEARCH_INDEXES`).
+    """
+    for index, (table, columns) in indexes.items():
+        names = ", ".join(columns)
+        new_values = ", ".join(f"NEW.{column}" for column in columns)
+        old_values = ", ".join(f"OLD.{column}" for column in columns)
+        insert = f"INSERT INTO {index} (rowid, {names}) VALUES (NEW.id, {new_values});"
+        delete = f"INSERT INTO {index} ({index}, rowid, {names}) VALUES ('delete', OLD.id, {old_values});"
+        for name, event, body in (("insert", "INSERT", insert), ("delete", "DELETE", delete),
+                                  ("update", f"UPDATE OF {names}", delete + insert)):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{index}_{name}
+                AFTER {event} ON {table}
+                BEGIN
+                    {body}
+                END
+            ''')
+
+
+def fill_search_indexes(conn, indexes=SEARCH_INDEXES):
+    """
+    Перестраивает индексы FTS5 по их таблицам.
+
+    Args:
+        conn (sqlite3.Connection): Соединение с открытой транзакцией.
+        indexes (dict): Описания индексов (см. `SEARCH_INDEXES`).
+    """
+    for index in indexes:
+        conn.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+
+
+def _add_search(conn):
+    """
+    Добавляет полнотекстовый поиск по транзакциям, целям и напоминаниям.
+
+    - category_usage: категории транзакций каждого пользователя с числом
+      транзакций, поддерживается триггерами. Транзакции ищутся по категории,
+      поэтому в индекс попадает одна строка на категорию пользователя, а не
+      каждая транзакция: ранжирование и подсветка обходят десятки строк даже
+      на истории из миллионов транзакций.
+    - fts_categories, fts_goals, fts_reminders: индексы FTS5.
+    - transactions (user_id, category, date): последние транзакции найденной
+      категории читаются по индексу без сортировки.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS category_usage (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (user_id, category)
+        )
+    ''')
+    create_search_indexes(conn, _SEARCH_INDEXES_V9)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_user_category_date
+        ON transactions (user_id, category, date)
+    ''')
+    conn.execute('''
+        INSERT INTO category_usage (user_id, category, transaction_count)
+        SELECT user_id, category, COUNT(*) FROM transactions GROUP BY user_id, category
+    ''')
+    fill_search_indexes(conn, _SEARCH_INDEXES_V9)
+
+    add = '''
+            INSERT INTO category_usage (user_id, category, transaction_count)
+            VALUES (NEW.user_id, NEW.category, 1)
+            ON CONFLICT (user_id, category) DO UPDATE SET transaction_count = transaction_count + 1;
+    '''
+    remove = '''
+            UPDATE category_usage SET transaction_count = transaction_count - 1
+            WHERE user_id = OLD.user_id AND category = OLD.category;
+            DELETE FROM category_usage
+            WHERE user_id = OLD.user_id AND category = OLD.category AND transaction_count = 0;
+    '''
+    for name, event, body in (("insert", "INSERT", add), ("delete", "DELETE", remove),
+                              ("update", "UPDATE OF user_id, category", remove + add)):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_search_{name}
+            AFTER {event} ON transactions
+            BEGIN
+                {body}
+            END
+        ''')
+    create_search_triggers(conn, _SEARCH_INDEXES_V9)
+
+
+def _add_history_indexes(conn):
+    """
+    Добавляет индексы для фильтров и сортировки истории транзакций
+    (см. `pfa_history.SORT_KEYS`):
+
+    - transactions (user_id, amount): сортировка и фильтр по сумме.
+    - transactions (user_id, type, date): сортировка по типу и фильтр по типу
+      при сортировке по дате.
+
+    Сортировка по дате и по категории использует индексы (user_id, date) и
+    (user_id, category, date).
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_user_amount ON transactions (user_id, amount)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_user_type_date ON transactions (user_id, type, date)")
+
+
+# Категории, которые получает каждый пользователь: (имя, тип транзакций).
+DEFAULT_CATEGORIES = (
+    ("Зарплата", "Доход"),
+    ("Переводы", "Доход"),
+    ("Инвестиции", "Доход"),
+    ("Продукты", "Расход"),
+    ("Одежда", "Расход"),
+    ("Такси", "Расход"),
+)
+
+
+def create_category_triggers(conn):
+    """
+    Создает триггеры категорий:
+
+    - новый пользователь получает категории `DEFAULT_CATEGORIES`;
+    - переименование или перенос категории увеличивает версию данных
+      пользователя: кэши сумм по категориям хранят имена категорий.
+    """
+    # Параметры в теле триггера не поддерживаются, поэтому значения
+    # подставляются строковыми литералами.
+    defaults = ", ".join(f"(NEW.id, '{name}', '{type_}')" for name, type_ in DEFAULT_CATEGORIES)
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_users_default_categories
+        AFTER INSERT ON users
+        BEGIN
+            INSERT OR IGNORE INTO categories (user_id, name, type) VALUES {defaults};
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_categories_version_update
+        AFTER UPDATE OF name, parent_id ON categories
+        BEGIN
+            INSERT INTO data_versions (user_id, version) VALUES (NEW.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END
+    ''')
+
+
+def _add_categories(conn):
+    """
+    Выносит категории транзакций в таблицу `categories` с целыми ключами.
+
+    - categories: категории пользователя (имя уникально у пользователя),
+      необязательная родительская категория и тип транзакций, для которых
+      категория предлагается. Каждый пользователь получает категории
+      `DEFAULT_CATEGORIES`; категории существующих транзакций переносятся
+      как категории верхнего уровня.
+    - transactions.category (TEXT) заменяется на category_id: таблица
+      пересоздается, индексы и триггеры создаются заново; переименование
+      категории меняет одну строку вместо всей истории.
+    - rollups группируются по category_id.
+    - category_usage больше не нужна: fts_categories индексирует имена
+      категорий прямо в `categories`.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            parent_id INTEGER,
+            name TEXT NOT NULL,
+            type TEXT,
+            UNIQUE (user_id, name),
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (parent_id) REFERENCES categories (id)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_categories_user_parent ON categories (user_id, parent_id)")
+    conn.executemany(
+        "INSERT OR IGNORE INTO categories (user_id, name, type) SELECT id, ?, ? FROM users",
+        DEFAULT_CATEGORIES,
+    )
+    conn.execute('''
+        INSERT OR IGNORE INTO categories (user_id, name, type)
+        SELECT user_id, category, CASE WHEN MIN(type) = MAX(type) THEN MIN(type) END
+        FROM transactions
+        GROUP BY user_id, category
+    ''')
+
+    _rebuild_table(conn, "transactions", '''
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            type TEXT NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (category_id) REFERENCES categories (id)
+        )
+    ''', ("id", "user_id", "category_id", "amount", "date", "type"),
+        {"category_id": '''(SELECT c.id FROM categories c
+                            WHERE c.user_id = transactions.user_id AND c.name = transactions.category)'''})
+    conn.execute("CREATE INDEX idx_transactions_user_date ON transactions (user_id, date)")
+    conn.execute('''
+        CREATE INDEX idx_transactions_user_type_category
+        ON transactions (user_id, type, category_id, amount)
+    ''')
+    conn.execute("CREATE INDEX idx_transactions_user_category_date ON transactions (user_id, category_id, date)")
+    _add_history_indexes(conn)
+
+    conn.execute("DROP TABLE rollups")
+    conn.execute('''
+        CREATE TABLE rollups (
+            user_id INTEGER NOT NULL,
+            granularity TEXT NOT NULL CHECK (granularity IN ('month', 'week')),
+            type TEXT NOT NULL,
+            period TEXT NOT NULL,
+            category_id INTEGER NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, granularity, type, period, category_id)
+        ) WITHOUT ROWID
+    ''')
+    fill_rollups(conn)
+
+    conn.execute("DROP TABLE category_usage")
+    conn.execute("DROP TABLE fts_categories")
+    create_search_indexes(conn)
+    fill_search_indexes(conn, {"fts_categories": SEARCH_INDEXES["fts_categories"]})
+
+    create_balance_triggers(conn)
+    create_data_version_triggers(conn)
+    create_rollup_triggers(conn)
+    create_search_triggers(conn)
+    create_category_triggers(conn)
+
+
+def _add_recurring(conn):
+    """
+    Добавляет правила повторяющихся транзакций (см. `pfa_recurring`).
+
+    - recurring_rules: сумма, тип и категория транзакции, периодичность
+      (frequency и interval), первое срабатывание start_date и необязательная
+      последняя дата end_date включительно. generated — число уже созданных
+      транзакций, next_date — срок следующей (NULL, если правило завершено);
+      индекс (user_id, next_date) находит правила, срок которых наступил.
+    - transactions.recurring_rule_id: правило, создавшее транзакцию.
+      Уникальный частичный индекс (recurring_rule_id, date) не дает создать
+      одно срабатывание правила дважды.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS recurring_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL CHECK (amount > 0),
+            type TEXT NOT NULL,
+            frequency TEXT NOT NULL CHECK (frequency IN ('daily', 'weekly', 'monthly', 'yearly')),
+            interval INTEGER NOT NULL DEFAULT 1 CHECK (interval > 0),
+            start_date TEXT NOT NULL,
+            end_date TEXT,
+            generated INTEGER NOT NULL DEFAULT 0,
+            next_date TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (category_id) REFERENCES categories (id)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_recurring_rules_user_next ON recurring_rules (user_id, next_date)")
+    conn.execute("ALTER TABLE transactions ADD COLUMN recurring_rule_id INTEGER REFERENCES recurring_rules (id)")
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_recurring
+        ON transactions (recurring_rule_id, date) WHERE recurring_rule_id IS NOT NULL
+    ''')
+
+
+def _add_currencies(conn):
+    """
+    Добавляет валюты и курсы (см. `pfa_rates`).
+
+    - transactions.currency и transactions.original_amount: валюта и сумма
+      транзакции в этой валюте; amount остается суммой в копейках базовой
+      валюты (RUB) по курсу на дату транзакции, поэтому итоги, сводки и
+      распределение по целям не меняются. У старых транзакций
+      original_amount равен NULL: сумма в рублях та же, что amount.
+      Частичный индекс по валюте находит транзакции в других валютах для
+      пересчета после загрузки курсов.
+    - goals.currency и recurring_rules.currency: валюта сумм цели и правила.
+    - users.currency: валюта отчетов пользователя.
+    - exchange_rates: курс валюты на дату (сколько рублей стоит единица
+      валюты); rate_imports — журнал загрузок курсов, номер последней
+      загрузки служит версией кэша курсов.
+    """
+    for table in ("transactions", "goals", "recurring_rules", "users"):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN currency TEXT NOT NULL DEFAULT 'RUB'")
+    conn.execute("ALTER TABLE transactions ADD COLUMN original_amount INTEGER")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_foreign_currency
+        ON transactions (currency) WHERE currency != 'RUB'
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS exchange_rates (
+            currency TEXT NOT NULL,
+            date TEXT NOT NULL,
+            rate REAL NOT NULL CHECK (rate > 0),
+            PRIMARY KEY (currency, date)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rate_imports (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            imported_at TEXT NOT NULL,
+            source TEXT NOT NULL,
+            rate_count INTEGER NOT NULL
+        )
+    ''')
+
+
+MIGRATIONS = [
+    _create_base_tables,
+    _add_user_indexes,
+    _add_balances,
+    _add_data_versions,
+    _add_timestamps,
+    _add_goal_allocation,
+    _add_rollups,
+    _use_minor_units,
+    _add_search,
+    _add_history_indexes,
+    _add_categories,
+    _add_recurring,
+    _add_currencies,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(db):
+    """
+    Возвращает версию схемы, записанную в базе данных.
+
+    Args:
+        db (Database): Подключение к базе данных.
+
+    Returns:
+        int: Значение `PRAGMA user_version`.
+    """
+    return db.fetchone("PRAGMA user_version")[0]
+
+
+def migrate(db):
+    """
+    Применяет к базе данных все недостающие миграции.
+
+    Args:
+        db (Database): Подключение к базе данных.
+
+    Returns:
+        int: Версия схемы после миграции.
+
+    Raises:
+        RuntimeError: Если база данных создана более новой версией приложения.
+    """
+    with db.transaction() as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(
+                f"Версия схемы базы данных ({version}) новее поддерживаемой ({SCHEMA_VERSION})"
+            )
+        for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+    return SCHEMA_VERSION
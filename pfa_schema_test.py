@@ -0,0 +1,200 @@
+import random
+import sqlite3
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from pfa_balances import verify_balances
+from pfa_db import Database
+from pfa_rollups import verify_rollups
+from pfa_schema import DEFAULT_CATEGORIES, MIGRATIONS, SCHEMA_VERSION, migrate, schema_version
+
+
+def query_plan(db, sql, params):
+    return " ".join(row[3] for row in db.fetchall("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def test_migrate_fresh_database(db):
+    assert schema_version(db) == SCHEMA_VERSION
+    tables = {row[0] for row in db.fetchall("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"users", "goals", "reminders", "transactions"} <= tables
+
+
+def test_migrate_is_idempotent(db):
+    assert migrate(db) == SCHEMA_VERSION
+    assert schema_version(db) == SCHEMA_VERSION
+
+
+def test_migrate_legacy_database(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, login TEXT UNIQUE NOT NULL,
+                            password TEXT NOT NULL);
+        CREATE TABLE transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+                                   category TEXT NOT NULL, amount REAL NOT NULL, date TEXT NOT NULL,
+                                   type TEXT NOT NULL);
+        INSERT INTO users (login, password) VALUES ('Pavel', 'abcdefgh');
+        INSERT INTO transactions (user_id, category, amount, date, type)
+        VALUES (1, 'Такси', 300, '2024-12-01 10:00:00', 'Расход');
+    ''')
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    migrate(db)
+    assert schema_version(db) == SCHEMA_VERSION
+    assert db.fetchone("SELECT login FROM users")[0] == "Pavel"
+    assert db.fetchone("SELECT COUNT(*) FROM transactions")[0] == 1
+    assert db.fetchall("SELECT granularity, period, total FROM rollups ORDER BY granularity") == [
+        ("month", "2024-12-01", 30000), ("week", "2024-11-25", 30000),
+    ]
+    db.close()
+
+
+def test_migrate_converts_timestamps(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    db = Database(path)
+    with db.transaction() as conn:
+        for step in MIGRATIONS[:4]:
+            step(conn)
+        conn.execute("PRAGMA user_version = 4")
+        conn.executemany(
+            "INSERT INTO reminders (user_id, title, date, time, description_reminder) VALUES (1, ?, ?, ?, '')",
+            [("Оплата", "2025-03-10", "9:05"), ("Старое", "", ""), ("Ошибка", "10.03.2025", "12:00")],
+        )
+        conn.executemany(
+            "INSERT INTO transactions (user_id, category, amount, date, type) VALUES (1, 'Такси', 1, ?, 'Расход')",
+            [("2025-03-10 09:05:00",), ("10.03.2025",), ("вчера",)],
+        )
+
+    migrate(db)
+
+    reminders = db.fetchall("SELECT title, date, time, due_at, status FROM reminders ORDER BY id")
+    assert reminders == [
+        ("Оплата", "2025-03-10", "09:05", int(datetime(2025, 3, 10, 9, 5).timestamp()), "active"),
+        ("Старое", "", "", None, "expired"),
+        ("Ошибка", "10.03.2025", "12:00", None, "invalid"),
+    ]
+    assert [row[0] for row in db.fetchall("SELECT date FROM transactions ORDER BY id")] == [
+        "2025-03-10 09:05:00", "2025-03-10 00:00:00", "вчера",
+    ]
+    with pytest.raises(sqlite3.IntegrityError):
+        db.execute("UPDATE reminders SET status = 'done'")
+    db.close()
+
+
+def test_migrate_restores_completed_goal_targets(tmp_path):
+    db = Database(str(tmp_path / "legacy.db"))
+    with db.transaction() as conn:
+        for step in MIGRATIONS[:5]:
+            step(conn)
+        conn.execute("PRAGMA user_version = 5")
+        conn.execute('''
+            INSERT INTO goals (user_id, title, target_amount, current_amount, creation_date, target_date)
+            VALUES (1, 'Достигнута', 0, 300, '2024-01-01', '2024-12-31'),
+                   (1, 'В процессе', 500, 100, '2024-01-01', '2024-12-31')
+        ''')
+
+    migrate(db)
+
+    assert db.fetchall("SELECT target_amount, current_amount, priority FROM goals ORDER BY id") == [
+        (30000, 30000, 1), (50000, 10000, 1),
+    ]
+    db.close()
+
+
+def test_migrate_to_minor_units(tmp_path):
+    db = Database(str(tmp_path / "legacy.db"))
+    rnd = random.Random(7)
+    amounts = [Decimal(rnd.randint(1, 10 ** 8)).scaleb(-2) for _ in range(500)]
+    with db.transaction() as conn:
+        for step in MIGRATIONS[:7]:
+            step(conn)
+        conn.execute("PRAGMA user_version = 7")
+        conn.executemany(
+            "INSERT INTO transactions (user_id, category, amount, date, type) VALUES (?, 'Такси', ?, ?, ?)",
+            [(number % 3 + 1, float(amount), f"2024-{number % 12 + 1:02d}-10 10:00:00",
+              "Доход" if number % 4 == 0 else "Расход") for number, amount in enumerate(amounts)],
+        )
+        # Накопленная погрешность, как после UPDATE amount = amount + 0.1 + 0.2.
+        conn.execute("UPDATE transactions SET amount = 1234.5000000001 WHERE id = 1")
+        conn.execute("UPDATE transactions SET amount = 0.30000000000000004 WHERE id = 2")
+        conn.execute("DELETE FROM transactions WHERE id = 500")
+        conn.execute('''
+            INSERT INTO goals (user_id, title, target_amount, current_amount, creation_date, target_date)
+            VALUES (1, 'Отпуск', 1000.1, 0.7000000000000001, '2024-01-01', '2024-12-31')
+        ''')
+
+    migrate(db)
+
+    rows = db.fetchall("SELECT amount, typeof(amount) FROM transactions ORDER BY id")
+    assert rows[:2] == [(123450, "integer"), (30, "integer")]
+    assert rows[2:] == [(int(amount * 100), "integer") for amount in amounts[2:499]]
+    assert db.fetchall("SELECT target_amount, current_amount FROM goals") == [(100010, 70)]
+    assert verify_balances(db) == [] and verify_rollups(db) == []
+
+    # AUTOINCREMENT не выдает повторно ID удаленной строки; индексы и триггеры работают.
+    row_id = db.execute("INSERT INTO transactions (user_id, category_id, amount, date, type) "
+                        "VALUES (1, 1, 150, '2024-05-01 10:00:00', 'Расход')").lastrowid
+    assert row_id == 501
+    assert verify_balances(db) == [] and verify_rollups(db) == []
+    assert "idx_transactions_user_date" in query_plan(
+        db, "SELECT date FROM transactions WHERE user_id = ? ORDER BY date", (1,))
+    db.close()
+
+
+def test_migrate_normalizes_categories(tmp_path):
+    db = Database(str(tmp_path / "legacy.db"))
+    with db.transaction() as conn:
+        for step in MIGRATIONS[:10]:
+            step(conn)
+        conn.execute("PRAGMA user_version = 10")
+        conn.executemany("INSERT INTO users (login, password) VALUES (?, 'password123')", [("Pavel",), ("Maria",)])
+        conn.executemany(
+            "INSERT INTO transactions (user_id, category, amount, date, type) VALUES (?, ?, ?, ?, ?)",
+            [(1, "Такси", 100, "2025-01-10 10:00:00", "Расход"), (1, "Кафе", 200, "2025-01-11 10:00:00", "Расход"),
+             (1, "Кафе", 50, "2025-02-01 10:00:00", "Доход"), (2, "Кафе", 70, "2025-01-12 10:00:00", "Расход")],
+        )
+
+    migrate(db)
+
+    assert db.fetchall(
+        "SELECT user_id, name, type FROM categories WHERE name IN ('Кафе', 'Такси') ORDER BY user_id, name"
+    ) == [(1, "Кафе", None), (1, "Такси", "Расход"), (2, "Кафе", "Расход"), (2, "Такси", "Расход")]
+    assert db.fetchall('''
+        SELECT t.user_id, c.user_id, c.name, t.amount FROM transactions t JOIN categories c ON c.id = t.category_id
+        ORDER BY t.id
+    ''') == [(1, 1, "Такси", 100), (1, 1, "Кафе", 200), (1, 1, "Кафе", 50), (2, 2, "Кафе", 70)]
+    assert "category" not in [row[1] for row in db.fetchall("PRAGMA table_info(transactions)")]
+    assert db.fetchone("SELECT COUNT(*) FROM sqlite_master WHERE name = 'category_usage'")[0] == 0
+    assert verify_balances(db) == [] and verify_rollups(db) == []
+
+    # Новый пользователь получает категории по умолчанию.
+    user_id = db.execute("INSERT INTO users (login, password) VALUES ('Ivan', 'password123')").lastrowid
+    assert db.fetchone("SELECT COUNT(*) FROM categories WHERE user_id = ?", (user_id,))[0] == len(DEFAULT_CATEGORIES)
+    db.close()
+
+
+def test_migrate_rejects_newer_schema(db):
+    db.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    with pytest.raises(RuntimeError):
+        migrate(db)
+
+
+@pytest.mark.parametrize("sql, index", [
+    ('''SELECT SUM(CASE WHEN type = "Доход" THEN amount ELSE 0 END),
+               SUM(CASE WHEN type = "Расход" THEN amount ELSE 0 END)
+        FROM transactions WHERE user_id = ?''', "COVERING INDEX idx_transactions_user_type_category"),
+    ("SELECT category_id, amount, type FROM transactions WHERE user_id = ?",
+     "COVERING INDEX idx_transactions_user_type_category"),
+    ("SELECT category_id, amount, type, date FROM transactions WHERE user_id = ? ORDER BY date",
+     "INDEX idx_transactions_user_date"),
+    ("SELECT id, title, due_at FROM reminders WHERE user_id = ? AND status = 'active' AND due_at <= 1000",
+     "INDEX idx_reminders_user_status_due (user_id=? AND status=? AND due_at<?)"),
+    ("SELECT id, title, target_amount, current_amount, target_date FROM goals WHERE user_id = ?",
+     "INDEX idx_goals_user"),
+])
+def test_hot_queries_use_indexes(db, sql, index):
+    plan = query_plan(db, sql, (1,))
+    assert index in plan
+    assert "SCAN transactions" not in plan
@@ -0,0 +1,208 @@
+"""
+Полнотекстовый поиск по транзакциям, целям и напоминаниям (SQLite FTS5).
+
+Индексы FTS5 поддерживаются триггерами схемы (см.
+`pfa_schema.create_search_triggers`):
+
+- fts_goals и fts_reminders индексируют названия и описания целей и
+  напоминаний; результаты ранжируются по BM25, совпадения в названии весят
+  больше, чем в описании.
+- fts_categories индексирует имена категорий пользователя (таблица
+  `categories`, см. `pfa_categories`). Найденные категории ранжируются по
+  BM25, а транзакции каждой категории читаются от новых к старым по индексу
+  (user_id, category_id, date). Поэтому время поиска не зависит от числа
+  транзакций: ранжируются десятки строк, а не все транзакции с подходящей
+  категорией.
+
+Каждое слово запроса ищется как префикс ("так" находит "Такси"), слова
+объединяются по И, регистр не учитывается. Совпадения в тексте результатов
+обрамляются маркерами `HIGHLIGHT`.
+"""
+from collections import namedtuple
+import re
+import sqlite3
+from pfa_money import BASE_CURRENCY, Money
+from pfa_schema import SEARCH_INDEXES, fill_search_indexes
+
+# Маркеры начала и конца совпадения в названиях и фрагментах.
+HIGHLIGHT = ("[", "]")
+
+# Максимальное число результатов каждого вида.
+SEARCH_LIMIT = 50
+
+# Длина фрагмента описания в словах.
+SNIPPET_TOKENS = 12
+
+KIND_LABELS = {
+    "goal": "Цель",
+    "reminder": "Напоминание",
+    "transaction": "Транзакция",
+}
+
+# Результат поиска: kind — ключ `KIND_LABELS`, title — название цели или
+# напоминания либо категория транзакции с подсветкой, snippet — фрагмент
+# описания с подсветкой (пустая строка без описания) или тип транзакции,
+# date — срок цели, дата и время напоминания или дата транзакции, amount —
+# сумма цели (в ее валюте) или транзакции (в базовой валюте) как `Money`
+# либо None, currency — код валюты суммы либо None.
+SearchHit = namedtuple("SearchHit", "kind id title snippet date amount currency")
+
+_WORD = re.compile(r"\w+")
+
+
+def match_expression(text, columns, user_id):
+    """
+    Строит выражение MATCH для FTS5 из текста, введенного пользователем.
+
+    Слова запроса берутся в кавычки, поэтому синтаксис FTS5 (операторы,
+    фильтры колонок, скобки) во вводе не интерпретируется.
+
+    Args:
+        text (str): Текст запроса.
+        columns (tuple): Колонки индекса, в которых ищутся слова.
+        user_id (int): ID пользователя.
+
+    Returns:
+        str: Выражение или None, если в запросе нет слов.
+    """
+    words = _WORD.findall(text)
+    if not words:
+        return None
+    terms = " ".join(f'"{word}"*' for word in words)
+    return f'user_id : "{int(user_id)}" AND {{{" ".join(columns)}}} : ({terms})'
+
+
+def search_goals(db, user_id, text, limit=SEARCH_LIMIT):
+    """
+    Ищет цели пользователя по названию и описанию.
+
+    Returns:
+        list: Записи `SearchHit`, лучшие совпадения первыми.
+    """
+    match = match_expression(text, ("title", "description"), user_id)
+    if match is None:
+        return []
+    rows = db.fetchall('''
+        SELECT g.id, highlight(fts_goals, 0, ?, ?), COALESCE(snippet(fts_goals, 1, ?, ?, '…', ?), ''),
+               g.target_date, g.target_amount, g.currency
+        FROM fts_goals JOIN goals g ON g.id = fts_goals.rowid
+        WHERE fts_goals MATCH ?
+        ORDER BY bm25(fts_goals, 10.0, 1.0, 0.0)
+        LIMIT ?
+    ''', (*HIGHLIGHT, *HIGHLIGHT, SNIPPET_TOKENS, match, limit))
+    return [SearchHit("goal", goal_id, title, snippet, target_date, Money(amount), currency)
+            for goal_id, title, snippet, target_date, amount, currency in rows]
+
+
+def search_reminders(db, user_id, text, limit=SEARCH_LIMIT):
+    """
+    Ищет напоминания пользователя по названию и описанию.
+
+    Returns:
+        list: Записи `SearchHit`, лучшие совпадения первыми.
+    """
+    match = match_expression(text, ("title", "description_reminder"), user_id)
+    if match is None:
+        return []
+    rows = db.fetchall('''
+        SELECT r.id, highlight(fts_reminders, 0, ?, ?), COALESCE(snippet(fts_reminders, 1, ?, ?, '…', ?), ''),
+               r.date, r.time
+        FROM fts_reminders JOIN reminders r ON r.id = fts_reminders.rowid
+        WHERE fts_reminders MATCH ?
+        ORDER BY bm25(fts_reminders, 10.0, 1.0, 0.0)
+        LIMIT ?
+    ''', (*HIGHLIGHT, *HIGHLIGHT, SNIPPET_TOKENS, match, limit))
+    return [SearchHit("reminder", reminder_id, title, snippet, f"{date} {time}".strip(), None, None)
+            for reminder_id, title, snippet, date, time in rows]
+
+
+def search_transactions(db, user_id, text, limit=SEARCH_LIMIT):
+    """
+    Ищет транзакции пользователя по категории.
+
+    Транзакции упорядочены по релевантности категории, внутри категории —
+    от новых к старым.
+
+    Returns:
+        list: Записи `SearchHit`.
+    """
+    match = match_expression(text, ("name",), user_id)
+    if match is None:
+        return []
+    categories = db.fetchall('''
+        SELECT c.id, highlight(fts_categories, 0, ?, ?)
+        FROM fts_categories JOIN categories c ON c.id = fts_categories.rowid
+        WHERE fts_categories MATCH ?
+        ORDER BY bm25(fts_categories, 1.0, 0.0)
+        LIMIT ?
+    ''', (*HIGHLIGHT, match, limit))
+    hits = []
+    for category_id, highlighted in categories:
+        rows = db.fetchall('''
+            SELECT id, amount, type, date
+            FROM transactions
+            WHERE user_id = ? AND category_id = ?
+            ORDER BY date DESC, id DESC
+            LIMIT ?
+        ''', (user_id, category_id, limit - len(hits)))
+        hits.extend(
+            SearchHit("transaction", transaction_id, highlighted, transaction_type, date, Money(amount), BASE_CURRENCY)
+            for transaction_id, amount, transaction_type, date in rows
+        )
+        if len(hits) >= limit:
+            break
+    return hits
+
+
+def search(db, user_id, text, limit=SEARCH_LIMIT):
+    """
+    Ищет цели, напоминания и транзакции пользователя.
+
+    Args:
+        db (Database): Подключение к базе данных.
+        user_id (int): ID пользователя.
+        text (str): Текст запроса.
+        limit (int): Максимальное число результатов каждого вида.
+
+    Returns:
+        list: Записи `SearchHit`: сначала цели, затем напоминания, затем
+        транзакции; внутри вида — по релевантности.
+    """
+    return (search_goals(db, user_id, text, limit) + search_reminders(db, user_id, text, limit)
+            + search_transactions(db, user_id, text, limit))
+
+
+def rebuild_search_index(db):
+    """
+    Перестраивает индексы FTS5 по их таблицам.
+
+    Args:
+        db (Database): Подключение к базе данных.
+
+    Returns:
+        dict: Число проиндексированных строк по имени индекса.
+    """
+    with db.transaction() as conn:
+        fill_search_indexes(conn)
+        return {index: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for index, (table, _) in SEARCH_INDEXES.items()}
+
+
+def verify_search_index(db):
+    """
+    Проверяет согласованность индексов FTS5 с их таблицами.
+
+    Args:
+        db (Database): Подключение к базе данных.
+
+    Returns:
+        list: Описания найденных расхождений (пустой список, если их нет).
+    """
+    problems = []
+    with db.transaction() as conn:
+        for index in SEARCH_INDEXES:
+            try:
+                conn.execute(f"INSERT INTO {index} ({index}, rank) VALUES ('integrity-check', 1)")
+            except sqlite3.DatabaseError as error:
+                problems.append(f"{index}: индекс не совпадает с таблицей ({error})")
+    return problems
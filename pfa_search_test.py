@@ -0,0 +1,151 @@
+from datetime import datetime
+import pytest
+from pfa_cli import main
+from pfa_db import Database
+from pfa_money import Money
+from pfa_schema import DEFAULT_CATEGORIES, MIGRATIONS, migrate
+from pfa_search import (match_expression, rebuild_search_index, search, search_goals, search_transactions,
+                        verify_search_index)
+from pfa_service import FinanceService
+
+
+@pytest.fixture
+def service(db):
+    return FinanceService(db, clock=lambda: datetime(2025, 3, 10, 12, 0))
+
+
+@pytest.fixture
+def user(service):
+    return service.register("Pavel", "password123")
+
+
+def titles(hits):
+    return [(hit.kind, hit.title) for hit in hits]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("такси", 'user_id : "1" AND {name} : ("такси"*)'),
+    ("  Такси,  аэропорт! ", 'user_id : "1" AND {name} : ("Такси"* "аэропорт"*)'),
+    ('" OR user_id : 2 NOT (', 'user_id : "1" AND {name} : ("OR"* "user_id"* "2"* "NOT"*)'),
+    ("", None),
+    ("?!", None),
+])
+def test_match_expression_quotes_user_input(text, expected):
+    assert match_expression(text, ("name",), 1) == expected
+
+
+def test_search_ranks_and_highlights(service, user, db):
+    service.add_goal(user.id, "Отпуск", 1000, "2030-01-01", "Море, отель и такси из аэропорта")
+    service.add_goal(user.id, "Такси на свадьбу", 300, "2030-01-01")
+    service.add_reminder(user.id, "Оплатить такси", "2030-01-01", "10:00", "Счет за март")
+    for day in range(1, 4):
+        service.add_transaction(user.id, "Такси", 100 * day, "Расход", date=datetime(2025, 3, day))
+    service.add_transaction(user.id, "Такси до аэропорта", 900, "Расход", date=datetime(2025, 3, 5))
+    service.add_transaction(user.id, "Продукты", 50, "Расход")
+
+    hits = search(db, user.id, "такс")
+    assert titles(hits) == [
+        ("goal", "[Такси] на свадьбу"),
+        ("goal", "Отпуск"),
+        ("reminder", "Оплатить [такси]"),
+        ("transaction", "[Такси]"), ("transaction", "[Такси]"), ("transaction", "[Такси]"),
+        ("transaction", "[Такси] до аэропорта"),
+    ]
+    assert hits[1].snippet == "Море, отель и [такси] из аэропорта"
+    assert hits[0].snippet == ""
+    assert [hit.amount for hit in hits[3:6]] == [Money(30000), Money(20000), Money(10000)]
+    assert hits[3].snippet == "Расход" and hits[3].date == "2025-03-03 00:00:00"
+
+    assert titles(search(db, user.id, "такси аэроп")) == [
+        ("goal", "Отпуск"), ("transaction", "[Такси] до [аэропорта]")]
+    assert len(search_transactions(db, user.id, "такси", limit=2)) == 2
+    assert search(db, user.id, "велосипед") == []
+    assert search(db, user.id, "   ") == []
+
+
+def test_goal_hits_keep_goal_currency(service, user, db, tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text("date,currency,rate\n2025-01-01,USD,90\n", encoding="utf-8")
+    service.import_rates(str(path))
+    service.add_goal(user.id, "Ноутбук", 1000, "2030-01-01", currency="USD")
+    service.add_transaction(user.id, "Ноутбук", 50, "Расход")
+    assert [(hit.kind, hit.amount, hit.currency) for hit in search(db, user.id, "ноутбук")] == [
+        ("goal", Money(100000), "USD"), ("transaction", Money(5000), "RUB")]
+
+
+def test_users_see_only_their_results(service, user, db):
+    other = service.register("Maria", "password123")
+    service.add_transaction(other.id, "Такси", 100, "Расход")
+    service.add_goal(other.id, "Такси", 100, "2030-01-01")
+    assert search(db, user.id, "такси") == []
+    assert len(search(db, other.id, "такси")) == 2
+
+
+def test_triggers_keep_index_in_sync(service, user, db):
+    goal_id = service.add_goal(user.id, "Велосипед", 1000, "2030-01-01")
+    first = service.add_transaction(user.id, "Такси", 100, "Расход").id
+    second = service.add_transaction(user.id, "Такси", 100, "Расход").id
+
+    db.execute("UPDATE goals SET title = 'Самокат' WHERE id = ?", (goal_id,))
+    service.add_transaction(user.id, "Зарплата", 500, "Доход")  # меняет current_amount цели
+    assert search_goals(db, user.id, "велосипед") == []
+    assert titles(search_goals(db, user.id, "самокат")) == [("goal", "[Самокат]")]
+
+    car_sharing = service.add_category(user.id, "Каршеринг")
+    db.execute("UPDATE transactions SET category_id = ? WHERE id = ?", (car_sharing, first))
+    assert [hit.id for hit in search_transactions(db, user.id, "такси")] == [second]
+    db.execute("DELETE FROM transactions WHERE id = ?", (second,))
+    assert search_transactions(db, user.id, "такси") == []
+    service.rename_category(user.id, car_sharing, "Аренда авто")
+    assert search_transactions(db, user.id, "каршеринг") == []
+    assert titles(search_transactions(db, user.id, "аренда")) == [("transaction", "[Аренда] авто")]
+
+    service.delete_goal(user.id, goal_id)
+    assert search_goals(db, user.id, "самокат") == []
+    assert verify_search_index(db) == []
+
+
+def test_verify_and_rebuild(service, user, db):
+    service.add_transaction(user.id, "Такси", 100, "Расход")
+    service.add_goal(user.id, "Велосипед", 1000, "2030-01-01")
+    db.execute("INSERT INTO fts_goals (fts_goals) VALUES ('delete-all')")
+
+    problems = verify_search_index(db)
+    assert len(problems) == 1
+    assert problems[0].startswith("fts_goals")
+    assert main(["--db", db.path, "search", "verify"]) == 1
+    assert main(["--db", db.path, "search", "rebuild"]) == 0
+    assert main(["--db", db.path, "search", "verify"]) == 0
+    assert rebuild_search_index(db) == {"fts_categories": len(DEFAULT_CATEGORIES), "fts_goals": 1, "fts_reminders": 0}
+    assert titles(search(db, user.id, "вело")) == [("goal", "[Велосипед]")]
+
+
+def test_migration_indexes_existing_rows(tmp_path):
+    db = Database(str(tmp_path / "legacy.db"))
+    with db.transaction() as conn:
+        for step in MIGRATIONS[:8]:
+            step(conn)
+        conn.execute("PRAGMA user_version = 8")
+        conn.executemany(
+            "INSERT INTO transactions (user_id, category, amount, date, type) VALUES (1, ?, 100, ?, 'Расход')",
+            [("Такси", "2025-01-01 10:00:00"), ("Такси", "2025-01-02 10:00:00"), ("Продукты", "2025-01-03 10:00:00")],
+        )
+        conn.execute('''
+            INSERT INTO reminders (user_id, title, date, time, description_reminder, due_at, status)
+            VALUES (1, 'Продлить страховку', '2030-01-01', '10:00', '', 0, 'active')
+        ''')
+
+    migrate(db)
+
+    assert [hit.date for hit in search(db, 1, "такси")] == ["2025-01-02 10:00:00", "2025-01-01 10:00:00"]
+    assert titles(search(db, 1, "страх")) == [("reminder", "Продлить [страховку]")]
+    assert verify_search_index(db) == []
+    db.close()
+
+
+def test_transactions_of_category_use_index(db):
+    plan = " ".join(row[3] for row in db.fetchall(
+        "EXPLAIN QUERY PLAN SELECT id, amount, type, date FROM transactions "
+        "WHERE user_id = ? AND category_id = ? ORDER BY date DESC, id DESC LIMIT 50", (1, 1)))
+    assert "INDEX idx_transactions_user_category_date" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,143 @@
+"""
+Генератор синтетических данных для замеров производительности.
+
+Заполняет базу данных пользователями, транзакциями, целями и напоминаниями
+(до миллионов строк). Генерация детерминирована: одинаковые параметры и
+`seed` дают одинаковые строки. Строки создаются потоково и вставляются
+пакетами по `batch_size` в отдельных транзакциях, поэтому память не зависит
+от объема данных. Суммы генерируются сразу в копейках, категории транзакций
+ссылаются на категории пользователя по ID. Итоговые балансы и версии данных
+обновляются триггерами схемы, как при обычной работе приложения.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+import random
+from pfa_categories import ensure_category
+from pfa_service import convert_reminder_due
+
+INCOME_CATEGORIES = ("Зарплата", "Переводы", "Инвестиции")
+EXPENSE_CATEGORIES = ("Продукты", "Одежда", "Такси")
+
+# Доля доходов среди сгенерированных транзакций.
+INCOME_SHARE = 0.2
+
+SEED_PASSWORD = "password123"
+
+BATCH_SIZE = 10000
+
+SeedReport = namedtuple("SeedReport", "user_ids transactions goals reminders")
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(db, sql, rows, batch_size):
+    count = 0
+    for batch in _batches(rows, batch_size):
+        with db.transaction() as conn:
+            conn.executemany(sql, batch)
+        count += len(batch)
+    return count
+
+
+def _transactions(rnd, user_ids, count, now, days, category_ids):
+    # Транзакции идут в хронологическом порядке со случайными интервалами, как
+    # при обычной работе приложения: вставка дописывает индексы по дате в конец.
+    step = days * 86400 / max(count, 1)
+    moment = now - timedelta(days=days)
+    for _ in range(count):
+        moment += timedelta(seconds=int(rnd.expovariate(1 / step)) if step >= 1 else 0)
+        moment = min(moment, now)
+        if rnd.random() < INCOME_SHARE:
+            user_id = rnd.choice(user_ids)
+            yield (user_id, category_ids[user_id, rnd.choice(INCOME_CATEGORIES)], rnd.randint(1000_00, 100000_00),
+                   moment.isoformat(" "), "Доход")
+        else:
+            user_id = rnd.choice(user_ids)
+            yield (user_id, category_ids[user_id, rnd.choice(EXPENSE_CATEGORIES)], rnd.randint(50_00, 5000_00),
+                   moment.isoformat(" "), "Расход")
+
+
+def _goals(rnd, user_ids, per_user, now):
+    for user_id in user_ids:
+        for number in range(per_user):
+            target_date = now + timedelta(days=rnd.randint(30, 730))
+            yield (user_id, f"Цель {number + 1}", rnd.randint(10000_00, 500000_00), 0,
+                   now.strftime("%Y-%m-%d"), target_date.strftime("%Y-%m-%d"), rnd.randint(1, 3))
+
+
+def _reminders(rnd, user_ids, per_user, now):
+    for user_id in user_ids:
+        for number in range(per_user):
+            # Часть напоминаний уже просрочена: их переводит в "expired" планировщик.
+            due = now + timedelta(minutes=rnd.randint(-30 * 1440, 180 * 1440))
+            date, time, due_at, status = convert_reminder_due(due.strftime("%Y-%m-%d"), due.strftime("%H:%M"))
+            yield user_id, f"Напоминание {number + 1}", date, time, "", due_at, status
+
+
+def seed(db, users=10, transactions=10000, goals=5, reminders=5, seed=42, now=None, days=3 * 365,
+         login_prefix="user", batch_size=BATCH_SIZE):
+    """
+    Заполняет базу данных синтетическими данными.
+
+    Транзакции распределяются между созданными пользователями случайно и
+    равномерно, их даты идут по возрастанию в последних `days` днях до `now`.
+
+    Args:
+        db (Database): Подключение к базе данных с актуальной схемой.
+        users (int): Число новых пользователей (логины `login_prefix` + номер,
+            пароль `SEED_PASSWORD`).
+        transactions (int): Общее число транзакций.
+        goals (int): Число целей на пользователя.
+        reminders (int): Число напоминаний на пользователя.
+        seed (int): Начальное значение генератора случайных чисел.
+        now (datetime): Точка отсчета дат; по умолчанию текущее время.
+        days (int): Глубина истории транзакций в днях.
+        login_prefix (str): Префикс логинов.
+        batch_size (int): Строк в одной транзакции записи.
+
+    Returns:
+        SeedReport: ID созданных пользователей и число вставленных строк.
+
+    Raises:
+        ValueError: Если нужно создать транзакции, цели или напоминания без пользователей.
+        sqlite3.IntegrityError: Если логин уже занят.
+    """
+    if users < 1 and (transactions or goals or reminders):
+        raise ValueError("Для генерации данных нужен хотя бы один пользователь")
+    rnd = random.Random(seed)
+    now = (now or datetime.now()).replace(microsecond=0)
+
+    with db.transaction() as conn:
+        user_ids = [
+            conn.execute("INSERT INTO users (login, password) VALUES (?, ?)",
+                         (f"{login_prefix}{number}", SEED_PASSWORD)).lastrowid
+            for number in range(1, users + 1)
+        ]
+        category_ids = {
+            (user_id, name): ensure_category(conn, user_id, name, transaction_type)
+            for user_id in user_ids
+            for names, transaction_type in ((INCOME_CATEGORIES, "Доход"), (EXPENSE_CATEGORIES, "Расход"))
+            for name in names
+        }
+
+    transaction_count = _insert(db, '''
+        INSERT INTO transactions (user_id, category_id, amount, date, type) VALUES (?, ?, ?, ?, ?)
+    ''', _transactions(rnd, user_ids, transactions, now, days, category_ids), batch_size)
+    goal_count = _insert(db, '''
+        INSERT INTO goals (user_id, title, target_amount, current_amount, creation_date, target_date, priority)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', _goals(rnd, user_ids, goals, now), batch_size)
+    reminder_count = _insert(db, '''
+        INSERT INTO reminders (user_id, title, date, time, description_reminder, due_at, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', _reminders(rnd, user_ids, reminders, now), batch_size)
+    return SeedReport(user_ids, transaction_count, goal_count, reminder_count)
@@ -0,0 +1,54 @@
+from datetime import datetime
+import pytest
+from pfa_balances import verify_balances
+from pfa_cli import main
+from pfa_db import Database
+from pfa_schema import migrate
+from pfa_seed import seed
+
+NOW = datetime(2025, 3, 10, 12, 0)
+
+
+def dump(db):
+    return [
+        db.fetchall("SELECT login FROM users ORDER BY id"),
+        db.fetchall("SELECT t.user_id, c.name, t.amount, t.date, t.type "
+                    "FROM transactions t JOIN categories c ON c.id = t.category_id ORDER BY t.id"),
+        db.fetchall("SELECT user_id, title, target_amount, target_date, priority FROM goals ORDER BY id"),
+        db.fetchall("SELECT user_id, date, time, due_at, status FROM reminders ORDER BY id"),
+    ]
+
+
+def test_seed_counts_and_totals(db):
+    report = seed(db, users=3, transactions=1000, goals=2, reminders=4, now=NOW, batch_size=64)
+
+    assert len(report.user_ids) == 3
+    assert (report.transactions, report.goals, report.reminders) == (1000, 6, 12)
+    assert db.fetchone("SELECT COUNT(*) FROM transactions")[0] == 1000
+    assert db.fetchone("SELECT MAX(date) <= ? FROM transactions", (NOW.strftime("%Y-%m-%d %H:%M:%S"),))[0]
+    assert db.fetchone("SELECT COUNT(*) FROM reminders WHERE status = 'active' AND due_at IS NOT NULL")[0] == 12
+    assert verify_balances(db) == []
+
+
+def test_seed_is_deterministic(tmp_path):
+    dumps = []
+    for name in ("a.db", "b.db"):
+        db = Database(str(tmp_path / name))
+        migrate(db)
+        seed(db, users=2, transactions=300, goals=3, reminders=3, seed=7, now=NOW)
+        dumps.append(dump(db))
+        db.close()
+    assert dumps[0] == dumps[1]
+
+
+def test_seed_requires_users(db):
+    with pytest.raises(ValueError):
+        seed(db, users=0, transactions=10)
+
+
+def test_cli_seed(tmp_path, capsys):
+    path = str(tmp_path / "bench.db")
+    args = ["--db", path, "seed", "--users", "2", "--transactions", "50", "--goals", "1", "--reminders", "1"]
+    assert main(args) == 0
+    assert "транзакций: 50" in capsys.readouterr().out
+    assert main(args) == 2
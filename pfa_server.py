@@ -0,0 +1,591 @@
+"""
+HTTP API "Финансового помощника" для доступа из локальной сети.
+
+Сервер на `http.server` открывает операции `FinanceService` (транзакции,
+категории, баланс, цели, повторяющиеся транзакции, валюты, напоминания) как
+JSON-эндпоинты:
+
+    POST   /api/register            {"login", "password"}
+    POST   /api/login               {"login", "password"} -> {"token", "user"}
+    POST   /api/logout
+    GET    /api/balance?currency=USD
+    GET    /api/totals?type=Расход&currency=USD
+    GET    /api/transactions?limit=50&sort=date&order=desc&after_id=...&after_date=...
+                             фильтры: date_from, date_to, type, category, min_amount, max_amount
+    POST   /api/transactions        {"category", "amount", "type", "date"?, "currency"?}
+    GET    /api/categories?type=Расход
+    POST   /api/categories          {"name", "parent_id"?, "type"?}
+    PATCH  /api/categories/<id>     {"name"?, "parent_id"?}
+    GET    /api/goals?currency=USD
+    POST   /api/goals               {"title", "target_amount", "target_date", "priority"?, "description"?,
+                                     "currency"?}
+    DELETE /api/goals/<id>
+    GET    /api/recurring
+    POST   /api/recurring           {"category", "amount", "type", "frequency", "start_date", "end_date"?,
+                                     "interval"?, "currency"?}
+    DELETE /api/recurring/<id>
+    GET    /api/currencies          -> {"currencies", "reporting"}
+    POST   /api/currencies          {"reporting"}
+    GET    /api/reminders
+    POST   /api/reminders           {"title", "date", "time", "description"?}
+    DELETE /api/reminders/<id>
+    GET    /api/search?q=такси&limit=20
+
+Суммы итогов и целей возвращаются в валюте отчетов пользователя, если
+параметр currency не задан; суммы транзакций в истории — в базовой валюте.
+Результаты поиска содержат сумму вместе с ее валютой (поле currency).
+
+Пароль проверяется один раз при входе; дальше запросы передают токен сессии
+в заголовке `Authorization: Bearer <токен>`. Запросы обрабатываются пулом из
+`WORKERS` потоков: у каждого потока свое долгоживущее соединение `Database`,
+поэтому чтения в режиме WAL идут параллельно, а каждый изменяющий запрос
+выполняется целиком в одной транзакции `Database.transaction()`, которая
+сериализует писателей. Соединение, по которому клиент молчит дольше
+`REQUEST_TIMEOUT` секунд, закрывается, поэтому простаивающие клиенты не
+занимают потоки пула.
+
+Запуск:
+    python pfa_cli.py serve --host 0.0.0.0 --port 8765
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+import json
+import re
+import secrets
+import threading
+import time
+import traceback
+from pfa_money import BASE_CURRENCY, Money
+from pfa_search import SEARCH_LIMIT
+from pfa_service import (
+    AuthenticationError, ConflictError, FinanceService, NotFoundError, ServiceError, Transaction,
+    validate_history_filter,
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Число потоков, обрабатывающих запросы (и открытых соединений с базой).
+WORKERS = 16
+
+# Сколько секунд ждать данных от клиента: соединение, по которому ничего не
+# приходит, закрывается и не занимает поток пула.
+REQUEST_TIMEOUT = 10
+
+# Время жизни сессии без запросов, секунды.
+SESSION_TTL = 12 * 3600
+
+# Максимальный размер тела запроса, байты.
+MAX_BODY_SIZE = 64 * 1024
+
+MAX_PAGE_SIZE = 1000
+
+_ERROR_STATUSES = (
+    (AuthenticationError, 401),
+    (NotFoundError, 404),
+    (ConflictError, 409),
+    (ServiceError, 400),
+)
+
+
+class ApiError(Exception):
+    """
+    Ошибка запроса с HTTP-статусом.
+
+    Атрибуты:
+        status (int): HTTP-статус ответа.
+        message (str): Сообщение для клиента.
+        field (str): Имя поля, к которому относится ошибка, или None.
+    """
+    def __init__(self, status, message, field=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.field = field
+
+
+class SessionStore:
+    """
+    Сессии пользователей по случайным токенам.
+
+    Сессия продлевается при каждом обращении и удаляется после `ttl` секунд
+    без запросов.
+    """
+    def __init__(self, ttl=SESSION_TTL, clock=time.monotonic):
+        """
+        Args:
+            ttl (float): Время жизни сессии без запросов, секунды.
+            clock (callable): Источник монотонного времени.
+        """
+        self.ttl = ttl
+        self.clock = clock
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, user):
+        """
+        Открывает сессию.
+
+        Args:
+            user (User): Вошедший пользователь.
+
+        Returns:
+            str: Токен сессии.
+        """
+        token = secrets.token_urlsafe(32)
+        now = self.clock()
+        with self._lock:
+            self._sessions[token] = (user, now + self.ttl)
+            for key in [key for key, (_, expires) in self._sessions.items() if expires <= now]:
+                del self._sessions[key]
+        return token
+
+    def get(self, token):
+        """
+        Returns:
+            User: Пользователь сессии или None, если токен неизвестен или истек.
+        """
+        now = self.clock()
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            if session[1] <= now:
+                del self._sessions[token]
+                return None
+            self._sessions[token] = (session[0], now + self.ttl)
+            return session[0]
+
+    def delete(self, token):
+        """
+        Закрывает сессию.
+        """
+        with self._lock:
+            self._sessions.pop(token, None)
+
+
+def to_json(value):
+    """
+    Приводит ответ к типам JSON: записи-namedtuple становятся объектами, даты — строками ISO,
+    суммы `Money` — строками в рублях ("1234.50"), чтобы клиент не терял копейки.
+    """
+    if isinstance(value, Money):
+        return str(value)
+    if hasattr(value, "_asdict"):
+        return {key: to_json(item) for key, item in value._asdict().items()}
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _positive_int(value, field):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"Поле {field} должно быть целым числом.", field) from None
+    if number < 1:
+        raise ApiError(400, f"Поле {field} должно быть больше нуля.", field)
+    return number
+
+
+def _parent_id(body):
+    parent_id = body.get("parent_id")
+    return _positive_int(parent_id, "parent_id") if parent_id is not None else None
+
+
+def _parse_money(value, field):
+    try:
+        return Money.parse(value)
+    except ValueError:
+        raise ApiError(400, f"Поле {field} должно быть суммой.", field) from None
+
+
+def _parse_datetime(value, field):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"Поле {field} должно быть датой ISO 8601.", field) from None
+
+
+class FinanceApi:
+    """
+    Обработчики эндпоинтов поверх `FinanceService`.
+
+    Каждый обработчик получает пользователя сессии (или None для открытых
+    эндпоинтов), параметры строки запроса, тело JSON и параметры пути и
+    возвращает пару (HTTP-статус, данные ответа).
+
+    Атрибуты:
+        service (FinanceService): Сервисный слой.
+        sessions (SessionStore): Сессии пользователей.
+    """
+    def __init__(self, service, sessions=None):
+        """
+        Args:
+            service (FinanceService): Сервисный слой.
+            sessions (SessionStore): Сессии; по умолчанию новое хранилище.
+        """
+        self.service = service
+        self.sessions = sessions if sessions is not None else SessionStore()
+        # (метод, шаблон пути, обработчик, нужна ли сессия, изменяет ли данные)
+        self.routes = [
+            ("POST", r"/api/register", self.register, False, True),
+            ("POST", r"/api/login", self.login, False, False),
+            ("POST", r"/api/logout", self.logout, True, False),
+            ("GET", r"/api/balance", self.balance, True, False),
+            ("GET", r"/api/totals", self.totals, True, False),
+            ("GET", r"/api/transactions", self.list_transactions, True, False),
+            ("POST", r"/api/transactions", self.add_transaction, True, True),
+            ("GET", r"/api/categories", self.list_categories, True, False),
+            ("POST", r"/api/categories", self.add_category, True, True),
+            ("PATCH", r"/api/categories/(\d+)", self.update_category, True, True),
+            ("GET", r"/api/goals", self.list_goals, True, False),
+            ("POST", r"/api/goals", self.add_goal, True, True),
+            ("DELETE", r"/api/goals/(\d+)", self.delete_goal, True, True),
+            ("GET", r"/api/recurring", self.list_recurring_rules, True, False),
+            ("POST", r"/api/recurring", self.add_recurring_rule, True, True),
+            ("DELETE", r"/api/recurring/(\d+)", self.delete_recurring_rule, True, True),
+            ("GET", r"/api/currencies", self.currencies, True, False),
+            ("POST", r"/api/currencies", self.set_reporting_currency, True, True),
+            ("GET", r"/api/reminders", self.list_reminders, True, False),
+            ("POST", r"/api/reminders", self.add_reminder, True, True),
+            ("DELETE", r"/api/reminders/(\d+)", self.delete_reminder, True, True),
+            ("GET", r"/api/search", self.search, True, False),
+        ]
+        self.routes = [(method, re.compile(pattern + r"\Z"), *rest) for method, pattern, *rest in self.routes]
+
+    def dispatch(self, method, path, query, body, token):
+        """
+        Выполняет запрос.
+
+        Args:
+            method (str): HTTP-метод.
+            path (str): Путь без строки запроса.
+            query (dict): Параметры строки запроса (последнее значение каждого).
+            body (dict): Тело запроса.
+            token (str): Токен сессии или None.
+
+        Returns:
+            tuple: HTTP-статус и данные ответа.
+
+        Raises:
+            ApiError: Если запрос некорректен или не авторизован.
+            ServiceError: Если сервисный слой отклонил запрос.
+        """
+        allowed = False
+        for route_method, pattern, handler, private, writes in self.routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            user = None
+            if private:
+                user = self.sessions.get(token) if token else None
+                if user is None:
+                    raise ApiError(401, "Требуется вход: передайте токен сессии.")
+            if not writes:
+                return handler(user, query, body, *match.groups(), token=token)
+            with self.service.db.transaction():
+                return handler(user, query, body, *match.groups(), token=token)
+        if allowed:
+            raise ApiError(405, "Метод не поддерживается.")
+        raise ApiError(404, "Неизвестный адрес.")
+
+    # Пользователи
+
+    def register(self, user, query, body, token=None):
+        created = self.service.register(str(body.get("login", "")), str(body.get("password", "")))
+        return 201, created
+
+    def login(self, user, query, body, token=None):
+        user = self.service.login(str(body.get("login", "")), str(body.get("password", "")))
+        return 200, {"token": self.sessions.create(user), "user": user}
+
+    def logout(self, user, query, body, token=None):
+        self.sessions.delete(token)
+        return 200, {}
+
+    # Транзакции
+
+    def balance(self, user, query, body, token=None):
+        balance = self.service.balance(user.id, query.get("currency") or None)
+        return 200, {**balance._asdict(), "current": balance.current}
+
+    def totals(self, user, query, body, token=None):
+        totals = self.service.category_totals(user.id, query.get("type", "Расход"), query.get("currency") or None)
+        return 200, [{"category": category, "amount": amount} for category, amount in totals]
+
+    def list_transactions(self, user, query, body, token=None):
+        limit = min(_positive_int(query.get("limit", 50), "limit"), MAX_PAGE_SIZE)
+        if query.get("order", "desc") not in ("asc", "desc"):
+            raise ApiError(400, "Поле order должно быть asc или desc.", "order")
+        filters = validate_history_filter(
+            query.get("date_from", ""), query.get("date_to", ""), query.get("type", ""),
+            query.get("category", ""), query.get("min_amount", ""), query.get("max_amount", ""))
+        after = None
+        if "after_id" in query:
+            amount = _parse_money(query["after_amount"], "after_amount") if "after_amount" in query else None
+            after = Transaction(_positive_int(query["after_id"], "after_id"), query.get("after_category"), amount,
+                                query.get("after_type"), query.get("after_date", ""))
+        transactions = self.service.list_transactions(
+            user.id, limit, after, filters, query.get("sort", "date"), query.get("order", "desc") == "desc")
+        result = {"transactions": transactions, "next": None}
+        if len(transactions) == limit:
+            last = transactions[-1]
+            result["next"] = {"after_id": last.id, "after_date": last.date, "after_category": last.category,
+                              "after_type": last.type, "after_amount": str(last.amount)}
+        return 200, result
+
+    def add_transaction(self, user, query, body, token=None):
+        moment = _parse_datetime(body["date"], "date") if body.get("date") else None
+        result = self.service.add_transaction(
+            user.id, str(body.get("category", "")), body.get("amount", ""), body.get("type"), moment,
+            body.get("currency") or BASE_CURRENCY)
+        completed = [{"id": goal.id, "title": goal.title} for goal in result.completed_goals]
+        return 201, {"id": result.id, "completed_goals": completed}
+
+    # Категории
+
+    def list_categories(self, user, query, body, token=None):
+        return 200, self.service.list_categories(user.id, query.get("type") or None)
+
+    def add_category(self, user, query, body, token=None):
+        category_id = self.service.add_category(
+            user.id, str(body.get("name", "")), _parent_id(body), body.get("type"))
+        return 201, {"id": category_id}
+
+    def update_category(self, user, query, body, category_id, token=None):
+        if "name" in body:
+            self.service.rename_category(user.id, int(category_id), str(body["name"]))
+        if "parent_id" in body:
+            self.service.move_category(user.id, int(category_id), _parent_id(body))
+        return 200, {}
+
+    # Цели
+
+    def list_goals(self, user, query, body, token=None):
+        return 200, self.service.list_goals(user.id, query.get("currency") or None)
+
+    def add_goal(self, user, query, body, token=None):
+        goal_id = self.service.add_goal(
+            user.id, str(body.get("title", "")), body.get("target_amount", ""), str(body.get("target_date", "")),
+            body.get("description"), body.get("priority", 1), body.get("currency") or BASE_CURRENCY)
+        return 201, {"id": goal_id}
+
+    def delete_goal(self, user, query, body, goal_id, token=None):
+        self.service.delete_goal(user.id, int(goal_id))
+        return 200, {}
+
+    # Повторяющиеся транзакции
+
+    def list_recurring_rules(self, user, query, body, token=None):
+        return 200, self.service.list_recurring_rules(user.id)
+
+    def add_recurring_rule(self, user, query, body, token=None):
+        rule_id = self.service.add_recurring_rule(
+            user.id, str(body.get("category", "")), body.get("amount", ""), body.get("type"),
+            body.get("frequency"), str(body.get("start_date", "")), str(body.get("end_date") or ""),
+            body.get("interval", 1), body.get("currency") or BASE_CURRENCY)
+        # Срабатывания с прошедшими датами создаются сразу.
+        report = self.service.generate_recurring(user.id)
+        completed = [{"id": goal.id, "title": goal.title} for goal in report.completed_goals]
+        return 201, {"id": rule_id, "created": report.created, "completed_goals": completed}
+
+    def delete_recurring_rule(self, user, query, body, rule_id, token=None):
+        self.service.delete_recurring_rule(user.id, int(rule_id))
+        return 200, {}
+
+    # Валюты
+
+    def currencies(self, user, query, body, token=None):
+        return 200, {"currencies": self.service.currencies(), "reporting": self.service.reporting_currency(user.id)}
+
+    def set_reporting_currency(self, user, query, body, token=None):
+        self.service.set_reporting_currency(user.id, body.get("reporting"))
+        return 200, {}
+
+    # Напоминания
+
+    def list_reminders(self, user, query, body, token=None):
+        return 200, self.service.list_reminders(user.id)
+
+    def add_reminder(self, user, query, body, token=None):
+        reminder_id = self.service.add_reminder(
+            user.id, str(body.get("title", "")), str(body.get("date", "")), str(body.get("time", "")),
+            str(body.get("description", "")))
+        return 201, {"id": reminder_id}
+
+    def delete_reminder(self, user, query, body, reminder_id, token=None):
+        self.service.delete_reminder(user.id, int(reminder_id))
+        return 200, {}
+
+    # Поиск
+
+    def search(self, user, query, body, token=None):
+        limit = min(_positive_int(query.get("limit", SEARCH_LIMIT), "limit"), SEARCH_LIMIT)
+        return 200, self.service.search(user.id, query.get("q", ""), limit)
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """
+    Разбирает HTTP-запрос, передает его `FinanceApi` и отправляет ответ JSON.
+
+    `StreamRequestHandler` задает сокету тайм-аут `timeout`: медленный или
+    молчащий клиент получает разрыв соединения, а поток возвращается в пул.
+    """
+    server_version = "PFA/1.0"
+    timeout = REQUEST_TIMEOUT
+
+    def do_GET(self):
+        self.handle_api("GET")
+
+    def do_POST(self):
+        self.handle_api("POST")
+
+    def do_PATCH(self):
+        self.handle_api("PATCH")
+
+    def do_DELETE(self):
+        self.handle_api("DELETE")
+
+    def handle_api(self, method):
+        """
+        Выполняет запрос и отправляет ответ; ошибки превращаются в JSON
+        `{"error": ..., "field": ...}` с соответствующим HTTP-статусом;
+        непредвиденные ошибки записываются в журнал и возвращаются как 500.
+        """
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            status, payload = self.server.api.dispatch(method, url.path, query, self.read_body(), self.token())
+        except TimeoutError:
+            # Клиент не прислал тело за `timeout` секунд: соединение закрывается без ответа.
+            self.log_error("Тайм-аут чтения тела запроса %s %s", method, url.path)
+            self.close_connection = True
+            return
+        except ApiError as e:
+            status, payload = e.status, {"error": e.message, "field": e.field}
+        except ServiceError as e:
+            status = next(code for error_type, code in _ERROR_STATUSES if isinstance(e, error_type))
+            payload = {"error": e.message, "field": e.field}
+        except Exception:
+            self.log_error("Ошибка обработки %s %s:\n%s", method, url.path, traceback.format_exc())
+            status, payload = 500, {"error": "Внутренняя ошибка сервера.", "field": None}
+        self.send_json(status, payload)
+
+    def token(self):
+        """
+        Returns:
+            str: Токен из заголовка `Authorization: Bearer`, или None.
+        """
+        scheme, _, token = self.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer":
+            return None
+        return token.strip() or None
+
+    def read_body(self):
+        """
+        Returns:
+            dict: Тело запроса JSON (пустой словарь, если тела нет).
+
+        Raises:
+            ApiError: Если тело слишком большое или не является объектом JSON.
+        """
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise ApiError(400, "Некорректный заголовок Content-Length.") from None
+        if length > MAX_BODY_SIZE:
+            raise ApiError(413, "Слишком большой запрос.")
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            raise ApiError(400, "Тело запроса должно быть JSON.") from None
+        if not isinstance(body, dict):
+            raise ApiError(400, "Тело запроса должно быть объектом JSON.")
+        return body
+
+    def send_json(self, status, payload):
+        data = json.dumps(to_json(payload), ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def log_error(self, format, *args):
+        # Ошибки пишутся в журнал и без подробного режима.
+        super().log_message(format, *args)
+
+
+class ApiServer(HTTPServer):
+    """
+    HTTP-сервер, обрабатывающий запросы пулом потоков фиксированного размера.
+
+    В отличие от `ThreadingHTTPServer`, потоки не создаются на каждый запрос,
+    поэтому соединения `Database` (по одному на поток) переиспользуются.
+
+    Атрибуты:
+        api (FinanceApi): Обработчики эндпоинтов.
+        verbose (bool): Писать ли журнал запросов в stderr.
+    """
+    allow_reuse_address = True
+
+    def __init__(self, address, api, workers=WORKERS, verbose=False):
+        """
+        Args:
+            address (tuple): Хост и порт (порт 0 — любой свободный).
+            api (FinanceApi): Обработчики эндпоинтов.
+            workers (int): Число потоков обработки.
+            verbose (bool): Писать ли журнал запросов.
+        """
+        super().__init__(address, ApiRequestHandler)
+        self.api = api
+        self.verbose = verbose
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
+def make_server(db, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=WORKERS, verbose=False):
+    """
+    Создает сервер API поверх базы данных.
+
+    Args:
+        db (Database): Подключение к базе данных с актуальной схемой.
+        host (str): Адрес для прослушивания.
+        port (int): Порт (0 — любой свободный).
+        workers (int): Число потоков обработки.
+        verbose (bool): Писать ли журнал запросов.
+
+    Returns:
+        ApiServer: Сервер; запускается `serve_forever()`.
+    """
+    return ApiServer((host, port), FinanceApi(FinanceService(db)), workers, verbose)
@@ -0,0 +1,248 @@
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import json
+import socket
+import threading
+import time
+from urllib.parse import quote, urlencode
+import pytest
+from pfa_balances import verify_balances
+from pfa_rates import import_rates
+from pfa_server import ApiRequestHandler, SessionStore, make_server
+
+
+@pytest.fixture
+def server(db):
+    server = make_server(db, port=0, workers=8)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def request(server, method, path, body=None, token=None):
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+    try:
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def login(server, name="Pavel"):
+    request(server, "POST", "/api/register", {"login": name, "password": "password123"})
+    status, payload = request(server, "POST", "/api/login", {"login": name, "password": "password123"})
+    assert status == 200
+    return payload["token"]
+
+
+def test_login_issues_token(server):
+    assert request(server, "POST", "/api/register", {"login": "Pavel", "password": "password123"})[0] == 201
+    status, payload = request(server, "POST", "/api/register", {"login": "Pavel", "password": "password123"})
+    assert (status, payload["field"]) == (409, "login")
+    assert request(server, "POST", "/api/login", {"login": "Pavel", "password": "wrong-pass"})[0] == 401
+
+    status, payload = request(server, "POST", "/api/login", {"login": "Pavel", "password": "password123"})
+    assert status == 200 and payload["user"]["login"] == "Pavel"
+    token = payload["token"]
+    assert request(server, "GET", "/api/balance", token=token)[0] == 200
+    assert request(server, "GET", "/api/balance")[0] == 401
+    assert request(server, "GET", "/api/balance", token="forged")[0] == 401
+    assert request(server, "POST", "/api/logout", token=token)[0] == 200
+    assert request(server, "GET", "/api/balance", token=token)[0] == 401
+
+
+def test_transactions_and_goals(server):
+    token = login(server)
+    status, goal = request(server, "POST", "/api/goals",
+                           {"title": "Велосипед", "target_amount": 300, "target_date": "2030-06-30"}, token)
+    assert status == 201
+    status, created = request(server, "POST", "/api/transactions",
+                              {"category": "Зарплата", "amount": 500, "type": "Доход",
+                               "date": "2025-01-10T09:00:00"}, token)
+    assert status == 201
+    assert created["completed_goals"] == [{"id": goal["id"], "title": "Велосипед"}]
+    for day in range(1, 4):
+        request(server, "POST", "/api/transactions",
+                {"category": "Такси", "amount": 10 * day, "type": "Расход", "date": f"2025-01-0{day}"}, token)
+
+    assert request(server, "GET", "/api/balance", token=token)[1] == {
+        "income": "500.00", "expense": "60.00", "count": 4, "currency": "RUB", "current": "440.00"}
+    assert request(server, "GET", f"/api/totals?type={quote('Расход')}", token=token)[1] == [
+        {"category": "Такси", "amount": "60.00"}]
+
+    status, page = request(server, "GET", "/api/transactions?limit=2", token=token)
+    assert [item["amount"] for item in page["transactions"]] == ["500.00", "30.00"]
+    cursor = page["next"]
+    status, page = request(server, "GET", f"/api/transactions?limit=2&{urlencode(cursor)}", token=token)
+    assert [item["amount"] for item in page["transactions"]] == ["20.00", "10.00"]
+
+    query = urlencode({"type": "Расход", "min_amount": "15", "sort": "amount", "order": "asc", "limit": 1})
+    status, page = request(server, "GET", f"/api/transactions?{query}", token=token)
+    assert [item["amount"] for item in page["transactions"]] == ["20.00"]
+    status, page = request(server, "GET", f"/api/transactions?{query}&{urlencode(page['next'])}", token=token)
+    assert [item["amount"] for item in page["transactions"]] == ["30.00"]
+    assert request(server, "GET", "/api/transactions?sort=id", token=token)[0] == 400
+    assert request(server, "GET", "/api/transactions?date_from=2025-13-01", token=token)[0] == 400
+
+    goals = request(server, "GET", "/api/goals", token=token)[1]
+    assert [(item["title"], item["current_amount"]) for item in goals] == [("Велосипед", "300.00")]
+    assert request(server, "DELETE", f"/api/goals/{goal['id']}", token=token)[0] == 200
+    assert request(server, "DELETE", f"/api/goals/{goal['id']}", token=token)[0] == 404
+
+
+def test_categories(server):
+    token = login(server)
+    status, cafe = request(server, "POST", "/api/categories", {"name": "Кафе", "type": "Расход"}, token)
+    assert status == 201
+    status, coffee = request(server, "POST", "/api/categories", {"name": "Кофе", "parent_id": cafe["id"]}, token)
+    assert status == 201
+    categories = request(server, "GET", f"/api/categories?type={quote('Расход')}", token=token)[1]
+    assert [(item["name"], item["depth"]) for item in categories][:3] == [("Кафе", 0), ("Кофе", 1), ("Одежда", 0)]
+
+    assert request(server, "PATCH", f"/api/categories/{coffee['id']}", {"name": "Кофейни", "parent_id": None},
+                   token)[0] == 200
+    names = [(item["name"], item["parent_id"]) for item in request(server, "GET", "/api/categories", token=token)[1]]
+    assert ("Кофейни", None) in names
+    status, payload = request(server, "POST", "/api/categories", {"name": "Кафе"}, token)
+    assert (status, payload["field"]) == (409, "name")
+    assert request(server, "PATCH", "/api/categories/999", {"name": "Бар"}, token)[0] == 404
+    status, payload = request(server, "PATCH", f"/api/categories/{cafe['id']}", {"parent_id": cafe["id"]}, token)
+    assert (status, payload["field"]) == (400, "parent_id")
+
+
+def test_recurring_rules(server):
+    token = login(server)
+    status, created = request(server, "POST", "/api/recurring",
+                              {"category": "Аренда", "amount": 100, "type": "Расход", "frequency": "monthly",
+                               "start_date": "2025-01-31", "end_date": "2025-03-31"}, token)
+    assert (status, created["created"]) == (201, 3)
+    rules = request(server, "GET", "/api/recurring", token=token)[1]
+    assert [(item["category"], item["amount"], item["next_date"]) for item in rules] == [("Аренда", "100.00", None)]
+    assert request(server, "GET", "/api/balance", token=token)[1]["expense"] == "300.00"
+    status, payload = request(server, "POST", "/api/recurring",
+                              {"category": "Аренда", "amount": 100, "type": "Расход", "frequency": "hourly",
+                               "start_date": "2025-01-31"}, token)
+    assert (status, payload["field"]) == (400, "frequency")
+    assert request(server, "DELETE", f"/api/recurring/{created['id']}", token=token)[0] == 200
+    assert request(server, "GET", "/api/recurring", token=token)[1] == []
+
+
+@pytest.mark.parametrize("path, body, field", [
+    ("/api/transactions", {"category": "Такси", "amount": "1e30", "type": "Расход"}, "amount"),
+    ("/api/transactions", {"category": "Такси", "amount": 99999999999999999, "type": "Расход"}, "amount"),
+    ("/api/goals", {"title": "Дом", "target_amount": 1e30, "target_date": "2030-01-01"}, "target_amount"),
+    ("/api/recurring", {"category": "Аренда", "amount": "1e30", "type": "Расход", "frequency": "daily",
+                        "start_date": "2025-01-01"}, "amount"),
+    ("/api/recurring", {"category": "Аренда", "amount": 100, "type": "Расход", "frequency": "daily",
+                        "start_date": "0101-01-01"}, "start_date"),
+    ("/api/recurring", {"category": "Аренда", "amount": 100, "type": "Расход", "frequency": "daily",
+                        "start_date": "10000-01-01"}, "start_date"),
+])
+def test_out_of_range_input_is_rejected(server, path, body, field):
+    token = login(server)
+    status, payload = request(server, "POST", path, body, token)
+    assert (status, payload["field"]) == (400, field)
+    assert request(server, "GET", "/api/balance", token=token)[1]["count"] == 0
+    assert request(server, "GET", "/api/recurring", token=token)[1] == []
+
+
+def test_currencies(server, db, tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text("date,currency,rate\n2025-01-01,USD,100\n", encoding="utf-8")
+    import_rates(db, str(path))
+    token = login(server)
+    assert request(server, "GET", "/api/currencies", token=token)[1] == {
+        "currencies": ["RUB", "USD"], "reporting": "RUB"}
+    request(server, "POST", "/api/goals",
+            {"title": "Ноутбук", "target_amount": 100, "target_date": "2030-06-30", "currency": "USD"}, token)
+    request(server, "POST", "/api/transactions",
+            {"category": "Зарплата", "amount": 30, "type": "Доход", "date": "2025-01-10", "currency": "USD"}, token)
+    assert request(server, "GET", "/api/balance?currency=USD", token=token)[1]["income"] == "30.00"
+
+    assert request(server, "POST", "/api/currencies", {"reporting": "USD"}, token)[0] == 200
+    assert request(server, "GET", "/api/balance", token=token)[1]["current"] == "30.00"
+    goals = request(server, "GET", "/api/goals", token=token)[1]
+    assert [(item["current_amount"], item["currency"]) for item in goals] == [("30.00", "USD")]
+    assert request(server, "GET", "/api/goals?currency=RUB", token=token)[1][0]["current_amount"] == "3000.00"
+    status, payload = request(server, "POST", "/api/currencies", {"reporting": "GBP"}, token)
+    assert (status, payload["field"]) == (400, "currency")
+
+
+def test_errors(server):
+    token = login(server)
+    status, payload = request(server, "POST", "/api/transactions",
+                              {"category": "Такси", "amount": -5, "type": "Расход"}, token)
+    assert (status, payload["field"]) == (400, "amount")
+    assert request(server, "GET", "/api/unknown", token=token)[0] == 404
+    assert request(server, "DELETE", "/api/balance", token=token)[0] == 405
+    assert request(server, "GET", "/api/transactions?limit=0", token=token)[0] == 400
+
+
+def test_users_see_only_their_data(server):
+    first, second = login(server, "Pavel"), login(server, "Maria")
+    _, reminder = request(server, "POST", "/api/reminders",
+                          {"title": "Оплатить счет", "date": "2030-01-01", "time": "10:00"}, first)
+    assert [item["title"] for item in request(server, "GET", "/api/reminders", token=first)[1]] == ["Оплатить счет"]
+    assert request(server, "GET", "/api/reminders", token=second)[1] == []
+    path = f"/api/search?{urlencode({'q': 'счет'})}"
+    assert [(hit["kind"], hit["title"]) for hit in request(server, "GET", path, token=first)[1]] == [
+        ("reminder", "Оплатить [счет]")]
+    assert request(server, "GET", path, token=second)[1] == []
+    assert request(server, "DELETE", f"/api/reminders/{reminder['id']}", token=second)[0] == 404
+
+
+def test_concurrent_writers_and_readers(server, db):
+    tokens = [login(server, f"user{number}") for number in range(4)]
+
+    def work(token):
+        for number in range(25):
+            status, _ = request(server, "POST", "/api/transactions",
+                                {"category": "Такси", "amount": 1, "type": "Расход"}, token)
+            assert status == 201
+            assert request(server, "GET", "/api/balance", token=token)[0] == 200
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(work, tokens * 2))
+    for token in tokens:
+        assert request(server, "GET", "/api/balance", token=token)[1]["count"] == 50
+    assert verify_balances(db) == []
+
+
+def test_idle_clients_do_not_block_workers(db, monkeypatch):
+    monkeypatch.setattr(ApiRequestHandler, "timeout", 0.5)
+    workers = 2
+    server = make_server(db, port=0, workers=workers)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    idle = [socket.create_connection(server.server_address[:2]) for _ in range(workers)]
+    # Заголовки получены, тело так и не приходит.
+    idle[0].sendall(b"POST /api/register HTTP/1.1\r\nContent-Length: 100\r\n\r\n")
+    try:
+        start = time.monotonic()
+        assert request(server, "POST", "/api/register", {"login": "Pavel", "password": "password123"})[0] == 201
+        assert time.monotonic() - start < 5
+    finally:
+        for sock in idle:
+            sock.close()
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_session_expires():
+    now = [0]
+    sessions = SessionStore(ttl=10, clock=lambda: now[0])
+    token = sessions.create("user")
+    now[0] = 9
+    assert sessions.get(token) == "user"
+    now[0] = 18
+    assert sessions.get(token) == "user"
+    now[0] = 29
+    assert sessions.get(token) is None
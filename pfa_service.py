@@ -0,0 +1,1072 @@
+"""
+Сервисный слой "Финансового помощника" без зависимости от Tkinter.
+
+`FinanceService` содержит бизнес-логику приложения: регистрацию и вход,
+транзакции, категории, баланс, суммы по категориям, цели, напоминания,
+валюты и поиск. Методы принимают обычные значения, возвращают кортежи-записи и при
+ошибке выбрасывают исключения `ServiceError` с текстом для пользователя и
+именем поля. Интерфейс на Tkinter только показывает результаты и ошибки, поэтому
+сервис можно вызывать из скриптов, тестов и замеров производительности.
+"""
+import re
+import sqlite3
+from collections import namedtuple
+from datetime import datetime
+from pfa_db import get_db
+from pfa_balances import read_balance
+from pfa_categories import descendants, ensure_category, list_categories
+from pfa_history import PAGE_SIZE, SORT_KEYS, HistoryFilter, TransactionPager
+from pfa_analytics import CategoryTotalsCache, data_version
+from pfa_goals import STRATEGIES, allocate_incomes, goal_strategy
+from pfa_money import BASE_CURRENCY, MAX_AMOUNT_KOPECKS, Money
+from pfa_rates import RateCache, import_rates, to_base_sql
+from pfa_recurring import FREQUENCIES, generate_due
+import pfa_rates
+import pfa_rollups
+import pfa_search
+
+TRANSACTION_TYPES = ("Доход", "Расход")
+
+MIN_LOGIN_LENGTH = 3
+MIN_PASSWORD_LENGTH = 8
+
+# Самый ранний год начала правила повторяющейся транзакции.
+MIN_RECURRING_YEAR = 1900
+
+# Статусы напоминаний (колонка reminders.status).
+REMINDER_ACTIVE = "active"
+REMINDER_EXPIRED = "expired"
+REMINDER_INVALID = "invalid"
+
+_TEXT_PATTERN = re.compile(r"^[a-zA-Zа-яА-Я0-9\s\-.,!?]+$")
+
+User = namedtuple("User", "id login")
+Transaction = namedtuple("Transaction", "id category amount type date")
+TransactionResult = namedtuple("TransactionResult", "id completed_goals")
+Goal = namedtuple("Goal", "id title target_amount current_amount creation_date target_date priority currency",
+                 defaults=(BASE_CURRENCY,))
+Reminder = namedtuple("Reminder", "id title date time description due_at status")
+RecurringRule = namedtuple("RecurringRule",
+                           "id category amount type frequency interval start_date end_date next_date currency")
+
+_REMINDER_COLUMNS = "id, title, date, time, description_reminder, due_at, status"
+
+
+class Balance(namedtuple("Balance", "income expense count currency", defaults=(BASE_CURRENCY,))):
+    """
+    Итоги пользователя: доходы и расходы (`Money` в валюте `currency`) и
+    число транзакций.
+    """
+    __slots__ = ()
+
+    @property
+    def current(self):
+        """
+        Текущий баланс (доходы минус расходы).
+        """
+        return self.income - self.expense
+
+
+class ServiceError(Exception):
+    """
+    Ошибка сервисного слоя.
+
+    Атрибуты:
+        message (str): Сообщение для пользователя.
+        field (str): Имя поля, к которому относится ошибка, или None.
+    """
+    def __init__(self, message, field=None):
+        super().__init__(message)
+        self.message = message
+        self.field = field
+
+
+class ValidationError(ServiceError, ValueError):
+    """
+    Некорректные входные данные.
+    """
+
+
+class AuthenticationError(ServiceError):
+    """
+    Неверный логин или пароль.
+    """
+
+
+class ConflictError(ServiceError):
+    """
+    Запись противоречит существующим данным (например, занятый логин).
+    """
+
+
+class NotFoundError(ServiceError):
+    """
+    Запись не найдена или принадлежит другому пользователю.
+    """
+
+
+def validate_login(login):
+    """
+    Проверяет длину логина.
+
+    Raises:
+        ValidationError: Если логин короче `MIN_LOGIN_LENGTH`.
+    """
+    if len(login) < MIN_LOGIN_LENGTH:
+        raise ValidationError(
+            f"Логин слишком короткий! Должен содержать минимум {MIN_LOGIN_LENGTH} символов.", "login")
+    return login
+
+
+def validate_password(password):
+    """
+    Проверяет длину пароля.
+
+    Raises:
+        ValidationError: Если пароль короче `MIN_PASSWORD_LENGTH`.
+    """
+    if len(password) < MIN_PASSWORD_LENGTH:
+        raise ValidationError(
+            f"Пароль слишком короткий! Должен содержать минимум {MIN_PASSWORD_LENGTH} символов.", "password")
+    return password
+
+
+def validate_amount(value, field="amount"):
+    """
+    Приводит сумму в рублях к `Money` и проверяет, что она положительна.
+
+    Args:
+        value (str | int | float | Money): Сумма (строка из поля ввода, число
+            рублей или `Money`). Доли копейки округляются.
+        field (str): Имя поля для сообщения об ошибке.
+
+    Returns:
+        Money: Сумма.
+
+    Raises:
+        ValidationError: Если сумма пуста, не является числом, меньше копейки
+            или больше `MAX_AMOUNT_KOPECKS`.
+    """
+    if isinstance(value, str) and not value.strip():
+        raise ValidationError("Сумма не может быть пустой!", field)
+    try:
+        money = Money.parse(value)
+    except ValueError:
+        raise ValidationError("Сумма должна быть числом!", field) from None
+    if money.kopecks <= 0:
+        raise ValidationError("Сумма должна быть положительным числом!", field)
+    if money.kopecks > MAX_AMOUNT_KOPECKS:
+        raise ValidationError(f"Сумма не может превышать {Money(MAX_AMOUNT_KOPECKS)}!", field)
+    return money
+
+
+def validate_transaction_type(transaction_type):
+    """
+    Raises:
+        ValidationError: Если тип не "Доход" и не "Расход".
+    """
+    if transaction_type not in TRANSACTION_TYPES:
+        raise ValidationError(f"Неизвестный тип транзакции: {transaction_type!r}", "type")
+    return transaction_type
+
+
+def validate_category_name(name):
+    """
+    Raises:
+        ValidationError: Если имя категории пустое.
+    """
+    if not name.strip():
+        raise ValidationError("Название категории не может быть пустым!", "name")
+    return name.strip()
+
+
+def validate_goal_title(title):
+    """
+    Raises:
+        ValidationError: Если название цели пустое.
+    """
+    if not title.strip():
+        raise ValidationError("Название цели не может быть пустым!", "title")
+    return title
+
+
+def validate_priority(value):
+    """
+    Приводит приоритет цели к целому числу больше нуля.
+
+    Raises:
+        ValidationError: Если приоритет не является положительным целым числом.
+    """
+    try:
+        priority = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError("Приоритет должен быть целым числом!", "priority") from None
+    if priority <= 0:
+        raise ValidationError("Приоритет должен быть больше нуля!", "priority")
+    return priority
+
+
+def validate_frequency(frequency):
+    """
+    Raises:
+        ValidationError: Если периодичность не из `pfa_recurring.FREQUENCIES`.
+    """
+    if frequency not in FREQUENCIES:
+        raise ValidationError(f"Неизвестная периодичность: {frequency!r}", "frequency")
+    return frequency
+
+
+def validate_interval(value):
+    """
+    Приводит шаг повторения к целому числу больше нуля.
+
+    Raises:
+        ValidationError: Если шаг не является положительным целым числом.
+    """
+    try:
+        interval = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError("Интервал должен быть целым числом!", "interval") from None
+    if interval <= 0:
+        raise ValidationError("Интервал должен быть больше нуля!", "interval")
+    return interval
+
+
+def validate_currency(currency, known):
+    """
+    Args:
+        currency (str): Код валюты.
+        known (tuple): Валюты с загруженными курсами (`RateCache.currencies`).
+
+    Returns:
+        str: Код валюты в верхнем регистре.
+
+    Raises:
+        ValidationError: Если код некорректен или курсов этой валюты нет.
+    """
+    try:
+        code = pfa_rates.validate_currency(currency)
+    except ValueError:
+        raise ValidationError("Некорректный код валюты!", "currency") from None
+    if code not in known:
+        raise ValidationError(f"Нет курсов валюты {code}! Загрузите файл курсов.", "currency")
+    return code
+
+
+def validate_date(value, field="date"):
+    """
+    Проверяет формат даты "ГГГГ-ММ-ДД".
+
+    Returns:
+        date: Разобранная дата.
+
+    Raises:
+        ValidationError: Если дата пуста или записана в другом формате.
+    """
+    if not value.strip():
+        raise ValidationError("Дата не может быть пустой!", field)
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValidationError("Некорректный формат даты! Используйте ГГГГ-ММ-ДД.", field) from None
+
+
+def validate_future_date(value, today, field="date"):
+    """
+    Проверяет формат даты и то, что она не раньше `today`.
+
+    Raises:
+        ValidationError: Если дата некорректна или уже прошла.
+    """
+    date = validate_date(value, field)
+    if date < today:
+        raise ValidationError("Дата должна быть больше указанной", field)
+    return date
+
+
+def validate_time(value, field="time"):
+    """
+    Проверяет формат времени "ЧЧ:ММ".
+
+    Raises:
+        ValidationError: Если время записано в другом формате.
+    """
+    try:
+        datetime.strptime(value, "%H:%M")
+    except ValueError:
+        raise ValidationError("Некорректный формат времени! Используйте ЧЧ:ММ.", field) from None
+    return value
+
+
+def convert_reminder_due(date, time):
+    """
+    Проверяет дату и время напоминания и переводит их в метку времени.
+
+    Args:
+        date (str): Дата "ГГГГ-ММ-ДД".
+        time (str): Время "ЧЧ:ММ".
+
+    Returns:
+        tuple: (дата, время, due_at, status). Для корректных значений дата и
+        время приводятся к каноническому виду, due_at — секунды Unix,
+        status — `REMINDER_ACTIVE`. Пустые значения дают `REMINDER_EXPIRED`,
+        нераспознанные — `REMINDER_INVALID`; в обоих случаях due_at равен
+        None, а исходные строки сохраняются.
+    """
+    if not date.strip() or not time.strip():
+        return date, time, None, REMINDER_EXPIRED
+    try:
+        due = datetime.strptime(f"{date.strip()} {time.strip()}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        return date, time, None, REMINDER_INVALID
+    return due.strftime("%Y-%m-%d"), due.strftime("%H:%M"), to_epoch(due), REMINDER_ACTIVE
+
+
+def to_epoch(moment):
+    """
+    Переводит локальные дату и время в секунды Unix.
+    """
+    return int(moment.timestamp())
+
+
+def validate_text(value, field, name):
+    """
+    Проверяет, что текст состоит из букв, цифр, пробелов и знаков препинания.
+
+    Raises:
+        ValidationError: Если в тексте есть другие символы.
+    """
+    if not _TEXT_PATTERN.match(value):
+        raise ValidationError(f"{name} содержит недопустимые символы!", field)
+    return value
+
+
+def validate_history_filter(date_from="", date_to="", transaction_type="", category="", amount_min="", amount_max=""):
+    """
+    Приводит значения полей фильтра истории к `HistoryFilter`.
+    Пустое поле означает отсутствие ограничения.
+
+    Args:
+        date_from (str): Начало периода "ГГГГ-ММ-ДД" (включительно).
+        date_to (str): Конец периода "ГГГГ-ММ-ДД" (включительно).
+        transaction_type (str): "Доход", "Расход" или пустая строка.
+        category (str): Категория.
+        amount_min (str): Минимальная сумма в рублях.
+        amount_max (str): Максимальная сумма в рублях.
+
+    Returns:
+        HistoryFilter: Фильтр.
+
+    Raises:
+        ValidationError: Если значение некорректно или границы перепутаны.
+    """
+    date_from, date_to = date_from.strip(), date_to.strip()
+    filters = HistoryFilter(
+        validate_date(date_from, "date_from") if date_from else None,
+        validate_date(date_to, "date_to") if date_to else None,
+        validate_transaction_type(transaction_type) if transaction_type else None,
+        category.strip() or None,
+        validate_amount(amount_min, "amount_min") if amount_min.strip() else None,
+        validate_amount(amount_max, "amount_max") if amount_max.strip() else None,
+    )
+    if None not in (filters.date_from, filters.date_to) and filters.date_from > filters.date_to:
+        raise ValidationError("Начало периода позже его конца!", "date_to")
+    if None not in (filters.amount_min, filters.amount_max) and filters.amount_min > filters.amount_max:
+        raise ValidationError("Минимальная сумма больше максимальной!", "amount_max")
+    return filters
+
+
+class FinanceService:
+    """
+    Бизнес-логика приложения поверх базы данных.
+
+    Атрибуты:
+        db (Database): Подключение к базе данных.
+        clock (callable): Возвращает текущие дату и время (`datetime.now` по умолчанию).
+        totals (CategoryTotalsCache): Кэш сумм по категориям.
+        rates (RateCache): Кэш курсов валют.
+        forecasts (ForecastCache): Кэш прогнозов накоплений; создается при первом прогнозе.
+    """
+    def __init__(self, db=None, clock=datetime.now):
+        """
+        Args:
+            db (Database): Подключение к базе данных. По умолчанию общее подключение приложения.
+            clock (callable): Источник текущего времени.
+        """
+        self.db = db if db is not None else get_db()
+        self.clock = clock
+        self.totals = CategoryTotalsCache(self.db)
+        self.rates = RateCache(self.db)
+        self.forecasts = None
+
+    # Пользователи
+
+    def register(self, login, password, confirm_password=None):
+        """
+        Регистрирует нового пользователя.
+
+        Args:
+            login (str): Логин.
+            password (str): Пароль.
+            confirm_password (str): Подтверждение пароля, если его нужно сверить.
+
+        Returns:
+            User: Созданный пользователь.
+
+        Raises:
+            ValidationError: Если логин или пароль некорректны или пароли не совпадают.
+            ConflictError: Если логин уже занят.
+        """
+        validate_login(login)
+        validate_password(password)
+        if confirm_password is not None and password != confirm_password:
+            raise ValidationError("Пароли не совпадают!", "confirm_password")
+        try:
+            cursor = self.db.execute("INSERT INTO users (login, password) VALUES (?, ?)", (login, password))
+        except sqlite3.IntegrityError:
+            raise ConflictError("Пользователь с таким логином уже существует!", "login") from None
+        return User(cursor.lastrowid, login)
+
+    def login(self, login, password):
+        """
+        Проверяет логин и пароль.
+
+        Returns:
+            User: Вошедший пользователь.
+
+        Raises:
+            AuthenticationError: Если пользователь не найден или пароль неверен.
+        """
+        row = self.db.fetchone("SELECT id, login FROM users WHERE login = ? AND password = ?", (login, password))
+        if row is None:
+            raise AuthenticationError("Проверьте корректность введённых данных!")
+        return User(*row)
+
+    # Транзакции
+
+    def add_transaction(self, user_id, category, amount, transaction_type, date=None, currency=BASE_CURRENCY):
+        """
+        Добавляет транзакцию. Доход также увеличивает прогресс целей пользователя.
+
+        Args:
+            user_id (int): ID пользователя.
+            category (str): Имя категории; новая категория создается.
+            amount (str | float | Money): Сумма в валюте `currency`.
+            transaction_type (str): "Доход" или "Расход".
+            date (datetime): Дата транзакции; по умолчанию текущее время.
+            currency (str): Валюта суммы; в базовую валюту сумма переводится
+                по курсу на дату транзакции.
+
+        Returns:
+            TransactionResult: ID транзакции и записи `GoalCompletion` целей,
+            достигнутых благодаря ей (показываются после фиксации транзакции).
+
+        Raises:
+            ValidationError: Если данные транзакции некорректны.
+        """
+        if not category.strip():
+            raise ValidationError("Пожалуйста, выберите категорию!", "category")
+        amount = validate_amount(amount)
+        validate_transaction_type(transaction_type)
+        currency = validate_currency(currency, self.rates.currencies())
+        date = (date or self.clock()).strftime("%Y-%m-%d %H:%M:%S")
+
+        with self.db.transaction() as conn:
+            category_id = ensure_category(conn, user_id, category.strip(), transaction_type)
+            transaction_id, base_amount = conn.execute(f'''
+                INSERT INTO transactions (user_id, category_id, original_amount, currency, date, type, amount)
+                VALUES (?1, ?2, ?3, ?4, ?5, ?6, {to_base_sql("?3", "?4", "?5")})
+                RETURNING id, amount
+            ''', (user_id, category_id, amount.kopecks, currency, date, transaction_type)).fetchone()
+            completed = []
+            if transaction_type == "Доход":
+                completed = allocate_incomes(conn, [(user_id, base_amount)], goal_strategy(conn, user_id))
+        return TransactionResult(transaction_id, completed)
+
+    def list_transactions(self, user_id, limit=PAGE_SIZE, after=None, filters=HistoryFilter(), sort="date",
+                          descending=True):
+        """
+        Возвращает страницу транзакций, по умолчанию от новых к старым.
+
+        Args:
+            user_id (int): ID пользователя.
+            limit (int): Размер страницы.
+            after (Transaction): Последняя транзакция предыдущей страницы
+                (достаточно id и полей сортировки).
+            filters (HistoryFilter): Фильтр (см. `validate_history_filter`).
+            sort (str): Колонка сортировки: "date", "amount", "category" или "type".
+            descending (bool): Сортировать по убыванию.
+
+        Returns:
+            list: Записи `Transaction`.
+
+        Raises:
+            ValidationError: Если колонка сортировки неизвестна.
+        """
+        if sort not in SORT_KEYS:
+            raise ValidationError(f"Неизвестная колонка сортировки: {sort!r}", "sort")
+        pager = TransactionPager(self.db, user_id, limit, filters, sort, descending)
+        if after is None:
+            rows = pager.first_page()
+        else:
+            if isinstance(after.amount, Money):
+                after = after._replace(amount=after.amount.kopecks)
+            rows = pager.page_after(pager.key(after))
+        return [Transaction(row_id, category, Money(amount), transaction_type, date)
+                for row_id, category, amount, transaction_type, date in rows]
+
+    # Категории
+
+    def list_categories(self, user_id, transaction_type=None):
+        """
+        Args:
+            user_id (int): ID пользователя.
+            transaction_type (str): Оставить категории этого типа и категории без типа.
+
+        Returns:
+            list: Записи `pfa_categories.Category` в порядке дерева.
+        """
+        return list_categories(self.db, user_id, transaction_type)
+
+    def add_category(self, user_id, name, parent_id=None, transaction_type=None):
+        """
+        Добавляет категорию пользователя.
+
+        Args:
+            user_id (int): ID пользователя.
+            name (str): Имя категории, уникальное у пользователя.
+            parent_id (int): ID родительской категории или None.
+            transaction_type (str): "Доход", "Расход" или None (для любых транзакций).
+
+        Returns:
+            int: ID категории.
+
+        Raises:
+            ValidationError: Если имя пустое или тип неизвестен.
+            NotFoundError: Если у пользователя нет родительской категории.
+            ConflictError: Если категория с таким именем уже есть.
+        """
+        name = validate_category_name(name)
+        if transaction_type is not None:
+            validate_transaction_type(transaction_type)
+        with self.db.transaction() as conn:
+            self._check_category(conn, user_id, parent_id)
+            try:
+                cursor = conn.execute(
+                    "INSERT INTO categories (user_id, parent_id, name, type) VALUES (?, ?, ?, ?)",
+                    (user_id, parent_id, name, transaction_type))
+            except sqlite3.IntegrityError:
+                raise ConflictError("Категория с таким названием уже существует!", "name") from None
+        return cursor.lastrowid
+
+    def rename_category(self, user_id, category_id, name):
+        """
+        Переименовывает категорию; транзакции категории получают новое имя.
+
+        Raises:
+            ValidationError: Если имя пустое.
+            NotFoundError: Если у пользователя нет такой категории.
+            ConflictError: Если категория с таким именем уже есть.
+        """
+        name = validate_category_name(name)
+        try:
+            cursor = self.db.execute(
+                "UPDATE categories SET name = ? WHERE user_id = ? AND id = ?", (name, user_id, category_id))
+        except sqlite3.IntegrityError:
+            raise ConflictError("Категория с таким названием уже существует!", "name") from None
+        if cursor.rowcount == 0:
+            raise NotFoundError("Категория не найдена.")
+
+    def move_category(self, user_id, category_id, parent_id):
+        """
+        Переносит категорию в другую родительскую категорию (None — на верхний уровень).
+
+        Raises:
+            NotFoundError: Если у пользователя нет одной из категорий.
+            ValidationError: Если категорию переносят в нее саму или во вложенную в нее категорию.
+        """
+        with self.db.transaction() as conn:
+            self._check_category(conn, user_id, category_id)
+            self._check_category(conn, user_id, parent_id)
+            if parent_id is not None and parent_id in descendants(conn, category_id):
+                raise ValidationError("Категорию нельзя вложить в нее саму или в ее подкатегорию!", "parent_id")
+            conn.execute("UPDATE categories SET parent_id = ? WHERE id = ?", (parent_id, category_id))
+
+    def _check_category(self, conn, user_id, category_id):
+        """
+        Raises:
+            NotFoundError: Если `category_id` не None и у пользователя нет такой категории.
+        """
+        if category_id is None:
+            return
+        row = conn.execute("SELECT 1 FROM categories WHERE user_id = ? AND id = ?", (user_id, category_id)).fetchone()
+        if row is None:
+            raise NotFoundError("Категория не найдена.")
+
+    # Итоги
+
+    def balance(self, user_id, currency=None):
+        """
+        Args:
+            user_id (int): ID пользователя.
+            currency (str): Валюта итогов; по умолчанию валюта отчетов пользователя.
+
+        Returns:
+            Balance: Итоги пользователя по последнему курсу.
+
+        Raises:
+            ValidationError: Если курсов валюты нет.
+        """
+        currency = self._reporting(user_id, currency)
+        income, expense, count = read_balance(self.db, user_id)
+        income, expense = self.rates.convert((income, expense), currency)
+        return Balance(income, expense, count, currency)
+
+    def data_version(self, user_id):
+        """
+        Returns:
+            int: Версия данных пользователя, меняющаяся при каждом изменении транзакций.
+        """
+        return data_version(self.db, user_id)
+
+    def category_totals(self, user_id, transaction_type, currency=None):
+        """
+        Возвращает суммы транзакций по категориям.
+
+        Args:
+            user_id (int): ID пользователя.
+            transaction_type (str): "Доход" или "Расход".
+            currency (str): Валюта сумм (по последнему курсу); по умолчанию
+                валюта отчетов пользователя.
+
+        Returns:
+            tuple: Пары (категория, `Money`), упорядоченные по категории.
+
+        Raises:
+            ValidationError: Если тип транзакции неизвестен или курсов валюты нет.
+        """
+        validate_transaction_type(transaction_type)
+        currency = self._reporting(user_id, currency)
+        totals = self.totals.get(user_id, transaction_type)
+        if currency == BASE_CURRENCY:
+            return totals
+        return tuple(zip((category for category, _ in totals),
+                         self.rates.convert([total for _, total in totals], currency)))
+
+    def trend(self, user_id, transaction_type, granularity="month", date_from=None, date_to=None, currency=None):
+        """
+        Возвращает суммы транзакций по категориям за последовательные периоды.
+
+        Читаются только сводки `rollups`, поэтому время не зависит от числа транзакций.
+
+        Args:
+            user_id (int): ID пользователя.
+            transaction_type (str): "Доход" или "Расход".
+            granularity (str): "month" или "week".
+            date_from (date): Начало интервала (по умолчанию — вся история).
+            date_to (date): Конец интервала.
+            currency (str): Валюта сумм (по курсу на начало каждого периода);
+                по умолчанию валюта отчетов пользователя.
+
+        Returns:
+            Trend: Периоды и суммы (`Money`) по категориям.
+
+        Raises:
+            ValidationError: Если тип транзакции или детализация неизвестны
+                или курсов валюты нет.
+        """
+        validate_transaction_type(transaction_type)
+        if granularity not in pfa_rollups.GRANULARITIES:
+            raise ValidationError(f"Неизвестная детализация: {granularity!r}", "granularity")
+        currency = self._reporting(user_id, currency)
+        trend = pfa_rollups.trend(self.db, user_id, transaction_type, granularity, date_from, date_to)
+        days = [period.isoformat() for period in trend.periods]
+        return trend._replace(series=tuple(
+            (category, tuple(self.rates.convert(totals, currency, days))) for category, totals in trend.series))
+
+    # Валюты
+
+    def currencies(self):
+        """
+        Returns:
+            tuple: Базовая валюта и валюты с загруженными курсами.
+        """
+        return self.rates.currencies()
+
+    def import_rates(self, path, delimiter=","):
+        """
+        Загружает курсы валют из CSV-файла (см. `pfa_rates.import_rates`).
+
+        Returns:
+            RateImportReport: Итог загрузки.
+
+        Raises:
+            ValidationError: Если файл некорректен.
+        """
+        try:
+            return import_rates(self.db, path, delimiter, clock=self.clock)
+        except pfa_rates.RateFileError as e:
+            raise ValidationError(f"Ошибка в файле курсов, {e}", "path") from None
+
+    def reporting_currency(self, user_id):
+        """
+        Returns:
+            str: Валюта, в которой пользователю показываются итоги и цели.
+        """
+        row = self.db.fetchone("SELECT currency FROM users WHERE id = ?", (user_id,))
+        return row[0] if row else BASE_CURRENCY
+
+    def set_reporting_currency(self, user_id, currency):
+        """
+        Сохраняет валюту отчетов пользователя.
+
+        Raises:
+            ValidationError: Если курсов валюты нет.
+        """
+        currency = validate_currency(currency, self.rates.currencies())
+        self.db.execute("UPDATE users SET currency = ? WHERE id = ?", (currency, user_id))
+
+    def _reporting(self, user_id, currency):
+        """
+        Returns:
+            str: Проверенная валюта `currency` или валюта отчетов пользователя.
+        """
+        if currency is None:
+            currency = self.reporting_currency(user_id)
+        return validate_currency(currency, self.rates.currencies())
+
+    # Цели
+
+    def add_goal(self, user_id, title, target_amount, target_date, description=None, priority=1,
+                 currency=BASE_CURRENCY):
+        """
+        Добавляет финансовую цель.
+
+        Args:
+            user_id (int): ID пользователя.
+            title (str): Название.
+            target_amount (str | float | Money): Сумма цели в валюте `currency`.
+            target_date (str): Дата достижения "ГГГГ-ММ-ДД".
+            description (str): Описание.
+            priority (int | str): Приоритет цели (целое больше нуля).
+            currency (str): Валюта цели.
+
+        Returns:
+            int: ID цели.
+
+        Raises:
+            ValidationError: Если данные цели некорректны.
+        """
+        validate_goal_title(title)
+        target_amount = validate_amount(target_amount, "target_amount")
+        validate_date(target_date, "target_date")
+        priority = validate_priority(priority)
+        currency = validate_currency(currency, self.rates.currencies())
+        cursor = self.db.execute('''
+            INSERT INTO goals (user_id, title, description, target_amount, current_amount, target_date,
+                               creation_date, priority, currency)
+            VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?)
+        ''', (user_id, title, description, target_amount.kopecks, target_date, self.clock().strftime("%Y-%m-%d"),
+              priority, currency))
+        return cursor.lastrowid
+
+    def list_goals(self, user_id, currency=None):
+        """
+        Args:
+            user_id (int): ID пользователя.
+            currency (str): Валюта сумм (по последнему курсу); по умолчанию
+                валюта отчетов пользователя.
+
+        Returns:
+            list: Записи `Goal` пользователя (суммы — `Money` в валюте `currency`).
+
+        Raises:
+            ValidationError: Если курсов валюты нет.
+        """
+        currency = self._reporting(user_id, currency)
+        rows = self.db.fetchall(f'''
+            SELECT id, title, CAST(ROUND(target_amount * factor) AS INTEGER),
+                   CAST(ROUND(current_amount * factor) AS INTEGER), creation_date, target_date, priority
+            FROM (
+                SELECT goals.*, {pfa_rates.rate_sql("goals.currency")} / {pfa_rates.rate_sql(":currency")} AS factor
+                FROM goals
+                WHERE user_id = :user_id
+            )
+        ''', {"user_id": user_id, "currency": currency})
+        return [Goal(goal_id, title, Money(target_amount), Money(current_amount), creation_date, target_date, priority,
+                     currency)
+                for goal_id, title, target_amount, current_amount, creation_date, target_date, priority in rows]
+
+    def goal_forecast(self, user_id):
+        """
+        Прогнозирует даты достижения незавершенных целей по денежному потоку
+        пользователя (см. `pfa_forecast`).
+
+        Args:
+            user_id (int): ID пользователя.
+
+        Returns:
+            dict: ID цели -> `date` достижения или None, если цель не
+            достигается за горизонт прогноза.
+        """
+        if self.forecasts is None:
+            # NumPy и pandas загружаются только при первом прогнозе.
+            from pfa_forecast import ForecastCache
+            self.forecasts = ForecastCache(self.db)
+        return self.forecasts.completion_dates(
+            user_id, self.list_goals(user_id, BASE_CURRENCY), goal_strategy(self.db, user_id), self.clock().date())
+
+    def delete_goal(self, user_id, goal_id):
+        """
+        Удаляет цель пользователя.
+
+        Raises:
+            NotFoundError: Если у пользователя нет такой цели.
+        """
+        cursor = self.db.execute("DELETE FROM goals WHERE user_id = ? AND id = ?", (user_id, goal_id))
+        if cursor.rowcount == 0:
+            raise NotFoundError("Цель не найдена.")
+
+    def goal_strategy(self, user_id):
+        """
+        Returns:
+            str: Стратегия распределения доходов по целям (см. `pfa_goals.STRATEGIES`).
+        """
+        return goal_strategy(self.db, user_id)
+
+    def set_goal_strategy(self, user_id, strategy):
+        """
+        Сохраняет стратегию распределения доходов по целям.
+
+        Raises:
+            ValidationError: Если стратегия неизвестна.
+        """
+        if strategy not in STRATEGIES:
+            raise ValidationError(f"Неизвестная стратегия распределения: {strategy!r}", "goal_strategy")
+        self.db.execute("UPDATE users SET goal_strategy = ? WHERE id = ?", (strategy, user_id))
+
+    # Повторяющиеся транзакции
+
+    def add_recurring_rule(self, user_id, category, amount, transaction_type, frequency, start_date, end_date="",
+                           interval=1, currency=BASE_CURRENCY):
+        """
+        Добавляет правило повторяющейся транзакции. Транзакции по правилу
+        создает `generate_recurring`, в том числе за прошедшие даты.
+
+        Args:
+            user_id (int): ID пользователя.
+            category (str): Имя категории; новая категория создается.
+            amount (str | float | Money): Сумма в валюте `currency`.
+            transaction_type (str): "Доход" или "Расход".
+            frequency (str): Периодичность из `pfa_recurring.FREQUENCIES`.
+            start_date (str): Дата первой транзакции "ГГГГ-ММ-ДД".
+            end_date (str): Дата "ГГГГ-ММ-ДД", после которой правило больше не
+                срабатывает; пустая строка — без окончания.
+            interval (int): Шаг: каждые `interval` дней, недель, месяцев или лет.
+            currency (str): Валюта суммы.
+
+        Returns:
+            int: ID правила.
+
+        Raises:
+            ValidationError: Если данные правила некорректны.
+        """
+        if not category.strip():
+            raise ValidationError("Пожалуйста, выберите категорию!", "category")
+        amount = validate_amount(amount)
+        validate_transaction_type(transaction_type)
+        validate_frequency(frequency)
+        interval = validate_interval(interval)
+        currency = validate_currency(currency, self.rates.currencies())
+        start = validate_date(start_date, "start_date")
+        if start.year < MIN_RECURRING_YEAR:
+            raise ValidationError(f"Дата начала должна быть не раньше {MIN_RECURRING_YEAR} года!", "start_date")
+        end = None
+        if end_date and end_date.strip():
+            end = validate_date(end_date, "end_date")
+            if end < start:
+                raise ValidationError("Дата окончания должна быть не раньше даты начала!", "end_date")
+        # isoformat дополняет год нулями до четырех цифр, в отличие от strftime в glibc.
+        start = datetime.combine(start, datetime.min.time()).isoformat(" ")
+
+        with self.db.transaction() as conn:
+            category_id = ensure_category(conn, user_id, category.strip(), transaction_type)
+            cursor = conn.execute('''
+                INSERT INTO recurring_rules (user_id, category_id, amount, type, frequency, interval, start_date,
+                                             end_date, next_date, currency)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, category_id, amount.kopecks, transaction_type, frequency, interval, start,
+                  end and end.isoformat(), start, currency))
+        return cursor.lastrowid
+
+    def list_recurring_rules(self, user_id):
+        """
+        Returns:
+            list: Записи `RecurringRule` пользователя (сумма — `Money` в валюте
+            правила, next_date — None у завершенных правил).
+        """
+        rows = self.db.fetchall('''
+            SELECT r.id, c.name, r.amount, r.type, r.frequency, r.interval, r.start_date, r.end_date, r.next_date,
+                   r.currency
+            FROM recurring_rules r JOIN categories c ON c.id = r.category_id
+            WHERE r.user_id = ?
+            ORDER BY r.id
+        ''', (user_id,))
+        return [RecurringRule(rule_id, category, Money(amount), *rest) for rule_id, category, amount, *rest in rows]
+
+    def delete_recurring_rule(self, user_id, rule_id):
+        """
+        Удаляет правило пользователя; уже созданные по нему транзакции остаются.
+
+        Raises:
+            NotFoundError: Если у пользователя нет такого правила.
+        """
+        cursor = self.db.execute("DELETE FROM recurring_rules WHERE user_id = ? AND id = ?", (user_id, rule_id))
+        if cursor.rowcount == 0:
+            raise NotFoundError("Правило не найдено.")
+
+    def generate_recurring(self, user_id=None, now=None):
+        """
+        Создает транзакции по всем наступившим срабатываниям правил (см.
+        `pfa_recurring.generate_due`).
+
+        Args:
+            user_id (int): ID пользователя; по умолчанию все пользователи.
+            now (datetime): Момент времени; по умолчанию текущее время.
+
+        Returns:
+            RecurringReport: Число созданных транзакций и достигнутые цели.
+        """
+        return generate_due(self.db, now or self.clock(), user_id)
+
+    # Напоминания
+
+    def add_reminder(self, user_id, title, date, time, description=""):
+        """
+        Добавляет напоминание.
+
+        Args:
+            user_id (int): ID пользователя.
+            title (str): Название.
+            date (str): Дата "ГГГГ-ММ-ДД" не раньше сегодняшней.
+            time (str): Время "ЧЧ:ММ".
+            description (str): Описание.
+
+        Returns:
+            int: ID напоминания.
+
+        Raises:
+            ValidationError: Если данные напоминания некорректны.
+        """
+        if not title or not date or not time:
+            raise ValidationError("Заполните все обязательные поля!")
+        validate_future_date(date, self.clock().date())
+        validate_time(time)
+        validate_text(title, "title", "Название")
+        if description:
+            validate_text(description, "description", "Описание")
+        date, time, due_at, status = convert_reminder_due(date, time)
+        cursor = self.db.execute('''
+            INSERT INTO reminders (user_id, title, date, time, description_reminder, due_at, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (user_id, title, date, time, description, due_at, status))
+        return cursor.lastrowid
+
+    def get_reminder(self, user_id, reminder_id):
+        """
+        Returns:
+            Reminder: Напоминание пользователя.
+
+        Raises:
+            NotFoundError: Если у пользователя нет такого напоминания.
+        """
+        row = self.db.fetchone(
+            f"SELECT {_REMINDER_COLUMNS} FROM reminders WHERE user_id = ? AND id = ?", (user_id, reminder_id))
+        if row is None:
+            raise NotFoundError("Напоминание не найдено.")
+        return Reminder._make(row)
+
+    def list_reminders(self, user_id):
+        """
+        Returns:
+            list: Все записи `Reminder` пользователя, включая устаревшие.
+        """
+        rows = self.db.fetchall(f"SELECT {_REMINDER_COLUMNS} FROM reminders WHERE user_id = ?", (user_id,))
+        return [Reminder._make(row) for row in rows]
+
+    def active_reminders(self, user_id, due_from=None, due_to=None):
+        """
+        Возвращает активные напоминания по возрастанию срока (диапазон по индексу).
+
+        Args:
+            user_id (int): ID пользователя.
+            due_from (datetime): Срок строго позже этого момента.
+            due_to (datetime): Срок не позже этого момента.
+
+        Returns:
+            list: Записи `Reminder`.
+        """
+        low = to_epoch(due_from) if due_from is not None else -1
+        high = to_epoch(due_to) if due_to is not None else 2 ** 62
+        rows = self.db.fetchall(f'''
+            SELECT {_REMINDER_COLUMNS} FROM reminders
+            WHERE user_id = ? AND status = ? AND due_at > ? AND due_at <= ?
+            ORDER BY due_at
+        ''', (user_id, REMINDER_ACTIVE, low, high))
+        return [Reminder._make(row) for row in rows]
+
+    def upcoming_reminders(self, user_id, within):
+        """
+        Возвращает активные напоминания, срок которых наступит в течение `within`.
+
+        Args:
+            user_id (int): ID пользователя.
+            within (timedelta): Длина интервала от текущего момента.
+        """
+        now = self.clock()
+        return self.active_reminders(user_id, now, now + within)
+
+    def delete_reminder(self, user_id, reminder_id):
+        """
+        Удаляет напоминание пользователя.
+
+        Raises:
+            NotFoundError: Если у пользователя нет такого напоминания.
+        """
+        cursor = self.db.execute("DELETE FROM reminders WHERE user_id = ? AND id = ?", (user_id, reminder_id))
+        if cursor.rowcount == 0:
+            raise NotFoundError("Напоминание не найдено.")
+
+    def expire_reminders(self, user_id, now=None):
+        """
+        Переводит в статус "expired" все активные напоминания со сроком не позже `now`
+        одним запросом по индексу (user_id, status, due_at).
+
+        Args:
+            user_id (int): ID пользователя.
+            now (datetime): Момент времени; по умолчанию текущее время.
+
+        Returns:
+            int: Число обновленных напоминаний.
+        """
+        cursor = self.db.execute('''
+            UPDATE reminders SET status = ?
+            WHERE user_id = ? AND status = ? AND due_at <= ?
+        ''', (REMINDER_EXPIRED, user_id, REMINDER_ACTIVE, to_epoch(now or self.clock())))
+        return cursor.rowcount
+
+    # Поиск
+
+    def search(self, user_id, text, limit=pfa_search.SEARCH_LIMIT):
+        """
+        Ищет цели, напоминания и транзакции пользователя по тексту.
+
+        Args:
+            user_id (int): ID пользователя.
+            text (str): Текст запроса; каждое слово ищется как начало слова.
+            limit (int): Максимальное число результатов каждого вида.
+
+        Returns:
+            list: Записи `pfa_search.SearchHit` (пустой список, если в запросе нет слов).
+        """
+        return pfa_search.search(self.db, user_id, text, limit)
@@ -0,0 +1,363 @@
+from datetime import date, datetime, timedelta
+import pytest
+from pfa_money import Money
+from pfa_service import (
+    AuthenticationError, ConflictError, FinanceService, NotFoundError, ValidationError,
+    REMINDER_ACTIVE, REMINDER_EXPIRED, to_epoch, validate_amount, validate_history_filter,
+)
+from pfa_history import HistoryFilter
+
+NOW = datetime(2025, 3, 10, 12, 0)
+
+
+@pytest.fixture
+def service(db):
+    return FinanceService(db, clock=lambda: NOW)
+
+
+@pytest.fixture
+def user(service):
+    return service.register("Pavel", "password123", "password123")
+
+
+def test_register_and_login(service, user):
+    assert user.login == "Pavel"
+    assert service.login("Pavel", "password123") == user
+
+
+@pytest.mark.parametrize("login, password, confirm, field", [
+    ("Pb", "password123", None, "login"),
+    ("Pavel", "short", None, "password"),
+    ("Pavel", "password123", "password124", "confirm_password"),
+])
+def test_register_rejects_invalid_input(service, login, password, confirm, field):
+    with pytest.raises(ValidationError) as error:
+        service.register(login, password, confirm)
+    assert error.value.field == field
+
+
+def test_register_duplicate_login(service, user):
+    with pytest.raises(ConflictError):
+        service.register("Pavel", "otherpassword")
+
+
+def test_login_wrong_password(service, user):
+    with pytest.raises(AuthenticationError):
+        service.login("Pavel", "wrongpassword")
+
+
+@pytest.mark.parametrize("value", ["", "abc", "-5", "0", 0, float("nan"), "1e30", "99999999999999999",
+                                   "10000000000000.01"])
+def test_validate_amount_rejects(value):
+    with pytest.raises(ValidationError):
+        validate_amount(value)
+
+
+def test_validate_amount_accepts_strings_and_numbers():
+    assert validate_amount("12.5") == Money(1250)
+    assert validate_amount("1 234,56") == Money(123456)
+    assert validate_amount(0.1) == Money(10)
+    assert validate_amount(3) == Money(300)
+    assert validate_amount("0.005") == Money(1)
+
+
+def test_add_and_list_transactions(service, user):
+    service.add_transaction(user.id, "Зарплата", "1000", "Доход")
+    service.add_transaction(user.id, "Продукты", 250.5, "Расход", date=datetime(2025, 3, 11))
+
+    transactions = service.list_transactions(user.id)
+    assert [t.category for t in transactions] == ["Продукты", "Зарплата"]
+    assert transactions[1].date == "2025-03-10 12:00:00"
+    assert service.list_transactions(user.id, limit=1, after=transactions[0]) == transactions[1:]
+
+    balance = service.balance(user.id)
+    assert (balance.income, balance.expense, balance.count) == (Money(100000), Money(25050), 2)
+    assert balance.current == Money(74950)
+
+
+def test_filtered_and_sorted_transactions(service, user):
+    for day, (category, amount, transaction_type) in enumerate(
+            [("Зарплата", 900, "Доход"), ("Такси", 300, "Расход"), ("Продукты", 500, "Расход"),
+             ("Такси", 100, "Расход"), ("Такси", 700, "Расход")], start=1):
+        service.add_transaction(user.id, category, amount, transaction_type, date=datetime(2025, 3, day))
+
+    taxi = validate_history_filter(category="Такси", date_to="2025-03-04")
+    assert [t.amount for t in service.list_transactions(user.id, filters=taxi)] == [Money(10000), Money(30000)]
+    expenses = validate_history_filter(transaction_type="Расход", amount_min="200")
+    page = service.list_transactions(user.id, limit=2, filters=expenses, sort="amount")
+    assert [t.amount for t in page] == [Money(70000), Money(50000)]
+    assert service.list_transactions(user.id, limit=2, after=page[-1], filters=expenses, sort="amount") == [
+        service.list_transactions(user.id, filters=taxi, sort="amount", descending=False)[-1]]
+    with pytest.raises(ValidationError) as error:
+        service.list_transactions(user.id, sort="id")
+    assert error.value.field == "sort"
+
+
+def test_categories(service, user):
+    assert [c.name for c in service.list_categories(user.id, "Доход")] == ["Зарплата", "Инвестиции", "Переводы"]
+    food = next(c.id for c in service.list_categories(user.id) if c.name == "Продукты")
+    cafe = service.add_category(user.id, "Кафе", food, "Расход")
+    service.add_transaction(user.id, "Кафе", 250, "Расход")
+    service.add_transaction(user.id, " Подарки ", 100, "Расход")
+    assert [(c.name, c.depth) for c in service.list_categories(user.id, "Расход")] == [
+        ("Одежда", 0), ("Подарки", 0), ("Продукты", 0), ("Кафе", 1), ("Такси", 0)]
+
+    service.rename_category(user.id, cafe, "Рестораны")
+    assert [t.category for t in service.list_transactions(user.id)] == ["Подарки", "Рестораны"]
+    assert service.category_totals(user.id, "Расход") == (("Подарки", Money(10000)), ("Рестораны", Money(25000)))
+    service.move_category(user.id, cafe, None)
+    assert [c.depth for c in service.list_categories(user.id) if c.id == cafe] == [0]
+
+    other = service.register("Maria", "password123")
+    with pytest.raises(ConflictError):
+        service.add_category(user.id, "Такси")
+    with pytest.raises(ConflictError):
+        service.rename_category(user.id, cafe, "Такси")
+    with pytest.raises(ValidationError):
+        service.add_category(user.id, "  ")
+    with pytest.raises(NotFoundError):
+        service.add_category(other.id, "Кафе", food)
+    with pytest.raises(NotFoundError):
+        service.rename_category(other.id, cafe, "Кафе")
+    service.move_category(user.id, cafe, food)
+    with pytest.raises(ValidationError) as error:
+        service.move_category(user.id, food, cafe)
+    assert error.value.field == "parent_id"
+
+
+def test_validate_history_filter():
+    assert validate_history_filter() == HistoryFilter()
+    assert validate_history_filter(" 2025-01-01 ", "2025-01-31", "Доход", " Такси ", "10", "20,5") == HistoryFilter(
+        date(2025, 1, 1), date(2025, 1, 31), "Доход", "Такси", Money(1000), Money(2050))
+    for kwargs, field in (({"date_from": "01.01.2025"}, "date_from"),
+                          ({"date_from": "2025-02-01", "date_to": "2025-01-01"}, "date_to"),
+                          ({"transaction_type": "Все"}, "type"),
+                          ({"amount_min": "abc"}, "amount_min"),
+                          ({"amount_min": "20", "amount_max": "10"}, "amount_max")):
+        with pytest.raises(ValidationError) as error:
+            validate_history_filter(**kwargs)
+        assert error.value.field == field
+
+
+def test_add_transaction_validation(service, user):
+    with pytest.raises(ValidationError) as error:
+        service.add_transaction(user.id, "Продукты", "abc", "Расход")
+    assert error.value.field == "amount"
+    with pytest.raises(ValidationError):
+        service.add_transaction(user.id, "Продукты", 10, "Перевод")
+    for amount in ("1e30", "99999999999999999"):
+        with pytest.raises(ValidationError) as error:
+            service.add_transaction(user.id, "Продукты", amount, "Расход")
+        assert error.value.field == "amount"
+    assert service.balance(user.id).count == 0
+
+
+def test_category_totals(service, user):
+    service.add_transaction(user.id, "Продукты", 100, "Расход")
+    service.add_transaction(user.id, "Такси", 50, "Расход")
+    service.add_transaction(user.id, "Продукты", 25, "Расход")
+    assert service.category_totals(user.id, "Расход") == (("Продукты", Money(12500)), ("Такси", Money(5000)))
+    with pytest.raises(ValidationError):
+        service.category_totals(user.id, "Все")
+
+
+def test_trend(service, user):
+    service.add_transaction(user.id, "Продукты", 100, "Расход", date=datetime(2025, 1, 10))
+    service.add_transaction(user.id, "Продукты", 50, "Расход", date=datetime(2025, 3, 1))
+    trend = service.trend(user.id, "Расход")
+    assert [period.month for period in trend.periods] == [1, 2, 3]
+    assert trend.series == (("Продукты", (Money(10000), Money(0), Money(5000))),)
+    with pytest.raises(ValidationError) as error:
+        service.trend(user.id, "Расход", "year")
+    assert error.value.field == "granularity"
+
+
+def test_goal_forecast(service, user):
+    goal_id = service.add_goal(user.id, "Отпуск", 2000, "2025-12-31")
+    done = service.add_goal(user.id, "Книга", 100, "2025-12-31", priority=5)
+    for offset in range(10):
+        service.add_transaction(user.id, "Зарплата", 100, "Доход", date=NOW - timedelta(days=offset))
+    assert service.goal_forecast(user.id) == {goal_id: NOW.date() + timedelta(days=11)}
+    assert service.forecasts.misses == 1
+    service.delete_goal(user.id, done)
+    service.goal_forecast(user.id)
+    assert service.forecasts.hits == 1
+
+
+def test_income_updates_goal_progress(service, user):
+    small = service.add_goal(user.id, "Велосипед", "300", "2025-06-30")
+    large = service.add_goal(user.id, "Машина", 10000, "2026-12-31")
+
+    result = service.add_transaction(user.id, "Зарплата", 500, "Доход")
+
+    assert [goal.title for goal in result.completed_goals] == ["Велосипед"]
+    goals = {goal.id: goal for goal in service.list_goals(user.id)}
+    assert (goals[small].current_amount, goals[small].target_amount) == (Money(30000), Money(30000))
+    assert goals[large].current_amount == Money(20000)
+    assert goals[large].creation_date == "2025-03-10"
+
+
+def test_goal_strategy_setting(service, user):
+    service.add_goal(user.id, "Отпуск", 1000, "2025-12-31", priority=1)
+    service.add_goal(user.id, "Ремонт", 1000, "2025-12-31", priority="3")
+    service.set_goal_strategy(user.id, "priority")
+    assert service.goal_strategy(user.id) == "priority"
+
+    service.add_transaction(user.id, "Зарплата", 400, "Доход")
+
+    assert [goal.current_amount for goal in service.list_goals(user.id)] == [Money(10000), Money(30000)]
+    with pytest.raises(ValidationError):
+        service.set_goal_strategy(user.id, "random")
+    with pytest.raises(ValidationError):
+        service.add_goal(user.id, "Дача", 1000, "2025-12-31", priority=0)
+
+
+def test_expense_does_not_change_goals(service, user):
+    service.add_goal(user.id, "Велосипед", 300, "2025-12-31")
+    assert service.add_transaction(user.id, "Продукты", 500, "Расход").completed_goals == []
+    assert service.list_goals(user.id)[0].current_amount == Money(0)
+
+
+def test_delete_goal_of_other_user(service, user):
+    other = service.register("Maria", "password123")
+    goal_id = service.add_goal(user.id, "Велосипед", 300, "2025-12-31")
+    with pytest.raises(NotFoundError):
+        service.delete_goal(other.id, goal_id)
+    service.delete_goal(user.id, goal_id)
+    assert service.list_goals(user.id) == []
+
+
+@pytest.fixture
+def rates(service, tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text("date,currency,rate\n2025-01-01,USD,90\n2025-02-01,USD,100\n", encoding="utf-8")
+    return service.import_rates(str(path))
+
+
+def test_foreign_currency_transactions(service, user, rates):
+    with pytest.raises(ValidationError) as error:
+        service.add_transaction(user.id, "Зарплата", 10, "Доход", currency="EUR")
+    assert error.value.field == "currency"
+    service.add_transaction(user.id, "Зарплата", 10, "Доход", date=datetime(2025, 1, 15), currency="usd")
+    service.add_transaction(user.id, "Продукты", 90, "Расход", date=datetime(2025, 1, 20))
+    service.add_transaction(user.id, "Продукты", 500, "Расход", date=datetime(2025, 2, 15))
+
+    assert service.balance(user.id) == (Money(90000), Money(59000), 3, "RUB")
+    assert service.balance(user.id, "USD") == (Money(900), Money(590), 3, "USD")
+    assert service.category_totals(user.id, "Доход", "USD") == (("Зарплата", Money(900)),)
+    # Тренд переводится по курсу на начало каждого месяца.
+    assert service.trend(user.id, "Расход", currency="USD").series == (("Продукты", (Money(100), Money(500))),)
+
+    assert service.currencies() == ("RUB", "USD")
+    service.set_reporting_currency(user.id, "USD")
+    assert service.reporting_currency(user.id) == "USD"
+    assert service.balance(user.id).current == Money(310)
+    with pytest.raises(ValidationError):
+        service.set_reporting_currency(user.id, "GBP")
+
+
+def test_goals_in_foreign_currency(service, user, rates):
+    goal_id = service.add_goal(user.id, "Ноутбук", 100, "2025-12-31", currency="USD")
+    service.add_transaction(user.id, "Зарплата", 5000, "Доход")
+    assert service.list_goals(user.id, "USD")[0][2:4] == (Money(10000), Money(5000))
+    assert service.list_goals(user.id)[0][2:4] == (Money(1000000), Money(500000))
+
+    result = service.add_transaction(user.id, "Зарплата", 6000, "Доход")
+
+    assert [goal.id for goal in result.completed_goals] == [goal_id]
+    assert service.list_goals(user.id, "USD")[0].current_amount == Money(10000)
+
+
+def test_recurring_rules(service, user):
+    goal_id = service.add_goal(user.id, "Отпуск", 1000, "2025-12-31")
+    rule_id = service.add_recurring_rule(user.id, "Зарплата", 500, "Доход", "monthly", "2025-01-31")
+    service.add_recurring_rule(user.id, "Аренда", 100, "Расход", "weekly", "2025-03-01", "2025-03-10", interval=2)
+
+    report = service.generate_recurring(user.id)
+
+    assert report.created == 3
+    assert [goal.id for goal in report.completed_goals] == [goal_id]
+    assert service.balance(user.id).current == Money(90000)
+    assert [(t.category, t.date) for t in service.list_transactions(user.id)] == [
+        ("Аренда", "2025-03-01 00:00:00"), ("Зарплата", "2025-02-28 00:00:00"), ("Зарплата", "2025-01-31 00:00:00")]
+    rules = service.list_recurring_rules(user.id)
+    assert [(rule.amount, rule.next_date) for rule in rules] == [
+        (Money(50000), "2025-03-31 00:00:00"), (Money(10000), None)]
+    assert service.generate_recurring().created == 0
+
+    with pytest.raises(NotFoundError):
+        service.delete_recurring_rule(service.register("Maria", "password123").id, rule_id)
+    service.delete_recurring_rule(user.id, rule_id)
+    assert [rule.category for rule in service.list_recurring_rules(user.id)] == ["Аренда"]
+
+
+def test_recurring_rule_from_early_year(service, user):
+    service.add_recurring_rule(user.id, "Взнос", 1, "Расход", "yearly", "1900-03-10")
+    assert service.list_recurring_rules(user.id)[0].start_date == "1900-03-10 00:00:00"
+    assert service.generate_recurring().created == 126
+    assert service.list_recurring_rules(user.id)[0].next_date == "2026-03-10 00:00:00"
+
+
+@pytest.mark.parametrize("frequency, start, end, interval, field", [
+    ("hourly", "2025-01-01", "", 1, "frequency"),
+    ("daily", "2025-01-01", "", 0, "interval"),
+    ("daily", "01.01.2025", "", 1, "start_date"),
+    ("daily", "0101-01-01", "", 1, "start_date"),
+    ("yearly", "1899-12-31", "", 1, "start_date"),
+    ("daily", "2025-01-10", "2025-01-01", 1, "end_date"),
+])
+def test_add_recurring_rule_validation(service, user, frequency, start, end, interval, field):
+    with pytest.raises(ValidationError) as error:
+        service.add_recurring_rule(user.id, "Аренда", 100, "Расход", frequency, start, end, interval)
+    assert error.value.field == field
+
+
+@pytest.mark.parametrize("date, time, title, field", [
+    ("2025-03-09", "10:00", "Оплата", "date"),
+    ("10.03.2025", "10:00", "Оплата", "date"),
+    ("2025-03-11", "25:00", "Оплата", "time"),
+    ("2025-03-11", "10:00", "Оплата <b>", "title"),
+])
+def test_add_reminder_validation(service, user, date, time, title, field):
+    with pytest.raises(ValidationError) as error:
+        service.add_reminder(user.id, title, date, time)
+    assert error.value.field == field
+
+
+def test_add_reminder_stores_due_timestamp(service, user):
+    reminder_id = service.add_reminder(user.id, "Оплата", "2025-03-10", "9:5")
+    reminder = service.get_reminder(user.id, reminder_id)
+    assert (reminder.date, reminder.time) == ("2025-03-10", "09:05")
+    assert reminder.due_at == to_epoch(datetime(2025, 3, 10, 9, 5))
+    assert reminder.status == REMINDER_ACTIVE
+
+
+def test_active_and_upcoming_reminders(service, user):
+    soon = service.add_reminder(user.id, "Скоро", "2025-03-10", "12:20")
+    later = service.add_reminder(user.id, "Позже", "2025-03-10", "13:00")
+    tomorrow = service.add_reminder(user.id, "Завтра", "2025-03-11", "09:00")
+
+    assert [r.id for r in service.active_reminders(user.id)] == [soon, later, tomorrow]
+    assert [r.id for r in service.upcoming_reminders(user.id, timedelta(minutes=30))] == [soon]
+    assert [r.id for r in service.active_reminders(user.id, due_to=datetime(2025, 3, 10, 23, 59))] == [soon, later]
+
+
+def test_expire_reminders(service, user):
+    first = service.add_reminder(user.id, "Оплата", "2025-03-10", "12:20")
+    second = service.add_reminder(user.id, "Звонок", "2025-03-11", "09:00")
+    other = service.register("Maria", "password123")
+    foreign = service.add_reminder(other.id, "Чужое", "2025-03-10", "12:20")
+
+    assert service.expire_reminders(user.id, datetime(2025, 3, 10, 12, 30)) == 1
+    reminder = service.get_reminder(user.id, first)
+    assert reminder.status == REMINDER_EXPIRED
+    assert (reminder.date, reminder.time) == ("2025-03-10", "12:20")
+    assert service.get_reminder(user.id, second).status == REMINDER_ACTIVE
+    assert service.get_reminder(other.id, foreign).status == REMINDER_ACTIVE
+    assert service.expire_reminders(user.id, datetime(2025, 3, 10, 12, 30)) == 0
+
+    service.delete_reminder(user.id, first)
+    with pytest.raises(NotFoundError):
+        service.delete_reminder(user.id, first)
+    with pytest.raises(NotFoundError):
+        service.get_reminder(user.id, first)
@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+import pytest
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Бюджет на импорт pfa_main (кумулятивное время по -X importtime), секунды.
+IMPORT_BUDGET = 0.5
+
+# Бюджет от запуска интерпретатора до отрисованного окна входа, секунды.
+LOGIN_WINDOW_BUDGET = 2.0
+
+# Тяжелые модули, которые должны загружаться только при работе с диаграммами.
+HEAVY_MODULES = ("matplotlib", "pandas", "numpy", "pfa_charts")
+
+
+def run_python(*args, cwd=APP_DIR):
+    return subprocess.run(
+        [sys.executable, *args], cwd=cwd, capture_output=True, text=True, timeout=60,
+    )
+
+
+def import_times(module):
+    """
+    Возвращает кумулятивное время импорта (в секундах) каждого модуля по `-X importtime`.
+    """
+    result = run_python("-X", "importtime", "-c", f"import {module}")
+    assert result.returncode == 0, result.stderr
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_import_within_budget():
+    times = import_times("pfa_main")
+    assert times["pfa_main"] < IMPORT_BUDGET
+
+
+def test_import_skips_heavy_modules():
+    times = import_times("pfa_main")
+    assert not [name for name in times if name.split(".")[0] in HEAVY_MODULES]
+
+
+def test_import_has_no_side_effects(tmp_path):
+    code = f"import sys; sys.path.insert(0, {APP_DIR!r}); import pfa_main"
+    before = os.stat(os.path.join(APP_DIR, "users.db")).st_mtime_ns
+    result = run_python("-c", code, cwd=tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert os.stat(os.path.join(APP_DIR, "users.db")).st_mtime_ns == before
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.skipif(sys.platform.startswith("linux") and not os.environ.get("DISPLAY"),
+                    reason="нет дисплея для окна Tk")
+def test_login_window_within_budget(tmp_path):
+    code = (
+        "import time; start = time.perf_counter()\n"
+        "import pfa_main, pfa_db\n"
+        f"pfa_db.set_db(pfa_db.Database({str(tmp_path / 'users.db')!r}))\n"
+        "pfa_main.create_db()\n"
+        "window = pfa_main.create_login_window()\n"
+        "window.update()\n"
+        "print(time.perf_counter() - start)\n"
+        "window.destroy()\n"
+    )
+    result = run_python("-c", code)
+    assert result.returncode == 0, result.stderr
+    assert float(result.stdout.strip().splitlines()[-1]) < LOGIN_WINDOW_BUDGET
@@ -0,0 +1,83 @@
+"""
+Точечное обновление `ttk.Treeview` по строкам базы данных.
+
+Вместо удаления и повторной вставки всех элементов `TreeviewReconciler`
+сравнивает новые строки с последним отображенным состоянием и выполняет
+только необходимые вставки, изменения, перемещения и удаления. ID элемента
+Treeview совпадает с ID строки в базе данных, поэтому прокрутка и выделение
+сохраняются между обновлениями.
+"""
+
+
+class TreeviewReconciler:
+    """
+    Приводит содержимое Treeview к заданному списку строк минимальным числом вызовов Tk.
+
+    Атрибуты:
+        tree (ttk.Treeview): Обновляемый виджет.
+        last_calls (int): Число вызовов Tk при последнем обновлении.
+        calls (int): Общее число вызовов Tk за время жизни объекта.
+    """
+    def __init__(self, tree):
+        """
+        Args:
+            tree (ttk.Treeview): Обновляемый виджет.
+        """
+        self.tree = tree
+        self.last_calls = 0
+        self.calls = 0
+        self._rendered = {}
+        self._order = []
+
+    def reconcile(self, items):
+        """
+        Обновляет Treeview по новому списку строк.
+
+        Args:
+            items (iterable): Кортежи (id, values, tags) в порядке отображения.
+
+        Returns:
+            int: Число выполненных вызовов Tk.
+        """
+        desired = []
+        state = {}
+        for iid, values, tags in items:
+            iid = str(iid)
+            desired.append(iid)
+            state[iid] = (tuple(values), tuple(tags))
+
+        calls = 0
+        removed = [iid for iid in self._order if iid not in state]
+        if removed:
+            self.tree.delete(*removed)
+            calls += 1
+        order = [iid for iid in self._order if iid in state]
+
+        for index, iid in enumerate(desired):
+            values, tags = state[iid]
+            previous = self._rendered.get(iid)
+            if previous is None:
+                self.tree.insert("", index, iid=iid, values=values, tags=tags)
+                order.insert(index, iid)
+                calls += 1
+                continue
+            if index >= len(order) or order[index] != iid:
+                self.tree.move(iid, "", index)
+                order.remove(iid)
+                order.insert(index, iid)
+                calls += 1
+            if previous != (values, tags):
+                self.tree.item(iid, values=values, tags=tags)
+                calls += 1
+
+        self._rendered = state
+        self._order = desired
+        self.last_calls = calls
+        self.calls += calls
+        return calls
+
+    def clear(self):
+        """
+        Удаляет все элементы, добавленные через этот объект.
+        """
+        self.reconcile(())
@@ -0,0 +1,84 @@
+import random
+from pfa_treeview import TreeviewReconciler
+
+
+class FakeTree:
+    """
+    Минимальная замена ttk.Treeview, записывающая вызовы Tk.
+    """
+    def __init__(self):
+        self.order = []
+        self.items = {}
+        self.log = []
+
+    def insert(self, parent, index, iid, values, tags):
+        self.log.append("insert")
+        self.order.insert(len(self.order) if index == "end" else index, iid)
+        self.items[iid] = (values, tags)
+
+    def delete(self, *iids):
+        self.log.append("delete")
+        for iid in iids:
+            self.order.remove(iid)
+            del self.items[iid]
+
+    def move(self, iid, parent, index):
+        self.log.append("move")
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+
+    def item(self, iid, values, tags):
+        self.log.append("item")
+        self.items[iid] = (values, tags)
+
+
+def rows(*pairs):
+    return [(row_id, (title, amount), ()) for row_id, title, amount in pairs]
+
+
+def assert_matches(tree, items):
+    assert tree.order == [str(row_id) for row_id, _, _ in items]
+    assert all(tree.items[str(row_id)] == (values, tags) for row_id, values, tags in items)
+
+
+def test_initial_fill_inserts_each_row():
+    tree = FakeTree()
+    reconciler = TreeviewReconciler(tree)
+    items = rows((1, "a", 10), (2, "b", 20))
+    assert reconciler.reconcile(items) == 2
+    assert_matches(tree, items)
+
+
+def test_unchanged_refresh_makes_no_calls():
+    tree = FakeTree()
+    reconciler = TreeviewReconciler(tree)
+    items = rows(*((i, "a", i) for i in range(1000)))
+    reconciler.reconcile(items)
+    tree.log.clear()
+    assert reconciler.reconcile(items) == 0
+    assert tree.log == []
+
+
+def test_single_change_costs_one_call_each():
+    tree = FakeTree()
+    reconciler = TreeviewReconciler(tree)
+    reconciler.reconcile(rows((1, "a", 10), (2, "b", 20), (3, "c", 30)))
+
+    assert reconciler.reconcile(rows((1, "a", 10), (2, "b", 20), (3, "c", 30), (4, "d", 40))) == 1
+    assert reconciler.reconcile(rows((1, "a", 10), (2, "b", 25), (3, "c", 30), (4, "d", 40))) == 1
+    items = rows((1, "a", 10), (3, "c", 30), (4, "d", 40))
+    assert reconciler.reconcile(items) == 1
+    assert tree.log[-3:] == ["insert", "item", "delete"]
+    assert_matches(tree, items)
+
+
+def test_random_sequences_converge():
+    rnd = random.Random(7)
+    tree = FakeTree()
+    reconciler = TreeviewReconciler(tree)
+    for _ in range(200):
+        ids = rnd.sample(range(50), rnd.randint(0, 30))
+        items = rows(*((i, "t", rnd.randint(0, 3)) for i in ids))
+        reconciler.reconcile(items)
+        assert_matches(tree, items)
+    assert reconciler.calls == len(tree.log)
@@ -0,0 +1,172 @@
+"""
+Фоновый поток для работы с базой данных.
+
+Обработчики Tk не обращаются к базе данных напрямую: запросы отправляются в
+`DatabaseWorker`, который выполняет их в единственном фоновом потоке (со своим
+соединением `Database`), поэтому медленный диск или заблокированная база не
+останавливают цикл событий. Задачи выполняются строго по очереди, так что
+чтение, отправленное после записи, видит ее результат.
+
+Результаты возвращаются в поток Tk через `after`: пока есть незавершенные
+задачи, воркер раз в `POLL_INTERVAL` мс забирает готовые результаты и вызывает
+обработчики в потоке Tk. Без задач таймер не планируется.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import queue
+
+# Интервал проверки готовых результатов, мс.
+POLL_INTERVAL = 15
+
+# Приписка к названию вкладки, пока для нее выполняются запросы.
+LOADING_SUFFIX = " (загрузка…)"
+
+
+def run_now(func, on_done, on_error=None):
+    """
+    Выполняет задачу сразу в текущем потоке.
+
+    Синхронная замена `DatabaseWorker.submit` для кода, которому можно
+    передать способ запуска задач (например, в тестах и консольных утилитах).
+
+    Args:
+        func (callable): Задача.
+        on_done (callable): Получает результат задачи.
+        on_error (callable): Вызывается с исключением перед тем, как оно будет проброшено.
+    """
+    try:
+        result = func()
+    except Exception as e:
+        if on_error is not None:
+            on_error(e)
+        raise
+    on_done(result)
+
+
+class DatabaseWorker:
+    """
+    Очередь запросов к базе данных, выполняемых в одном фоновом потоке.
+
+    Атрибуты:
+        pending (int): Число задач, результаты которых еще не переданы в поток Tk.
+    """
+    def __init__(self, after, on_error=None, poll_interval=POLL_INTERVAL):
+        """
+        Args:
+            after (callable): Планирует вызов в потоке Tk: `after(задержка в мс, функция)`.
+            on_error (callable): Обработчик ошибок задач, для которых не задан свой.
+            poll_interval (int): Интервал проверки готовых результатов, мс.
+        """
+        self.after = after
+        self.on_error = on_error
+        self.poll_interval = poll_interval
+        self.pending = 0
+        self._done = queue.SimpleQueue()
+        self._timer = None
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-worker")
+
+    def submit(self, func, *args, on_done=None, on_error=None):
+        """
+        Ставит задачу в очередь фонового потока.
+
+        Args:
+            func (callable): Задача; вызывается в фоновом потоке как `func(*args)`.
+            on_done (callable): Получает результат в потоке Tk.
+            on_error (callable): Получает исключение в потоке Tk.
+
+        Returns:
+            concurrent.futures.Future: Результат задачи.
+
+        Raises:
+            RuntimeError: Если воркер уже остановлен.
+        """
+        if self._closed:
+            raise RuntimeError("Фоновый поток базы данных остановлен")
+        future = self._executor.submit(func, *args)
+        self.pending += 1
+        future.add_done_callback(lambda f: self._done.put((f, on_done, on_error)))
+        self._schedule()
+        return future
+
+    def close(self):
+        """
+        Дожидается уже отправленных задач и останавливает фоновый поток.
+        """
+        self._closed = True
+        self._executor.shutdown(wait=True)
+
+    def _schedule(self):
+        if self._timer is None and self.pending and not self._closed:
+            self._timer = self.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        self._timer = None
+        try:
+            while True:
+                try:
+                    future, on_done, on_error = self._done.get_nowait()
+                except queue.Empty:
+                    break
+                self.pending -= 1
+                self._deliver(future, on_done, on_error)
+        finally:
+            self._schedule()
+
+    def _deliver(self, future, on_done, on_error):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            if on_done is not None:
+                on_done(future.result())
+            return
+        handler = on_error if on_error is not None else self.on_error
+        if handler is None:
+            raise error
+        handler(error)
+
+
+class LoadingTabs:
+    """
+    Отмечает вкладки `ttk.Notebook`, для которых выполняются запросы.
+
+    Пока для вкладки есть незавершенные задачи, к ее названию добавляется
+    `LOADING_SUFFIX`.
+    """
+    def __init__(self, notebook, suffix=LOADING_SUFFIX):
+        """
+        Args:
+            notebook (ttk.Notebook): Вкладки приложения.
+            suffix (str): Приписка к названию загружающейся вкладки.
+        """
+        self.notebook = notebook
+        self.suffix = suffix
+        self._counts = {}
+        self._titles = {}
+
+    def is_loading(self, page):
+        """
+        Returns:
+            bool: Есть ли незавершенные задачи для вкладки.
+        """
+        return self._counts.get(str(page), 0) > 0
+
+    def begin(self, page):
+        """
+        Отмечает начало задачи для вкладки `page`.
+        """
+        key = str(page)
+        self._counts[key] = self._counts.get(key, 0) + 1
+        if self._counts[key] == 1:
+            self._titles[key] = self.notebook.tab(page, "text")
+            self.notebook.tab(page, text=self._titles[key] + self.suffix)
+
+    def end(self, page):
+        """
+        Отмечает завершение задачи для вкладки `page`.
+        """
+        key = str(page)
+        self._counts[key] -= 1
+        if self._counts[key] == 0:
+            del self._counts[key]
+            self.notebook.tab(page, text=self._titles.pop(key))
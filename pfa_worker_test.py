@@ -0,0 +1,222 @@
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+import pytest
+from pfa_db import Database
+from pfa_money import Money
+from pfa_schema import migrate
+from pfa_service import AuthenticationError, FinanceService, ValidationError
+from pfa_worker import DatabaseWorker, LoadingTabs, run_now
+
+# Искусственная задержка каждого SQL-запроса в фоновом потоке, секунды.
+QUERY_LATENCY = 0.05
+
+# Период "сердцебиения" цикла событий и допустимая пауза между ударами, секунды.
+HEARTBEAT = 0.01
+MAX_STALL = 0.1
+
+
+class EventLoop:
+    """
+    Однопоточный цикл событий с `after` в реальном времени, как у Tk.
+    """
+    def __init__(self):
+        self.timers = []
+        self.cancelled = set()
+        self.ids = itertools.count()
+
+    def after(self, delay, callback, *args):
+        timer_id = next(self.ids)
+        heapq.heappush(self.timers, (time.monotonic() + delay / 1000, timer_id, callback, args))
+        return timer_id
+
+    def after_cancel(self, timer_id):
+        self.cancelled.add(timer_id)
+
+    def run_until(self, predicate, timeout=10):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            assert time.monotonic() < deadline, "цикл событий не дождался результата"
+            if not self.timers or self.timers[0][0] > time.monotonic():
+                time.sleep(0.001)
+                continue
+            _, timer_id, callback, args = heapq.heappop(self.timers)
+            if timer_id not in self.cancelled:
+                callback(*args)
+
+
+class SlowDatabase(Database):
+    """
+    База данных, в которой каждый запрос выполняется с задержкой.
+
+    Атрибуты:
+        threads (list): Имена потоков, в которых выполнялись запросы.
+    """
+    def __init__(self, path, latency):
+        super().__init__(path)
+        self.latency = latency
+        self.threads = []
+
+    def _connect(self):
+        conn = super()._connect()
+        conn.set_trace_callback(self._delay)
+        return conn
+
+    def _delay(self, sql):
+        self.threads.append(threading.current_thread().name)
+        time.sleep(self.latency)
+
+
+class FakeNotebook:
+    def __init__(self, **titles):
+        self.titles = titles
+
+    def tab(self, page, option=None, text=None):
+        if option == "text":
+            return self.titles[page]
+        self.titles[page] = text
+
+
+@pytest.fixture
+def loop():
+    return EventLoop()
+
+
+@pytest.fixture
+def worker(loop):
+    worker = DatabaseWorker(loop.after)
+    yield worker
+    worker.close()
+
+
+@pytest.fixture
+def slow_db(tmp_path):
+    path = str(tmp_path / "users.db")
+    setup = Database(path)
+    migrate(setup)
+    setup.close()
+    db = SlowDatabase(path, QUERY_LATENCY)
+    yield db
+    db.close()
+
+
+def test_event_loop_keeps_running_during_slow_queries(loop, worker, slow_db):
+    service = FinanceService(slow_db)
+    user = service.register("Pavel", "password123")
+    slow_db.threads.clear()
+    results = []
+    beats = [time.monotonic()]
+
+    def heartbeat():
+        beats.append(time.monotonic())
+        loop.after(HEARTBEAT * 1000, heartbeat)
+
+    loop.after(HEARTBEAT * 1000, heartbeat)
+    for amount in (100, 200, 300):
+        worker.submit(service.add_transaction, user.id, "Зарплата", amount, "Доход")
+    worker.submit(service.balance, user.id, on_done=results.append)
+    worker.submit(service.list_goals, user.id, on_done=results.append)
+    start = time.monotonic()
+    loop.run_until(lambda: len(results) == 2)
+
+    assert time.monotonic() - start >= 10 * QUERY_LATENCY
+    assert max(b - a for a, b in zip(beats, beats[1:])) < MAX_STALL
+    assert results[0].income == Money.parse(600)
+    assert slow_db.threads and all(name.startswith("db-worker") for name in slow_db.threads)
+
+
+def test_results_are_delivered_in_order_on_loop_thread(loop, worker, db):
+    service = FinanceService(db)
+    user = service.register("Pavel", "password123")
+    delivered = []
+
+    def record(result):
+        delivered.append((threading.current_thread() is threading.main_thread(), result))
+
+    worker.submit(service.add_transaction, user.id, "Продукты", 50, "Расход", on_done=lambda r: record("saved"))
+    worker.submit(lambda: service.balance(user.id).expense, on_done=record)
+    loop.run_until(lambda: len(delivered) == 2)
+
+    assert delivered == [(True, "saved"), (True, Money.parse(50))]
+
+
+def test_errors_are_passed_to_handlers(loop, db):
+    reported = []
+    worker = DatabaseWorker(loop.after, on_error=reported.append)
+    service = FinanceService(db)
+    handled = []
+    try:
+        worker.submit(service.add_transaction, 1, "Продукты", "abc", "Расход", on_error=handled.append)
+        worker.submit(service.login, "nobody", "password123")
+        loop.run_until(lambda: handled and reported)
+    finally:
+        worker.close()
+
+    assert isinstance(handled[0], ValidationError) and handled[0].field == "amount"
+    assert isinstance(reported[0], AuthenticationError)
+
+
+def test_worker_stops_polling_when_idle(loop, worker):
+    done = []
+    worker.submit(time.sleep, 0.02, on_done=done.append)
+    loop.run_until(lambda: done)
+    assert worker.pending == 0
+    assert loop.timers == []
+    worker.close()
+    with pytest.raises(RuntimeError):
+        worker.submit(time.sleep, 0)
+
+
+def test_loading_tabs_mark_pages_until_all_tasks_finish():
+    notebook = FakeNotebook(goals="Цели")
+    tabs = LoadingTabs(notebook)
+    tabs.begin("goals")
+    tabs.begin("goals")
+    assert notebook.titles["goals"] == "Цели (загрузка…)"
+    tabs.end("goals")
+    assert tabs.is_loading("goals")
+    tabs.end("goals")
+    assert notebook.titles["goals"] == "Цели"
+    assert not tabs.is_loading("goals")
+
+
+def test_run_now_calls_error_handler_and_reraises():
+    errors = []
+    with pytest.raises(ZeroDivisionError):
+        run_now(lambda: 1 / 0, on_done=None, on_error=errors.append)
+    assert len(errors) == 1
+
+
+@pytest.mark.skipif(sys.platform.startswith("linux") and not os.environ.get("DISPLAY"),
+                    reason="нет дисплея для окна Tk")
+def test_tk_event_loop_keeps_running_during_slow_queries(slow_db):
+    import tkinter as tk
+    root = tk.Tk()
+    worker = DatabaseWorker(root.after)
+    service = FinanceService(slow_db)
+    user_id = service.register("Pavel", "password123").id
+    beats = [time.monotonic()]
+    results = []
+
+    def heartbeat():
+        beats.append(time.monotonic())
+        root.after(int(HEARTBEAT * 1000), heartbeat)
+
+    try:
+        root.after(int(HEARTBEAT * 1000), heartbeat)
+        for amount in (100, 200, 300):
+            worker.submit(service.add_transaction, user_id, "Зарплата", amount, "Доход")
+        worker.submit(service.balance, user_id, on_done=results.append)
+        deadline = time.monotonic() + 10
+        while not results and time.monotonic() < deadline:
+            root.update()
+            time.sleep(0.001)
+    finally:
+        worker.close()
+        root.destroy()
+
+    assert results and results[0].income == Money.parse(600)
+    assert max(b - a for a, b in zip(beats, beats[1:])) < MAX_STALL